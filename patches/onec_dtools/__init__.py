@@ -2,6 +2,7 @@
 Патчи для библиотеки onec_dtools
 """
 
+from .mmap_patch import MmapFile, apply_mmap_patch, open_mmap_database
 from .simple_patch import apply_simple_patch
 
-__all__ = ["apply_simple_patch"]
+__all__ = ["MmapFile", "apply_mmap_patch", "apply_simple_patch", "open_mmap_database"]
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+"""
+MMAP ПАТЧ ДЛЯ БИБЛИОТЕКИ ONEC_DTOOLS
+Чтение 1CD файла через mmap: страницы и блоки BLOB отдаются срезами memoryview
+без seek+read и без промежуточных копий, данные берутся из page cache ОС
+
+Версия: 1.0
+"""
+
+import mmap
+import os
+from struct import unpack_from
+from typing import Any
+
+BLOB_CHUNK_SIZE = 256
+
+
+class MmapFile:
+    """
+    JTBD:
+    Как источник данных DatabaseReader, я хочу отображать 1CD файл в память
+    и отдавать memoryview срезы вместо read(), чтобы случайный доступ к строкам
+    и BLOB большого файла шел через page cache ОС без системных вызовов и копий.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.name = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._mmap)
+        self.size = len(self._mmap)
+        self.closed = False
+        self._pos = 0
+        # Таблицы размещения объектов БД: object_offset -> (длина, страницы данных)
+        self.objects: dict[int, tuple[int, list[int]]] = {}
+
+    def read(self, size: int = -1) -> memoryview:
+        """Срез memoryview от текущей позиции (без копирования)"""
+        stop = self.size if size < 0 else min(self._pos + size, self.size)
+        chunk = self.view[self._pos : stop]
+        self._pos = stop
+        return chunk
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            pos += self._pos
+        elif whence == os.SEEK_END:
+            pos += self.size
+        self._pos = pos
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.objects.clear()
+        self.view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Строки еще держат срезы - отображение освободит сборщик мусора
+            pass
+        self._file.close()
+
+    def __reduce__(self) -> tuple[Any, tuple[str]]:
+        # В рабочий процесс передается путь, процесс отображает файл заново
+        return (MmapFile, (self.name,))
+
+    def __enter__(self) -> "MmapFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def apply_mmap_patch() -> bool:
+    """
+    Применяет mmap патч к библиотеке onec_dtools
+
+    Изменяется только поведение для файлов MmapFile, обычные файлы
+    читаются оригинальным кодом библиотеки.
+    """
+    try:
+        import onec_dtools.database_reader as dr
+
+        if getattr(dr.DBObject, "_mmap_patched", False):
+            return True
+
+        original_init = dr.DBObject.__init__
+        original_read = dr.DBObject.read
+        original_convert = dr.Row._convert
+        original_blob_iter = dr.Blob.__iter__
+
+        def db_object_init(
+            self: Any,
+            db_file: Any,
+            version: str,
+            page_size: int,
+            object_offset: int,
+        ) -> None:
+            """Таблица размещения объекта читается один раз на файл"""
+            if not isinstance(db_file, MmapFile):
+                original_init(self, db_file, version, page_size, object_offset)
+                return
+
+            cached = db_file.objects.get(object_offset)
+            if cached is None:
+                original_init(self, db_file, version, page_size, object_offset)
+                db_file.objects[object_offset] = (
+                    self._length,
+                    self._data_pages_offsets,
+                )
+                return
+
+            self._db_file = db_file
+            self._version = version
+            self._page_size = page_size
+            self._length, self._data_pages_offsets = cached
+            self._current_data_page = 0
+            self._pos_on_page = 0
+
+        def db_object_read(self: Any, size: int = -1) -> Any:
+            """
+            Чтение в пределах одной страницы возвращает срез memoryview,
+            через границу страниц - один bytes без промежуточного списка read()
+            """
+            # Полное чтение объекта (описания таблиц) остается bytes
+            if not isinstance(self._db_file, MmapFile) or size < 0:
+                return original_read(self, size)
+
+            page_size = self._page_size
+            total_bytes_left = (
+                self._length - self._current_data_page * page_size - self._pos_on_page
+            )
+            bytes_left = min(size, total_bytes_left)
+            if bytes_left <= 0:
+                return b""
+
+            view = self._db_file.view
+            chunks = []
+            while bytes_left:
+                start = (
+                    page_size * self._data_pages_offsets[self._current_data_page]
+                    + self._pos_on_page
+                )
+                max_read = min(page_size - self._pos_on_page, bytes_left)
+                chunks.append(view[start : start + max_read])
+                if max_read + self._pos_on_page == page_size:
+                    self._current_data_page += 1
+                    self._pos_on_page = 0
+                else:
+                    self._pos_on_page += max_read
+                bytes_left -= max_read
+
+            return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+        def row_convert(self: Any, value: Any, field: Any) -> Any:
+            """Копируется только декодируемое поле, а не вся строка"""
+            if isinstance(value, memoryview):
+                value = value.tobytes()
+            return original_convert(self, value, field)
+
+        def blob_iter(self: Any) -> Any:
+            """Блоки BLOB отдаются срезами без распаковки в bytes"""
+            if not isinstance(self._db_object._db_file, MmapFile):
+                yield from original_blob_iter(self)
+                return
+
+            if self._size == 0:
+                yield b""
+                return
+
+            self._db_object.seek(BLOB_CHUNK_SIZE * self._blob_chunk_offset)
+            while True:
+                buffer = self._db_object.read(BLOB_CHUNK_SIZE)
+                next_block, size = unpack_from("Ih", buffer)
+                yield buffer[6 : 6 + size]
+
+                if next_block == 0:
+                    break
+
+                self._db_object.seek(BLOB_CHUNK_SIZE * next_block)
+
+        dr.DBObject.__init__ = db_object_init
+        dr.DBObject.read = db_object_read
+        dr.Row._convert = row_convert
+        dr.Blob.__iter__ = blob_iter
+        dr.DBObject._mmap_patched = True
+
+        print("✅ Mmap патч успешно применен к библиотеке onec_dtools")
+        return True
+
+    except Exception as e:
+        print(f"❌ Ошибка применения mmap патча: {e}")
+        return False
+
+
+def open_mmap_database(db_path: str) -> tuple[MmapFile, Any]:
+    """
+    Открывает 1CD файл через mmap
+
+    Returns:
+        (MmapFile, DatabaseReader) - файл нужно закрыть после работы
+    """
+    from onec_dtools.database_reader import DatabaseReader
+
+    apply_mmap_patch()
+    db_file = MmapFile(db_path)
+    try:
+        return db_file, DatabaseReader(db_file)
+    except Exception:
+        db_file.close()
+        raise
+
+
+if __name__ == "__main__":
+    print("🔧 Применение mmap патча для библиотеки onec_dtools...")
+    apply_mmap_patch()
@@ -7,13 +7,49 @@
 import json
 import os
 import sys
+from collections.abc import Iterable
 from typing import Any
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
 
 # Добавляем путь к src
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.onec_serialized import (  # noqa: E402
+    business_projection,
+    parse_blob,
+    project,
+)
+from src.utils.partitioned_dataset import (  # noqa: E402
+    PartitionedParquetSink,
+    create_dataset_view,
+)
+from src.utils.rollups import RollupStore, has_rollup  # noqa: E402
+
+# Схема строки документа для Parquet
+DOCUMENT_SCHEMA_TYPES = {
+    "id": "string",
+    "table_name": "string",
+    "row_index": "int64",
+    "document_number": "string",
+    "document_date": "string",
+    "total_amount": "float64",
+    "quantity": "float64",
+    "unit_measure": "float64",
+    "posted": "bool",
+    "marked": "bool",
+    "document_type": "string",
+    "store_name": "string",
+    "nomenclature": "string",
+    "blob_amount": "float64",
+    "blob_content": "string",
+    "total_blobs": "int64",
+    "successful_blobs": "int64",
+    "failed_blobs": "int64",
+}
 
 
 def load_json_data(json_file: str) -> dict[str, Any]:
@@ -34,121 +70,123 @@ def load_json_data(json_file: str) -> dict[str, Any]:
         return {}
 
 
-def convert_documents_to_dataframe(documents: list[dict[str, Any]]) -> pd.DataFrame:
-    """Конвертирует документы в DataFrame"""
-    print("🔄 Конвертация документов в DataFrame...")
-
-    rows = []
-    for doc in documents:
-        # Основные поля
-        row = {
-            "id": doc.get("id", ""),
-            "table_name": doc.get("table_name", ""),
-            "row_index": doc.get("row_index", 0),
-        }
-
-        # ИСПРАВЛЕНО: Создаем бизнес-поля из технических полей
-        if "fields" in doc:
-            fields = doc["fields"]
-
-            # Извлекаем бизнес-поля из технических полей
-            row["document_number"] = fields.get("_NUMBER", "N/A")
-
-            # ИСПРАВЛЕНО: Ищем дату в разных полях
-            date_value = "N/A"
-            for field_name, field_value in fields.items():
-                if isinstance(field_value, str) and len(field_value) > 10:
-                    # Проверяем, содержит ли поле дату
-                    if any(char.isdigit() for char in field_value) and any(
-                        char in field_value for char in [".", "-", "/"]
-                    ):
-                        date_value = field_value
-                        break
-            row["document_date"] = date_value
-
-            row["total_amount"] = fields.get("_FLD4239", 0)
-            row["quantity"] = fields.get("_FLD4238", 0)
-            row["unit_measure"] = fields.get("_FLD4240", 1)
-            row["posted"] = fields.get("_POSTED", False)
-            row["marked"] = fields.get("_MARKED", False)
-
-            # Определяем тип документа по table_name
-            table_name = doc.get("table_name", "")
-            if "JOURNAL" in table_name:
-                row["document_type"] = "ЖУРНАЛ"
-            elif "DOCUMENT138" in table_name:
-                row["document_type"] = "ПЕРЕМЕЩЕНИЕ"
-            elif "DOCUMENT156" in table_name:
-                row["document_type"] = "РЕАЛИЗАЦИЯ"
-            elif "DOCUMENT184" in table_name:
-                row["document_type"] = "СЧЕТ-ФАКТУРА"
-            else:
-                row["document_type"] = "ДОКУМЕНТ"
-
-            # ИСПРАВЛЕНО: Извлекаем магазин из BLOB полей
-            row["store_name"] = "N/A"
-            if "blobs" in doc:
-                for blob_name, blob_data in doc["blobs"].items():
-                    if isinstance(blob_data, dict):
-                        # Ищем содержимое в value.content
-                        if "value" in blob_data and isinstance(
-                            blob_data["value"],
-                            dict,
-                        ):
-                            content = blob_data["value"].get("content", "")
-                        elif "content" in blob_data:
-                            content = blob_data["content"]
-                        else:
-                            continue
-
-                        if isinstance(content, str) and content.strip():
-                            # Ищем магазины в содержимом
-                            if "ПЦ022" in content:
-                                row["store_name"] = "ПЦ022 (Чеховский)"
-                            elif "ПЦ036" in content:
-                                row["store_name"] = "ПЦ036 (Южный)"
-                            elif "Братиславский" in content:
-                                row["store_name"] = "Братиславский"
-                            elif "Южный" in content:
-                                row["store_name"] = "Южный"
-                            elif "Чеховский" in content:
-                                row["store_name"] = "Чеховский"
-                            break
-
-        # BLOB поля для поиска
-        if "blobs" in doc:
-            blob_content = ""
-            for blob_name, blob_data in doc["blobs"].items():
-                if isinstance(blob_data, dict):
-                    # ИСПРАВЛЕНО: Правильное извлечение BLOB содержимого
-                    if "value" in blob_data and isinstance(blob_data["value"], dict):
-                        value_data = blob_data["value"]
-                        if "content" in value_data and isinstance(
-                            value_data["content"],
-                            str,
-                        ):
-                            content = value_data["content"]
-                            if content and content.strip():
-                                blob_content += content + " "
-                    elif "content" in blob_data and isinstance(
-                        blob_data["content"],
+def document_business_values(doc: dict[str, Any]) -> dict[str, Any]:
+    """
+    Магазин, номенклатура и сумма документа из типизированной проекции:
+    blob_structure, сохраненной при извлечении, или разобранного
+    содержимого BLOB полей
+    """
+    if doc.get("blob_structure"):
+        return business_projection(doc["blob_structure"])
+    for blob_data in doc.get("blobs", {}).values():
+        if not isinstance(blob_data, dict):
+            continue
+        value = blob_data.get("value")
+        content = (
+            value.get("content")
+            if isinstance(value, dict)
+            else blob_data.get("content")
+        )
+        structure = parse_blob(content) if isinstance(content, str) else None
+        if structure is not None:
+            return business_projection(project(structure))
+    return business_projection({})
+
+
+def document_to_row(doc: dict[str, Any]) -> dict[str, Any]:
+    """Конвертирует документ в плоскую строку"""
+    # Основные поля
+    row = {
+        "id": doc.get("id", ""),
+        "table_name": doc.get("table_name", ""),
+        "row_index": doc.get("row_index", 0),
+    }
+
+    # ИСПРАВЛЕНО: Создаем бизнес-поля из технических полей
+    if "fields" in doc:
+        fields = doc["fields"]
+
+        # Извлекаем бизнес-поля из технических полей
+        row["document_number"] = fields.get("_NUMBER", "N/A")
+
+        # ИСПРАВЛЕНО: Ищем дату в разных полях
+        date_value = "N/A"
+        for field_name, field_value in fields.items():
+            if isinstance(field_value, str) and len(field_value) > 10:
+                # Проверяем, содержит ли поле дату
+                if any(char.isdigit() for char in field_value) and any(
+                    char in field_value for char in [".", "-", "/"]
+                ):
+                    date_value = field_value
+                    break
+        row["document_date"] = date_value
+
+        row["total_amount"] = fields.get("_FLD4239", 0)
+        row["quantity"] = fields.get("_FLD4238", 0)
+        row["unit_measure"] = fields.get("_FLD4240", 1)
+        row["posted"] = fields.get("_POSTED", False)
+        row["marked"] = fields.get("_MARKED", False)
+
+        # Определяем тип документа по table_name
+        table_name = doc.get("table_name", "")
+        if "JOURNAL" in table_name:
+            row["document_type"] = "ЖУРНАЛ"
+        elif "DOCUMENT138" in table_name:
+            row["document_type"] = "ПЕРЕМЕЩЕНИЕ"
+        elif "DOCUMENT156" in table_name:
+            row["document_type"] = "РЕАЛИЗАЦИЯ"
+        elif "DOCUMENT184" in table_name:
+            row["document_type"] = "СЧЕТ-ФАКТУРА"
+        else:
+            row["document_type"] = "ДОКУМЕНТ"
+
+        # Магазин, номенклатура и сумма - из разобранной структуры BLOB
+        business = document_business_values(doc)
+        row["store_name"] = business["store_name"] or "N/A"
+        row["nomenclature"] = "; ".join(business["nomenclature"])
+        row["blob_amount"] = business["amount"]
+
+    # BLOB поля для поиска
+    if "blobs" in doc:
+        blob_content = ""
+        for blob_name, blob_data in doc["blobs"].items():
+            if isinstance(blob_data, dict):
+                # ИСПРАВЛЕНО: Правильное извлечение BLOB содержимого
+                if "value" in blob_data and isinstance(blob_data["value"], dict):
+                    value_data = blob_data["value"]
+                    if "content" in value_data and isinstance(
+                        value_data["content"],
                         str,
                     ):
-                        content = blob_data["content"]
+                        content = value_data["content"]
                         if content and content.strip():
                             blob_content += content + " "
-            row["blob_content"] = blob_content.strip()
-        else:
-            row["blob_content"] = ""
+                elif "content" in blob_data and isinstance(
+                    blob_data["content"],
+                    str,
+                ):
+                    content = blob_data["content"]
+                    if content and content.strip():
+                        blob_content += content + " "
+        row["blob_content"] = blob_content.strip()
+    else:
+        row["blob_content"] = ""
+
+    # Статистика извлечения
+    if "extraction_stats" in doc:
+        stats = doc["extraction_stats"]
+        row["total_blobs"] = stats.get("total_blobs", 0)
+        row["successful_blobs"] = stats.get("successful", 0)
+        row["failed_blobs"] = stats.get("failed", 0)
+
+    return row
 
-        # Статистика извлечения
-        if "extraction_stats" in doc:
-            stats = doc["extraction_stats"]
-            row["total_blobs"] = stats.get("total_blobs", 0)
-            row["successful_blobs"] = stats.get("successful", 0)
-            row["failed_blobs"] = stats.get("failed", 0)
 
-        rows.append(row)
+def convert_documents_to_dataframe(documents: list[dict[str, Any]]) -> pd.DataFrame:
+    """Конвертирует документы в DataFrame"""
+    print("🔄 Конвертация документов в DataFrame...")
+
+    rows = [document_to_row(doc) for doc in documents]
 
     df = pd.DataFrame(rows)
     print(f"✅ Создан DataFrame с {len(df)} строками и {len(df.columns)} столбцами")
@@ -174,42 +212,58 @@ def save_to_parquet(df: pd.DataFrame, output_file: str) -> None:
         print(f"❌ Ошибка сохранения Parquet: {e}")
 
 
-def create_duckdb_database(parquet_file: str, db_file: str) -> None:
-    """Создает DuckDB базу данных из Parquet файла"""
-    print(f"🗄️ Создание DuckDB базы: {db_file}...")
+def save_documents_to_parquet(
+    documents: Iterable[dict[str, Any]],
+    output_dir: str,
+) -> int:
+    """
+    Потоково сохраняет документы в Hive датасет Parquet
+    (table_name=.../document_type=.../year_month=.../part-N.parquet):
+    строки собираются в RecordBatch, группы строк сортируются по дате
+    и пишутся со статистикой min/max
+    """
+    print(f"💾 Сохранение в Parquet: {output_dir}...")
 
     try:
-        # Подключаемся к DuckDB
-        conn = duckdb.connect(db_file)
+        schema = pa.schema(
+            [
+                pa.field(name, pa.type_for_alias(type_name))
+                for name, type_name in DOCUMENT_SCHEMA_TYPES.items()
+            ],
+        )
+        with PartitionedParquetSink(output_dir, schema=schema) as sink:
+            sink.write_rows(document_to_row(doc) for doc in documents)
 
-        # Создаем таблицу из Parquet файла
-        conn.execute(
-            f"""
-            CREATE TABLE documents AS
-            SELECT * FROM read_parquet('{parquet_file}')
-        """,
+        dataset_size = sum(os.path.getsize(path) for path in sink.files)
+        print(
+            f"✅ Parquet датасет сохранен: {sink.rows_written:,} строк, "
+            f"{len(sink.files)} файлов, {dataset_size / 1024 / 1024:.2f} MB",
         )
+        return sink.rows_written
 
-        # Создаем индексы для быстрого поиска
-        print("🔍 Создание индексов...")
+    except Exception as e:
+        print(f"❌ Ошибка сохранения Parquet: {e}")
+        return 0
 
-        # Индекс по table_name
-        conn.execute("CREATE INDEX idx_table_name ON documents(table_name)")
 
-        # Индекс по row_index
-        conn.execute("CREATE INDEX idx_row_index ON documents(row_index)")
+def create_duckdb_database(parquet_dir: str, db_file: str) -> None:
+    """
+    Создает DuckDB базу с view documents поверх Parquet датасета:
+    вместо индексов фильтры отсекают партиции и группы строк по статистике.
+    Сводные таблицы документов пересчитываются по измененным месяцам
+    """
+    print(f"🗄️ Создание DuckDB базы: {db_file}...")
 
-        # Индекс по BLOB полям (если есть)
-        blob_columns = [
-            col
-            for col in conn.execute("DESCRIBE documents").fetchall()
-            if col[0].startswith("blob_")
-        ]
-        for col_name, _, _, _, _, _ in blob_columns:
-            try:
-                conn.execute(f"CREATE INDEX idx_{col_name} ON documents({col_name})")
-            except:
-                pass  # Игнорируем ошибки создания индексов для BLOB полей
+    try:
+        # Подключаемся к DuckDB
+        conn = duckdb.connect(db_file)
+
+        if not create_dataset_view(conn, "documents", parquet_dir):
+            print(f"❌ Parquet датасет не найден: {parquet_dir}")
+        else:
+            refreshed = RollupStore(conn).refresh({"documents": parquet_dir})
+            for rollup_name, months in refreshed.items():
+                print(f"🧮 {rollup_name}: пересчитано месяцев {months}")
 
         # Закрываем соединение
         conn.close()
@@ -229,23 +283,48 @@ def create_analysis_queries(db_file: str) -> None:
     try:
         conn = duckdb.connect(db_file)
 
-        # Анализ по таблицам
+        # Анализ по таблицам (из сводной таблицы, если она есть)
         print("\n📋 Анализ по таблицам:")
-        result = conn.execute(
-            """
-            SELECT
-                table_name,
-                COUNT(*) as total_records,
-                COUNT(DISTINCT id) as unique_documents
-            FROM documents
-            GROUP BY table_name
-            ORDER BY total_records DESC
-            LIMIT 10
-        """,
-        ).fetchall()
-
-        for row in result:
-            print(f"  {row[0]}: {row[1]:,} записей, {row[2]:,} документов")
+        if has_rollup(conn, "documents_by_type_month"):
+            result = conn.execute(
+                """
+                SELECT table_name, SUM(documents) as total_records
+                FROM documents_by_type_month
+                GROUP BY table_name
+                ORDER BY total_records DESC
+                LIMIT 10
+            """,
+            ).fetchall()
+            for row in result:
+                print(f"  {row[0]}: {row[1]:,} записей")
+        else:
+            result = conn.execute(
+                """
+                SELECT
+                    table_name,
+                    COUNT(*) as total_records,
+                    COUNT(DISTINCT id) as unique_documents
+                FROM documents
+                GROUP BY table_name
+                ORDER BY total_records DESC
+                LIMIT 10
+            """,
+            ).fetchall()
+            for row in result:
+                print(f"  {row[0]}: {row[1]:,} записей, {row[2]:,} документов")
+
+        # Документы по типу и месяцу
+        if has_rollup(conn, "documents_by_type_month"):
+            print("\n📅 Документы по типу и месяцу:")
+            for document_type, month, count in conn.execute(
+                """
+                SELECT document_type, year_month, SUM(documents)
+                FROM documents_by_type_month
+                GROUP BY document_type, year_month
+                ORDER BY year_month, document_type
+            """,
+            ).fetchall():
+                print(f"  {month or 'без даты'} {document_type}: {count:,}")
 
         # Анализ BLOB полей
         print("\n📝 Анализ BLOB полей:")
@@ -329,7 +408,7 @@ def main():
 
     # Пути к файлам
     json_file = "all_available_data.json"
-    parquet_file = "data/results/heroes_1c_data.parquet"
+    parquet_dir = "data/results/heroes_1c_data"
     db_file = "data/results/heroes_1c_data.duckdb"
 
     # Загружаем данные
@@ -344,20 +423,17 @@ def main():
         print("❌ Нет документов для конвертации")
         return
 
-    # Создаем DataFrame
-    df = convert_documents_to_dataframe(documents)
-
-    # Сохраняем в Parquet
-    save_to_parquet(df, parquet_file)
+    # Сохраняем в Parquet потоково, без промежуточного DataFrame
+    save_documents_to_parquet(documents, parquet_dir)
 
     # Создаем DuckDB базу
-    create_duckdb_database(parquet_file, db_file)
+    create_duckdb_database(parquet_dir, db_file)
 
     # Создаем SQL запросы для анализа
     create_analysis_queries(db_file)
 
     print("\n✅ Конвертация завершена!")
-    print(f"📁 Parquet файл: {parquet_file}")
+    print(f"📁 Parquet датасет: {parquet_dir}")
     print(f"🗄️ DuckDB база: {db_file}")
     print("\n🔍 Для анализа используйте:")
     print(
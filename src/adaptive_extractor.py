@@ -4,22 +4,52 @@
 Адаптивный извлекатель для разных типов таблиц 1С
 """
 
+import argparse
+import bisect
 import logging
 import os
+import signal
 import sys
 import time
-from datetime import datetime
+from collections import deque
 
 sys.path.insert(
     0,
     os.path.join(os.path.dirname(__file__), "..", "tools", "onec_dtools"),
 )
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 import json
 from typing import Any
 
 from onec_dtools.database_reader import DatabaseReader
 
+from src.utils.batch_blob_decoder import DecodedBlob, decode_blob
+from src.utils.blob_cache import shared_blob_cache
+from src.utils.blob_inflater import BlobInflater, inflate_or_decode, is_compressed
+from src.utils.extraction_checkpoint import (
+    DEFAULT_CHECKPOINT_DIR,
+    CheckpointManifest,
+    ExtractionCheckpoint,
+)
+from src.utils.extraction_planner import DEFAULT_PLAN_FILE, ExtractionPlan, plan_for
+from src.utils.incremental_state import (
+    DEFAULT_STATE_FILE,
+    IncrementalState,
+    TableDelta,
+)
+from src.utils.row_decoder import CompiledRowDecoder
+from src.utils.stage_profiler import (
+    DEFAULT_REPORT_FILE,
+    PROFILE_MODES,
+    STAGE_DECODE,
+    STAGE_FETCH,
+    STAGE_SINK,
+    configure_profiler,
+    get_profiler,
+    profiled,
+)
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -30,10 +60,24 @@ logger = logging.getLogger(__name__)
 
 # Импорты для Parquet и DuckDB
 try:
-    import duckdb
-    import pandas as pd
-    import pyarrow as pa  # noqa: F401
-    import pyarrow.parquet as pq  # noqa: F401
+    import duckdb  # noqa: F401
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    from src.utils.arrow_parquet_sink import (
+        ArrowParquetSink,
+        arrow_type_for_field,
+        rows_to_record_batch,
+    )
+    from src.utils.duckdb_sink import DuckDBSink, infer_row_schema
+    from src.utils.partitioned_dataset import (
+        PartitionedParquetSink,
+        create_dataset_view,
+        has_dataset_files,
+        partition_value,
+        read_dataset,
+    )
 
     PARQUET_DUCKDB_AVAILABLE = True
 except ImportError:
@@ -42,13 +86,56 @@ except ImportError:
         "⚠️ Parquet/DuckDB не установлены. Установите: pip install pandas pyarrow duckdb",
     )
 
+# Интервал checkpoint (строк таблицы)
+CHECKPOINT_INTERVAL = 10000
+
+DEFAULT_DUCKDB_FILE = "complete_1c_database.duckdb"
+
 
 class AdaptiveExtractor:
     """Адаптивный извлекатель для разных типов таблиц"""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+        project_columns: bool = False,
+        references: Any = None,
+        plan: ExtractionPlan | None = None,
+        plan_file: str | None = DEFAULT_PLAN_FILE,
+        dataset_dir: str | None = None,
+        blob_workers: int | None = None,
+    ) -> None:
         self.business_fields = {"_NUMBER", "_DATE_TIME", "_POSTED", "_MARKED"}
 
+        # ReferenceResolver: колонки ссылок (*RREF) сохраняются вместе с кодом
+        # и наименованием элемента справочника
+        self.references = references
+
+        # План извлечения: критические таблицы и размер партиций
+        # (manifest plan_file или план по каталогу открытой базы)
+        self.plan = plan
+        self.plan_file = plan_file
+
+        # Проекция: декодировать только бизнес-поля и поля из field_mapping
+        self.project_columns = project_columns
+
+        # Hive датасет (table_name/document_type/year_month) вместо файла
+        # на таблицу; DuckDB получает view поверх датасета, а не копию строк
+        self.dataset_dir = dataset_dir
+
+        # Содержимое BLOB читается по требованию через общий LRU кэш
+        self.blob_cache = shared_blob_cache()
+
+        # Сжатые BLOB распаковываются в пуле потоков (blob_workers, по умолчанию
+        # по числу ядер), пока основной поток читает следующие строки
+        self.blob_inflater = BlobInflater(blob_workers)
+        self._pending_blobs: deque[tuple[Any, ...]] = deque()
+
+        # Возобновляемое извлечение: manifest с watermark по каждой таблице
+        self.checkpoint = ExtractionCheckpoint(checkpoint_dir)
+        self._checkpoint_progress: dict[str, dict[str, Any]] = {}
+        self.interrupted = False
+
         # Статистика извлечения
         self.extraction_stats = {
             "total_records_processed": 0,
@@ -59,6 +146,17 @@ class AdaptiveExtractor:
             "last_checkpoint": 0,
         }
 
+        # Схемы Arrow по метаданным таблиц и открытые Parquet writer'ы
+        self.table_schemas: dict[str, Any] = {}
+        self._parquet_sinks: dict[str, Any] = {}
+        self._parquet_written: dict[str, int] = {}
+
+        # Открытая на все извлечение база DuckDB: записи дописываются
+        # пакетами Arrow, таблица пересоздается один раз за извлечение
+        self.duckdb_file = DEFAULT_DUCKDB_FILE
+        self._duckdb_sink: Any = None
+        self._duckdb_written: dict[str, int] = {}
+
         # Маппинг полей для разных типов таблиц
         self.field_mapping = {
             "_DOCUMENTJOURNAL5354": {
@@ -128,6 +226,76 @@ class AdaptiveExtractor:
 
         return analysis
 
+    def table_columns(self, table_name: str) -> list[str] | None:
+        """
+        Колонки проекции таблицы: бизнес-поля и поля сумм, количеств и BLOB
+        из field_mapping (None - декодировать все колонки)
+        """
+        mapping = self.field_mapping.get(table_name)
+        if not self.project_columns or mapping is None:
+            return None
+        columns = set(self.business_fields)
+        for fields in mapping.values():
+            columns.update(fields)
+        return sorted(columns)
+
+    def ref_columns(self, table: Any) -> list[str]:
+        """Колонки ссылок таблицы, которые разрешаются по справочникам"""
+        if self.references is None:
+            return []
+        from src.utils.reference_resolver import ref_columns
+
+        return ref_columns(table)
+
+    def enrich_batch(self, batch: Any) -> Any:
+        """Добавляет к пакету код и наименование по колонкам ссылок"""
+        if self.references is None:
+            return batch
+        return self.references.enrich_batch(batch)
+
+    def build_record_schema(
+        self,
+        table: Any,
+        columns: list[str] | None = None,
+    ) -> Any:
+        """
+        Строит схему Arrow для записей извлечения по описанию полей 1CD таблицы
+        (бизнес-поля, суммы/количества для числовых полей, метаданные BLOB)
+        """
+        schema_columns = [
+            ("id", pa.string()),
+            ("table_name", pa.string()),
+            ("row_index", pa.int64()),
+        ]
+        ref_names = set(self.ref_columns(table))
+        for name, description in table.fields.items():
+            if columns is not None and name not in columns:
+                continue
+            if name in self.business_fields or name in ref_names:
+                schema_columns.append(
+                    (
+                        f"field_{name}",
+                        arrow_type_for_field(
+                            description.type,
+                            description.length,
+                            description.precision,
+                        ),
+                    ),
+                )
+            if description.type in ("N", "L"):
+                schema_columns.append((f"field_amount_{name}", pa.float64()))
+                schema_columns.append((f"field_quantity_{name}", pa.float64()))
+            if description.type in ("NT", "I"):
+                schema_columns.append((f"blob_{name}_size", pa.int64()))
+                schema_columns.append((f"blob_{name}_type", pa.string()))
+                schema_columns.append((f"blob_{name}_content", pa.string()))
+        schema_columns += [
+            ("total_blobs", pa.int64()),
+            ("successful_blobs", pa.int64()),
+            ("failed_blobs", pa.int64()),
+        ]
+        return pa.schema(schema_columns)
+
     def log_progress(
         self,
         table_name: str,
@@ -154,6 +322,9 @@ class AdaptiveExtractor:
             f"Осталось: {estimated_remaining / 60:.1f} мин | "
             f"Ошибки: {error_count}",
         )
+        profiler = get_profiler()
+        if profiler.enabled:
+            logger.info(f"⏱️ {table_name}: {profiler.progress_line(table_name)}")
 
         # Обновляем статистику
         self.extraction_stats["total_records_processed"] = current_record
@@ -173,24 +344,98 @@ class AdaptiveExtractor:
 
         logger.error(f"❌ {table_name}[{record_index}]: {error_type} - {error_message}")
 
-    def save_checkpoint(self, table_name: str, records: list[dict[str, Any]]) -> None:
-        """Сохраняет checkpoint для восстановления"""
-        checkpoint_file = f"checkpoint_{table_name}_{len(records)}.json"
+    def install_signal_handler(self) -> None:
+        """SIGINT останавливает извлечение после фиксации checkpoint"""
+
+        def handler(sig: int, frame: Any) -> None:
+            logger.warning("🛑 Получен сигнал прерывания, сохраняем checkpoint...")
+            self.interrupted = True
+
+        signal.signal(signal.SIGINT, handler)
+
+    def start_checkpoint(
+        self,
+        table_name: str,
+        start_record: int,
+        resume: bool = True,
+        stop_record: int | None = None,
+    ) -> tuple[int, list[dict[str, Any]]]:
+        """
+        Загружает manifest таблицы и возвращает строку, с которой продолжать,
+        и уже зафиксированные записи
+
+        stop_record ограничивает возобновление текущим диапазоном: записи
+        строк за его границей (manifest запуска с большим лимитом) не
+        загружаются, а строка продолжения не выходит за stop_record.
+        """
+        manifest = self.checkpoint.load(table_name)
+        records: list[dict[str, Any]] = []
+
+        if resume and not manifest.completed and manifest.watermark > start_record:
+            watermark = manifest.watermark
+            if stop_record is not None:
+                watermark = min(watermark, stop_record)
+            # row_index записи - номер строки с 1 (строка i → i + 1)
+            records = [
+                record
+                for record in self.checkpoint.iter_records(manifest)
+                if start_record < record["row_index"] <= watermark
+            ]
+            logger.info(
+                f"♻️ {table_name}: возобновление с строки {watermark:,} "
+                f"({len(records):,} записей из checkpoint)",
+            )
+            start_record = watermark
+        elif manifest.shards or manifest.completed:
+            manifest = self.checkpoint.reset(table_name)
+
+        self._checkpoint_progress[table_name] = {
+            "manifest": manifest,
+            "records": len(records),
+            "row": max(start_record, manifest.watermark),
+        }
+        return start_record, records
+
+    def save_checkpoint(
+        self,
+        table_name: str,
+        records: list[dict[str, Any]],
+        next_row: int | None = None,
+    ) -> None:
+        """
+        Сохраняет checkpoint для восстановления
+
+        В шард пишутся только записи после предыдущего checkpoint,
+        manifest фиксирует watermark next_row (все строки до него сохранены).
+        """
+        progress = self._checkpoint_progress.get(table_name)
+        if progress is None:
+            progress = {
+                "manifest": self.checkpoint.load(table_name),
+                "records": 0,
+                "row": 0,
+            }
+            self._checkpoint_progress[table_name] = progress
+
+        if next_row is None:
+            next_row = records[-1]["row_index"] if records else progress["row"]
+        if next_row <= progress["row"]:
+            return
+
         try:
-            with open(checkpoint_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "table_name": table_name,
-                        "records": records,
-                        "timestamp": datetime.now().isoformat(),
-                        "stats": self.extraction_stats,
-                    },
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    default=str,
-                )
-            logger.info(f"💾 Checkpoint сохранен: {checkpoint_file}")
+            manifest: CheckpointManifest = self.checkpoint.commit(
+                progress["manifest"],
+                records[progress["records"] :],
+                progress["row"],
+                next_row,
+            )
+            progress["records"] = len(records)
+            progress["row"] = next_row
+            self.extraction_stats["last_checkpoint"] = next_row
+            logger.info(
+                f"💾 Checkpoint {table_name}: watermark {manifest.watermark:,}, "
+                f"{len(manifest.shards)} шардов",
+            )
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения checkpoint: {e!s}")
 
@@ -207,33 +452,18 @@ class AdaptiveExtractor:
             # Безопасное извлечение через value атрибут
             if hasattr(blob_obj, "value"):
                 try:
-                    blob_value = blob_obj.value
+                    blob_value = self.blob_cache.read(blob_obj)
                     if isinstance(blob_value, bytes):
-                        # Пробуем разные кодировки
-                        for encoding in ["utf-8", "cp1251", "latin1"]:
-                            try:
-                                content = blob_value.decode(encoding)
-                                blob_data["value"] = {
-                                    "content": content,
-                                    "type": f"str_{encoding}",
-                                    "length": len(content),
-                                }
-                                blob_data["extraction_methods"].append(
-                                    f"value_{encoding}",
-                                )
-                                blob_data["size"] = len(blob_value)
-                                break
-                            except UnicodeDecodeError:
-                                continue
-                        else:
-                            # Если все кодировки не сработали, используем hex
-                            blob_data["value"] = {
-                                "content": blob_value.hex(),
-                                "type": "hex",
-                                "length": len(blob_value),
-                            }
-                            blob_data["extraction_methods"].append("value_hex")
-                            blob_data["size"] = len(blob_value)
+                        # Сжатые значения распаковываются, кодировка и тип
+                        # содержимого - по частотам байтов и сигнатурам
+                        self.fill_blob_value(
+                            blob_data,
+                            blob_value,
+                            inflate_or_decode(
+                                blob_value,
+                                self.blob_inflater.max_output,
+                            ),
+                        )
                     else:
                         # Если value не bytes, конвертируем в строку
                         blob_data["value"] = {
@@ -281,46 +511,188 @@ class AdaptiveExtractor:
 
         return blob_data
 
+    @staticmethod
+    def fill_blob_value(
+        blob_data: dict[str, Any],
+        blob_value: bytes,
+        decoded: DecodedBlob,
+    ) -> None:
+        """Содержимое BLOB из декодированного значения (двоичное - hex)"""
+        if decoded.text is not None:
+            blob_data["value"] = {
+                "content": decoded.text,
+                "type": f"str_{decoded.encoding}",
+                "length": len(decoded.text),
+            }
+            blob_data["extraction_methods"].append(f"value_{decoded.encoding}")
+        else:
+            # Двоичные данные (файлы, несжимаемые данные) - hex
+            blob_data["value"] = {
+                "content": blob_value.hex(),
+                "type": "hex",
+                "length": len(blob_value),
+            }
+            blob_data["extraction_methods"].append("value_hex")
+        blob_data["value"]["content_type"] = decoded.content_type
+        blob_data["size"] = len(blob_value)
+
+    @staticmethod
+    def count_blob(record: dict[str, Any], blob_data: dict[str, Any]) -> None:
+        stats = record["extraction_stats"]
+        stats["total_blobs"] += 1
+        if blob_data.get("extraction_methods"):
+            stats["successful"] += 1
+        else:
+            stats["failed"] += 1
+
+    def defer_blob(self, record: dict[str, Any], key: str, blob_obj: Any) -> bool:
+        """
+        Сжатый BLOB уходит в пул распаковки, запись дополняется при
+        resolve_blobs. False - BLOB не сжат или пул в один поток:
+        значение обрабатывается extract_blob_content сразу
+        """
+        if self.blob_inflater.workers <= 1 or not hasattr(blob_obj, "value"):
+            return False
+        try:
+            blob_value = self.blob_cache.read(blob_obj)
+        except Exception:
+            return False
+        if not isinstance(blob_value, bytes) or not is_compressed(blob_value):
+            return False
+
+        # Место поля в записи сохраняется до распаковки
+        record["blobs"][key] = None
+        future = self.blob_inflater.submit(blob_value)
+        self._pending_blobs.append((record, key, blob_obj, blob_value, future))
+        self.resolve_blobs(keep=self.blob_inflater.max_pending)
+        return True
+
+    def resolve_blobs(self, keep: int = 0) -> None:
+        """Дописывает в записи распакованные BLOB, пока в пуле больше keep"""
+        while len(self._pending_blobs) > keep:
+            record, key, blob_obj, blob_value, future = self._pending_blobs.popleft()
+            blob_data: dict[str, Any] = {
+                "field_type": str(type(blob_obj)),
+                "size": 0,
+                "extraction_methods": [],
+                "value": {"content": "", "type": "unknown", "length": 0},
+            }
+            try:
+                decoded = future.result()
+            except Exception as e:
+                logger.debug(f"⚠️ Распаковка BLOB {key}: {e!s}")
+                decoded = None
+            # Не распаковалось (поврежденный поток) - декодируется как текст,
+            # как в inflate_or_decode последовательного извлечения
+            if decoded is None:
+                decoded = decode_blob(blob_value, deflate=False)
+            self.fill_blob_value(blob_data, blob_value, decoded)
+            record["blobs"][key] = blob_data
+            self.count_blob(record, blob_data)
+
     def extract_table_data(
         self,
         table_name: str,
         table: Any,
         max_records: int | None = None,
+        start_record: int = 0,
+        checkpoints: bool = True,
+        resume: bool = True,
     ) -> list[dict[str, Any]]:
-        """Извлекает данные из таблицы с адаптивной логикой"""
+        """
+        Извлекает данные из таблицы с адаптивной логикой
+
+        start_record и max_records задают диапазон строк, что позволяет
+        параллельным процессам извлекать таблицу по партициям.
+        checkpoints=False отключает промежуточные сохранения (шарды пишет координатор).
+        resume=True продолжает незавершенное извлечение с watermark из manifest.
+        """
         print(f"   🔄 Извлечение {table_name}...")
         print(f"      📊 Всего записей: {len(table):,}")
 
-        records = []
+        records: list[dict[str, Any]] = []
         successful_records = 0
 
-        # Определяем лимит записей
+        # Определяем диапазон записей
+        start_record = min(max(start_record, 0), len(table))
         if max_records is None:
-            max_records = len(table)
+            max_records = len(table) - start_record
         else:
-            max_records = min(max_records, len(table))
+            max_records = min(max_records, len(table) - start_record)
+        stop_record = start_record + max_records
+        range_start = start_record
+
+        # Возобновление с watermark
+        if checkpoints:
+            start_record, records = self.start_checkpoint(
+                table_name,
+                start_record,
+                resume,
+                stop_record,
+            )
+
+        # Схема Parquet из метаданных таблицы (с учетом проекции колонок)
+        columns = self.table_columns(table_name)
+        ref_names = self.ref_columns(table)
+        if columns is not None and ref_names:
+            columns = sorted(set(columns) | set(ref_names))
+        self._parquet_written.pop(table_name, None)
+        self._duckdb_written.pop(table_name, None)
+        if PARQUET_DUCKDB_AVAILABLE and hasattr(table, "fields"):
+            self.table_schemas[table_name] = self.build_record_schema(table, columns)
 
         print(f"      🎯 Извлекаем {max_records:,} записей...")
-        logger.info(f"🚀 Начинаем извлечение {table_name}: {max_records:,} записей")
+        logger.info(
+            f"🚀 Начинаем извлечение {table_name}: {max_records:,} записей "
+            f"(строки {start_record:,}-{stop_record:,})",
+        )
+
+        # Декодер строк компилируется один раз по описанию полей таблицы,
+        # колонки вне проекции не декодируются и BLOB для них не создаются
+        decoder = CompiledRowDecoder.from_table(table, self.business_fields, columns)
+        names = decoder.names
+        ref_indexes = [index for index, name in enumerate(names) if name in ref_names]
 
         error_count = 0
+        next_row = start_record
+        profiler = get_profiler()
+        profiler.set_table(table_name)
+
+        for i in range(start_record, stop_record):
+            # Checkpoint каждые CHECKPOINT_INTERVAL строк: фиксируем строки до i
+            if checkpoints and i > start_record and i % CHECKPOINT_INTERVAL == 0:
+                self.resolve_blobs()
+                self.save_checkpoint(table_name, records, next_row=i)
+                # Промежуточное сохранение в Parquet/DuckDB (только новые записи)
+                if PARQUET_DUCKDB_AVAILABLE and records:
+                    self.save_to_parquet({table_name: records}, final=False)
+                    self.save_to_duckdb({table_name: records}, final=False)
+
+            if self.interrupted:
+                logger.warning(f"🛑 {table_name}: остановка на строке {i:,}")
+                break
+            next_row = i + 1
 
-        for i in range(max_records):
             try:
-                row = table[i]
+                with profiler.stage(STAGE_FETCH):
+                    row = table[i]
 
                 # Пропускаем пустые записи
                 if hasattr(row, "is_empty") and row.is_empty:
                     continue
 
-                # Извлекаем данные
-                row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-                if not row_dict:
+                # Извлекаем данные (BLOB поля остаются объектами Blob)
+                with profiler.stage(STAGE_DECODE):
+                    values = decoder.decode(row)
+                if not values:
                     continue
 
                 # Анализируем структуру (только для первых записей)
                 if i < 3:
-                    analysis = self.analyze_table_structure(table_name, row_dict)
+                    analysis = self.analyze_table_structure(
+                        table_name,
+                        dict(zip(names, values)),
+                    )
                     logger.info(
                         f"🔍 Анализ записи {i}: {analysis['total_fields']} полей, "
                         f"{len(analysis['amount_fields'])} сумм, "
@@ -343,31 +715,37 @@ class AdaptiveExtractor:
                 }
 
                 # Извлекаем бизнес-поля
-                for key, value in row_dict.items():
-                    if key in self.business_fields:
-                        record["fields"][key] = value
-
-                # Извлекаем поля с суммами
-                for key, value in row_dict.items():
-                    if isinstance(value, (int, float)) and value > 100:
-                        record["fields"][f"amount_{key}"] = value
-
-                # Извлекаем поля с количествами
-                for key, value in row_dict.items():
-                    if isinstance(value, (int, float)) and value <= 100:
-                        record["fields"][f"quantity_{key}"] = value
+                fields = record["fields"]
+                for index in decoder.business_indexes:
+                    fields[names[index]] = values[index]
+                # Ссылки разрешаются пакетно при записи в Parquet/DuckDB
+                for index in ref_indexes:
+                    fields[names[index]] = values[index]
+
+                # Числовые поля (N, L): суммы > 100, количества <= 100
+                numeric = [
+                    (names[index], values[index])
+                    for index in decoder.numeric_indexes
+                    if values[index] is not None
+                ]
+                for key, value in numeric:
+                    if value > 100:
+                        fields[f"amount_{key}"] = value
+                for key, value in numeric:
+                    if value <= 100:
+                        fields[f"quantity_{key}"] = value
 
                 # Извлекаем BLOB поля с детальным логированием
-                for key, value in row_dict.items():
-                    if hasattr(value, "__class__") and "Blob" in str(type(value)):
+                for index in decoder.blob_indexes:
+                    key, value = names[index], values[index]
+                    if value is not None:
                         try:
+                            # Сжатые BLOB распаковываются в пуле потоков
+                            if self.defer_blob(record, key, value):
+                                continue
                             blob_data = self.extract_blob_content(value)
                             record["blobs"][key] = blob_data
-                            record["extraction_stats"]["total_blobs"] += 1
-                            if blob_data.get("extraction_methods"):
-                                record["extraction_stats"]["successful"] += 1
-                            else:
-                                record["extraction_stats"]["failed"] += 1
+                            self.count_blob(record, blob_data)
                         except StopIteration:
                             # StopIteration - это нормальное завершение итератора
                             blob_data = {
@@ -408,16 +786,9 @@ class AdaptiveExtractor:
                 self.extraction_stats["successful_records"] += 1
 
                 # Мониторинг прогресса каждые 1000 записей
-                if i > 0 and i % 1000 == 0:
-                    self.log_progress(table_name, i, max_records, error_count)
-
-                # Сохраняем checkpoint каждые 10000 записей
-                if i > 0 and i % 10000 == 0:
-                    self.save_checkpoint(table_name, records)
-                    # Добавляем промежуточное сохранение в Parquet/DuckDB
-                    if PARQUET_DUCKDB_AVAILABLE and records:
-                        self.save_to_parquet({table_name: records})
-                        self.save_to_duckdb({table_name: records})
+                processed = i - range_start
+                if processed > 0 and processed % 1000 == 0:
+                    self.log_progress(table_name, processed, max_records, error_count)
 
             except Exception as e:
                 error_count += 1
@@ -425,6 +796,21 @@ class AdaptiveExtractor:
                 self.extraction_stats["failed_records"] += 1
                 continue
 
+        # BLOB, которые еще распаковываются, дописываются до сохранения
+        self.resolve_blobs()
+
+        # Фиксируем остаток; при полном проходе таблица отмечается завершенной
+        if checkpoints:
+            self.save_checkpoint(table_name, records, next_row=next_row)
+            if not self.interrupted:
+                self.checkpoint.complete(
+                    self._checkpoint_progress[table_name]["manifest"],
+                )
+
+        # Дописываем остаток в Parquet, открытый на checkpoint
+        if table_name in self._parquet_sinks:
+            self.save_to_parquet({table_name: records})
+
         # Финальная статистика
         elapsed_time = time.time() - self.extraction_stats["start_time"]
         logger.info(
@@ -437,22 +823,26 @@ class AdaptiveExtractor:
         print(f"      ✅ Извлечено {successful_records:,} записей из {table_name}")
         return records
 
+    def extraction_plan(self, db: DatabaseReader) -> ExtractionPlan:
+        """План извлечения базы (manifest планировщика или план по каталогу)"""
+        if self.plan is None:
+            self.plan = plan_for(db, self.plan_file)
+        return self.plan
+
+    def critical_tables(self, db: DatabaseReader) -> list[str]:
+        """Самые дорогие таблицы документов и журналов по плану"""
+        return self.extraction_plan(db).critical_tables()
+
     def extract_critical_tables(
         self,
         db: DatabaseReader,
     ) -> dict[str, list[dict[str, Any]]]:
         """Извлекает критические таблицы"""
-        critical_tables = [
-            "_DOCUMENTJOURNAL5354",  # 4,458,509 записей
-            "_DOCUMENTJOURNAL5287",  # 2,798,531 записей
-            "_DOCUMENTJOURNAL5321",  # 973,975 записей
-            "_DOCUMENT138",  # 861,178 записей
-            "_DOCUMENT156",  # 571,213 записей
-        ]
-
         results = {}
 
-        for table_name in critical_tables:
+        for table_name in self.critical_tables(db):
+            if self.interrupted:
+                break
             if table_name in db.tables:
                 table = db.tables[table_name]
 
@@ -466,168 +856,697 @@ class AdaptiveExtractor:
 
         return results
 
-    def save_to_parquet(self, results: dict[str, list[dict[str, Any]]]) -> None:
-        """Сохраняет результаты в Parquet формат"""
+    def extract_table_partitioned(
+        self,
+        table_name: str,
+        db_path: str = "data/raw/1Cv8.1CD",
+        workers: int | None = None,
+        max_records: int | None = None,
+        output_dir: str = "data/results/shards",
+        use_mmap: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Извлекает таблицу параллельно: каждый процесс открывает свой
+        DatabaseReader, читает диапазон строк и пишет JSONL шард
+        """
+        from src.utils.parallel_extractor import (
+            DEFAULT_ROWS_PER_PARTITION,
+            ParallelTableExtractor,
+        )
+
+        # Партиции и их размер - из задачи плана извлечения
+        rows_per_partition = DEFAULT_ROWS_PER_PARTITION
+        partitions = None
+        if self.plan is not None:
+            rows_per_partition = self.plan.rows_per_partition(table_name)
+            partitions = self.plan.partitions_for(table_name)
+        parallel = ParallelTableExtractor(
+            db_path=db_path,
+            workers=workers,
+            output_dir=output_dir,
+            rows_per_partition=rows_per_partition,
+            use_mmap=use_mmap,
+        )
+        summary = parallel.extract_table(
+            table_name,
+            max_records=max_records,
+            should_stop=lambda: self.interrupted,
+            partitions=partitions,
+        )
+
+        for key, value in summary["stats"].items():
+            self.extraction_stats[key] += value
+        self.extraction_stats["total_records_processed"] += summary["total_rows"]
+
+        return summary
+
+    def extract_critical_tables_partitioned(
+        self,
+        db_path: str = "data/raw/1Cv8.1CD",
+        workers: int | None = None,
+        max_records: int | None = None,
+        output_dir: str = "data/results/shards",
+        use_mmap: bool = False,
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Извлекает критические таблицы целиком через пул процессов в порядке
+        задач плана, по партициям задач; отложенные бюджетом таблицы не идут
+        """
+        plan = self.plan
+        if plan is None:
+            from src.utils.parallel_extractor import open_db_file
+
+            with open_db_file(db_path, use_mmap) as db_file:
+                plan = self.extraction_plan(DatabaseReader(db_file))
+        if plan.deferred:
+            print(
+                f"   ⏭️ Отложено по бюджету плана: {len(plan.deferred)} таблиц "
+                f"({', '.join(plan.deferred[:3])}{'...' if len(plan.deferred) > 3 else ''})",
+            )
+
+        summaries = {}
+        for table_name in plan.critical_tables():
+            if self.interrupted:
+                break
+            try:
+                summaries[table_name] = self.extract_table_partitioned(
+                    table_name,
+                    db_path=db_path,
+                    workers=workers,
+                    max_records=max_records,
+                    output_dir=output_dir,
+                    use_mmap=use_mmap,
+                )
+            except KeyError:
+                print(f"   ❌ Таблица {table_name} не найдена")
+        return summaries
+
+    def extract_table_incremental(
+        self,
+        table_name: str,
+        table: Any,
+        state: IncrementalState,
+    ) -> list[dict[str, Any]]:
+        """
+        Извлекает только добавленные и измененные строки таблицы и обновляет
+        ими существующие Parquet/DuckDB. Отпечаток фиксируется после записи.
+        """
+        delta = state.plan(table_name, table)
+        if delta.full:
+            records = self.extract_table_data(table_name, table, checkpoints=False)
+            self.save_to_parquet({table_name: records})
+            self.upsert_to_duckdb(table_name, records, delta)
+        else:
+            records = []
+            for start_row, stop_row in delta.ranges:
+                if self.interrupted:
+                    break
+                records.extend(
+                    self.extract_table_data(
+                        table_name,
+                        table,
+                        max_records=stop_row - start_row,
+                        start_record=start_row,
+                        checkpoints=False,
+                    ),
+                )
+            if not delta.is_empty and not self.interrupted:
+                self.upsert_to_parquet(table_name, records, delta)
+                self.upsert_to_duckdb(table_name, records, delta)
+
+        if not self.interrupted:
+            state.commit(table_name)
+        return records
+
+    def extract_critical_tables_incremental(
+        self,
+        db: DatabaseReader,
+        state: IncrementalState,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Инкрементально обновляет критические таблицы"""
+        results = {}
+        for table_name in self.critical_tables(db):
+            if self.interrupted:
+                break
+            if table_name in db.tables:
+                results[table_name] = self.extract_table_incremental(
+                    table_name,
+                    db.tables[table_name],
+                    state,
+                )
+            else:
+                print(f"   ❌ Таблица {table_name} не найдена")
+        return results
+
+    @staticmethod
+    def _changed_mask(row_index: Any, ranges: list[tuple[int, int]]) -> Any:
+        """Маска строк пакета (row_index = номер строки + 1) в диапазонах delta"""
+        changed = pa.array([False] * len(row_index))
+        for start_row, stop_row in ranges:
+            changed = pc.or_(
+                changed,
+                pc.and_(
+                    pc.greater(row_index, start_row),
+                    pc.less_equal(row_index, stop_row),
+                ),
+            )
+        return changed
+
+    @staticmethod
+    def _conform_batch(batch: Any, schema: Any) -> Any:
+        """Пакет с колонками схемы строк: типы приводятся, недостающие - null"""
+        return pa.RecordBatch.from_arrays(
+            [
+                (
+                    batch.column(field.name).cast(field.type)
+                    if field.name in batch.schema.names
+                    else pa.nulls(batch.num_rows, field.type)
+                )
+                for field in schema
+            ],
+            schema=schema,
+        )
+
+    @staticmethod
+    def _merge_by_row_index(
+        batches: Any,
+        rows: list[dict[str, Any]],
+        schema: Any,
+    ) -> Any:
+        """
+        Сливает упорядоченные пакеты и строки по row_index: пакеты режутся
+        только в местах вставки строк, строки конвертируются группами
+        """
+        row_indexes = [row["row_index"] for row in rows]
+        pending = 0
+        for batch in batches:
+            if not batch.num_rows:
+                continue
+            batch_indexes = batch.column("row_index").to_pylist()
+            stop = bisect.bisect_left(row_indexes, batch_indexes[-1], lo=pending)
+            offset = 0
+            while pending < stop:
+                position = bisect.bisect_left(batch_indexes, row_indexes[pending])
+                group_stop = bisect.bisect_left(
+                    row_indexes,
+                    batch_indexes[position],
+                    lo=pending,
+                    hi=stop,
+                )
+                if position > offset:
+                    yield batch.slice(offset, position - offset)
+                    offset = position
+                yield rows_to_record_batch(rows[pending:group_stop], schema)
+                pending = group_stop
+            yield batch.slice(offset)
+        if pending < len(rows):
+            yield rows_to_record_batch(rows[pending:], schema)
+
+    @profiled(STAGE_SINK)
+    def upsert_to_parquet(
+        self,
+        table_name: str,
+        records: list[dict[str, Any]],
+        delta: TableDelta,
+    ) -> None:
+        """
+        Заменяет в Parquet строки измененных диапазонов новыми записями.
+        Файл перечитывается пакетами: строки вне диапазонов отбираются
+        маской Arrow и переносятся пакетами, новые записи вставляются
+        между ними по row_index
+        """
         if not PARQUET_DUCKDB_AVAILABLE:
             logger.error("❌ Parquet/DuckDB не доступны")
             return
 
-        try:
-            logger.info("💾 Сохранение в Parquet формат...")
+        if self.dataset_dir is not None:
+            self._upsert_to_dataset(self.dataset_dir, table_name, records, delta)
+            return
 
-            # Создаем DataFrame для каждой таблицы
-            parquet_files = {}
+        parquet_file = f"complete_1c_database_{table_name}.parquet"
+        if not os.path.exists(parquet_file):
+            self._parquet_written.pop(table_name, None)
+            self.save_to_parquet({table_name: records})
+            return
 
-            for table_name, records in results.items():
-                if not records:
-                    continue
+        try:
+            existing = pq.ParquetFile(parquet_file)
+            schema = self.table_schemas.get(table_name) or existing.schema_arrow
+
+            kept_batches = (
+                self._conform_batch(
+                    batch.filter(
+                        pc.invert(
+                            self._changed_mask(
+                                batch.column("row_index"),
+                                delta.ranges,
+                            ),
+                        ),
+                    ),
+                    schema,
+                )
+                for batch in existing.iter_batches()
+            )
+            new_rows = sorted(
+                (self._record_to_row(record) for record in records),
+                key=lambda row: row["row_index"],
+            )
+            tmp_file = f"{parquet_file}.tmp"
+            with ArrowParquetSink(
+                tmp_file,
+                schema=schema,
+                enrich=self.enrich_batch if self.references is not None else None,
+            ) as sink:
+                for batch in self._merge_by_row_index(kept_batches, new_rows, schema):
+                    sink.write_batch(batch)
+            os.replace(tmp_file, parquet_file)
+            logger.info(
+                f"✅ {table_name}: обновлено {len(records):,} записей → {parquet_file}",
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления Parquet: {e!s}")
 
-                # Преобразуем записи в DataFrame
-                df_data = []
-                for record in records:
-                    row_data = {
-                        "id": record.get("id"),
-                        "table_name": record.get("table_name"),
-                        "row_index": record.get("row_index"),
-                    }
+    def dataset_table_dir(self, table_name: str) -> str:
+        """Каталог партиции таблицы в Hive датасете"""
+        return os.path.join(
+            self.dataset_dir or "",
+            f"table_name={partition_value(table_name)}",
+        )
 
-                    # Добавляем поля
-                    for key, value in record.get("fields", {}).items():
-                        row_data[f"field_{key}"] = value
+    def _new_parquet_sink(self, table_name: str, root: str | None = None) -> Any:
+        """Sink таблицы: Parquet файл или партиции Hive датасета"""
+        enrich = self.enrich_batch if self.references is not None else None
+        schema = self.table_schemas.get(table_name)
+        if self.dataset_dir is None:
+            return ArrowParquetSink(
+                f"complete_1c_database_{table_name}.parquet",
+                schema=schema,
+                enrich=enrich,
+            )
+        return PartitionedParquetSink(
+            root or self.dataset_dir,
+            schema=schema,
+            table_name=table_name,
+            enrich=enrich,
+        )
 
-                    # Добавляем BLOB поля (только метаданные)
-                    for key, blob_data in record.get("blobs", {}).items():
-                        row_data[f"blob_{key}_size"] = blob_data.get("size", 0)
-                        row_data[f"blob_{key}_type"] = blob_data.get("value", {}).get(
-                            "type",
-                            "unknown",
-                        )
-                        # Добавляем содержимое BLOB для анализа
-                        blob_content = blob_data.get("value", {}).get("content", "")
-                        if blob_content and len(blob_content) > 3:  # Игнорируем "!!!"
-                            row_data[f"blob_{key}_content"] = blob_content[
-                                :100
-                            ]  # Первые 100 символов
-
-                    # Добавляем статистику извлечения
-                    stats = record.get("extraction_stats", {})
-                    row_data["total_blobs"] = stats.get("total_blobs", 0)
-                    row_data["successful_blobs"] = stats.get("successful", 0)
-                    row_data["failed_blobs"] = stats.get("failed", 0)
-
-                    df_data.append(row_data)
-
-                if df_data:
-                    df = pd.DataFrame(df_data)
-                    parquet_file = f"complete_1c_database_{table_name}.parquet"
-                    df.to_parquet(parquet_file, engine="pyarrow")
-                    parquet_files[table_name] = parquet_file
-                    logger.info(
-                        f"✅ {table_name}: {len(df):,} записей → {parquet_file}",
-                    )
+    def _upsert_to_dataset(
+        self,
+        dataset_dir: str,
+        table_name: str,
+        records: list[dict[str, Any]],
+        delta: TableDelta,
+    ) -> None:
+        """
+        Пересобирает партицию таблицы в датасете: строки вне диапазонов delta
+        переносятся пакетами Arrow, новые записи дописываются, затем каталог
+        таблицы заменяется целиком
+        """
+        import shutil
+
+        table_dir = self.dataset_table_dir(table_name)
+        if not has_dataset_files(table_dir):
+            self._parquet_written.pop(table_name, None)
+            self.save_to_parquet({table_name: records})
+            return
+
+        try:
+            existing = read_dataset(
+                dataset_dir,
+                filter=pc.field("table_name") == table_name,
+            )
+            kept = existing.filter(
+                pc.invert(
+                    self._changed_mask(existing.column("row_index"), delta.ranges),
+                ),
+            )
+
+            tmp_root = f"{dataset_dir}.tmp"
+            shutil.rmtree(tmp_root, ignore_errors=True)
+            with self._new_parquet_sink(table_name, root=tmp_root) as sink:
+                schema = sink.row_schema or kept.schema
+                for batch in kept.to_batches():
+                    sink.write_batch(self._conform_batch(batch, schema))
+                sink.write_rows(self._record_to_row(record) for record in records)
+
+            shutil.rmtree(table_dir)
+            os.replace(
+                os.path.join(tmp_root, os.path.basename(table_dir)),
+                table_dir,
+            )
+            shutil.rmtree(tmp_root, ignore_errors=True)
+            logger.info(
+                f"✅ {table_name}: обновлено {len(records):,} записей → {table_dir}",
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления датасета: {e!s}")
+
+    @profiled(STAGE_SINK)
+    def create_dataset_views(self, table_names: Any) -> None:
+        """View DuckDB поверх партиций таблиц датасета (без копирования строк)"""
+        conn = self.duckdb_sink().conn
+        for table_name in table_names:
+            # Файлы открытого sink еще не дописаны
+            if table_name in self._parquet_sinks:
+                continue
+            if create_dataset_view(
+                conn,
+                table_name,
+                self.dataset_table_dir(table_name),
+            ):
+                logger.info(f"✅ {table_name}: view DuckDB → датасет")
+
+    @profiled(STAGE_SINK)
+    def upsert_to_duckdb(
+        self,
+        table_name: str,
+        records: list[dict[str, Any]],
+        delta: TableDelta,
+    ) -> None:
+        """Удаляет строки измененных диапазонов в DuckDB и вставляет новые записи"""
+        if not PARQUET_DUCKDB_AVAILABLE:
+            logger.error("❌ Parquet/DuckDB не доступны")
+            return
 
-            # Создаем основной Parquet файл
-            if parquet_files:
-                main_parquet = "complete_1c_database.parquet"
-                logger.info(f"📊 Создание основного Parquet файла: {main_parquet}")
-                # Здесь можно объединить все таблицы в один файл
+        if self.dataset_dir is not None:
+            # View читает обновленную партицию датасета
+            self.create_dataset_views([table_name])
+            return
 
+        try:
+            sink = self.duckdb_sink()
+            rows = (self._record_to_row(record) for record in records)
+            if delta.full or not sink.has_table(table_name):
+                sink.write_rows(
+                    table_name,
+                    rows,
+                    schema=self.table_schemas.get(table_name),
+                    replace=True,
+                    enrich=self.enrich_batch,
+                )
+            else:
+                row_list: list[dict[str, Any]] = list(rows)
+                schema = self.table_schemas.get(table_name) or infer_row_schema(
+                    row_list,
+                )
+                sink.replace_ranges(
+                    table_name,
+                    self.enrich_batch(rows_to_record_batch(row_list, schema)),
+                    delta.ranges,
+                )
+            self._duckdb_written[table_name] = len(records)
+            logger.info(f"✅ {table_name}: {len(records):,} записей → DuckDB (upsert)")
         except Exception as e:
-            logger.error(f"❌ Ошибка сохранения в Parquet: {e!s}")
+            logger.error(f"❌ Ошибка обновления DuckDB: {e!s}")
+
+    def _record_to_row(self, record: dict[str, Any]) -> dict[str, Any]:
+        """Преобразует запись извлечения в плоскую строку для Parquet"""
+        row_data = {
+            "id": record.get("id"),
+            "table_name": record.get("table_name"),
+            "row_index": record.get("row_index"),
+        }
+
+        # Добавляем поля
+        for key, value in record.get("fields", {}).items():
+            row_data[f"field_{key}"] = value
+
+        # Добавляем BLOB поля (только метаданные)
+        for key, blob_data in record.get("blobs", {}).items():
+            row_data[f"blob_{key}_size"] = blob_data.get("size", 0)
+            row_data[f"blob_{key}_type"] = blob_data.get("value", {}).get(
+                "type",
+                "unknown",
+            )
+            # Добавляем содержимое BLOB для анализа
+            blob_content = blob_data.get("value", {}).get("content", "")
+            if blob_content and len(blob_content) > 3:  # Игнорируем "!!!"
+                row_data[f"blob_{key}_content"] = blob_content[
+                    :100
+                ]  # Первые 100 символов
+
+        # Добавляем статистику извлечения
+        stats = record.get("extraction_stats", {})
+        row_data["total_blobs"] = stats.get("total_blobs", 0)
+        row_data["successful_blobs"] = stats.get("successful", 0)
+        row_data["failed_blobs"] = stats.get("failed", 0)
+
+        return row_data
+
+    @profiled(STAGE_SINK)
+    def save_to_parquet(
+        self,
+        results: dict[str, list[dict[str, Any]]],
+        final: bool = True,
+    ) -> None:
+        """
+        Сохраняет результаты в Parquet формат
 
-    def save_to_duckdb(self, results: dict[str, list[dict[str, Any]]]) -> None:
-        """Сохраняет результаты в DuckDB"""
+        Записи дописываются в открытый ParquetWriter: на checkpoint (final=False)
+        передаются только новые записи, final=True дописывает остаток
+        и закрывает файл (до закрытия файл без footer не читается).
+        """
         if not PARQUET_DUCKDB_AVAILABLE:
             logger.error("❌ Parquet/DuckDB не доступны")
             return
 
         try:
-            logger.info("💾 Создание DuckDB базы данных...")
-
-            # Создаем DuckDB соединение
-            conn = duckdb.connect("complete_1c_database.duckdb")
+            logger.info("💾 Сохранение в Parquet формат...")
 
             for table_name, records in results.items():
-                if not records:
+                written = self._parquet_written.get(table_name, 0)
+                new_records = records[written:]
+                sink = self._parquet_sinks.get(table_name)
+                if sink is None and not new_records:
                     continue
 
-                logger.info(f"📊 Создание таблицы {table_name} в DuckDB...")
+                if sink is None:
+                    sink = self._new_parquet_sink(table_name)
+                    self._parquet_sinks[table_name] = sink
 
-                # Преобразуем записи в DataFrame
-                df_data = []
-                for record in records:
-                    row_data = {
-                        "id": record.get("id"),
-                        "table_name": record.get("table_name"),
-                        "row_index": record.get("row_index"),
-                    }
+                # Группы строк пишутся по row_group_size, остаток - при close()
+                sink.write_rows(self._record_to_row(record) for record in new_records)
+                self._parquet_written[table_name] = len(records)
 
-                    # Добавляем поля
-                    for key, value in record.get("fields", {}).items():
-                        row_data[f"field_{key}"] = value
+                if final:
+                    rows_written = sink.close()
+                    del self._parquet_sinks[table_name]
+                    logger.info(
+                        f"✅ {table_name}: {rows_written:,} записей → {sink.path}",
+                    )
+                else:
+                    logger.info(
+                        f"💾 {table_name}: +{len(new_records):,} записей → {sink.path}",
+                    )
 
-                    # Добавляем BLOB поля (только метаданные)
-                    for key, blob_data in record.get("blobs", {}).items():
-                        row_data[f"blob_{key}_size"] = blob_data.get("size", 0)
-                        row_data[f"blob_{key}_type"] = blob_data.get("value", {}).get(
-                            "type",
-                            "unknown",
-                        )
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения в Parquet: {e!s}")
 
-                    # Добавляем статистику извлечения
-                    stats = record.get("extraction_stats", {})
-                    row_data["total_blobs"] = stats.get("total_blobs", 0)
-                    row_data["successful_blobs"] = stats.get("successful", 0)
-                    row_data["failed_blobs"] = stats.get("failed", 0)
-
-                    df_data.append(row_data)
-
-                if df_data:
-                    df = pd.DataFrame(df_data)
-                    # Создаем таблицу в DuckDB
-                    conn.register(f"df_{table_name}", df)
-                    # Безопасное создание таблицы без SQL injection
-                    conn.execute(
-                        "CREATE TABLE ? AS SELECT * FROM ?",
-                        [table_name, f"df_{table_name}"],
-                    )
-                    logger.info(f"✅ {table_name}: {len(df):,} записей → DuckDB")
+    def duckdb_sink(self) -> Any:
+        """Открытая база DuckDB извлечения (соединение одно на все сохранения)"""
+        if self._duckdb_sink is None:
+            self._duckdb_sink = DuckDBSink(self.duckdb_file)
+        return self._duckdb_sink
 
-            # Создаем индексы для быстрого поиска
-            logger.info("🔍 Создание индексов...")
-            for table_name in results:
-                try:
-                    conn.execute(
-                        f"CREATE INDEX IF NOT EXISTS idx_{table_name}_id ON {table_name}(id)",
-                    )
-                    conn.execute(
-                        f"CREATE INDEX IF NOT EXISTS idx_{table_name}_table ON {table_name}(table_name)",
+    def close_duckdb(self) -> None:
+        if self._duckdb_sink is not None:
+            self._duckdb_sink.close()
+            self._duckdb_sink = None
+
+    @profiled(STAGE_SINK)
+    def save_to_duckdb(
+        self,
+        results: dict[str, list[dict[str, Any]]],
+        final: bool = True,
+    ) -> None:
+        """
+        Сохраняет результаты в DuckDB
+
+        Как и в save_to_parquet, дописываются только записи после прошлого
+        сохранения (пакетами Arrow в транзакции); первое сохранение таблицы
+        в извлечении пересоздает ее. final=True строит индексы.
+        """
+        if not PARQUET_DUCKDB_AVAILABLE:
+            logger.error("❌ Parquet/DuckDB не доступны")
+            return
+
+        if self.dataset_dir is not None:
+            self.create_dataset_views(results)
+            return
+
+        try:
+            sink = self.duckdb_sink()
+
+            for table_name, records in results.items():
+                written = self._duckdb_written.get(table_name)
+                new_records = records[written or 0 :]
+                if new_records or written is None:
+                    sink.write_rows(
+                        table_name,
+                        (self._record_to_row(record) for record in new_records),
+                        schema=self.table_schemas.get(table_name),
+                        replace=written is None,
+                        enrich=self.enrich_batch,
                     )
-                except Exception as e:
-                    logger.warning(
-                        f"⚠️ Не удалось создать индекс для {table_name}: {e!s}",
+                    self._duckdb_written[table_name] = len(records)
+                    logger.info(
+                        f"💾 {table_name}: +{len(new_records):,} записей → DuckDB",
                     )
 
-            conn.close()
-            logger.info("✅ DuckDB база данных создана: complete_1c_database.duckdb")
+                # Индексы для быстрого поиска - после загрузки таблицы
+                if final and sink.has_table(table_name):
+                    try:
+                        sink.create_indexes(table_name, ("id", "table_name"))
+                    except Exception as e:
+                        logger.warning(
+                            f"⚠️ Не удалось создать индекс для {table_name}: {e!s}",
+                        )
+
+            if final:
+                logger.info(f"✅ DuckDB база данных обновлена: {self.duckdb_file}")
 
         except Exception as e:
-            logger.error(f"❌ Ошибка создания DuckDB: {e!s}")
+            logger.error(f"❌ Ошибка сохранения в DuckDB: {e!s}")
 
 
 def main() -> None:
     """Основная функция адаптивного извлечения"""
+    parser = argparse.ArgumentParser(description="Адаптивное извлечение таблиц 1С")
+    parser.add_argument("--db", default="data/raw/1Cv8.1CD", help="Путь к 1CD файлу")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Количество процессов (больше 1 - параллельное извлечение по партициям)",
+    )
+    parser.add_argument(
+        "--max-records",
+        type=int,
+        default=None,
+        help="Лимит записей на таблицу в параллельном режиме",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Читать 1CD через mmap (patches/onec_dtools/mmap_patch.py)",
+    )
+    parser.add_argument(
+        "--project",
+        action="store_true",
+        help="Декодировать только бизнес-поля и поля из field_mapping",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Извлекать только строки, измененные с прошлого запуска",
+    )
+    parser.add_argument(
+        "--plan",
+        default=DEFAULT_PLAN_FILE,
+        help="Manifest плана извлечения (python -m src.utils.extraction_planner)",
+    )
+    parser.add_argument(
+        "--resolve-refs",
+        action="store_true",
+        help="Добавлять код и наименование справочника к колонкам ссылок",
+    )
+    parser.add_argument(
+        "--dataset-dir",
+        default=None,
+        help="Писать Parquet Hive датасетом (table_name/document_type/year_month)",
+    )
+    parser.add_argument(
+        "--state-file",
+        default=DEFAULT_STATE_FILE,
+        help="Файл отпечатков таблиц для инкрементального режима",
+    )
+    parser.add_argument(
+        "--blob-workers",
+        type=int,
+        default=None,
+        help="Потоки распаковки сжатых BLOB (по умолчанию - число ядер, 1 - без пула)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help=(
+            "Время этапов по таблицам (stages), cProfile (cprofile) или "
+            f"сэмплер стеков (sample); отчет в {DEFAULT_REPORT_FILE}"
+        ),
+    )
+    args = parser.parse_args()
+    profiler = configure_profiler(args.profile) if args.profile else get_profiler()
+    profiler.start()
+
     print("🔍 Адаптивное извлечение критических таблиц")
     print("=" * 60)
 
+    if args.workers > 1:
+        extractor = AdaptiveExtractor(plan_file=args.plan)
+        extractor.install_signal_handler()
+        summaries = extractor.extract_critical_tables_partitioned(
+            db_path=args.db,
+            workers=args.workers,
+            max_records=args.max_records,
+            use_mmap=args.mmap,
+        )
+        output_file = "adaptive_extraction_partitions.json"
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2, default=str)
+
+        print("\n📊 ИТОГОВАЯ СТАТИСТИКА:")
+        for table_name, summary in summaries.items():
+            print(
+                f"   📄 {table_name}: {summary['records']:,} записей, "
+                f"{len(summary['shards'])} шардов",
+            )
+        print(f"\n✅ Сводка партиций сохранена в {output_file}")
+        # В режиме партиций профилируется только координатор
+        if profiler.write_report(DEFAULT_REPORT_FILE):
+            print(profiler.summary())
+        return
+
     try:
-        db_file = open("data/raw/1Cv8.1CD", "rb")
+        from src.utils.parallel_extractor import open_db_file
+
+        db_file = open_db_file(args.db, args.mmap)
         db = DatabaseReader(db_file)
 
         print("✅ База данных открыта успешно!")
 
+        references = None
+        if args.resolve_refs:
+            from src.utils.reference_resolver import ReferenceResolver
+
+            references = ReferenceResolver(db)
+
         # Создаем адаптивный извлекатель
-        extractor = AdaptiveExtractor()
+        extractor = AdaptiveExtractor(
+            project_columns=args.project,
+            references=references,
+            plan_file=args.plan,
+            dataset_dir=args.dataset_dir,
+            blob_workers=args.blob_workers,
+        )
+        extractor.install_signal_handler()
+
+        if args.incremental:
+            # Только измененные строки, Parquet/DuckDB обновляются на месте
+            print("\n🔁 Инкрементальное обновление критических таблиц...")
+            results = extractor.extract_critical_tables_incremental(
+                db,
+                IncrementalState(args.state_file),
+            )
+            output_file = "adaptive_extraction_incremental.json"
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+
+            print("\n📊 ИТОГОВАЯ СТАТИСТИКА:")
+            for table_name, records in results.items():
+                print(f"   📄 {table_name}: {len(records):,} обновленных записей")
+            print(f"\n✅ Измененные записи сохранены в {output_file}")
+            return
 
         # Извлекаем критические таблицы
         print("\n🎯 Извлечение критических таблиц...")
@@ -668,6 +1587,12 @@ def main() -> None:
         # Закрываем файл
         if "db_file" in locals():
             db_file.close()
+        if "extractor" in locals():
+            extractor.close_duckdb()
+            extractor.blob_inflater.close()
+        if profiler.write_report(DEFAULT_REPORT_FILE):
+            print(f"\n⏱️ Профиль этапов сохранен в {DEFAULT_REPORT_FILE}")
+            print(profiler.summary())
 
 
 if __name__ == "__main__":
@@ -9,11 +9,26 @@ from datetime import datetime
 from typing import Any
 
 import duckdb
-import pandas as pd
 from onec_dtools import DatabaseReader
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 # from src.utils.blob_processor import BlobProcessor  # Пока не используется
+from src.utils.extraction_planner import plan_for  # noqa: E402
+from src.utils.fulltext_index import DEFAULT_INDEX_PATH, FullTextIndex  # noqa: E402
+from src.utils.onec_serialized import (  # noqa: E402
+    parse_blob,
+    project,
+    projection_to_json,
+)
+from src.utils.row_decoder import CompiledRowDecoder  # noqa: E402
+from src.utils.row_stream import (  # noqa: E402
+    JsonlSpool,
+    decode_rows,
+    iter_non_empty_rows,
+    write_json_sections,
+)
+from src.utils.stage_profiler import DEFAULT_REPORT_FILE, get_profiler  # noqa: E402
+from src.utils.table_part_index import TablePartIndex  # noqa: E402
 
 # Флаг для прерывания
 interrupted = False
@@ -28,96 +43,93 @@ def signal_handler(sig: int, frame: Any) -> None:
 signal.signal(signal.SIGINT, signal_handler)
 
 
-def extract_table_parts(db, table_name: str, row_index: int) -> dict:
+def extract_table_parts(
+    db,
+    table_name: str,
+    row_index: int,
+    parent_ref: Any = None,
+    index: TablePartIndex | None = None,
+) -> dict:
     """
     Извлекает табличные части документа
+
+    Строки берутся из индекса табличных частей по ссылке документа
+    (parent_ref - значение _IDRREF), без обхода всех строк таблиц _VT
     """
     table_parts = {}
-
-    # ИСПРАВЛЕНО: Ищем табличные части для конкретной таблицы
-    for table_part_name in db.tables.keys():
-        if table_part_name.startswith(f"{table_name}_VT"):
-            try:
-                table_part = db.tables[table_part_name]
-                records = []
-
-                for i, row in enumerate(table_part):
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        # ИСПРАВЛЕНО: Правильное извлечение табличных частей с BLOB
-                        row_list = row.as_list(True) if hasattr(row, "as_list") else []
-                        if row_list:
-                            # ИСПРАВЛЕНО: Безопасное создание словаря
-                            row_data = {}
-                            for j, value in enumerate(row_list):
-                                if (
-                                    hasattr(value, "name")
-                                    and value.name
-                                    and value.name.strip()
-                                ):
-                                    row_data[value.name] = value
-                                else:
-                                    row_data[f"field_{j}"] = value
-
-                            # ИСПРАВЛЕНО: Анализируем структуру табличной части
-                            table_part_record = {
-                                "row_index": i,
-                                "fields": row_data,
-                            }
-
-                            # ИСПРАВЛЕНО: Динамический анализ полей табличной части
-                            for field_name, value in row_data.items():
-                                # Анализируем по имени поля и содержимому
-                                field_lower = field_name.lower()
-                                if (
-                                    "номенклатура" in field_lower
-                                    or "nomenclature" in field_lower
-                                ):
-                                    table_part_record["nomenclature"] = value
-                                elif (
-                                    "количество" in field_lower
-                                    or "quantity" in field_lower
-                                    or "qty" in field_lower
-                                ):
-                                    table_part_record["quantity"] = value
-                                elif "цена" in field_lower or "price" in field_lower:
-                                    table_part_record["price"] = value
-                                elif (
-                                    "сумма" in field_lower
-                                    or "amount" in field_lower
-                                    or "sum" in field_lower
-                                ):
-                                    table_part_record["amount"] = value
-                                elif field_name.startswith("field_"):
-                                    # Fallback для полей без понятных имен
-                                    field_parts = field_name.split("_")
-                                    field_index = (
-                                        int(field_parts[1])
-                                        if len(field_parts) > 1
-                                        and field_parts[1].isdigit()
-                                        else 0
-                                    )
-                                    if field_index == 0:
-                                        table_part_record["nomenclature"] = value
-                                    elif field_index == 1:
-                                        table_part_record["quantity"] = value
-                                    elif field_index == 2:
-                                        table_part_record["price"] = value
-                                    elif field_index == 3:
-                                        table_part_record["amount"] = value
-
-                            # Устанавливаем значения по умолчанию если не найдены
-                            table_part_record.setdefault("nomenclature", "")
-                            table_part_record.setdefault("quantity", 0)
-                            table_part_record.setdefault("price", 0)
-                            table_part_record.setdefault("amount", 0)
-
-                            records.append(table_part_record)
-
-                if records:
-                    table_parts[table_part_name] = records
-            except Exception as e:
-                print(f"   ⚠️ Ошибка извлечения табличной части {table_part_name}: {e}")
-                continue
+    index = index or TablePartIndex(db)
+
+    for table_part_name, offsets in index.rows_for(table_name, parent_ref).items():
+        try:
+            table_part = db.tables[table_part_name]
+            decoder = index.decoder(table_part_name)
+            records = []
+
+            for i in offsets:
+                # ИСПРАВЛЕНО: Правильное извлечение табличных частей с BLOB
+                row_list = decoder.decode(table_part[i], read_blobs=True)
+                if row_list:
+                    row_data = dict(zip(decoder.positional_names, row_list))
+
+                    # ИСПРАВЛЕНО: Анализируем структуру табличной части
+                    table_part_record = {
+                        "row_index": i,
+                        "fields": row_data,
+                    }
+
+                    # ИСПРАВЛЕНО: Динамический анализ полей табличной части
+                    for field_name, value in row_data.items():
+                        # Анализируем по имени поля и содержимому
+                        field_lower = field_name.lower()
+                        if (
+                            "номенклатура" in field_lower
+                            or "nomenclature" in field_lower
+                        ):
+                            table_part_record["nomenclature"] = value
+                        elif (
+                            "количество" in field_lower
+                            or "quantity" in field_lower
+                            or "qty" in field_lower
+                        ):
+                            table_part_record["quantity"] = value
+                        elif "цена" in field_lower or "price" in field_lower:
+                            table_part_record["price"] = value
+                        elif (
+                            "сумма" in field_lower
+                            or "amount" in field_lower
+                            or "sum" in field_lower
+                        ):
+                            table_part_record["amount"] = value
+                        elif field_name.startswith("field_"):
+                            # Fallback для полей без понятных имен
+                            field_parts = field_name.split("_")
+                            field_index = (
+                                int(field_parts[1])
+                                if len(field_parts) > 1 and field_parts[1].isdigit()
+                                else 0
+                            )
+                            if field_index == 0:
+                                table_part_record["nomenclature"] = value
+                            elif field_index == 1:
+                                table_part_record["quantity"] = value
+                            elif field_index == 2:
+                                table_part_record["price"] = value
+                            elif field_index == 3:
+                                table_part_record["amount"] = value
+
+                    # Устанавливаем значения по умолчанию если не найдены
+                    table_part_record.setdefault("nomenclature", "")
+                    table_part_record.setdefault("quantity", 0)
+                    table_part_record.setdefault("price", 0)
+                    table_part_record.setdefault("amount", 0)
+
+                    records.append(table_part_record)
+
+            if records:
+                table_parts[table_part_name] = records
+        except Exception as e:
+            print(f"   ⚠️ Ошибка извлечения табличной части {table_part_name}: {e}")
+            continue
 
     return table_parts
 
@@ -170,8 +182,15 @@ def extract_all_available_data() -> None:
             return
         print(f"✅ Файл 1CD найден: {cdb_file_path}")
 
+    # ONEC_MMAP=1: 1CD читается через mmap (patches/onec_dtools/mmap_patch.py)
+    use_mmap = os.environ.get("ONEC_MMAP", "0") == "1"
+    if use_mmap:
+        from patches.onec_dtools.mmap_patch import MmapFile, apply_mmap_patch
+
+        apply_mmap_patch()
+
     try:
-        with open(cdb_file_path, "rb") as f:
+        with MmapFile(cdb_file_path) if use_mmap else open(cdb_file_path, "rb") as f:
             try:
                 db = DatabaseReader(f)
             except ValueError as e:
@@ -192,12 +211,7 @@ def extract_all_available_data() -> None:
                 "_DOCUMENT154",  # Таблица с суммами
                 "_DOCUMENT137",  # Таблица с суммами (из предыдущего анализа)
                 "_DOCUMENT12259",  # Таблица документов
-                # КРИТИЧЕСКИЕ ТАБЛИЦЫ ДЛЯ ИЗВЛЕЧЕНИЯ
-                "_DOCUMENTJOURNAL5354",  # 4,458,509 записей - КРИТИЧЕСКАЯ
-                "_DOCUMENTJOURNAL5287",  # 2,798,531 записей - КРИТИЧЕСКАЯ
-                "_DOCUMENTJOURNAL5321",  # 973,975 записей - КРИТИЧЕСКАЯ
-                "_DOCUMENT138",  # 861,178 записей - КРИТИЧЕСКАЯ
-                "_DOCUMENT156",  # 571,213 записей - КРИТИЧЕСКАЯ
+                # Критические таблицы добавляются по плану извлечения
             ]
 
             all_results: dict = {
@@ -216,6 +230,18 @@ def extract_all_available_data() -> None:
                 },
             }
 
+            # Документы, справочники и регистры сразу сбрасываются на диск (JSONL),
+            # в памяти остаются только счетчики
+            output_file = "data/results/all_available_data.json"
+            spools = {
+                section: JsonlSpool(
+                    output_file.replace(".json", f".{section}.jsonl"),
+                )
+                for section in ("documents", "references", "registers")
+            }
+            # Полнотекстовый индекс строится вместе с JSONL секциями
+            fulltext_index = FullTextIndex(DEFAULT_INDEX_PATH, reset=True)
+
             # Сначала извлекаем все таблицы для анализа
             all_tables = list(db.tables.keys())
             print(f"\n📊 Найдено {len(all_tables)} таблиц в базе данных")
@@ -235,15 +261,10 @@ def extract_all_available_data() -> None:
             print(f"   📚 Справочники: {len(reference_tables_found)}")
             print(f"   📊 Регистры: {len(register_tables_found)}")
 
-            # Обновляем список для извлечения
-            # КРИТИЧЕСКИЕ ТАБЛИЦЫ - ПРИОРИТЕТ 1 (ЛИМИТ 1000 ЗАПИСЕЙ)
-            critical_tables = [
-                "_DOCUMENTJOURNAL5354",  # 4,458,509 записей - КРИТИЧЕСКАЯ (ЛИМИТ 1000)
-                "_DOCUMENTJOURNAL5287",  # 2,798,531 записей - КРИТИЧЕСКАЯ (ЛИМИТ 1000)
-                "_DOCUMENTJOURNAL5321",  # 973,975 записей - КРИТИЧЕСКАЯ (ЛИМИТ 1000)
-                "_DOCUMENT138",  # 861,178 записей - КРИТИЧЕСКАЯ (ЛИМИТ 1000)
-                "_DOCUMENT156",  # 571,213 записей - КРИТИЧЕСКАЯ (ЛИМИТ 1000)
-            ]
+            # КРИТИЧЕСКИЕ ТАБЛИЦЫ - ПРИОРИТЕТ 1: самые дорогие документы и журналы
+            # по плану извлечения (manifest планировщика или каталог 1CD)
+            extraction_plan = plan_for(db)
+            critical_tables = extraction_plan.critical_tables()
 
             # Лимит записей для критических таблиц
             MAX_RECORDS_CRITICAL = (
@@ -258,100 +279,156 @@ def extract_all_available_data() -> None:
             for table in available_critical:
                 print(f"   ✅ {table}: {len(db.tables[table]):,} записей")
 
-            tables_to_extract = (
-                document_tables + available_critical + document_tables_found[:5]
-            )  # Критические + 5 дополнительных
+            # Параллельное извлечение критических таблиц целиком по партициям
+            # (EXTRACTION_WORKERS > 1): каждый процесс открывает свой DatabaseReader,
+            # записи шардов потоково попадают в JSONL секцию и полнотекстовый индекс
+            extraction_workers = int(os.environ.get("EXTRACTION_WORKERS", "1"))
+            pool_extracted: set[str] = set()
+            if extraction_workers > 1 and available_critical:
+                from src.utils.parallel_extractor import (
+                    ParallelTableExtractor,
+                    iter_shards,
+                    to_document,
+                )
+
+                parallel = ParallelTableExtractor(
+                    db_path=cdb_file_path,
+                    workers=extraction_workers,
+                    use_mmap=use_mmap,
+                )
+                all_results["metadata"]["partitioned_extraction"] = {}
+                for table_name in available_critical:
+                    if interrupted:
+                        break
+                    parallel.rows_per_partition = extraction_plan.rows_per_partition(
+                        table_name,
+                    )
+                    summary = parallel.extract_table(
+                        table_name,
+                        should_stop=lambda: interrupted,
+                    )
+                    all_results["metadata"]["partitioned_extraction"][
+                        table_name
+                    ] = summary
 
-            # Добавляем справочники и регистры
-            reference_tables_to_extract = reference_tables_found[
-                :5
-            ]  # Первые 5 справочников
-            register_tables_to_extract = register_tables_found[:5]  # Первые 5 регистров
+                    # Записи пула приводятся к форме последовательного пути:
+                    # поля field_N, id {таблица}_{i}, row_index с 0
+                    table = db.tables[table_name]
+                    all_results["metadata"].setdefault("table_fields", {})[
+                        table_name
+                    ] = {
+                        f"field_{j}": [
+                            description.type,
+                            description.length,
+                            description.precision,
+                            name,
+                        ]
+                        for j, (name, description) in enumerate(table.fields.items())
+                    }
+                    decoder = CompiledRowDecoder.from_table(table)
+                    positional_names = dict(
+                        zip(decoder.names, decoder.positional_names),
+                    )
+                    for i, record in enumerate(iter_shards(summary["shards"]), 1):
+                        pool_document = to_document(record, positional_names, i)
+                        spools["documents"].write(pool_document)
+                        fulltext_index.index_record(pool_document)
+                        all_results["metadata"]["total_documents"] += 1
+                    pool_extracted.add(table_name)
+
+            # Таблицы, извлеченные пулом, повторно не читаются
+            tables_to_extract = [
+                table_name
+                for table_name in dict.fromkeys(
+                    document_tables + available_critical + document_tables_found[:5],
+                )
+                if table_name not in pool_extracted
+            ]  # Критические + 5 дополнительных (без повторов)
+
+            # Добавляем справочники и регистры: первые 5 в порядке плана
+            planned_order = {
+                name: i for i, name in enumerate(extraction_plan.table_names())
+            }
+            reference_tables_to_extract = sorted(
+                reference_tables_found,
+                key=lambda t: planned_order.get(t, len(planned_order)),
+            )[:5]
+            register_tables_to_extract = sorted(
+                register_tables_found,
+                key=lambda t: planned_order.get(t, len(planned_order)),
+            )[:5]
 
             print("\n🎯 План извлечения:")
             print(f"   📄 Документы: {len(tables_to_extract)}")
             print(f"   📚 Справочники: {len(reference_tables_to_extract)}")
             print(f"   📊 Регистры: {len(register_tables_to_extract)}")
 
+            # Индекс табличных частей: ссылка документа → строки _VT таблиц
+            # (строится один раз на таблицу _VT и сохраняется на диск)
+            table_part_index = TablePartIndex(db)
+
             # Извлекаем документы
             for table_name in tables_to_extract:
                 if table_name in db.tables:
                     print(f"\n📊 Анализ таблицы: {table_name}")
                     table = db.tables[table_name]
+                    get_profiler().set_table(table_name)
                     print(f"   📈 Всего записей: {len(table):,}")
 
+                    # Метаданные полей (field_N → тип 1С и имя поля) для схемы
+                    # типизированной Parquet таблицы
+                    all_results["metadata"].setdefault("table_fields", {})[
+                        table_name
+                    ] = {
+                        f"field_{j}": [
+                            description.type,
+                            description.length,
+                            description.precision,
+                            name,
+                        ]
+                        for j, (name, description) in enumerate(table.fields.items())
+                    }
+
                     # ИСПРАВЛЕНО: Определяем лимит записей - ТОЛЬКО ДЛЯ ТЕСТИРОВАНИЯ
                     max_records = min(MAX_RECORDS_CRITICAL, len(table))
                     print(
                         f"   🎯 Лимит извлечения: {max_records:,} записей (ИСПРАВЛЕНО)",
                     )
 
-                    # Находим непустые записи - с лимитом для критических таблиц
-                    non_empty_rows = []
-                    print(f"   🔍 Анализ {min(max_records, len(table)):,} записей...")
-                    for i in range(
-                        min(max_records, len(table)),
-                    ):  # Анализируем с лимитом
-                        # ИСПРАВЛЕНО: Проверяем флаг прерывания
-                        if interrupted:
-                            print(f"   🛑 ПРЕРЫВАНИЕ: Остановка анализа на записи {i}")
-                            break
-
-                        try:
-                            row = table[i]
-                            if not hasattr(row, "is_empty") or not row.is_empty:
-                                non_empty_rows.append((i, row))
-                        except Exception as e:
-                            print(f"   ⚠️ Ошибка при проверке записи {i}: {e!s}")
-                            continue
-
-                        # Показываем прогресс для больших таблиц
-                        if i > 0 and i % 100000 == 0:
-                            print(
-                                f"   📊 Обработано {i:,} записей, найдено {len(non_empty_rows):,} непустых",
-                            )
-
-                    print(f"   ✅ Найдено {len(non_empty_rows)} непустых записей")
+                    # Потоковый конвейер: непустые строки → декодирование полей
+                    # (строки читаются по одной, список строк не накапливается)
+                    decoder = CompiledRowDecoder.from_table(table)
+                    idrref_index = (
+                        decoder.names.index("_IDRREF")
+                        if "_IDRREF" in decoder.names
+                        else None
+                    )
+                    decoded_rows = decode_rows(
+                        iter_non_empty_rows(
+                            table,
+                            stop=max_records,
+                            should_stop=lambda: interrupted,
+                        ),
+                        decoder=decoder,
+                    )
 
                     # Извлекаем данные документов - ВСЕ записи
                     successful_docs = 0
                     error_counter: dict[str, int] = {}  # Счетчик ошибок по типам
                     max_repeated_errors = 100  # Максимум повторяющихся ошибок
-                    print(f"   🔄 Извлечение всех {len(non_empty_rows):,} записей...")
-
-                    for i, (row_index, row) in enumerate(non_empty_rows, 1):
-                        # Проверяем флаг прерывания
-                        if interrupted:
-                            print(
-                                f"   🛑 ПРЕРЫВАНИЕ: Остановка извлечения на записи {i:,}",
-                            )
-                            break
+                    print(f"   🔄 Извлечение до {max_records:,} записей...")
 
+                    for i, (row_index, row, row_list) in enumerate(decoded_rows, 1):
                         # Показываем прогресс для больших таблиц
                         if i > 0 and i % 1000 == 0:
                             print(
-                                f"   📊 Извлечено {i:,} из {len(non_empty_rows):,} записей ({i / len(non_empty_rows) * 100:.1f}%)",
+                                f"   📊 Извлечено {i:,} записей, строка {row_index + 1:,} из {max_records:,} ({(row_index + 1) / max_records * 100:.1f}%)",
                             )
 
                         try:
-                            # ИСПРАВЛЕНО: Правильное извлечение данных с BLOB полями
-                            row_list = (
-                                row.as_list(True) if hasattr(row, "as_list") else []
-                            )
-                            if not row_list:
-                                continue
 
-                            # ИСПРАВЛЕНО: Безопасное создание словаря
-                            row_dict = {}
-                            for j, value in enumerate(row_list):
-                                if (
-                                    hasattr(value, "name")
-                                    and value.name
-                                    and value.name.strip()
-                                ):
-                                    row_dict[value.name] = value
-                                else:
-                                    row_dict[f"field_{j}"] = value
+                            # Позиционные имена field_N заранее вычислены декодером
+                            row_dict = dict(zip(decoder.positional_names, row_list))
 
                             # Создаем структуру документа с извлечением реальных данных
                             document: dict = {
@@ -635,6 +712,21 @@ def extract_all_available_data() -> None:
                                     elif blob_bytes.startswith(b"PK"):
                                         blob_type = "ZIP/Office"
 
+                                    # Сериализованное значение 1С (в том числе сжатое deflate):
+                                    # анализируются строковые листья, а не весь текст
+                                    structure = (
+                                        parse_blob(blob_bytes)
+                                        if blob_type == "unknown"
+                                        else None
+                                    )
+                                    if structure is not None:
+                                        blob_type = "ONEC_SERIALIZED"
+                                        projection = project(structure)
+                                        blob_content = "\n".join(projection["string"])
+                                        document["blob_structure"] = projection_to_json(
+                                            projection,
+                                        )
+
                                     # ИСПРАВЛЕНО: Правильное декодирование в зависимости от типа
                                     if blob_type == "unknown":
                                         # Пробуем декодировать как текст
@@ -658,7 +750,7 @@ def extract_all_available_data() -> None:
                                                     blob_bytes.hex()[:100] + "..."
                                                 )
                                                 blob_type = "BINARY"
-                                    else:
+                                    elif blob_type != "ONEC_SERIALIZED":
                                         blob_content = f"[{blob_type} файл, {len(blob_bytes)} байт]"
 
                                     document["blob_content"] = blob_content
@@ -833,7 +925,17 @@ def extract_all_available_data() -> None:
                             # Дублирующий код удален - данные уже извлечены выше
 
                             # Извлекаем табличные части документа
-                            table_parts = extract_table_parts(db, table_name, row_index)
+                            table_parts = extract_table_parts(
+                                db,
+                                table_name,
+                                row_index,
+                                parent_ref=(
+                                    row_list[idrref_index]
+                                    if idrref_index is not None
+                                    else None
+                                ),
+                                index=table_part_index,
+                            )
                             if table_parts:
                                 document["table_parts"] = table_parts
 
@@ -1184,11 +1286,8 @@ def extract_all_available_data() -> None:
                                         )
                                     continue
 
-                            if (
-                                isinstance(all_results, dict)
-                                and "documents" in all_results
-                            ):
-                                all_results["documents"].append(document)
+                            spools["documents"].write(document)
+                            fulltext_index.index_record(document)
                             if (
                                 isinstance(all_results, dict)
                                 and "metadata" in all_results
@@ -1404,20 +1503,10 @@ def extract_all_available_data() -> None:
                             print(f"   ⚠️ Ошибка при обработке записи {i}: {e!s}")
                             continue
 
-                    # СВОДНАЯ СТАТИСТИКА ПО BLOB ДАННЫМ
-
-                    total_blobs = 0
-                    total_failed_fields = 0
-
-                    # Анализируем все обработанные документы
-                    for doc in all_results.get("documents", []):
-                        if doc.get("table_name") == table_name:
-                            # Подсчитываем все BLOB поля
-                            for blob_name, blob_data in doc.get("blobs", {}).items():
-                                if blob_data.get("value", {}).get("content"):
-                                    total_blobs += 1
-                                else:
-                                    total_failed_fields += 1
+                    # СВОДНАЯ СТАТИСТИКА ПО BLOB ДАННЫМ (счетчики sink, без повторного прохода)
+                    table_stats = spools["documents"].stats_for(table_name)
+                    total_blobs = table_stats["blob_fields"]
+                    total_failed_fields = table_stats["failed_blob_fields"]
 
                     print(
                         f"   📄 Успешно обработано {successful_docs} документов из {table_name}",
@@ -1437,6 +1526,7 @@ def extract_all_available_data() -> None:
                 if table_name in db.tables:
                     print(f"\n📚 Анализ справочника: {table_name}")
                     table = db.tables[table_name]
+                    get_profiler().set_table(table_name)
                     print(f"   📈 Всего записей: {len(table):,}")
 
                     # Извлекаем ВСЕ записи справочника
@@ -1444,28 +1534,22 @@ def extract_all_available_data() -> None:
                     print(
                         f"   🔄 Извлечение всех {len(table):,} записей справочника...",
                     )
-                    for i in range(len(table)):
-                        try:
-                            row = table[i]
-                            if not hasattr(row, "is_empty") or not row.is_empty:
-                                row_dict = (
-                                    row.as_list(True) if hasattr(row, "as_list") else {}
-                                )
-                                if row_dict:
-                                    reference = {
-                                        "id": f"{table_name}_{i}",
-                                        "table_name": table_name,
-                                        "fields": row_dict,
-                                        "extraction_stats": {
-                                            "extraction_time": datetime.now().isoformat(),
-                                            "success": True,
-                                        },
-                                    }
-                                    all_results["references"].append(reference)
-                                    successful_refs += 1
-                        except Exception as e:
-                            print(f"   ⚠️ Ошибка при извлечении справочника {i}: {e!s}")
-                            continue
+                    for i, _row, row_values in decode_rows(
+                        iter_non_empty_rows(table, should_stop=lambda: interrupted),
+                        decoder=CompiledRowDecoder.from_table(table),
+                    ):
+                        reference = {
+                            "id": f"{table_name}_{i}",
+                            "table_name": table_name,
+                            "fields": row_values,
+                            "extraction_stats": {
+                                "extraction_time": datetime.now().isoformat(),
+                                "success": True,
+                            },
+                        }
+                        spools["references"].write(reference)
+                        fulltext_index.index_record(reference)
+                        successful_refs += 1
 
                     print(
                         f"   ✅ Успешно извлечено {successful_refs} записей справочника",
@@ -1477,41 +1561,47 @@ def extract_all_available_data() -> None:
                 if table_name in db.tables:
                     print(f"\n📊 Анализ регистра: {table_name}")
                     table = db.tables[table_name]
+                    get_profiler().set_table(table_name)
                     print(f"   📈 Всего записей: {len(table):,}")
 
                     # Извлекаем ВСЕ записи регистра
                     successful_regs = 0
                     print(f"   🔄 Извлечение всех {len(table):,} записей регистра...")
-                    for i in range(len(table)):
-                        try:
-                            row = table[i]
-                            if not hasattr(row, "is_empty") or not row.is_empty:
-                                row_dict = (
-                                    row.as_list(True) if hasattr(row, "as_list") else {}
-                                )
-                                if row_dict:
-                                    register = {
-                                        "id": f"{table_name}_{i}",
-                                        "table_name": table_name,
-                                        "fields": row_dict,
-                                        "extraction_stats": {
-                                            "extraction_time": datetime.now().isoformat(),
-                                            "success": True,
-                                        },
-                                    }
-                                    all_results["registers"].append(register)
-                                    successful_regs += 1
-                        except Exception as e:
-                            print(f"   ⚠️ Ошибка при извлечении регистра {i}: {e!s}")
-                            continue
+                    for i, _row, row_values in decode_rows(
+                        iter_non_empty_rows(table, should_stop=lambda: interrupted),
+                        decoder=CompiledRowDecoder.from_table(table),
+                    ):
+                        register = {
+                            "id": f"{table_name}_{i}",
+                            "table_name": table_name,
+                            "fields": row_values,
+                            "extraction_stats": {
+                                "extraction_time": datetime.now().isoformat(),
+                                "success": True,
+                            },
+                        }
+                        spools["registers"].write(register)
+                        fulltext_index.index_record(register)
+                        successful_regs += 1
 
                     print(f"   ✅ Успешно извлечено {successful_regs} записей регистра")
                     all_results["metadata"]["total_registers"] += successful_regs
 
-            # Сохраняем результат в JSON
-            output_file = "data/results/all_available_data.json"
-            with open(output_file, "w", encoding="utf-8") as f:  # type: ignore
-                json.dump(all_results, f, ensure_ascii=False, indent=2, default=str)  # type: ignore
+            # Сохраняем результат в JSON потоково из JSONL spool файлов
+            for spool in spools.values():
+                spool.close()
+            index_stats = fulltext_index.get_stats()
+            fulltext_index.close()
+            print(
+                f"🔎 Полнотекстовый индекс: {index_stats['records']:,} записей, "
+                f"{index_stats['terms']:,} терминов → {DEFAULT_INDEX_PATH}",
+            )
+            all_results.update(spools)
+            write_json_sections(
+                output_file,
+                {section: spools[section] for section in spools},
+                all_results["metadata"],
+            )
 
             print(f"\n💾 Результат сохранен в: {output_file}")
 
@@ -1521,6 +1611,12 @@ def extract_all_available_data() -> None:
             # КОНВЕРТИРУЕМ В PARQUET И DUCKDB
             convert_to_parquet_duckdb(all_results)
 
+            # Время этапов по таблицам (EXTRACTOR_PROFILE=stages|cprofile|sample)
+            profile_file = os.path.join("data/results", DEFAULT_REPORT_FILE)
+            if get_profiler().write_report(profile_file):
+                print(f"\n⏱️ Профиль этапов сохранен в: {profile_file}")
+                print(get_profiler().summary())
+
             print("\n✅ Извлечение всех доступных данных завершено")
 
     except Exception as e:
@@ -1537,83 +1633,50 @@ def convert_to_parquet_duckdb(all_results: dict) -> None:
     print("\n🦆 Конвертация в Parquet и DuckDB...")
 
     try:
+        from src.utils.document_tables import DocumentTablesWriter
+        from src.utils.rollups import RollupStore
+
         # Создаем директории
         os.makedirs("data/results/parquet", exist_ok=True)
         os.makedirs("data/results/duckdb", exist_ok=True)
 
-        # Конвертируем документы в DataFrame
-        documents_data = []
-        for doc in all_results.get("documents", []):
-            # Извлекаем основные поля
-            doc_data = {
-                "id": doc.get("id", ""),
-                "table_name": doc.get("table_name", ""),
-                "row_index": doc.get("row_index", 0),
-                "document_type": doc.get("document_type", "Неизвестно"),
-                "document_number": doc.get("document_number", "N/A"),
-                "document_date": doc.get("document_date", "N/A"),
-                "store_name": doc.get("store_name", "N/A"),
-                "store_code": doc.get("store_code", "N/A"),
-                "total_amount": doc.get("total_amount", 0.0),
-                "currency": doc.get("currency", "RUB"),
-                "supplier_name": doc.get("supplier_name", "N/A"),
-                "buyer_name": doc.get("buyer_name", "N/A"),
-                "blob_content": doc.get("blob_content", ""),
-                "total_blobs": doc.get("extraction_stats", {}).get("total_blobs", 0),
-                "successful_blobs": doc.get("extraction_stats", {}).get(
-                    "successful",
-                    0,
-                ),
-                "failed_blobs": doc.get("extraction_stats", {}).get("failed", 0),
-            }
-
-            # Добавляем поля из fields
-            for field_name, value in doc.get("fields", {}).items():
-                if isinstance(value, (str, int, float, bool)):
-                    doc_data[f"field_{field_name}"] = value
-                else:
-                    doc_data[f"field_{field_name}"] = str(value)
-
-            # Добавляем информацию о BLOB полях
-            blob_count = 0
-            for blob_name, blob_data in doc.get("blobs", {}).items():
-                if blob_data.get("extraction_methods"):
-                    blob_count += 1
-                    doc_data[f"blob_{blob_name}_methods"] = ",".join(
-                        blob_data.get("extraction_methods", []),
-                    )
-                    doc_data[f"blob_{blob_name}_size"] = blob_data.get("size", 0)
-
-            doc_data["blob_fields_count"] = blob_count
-            documents_data.append(doc_data)
-
-        if documents_data:
-            # Создаем DataFrame
-            df = pd.DataFrame(documents_data)
+        # Один проход по spool: узкий индекс documents и типизированная
+        # таблица на каждую 1CD таблицу (вместо колонки на каждое поле)
+        documents = all_results.get("documents", [])
+        writer = DocumentTablesWriter(
+            "data/results/parquet",
+            all_results.get("metadata", {}).get("table_fields", {}),
+        )
+        with writer:
+            for doc in documents:
+                writer.write(doc)
+        table_rows = {name: sink.rows_written for name, sink in writer.tables.items()}
 
-            # Сохраняем в Parquet
-            parquet_file = "data/results/parquet/documents.parquet"
-            df.to_parquet(parquet_file, index=False)
-            print(f"✅ Parquet файл создан: {parquet_file}")
+        if table_rows:
+            print(
+                f"✅ Parquet индекс документов: {writer.index_dir} "
+                f"({writer.index.rows_written:,} строк)",
+            )
+            for table_name, rows in table_rows.items():
+                print(f"   📄 {writer.table_dir(table_name)}: {rows:,} строк")
 
             # Создаем DuckDB базу
             duckdb_file = "data/results/duckdb/analysis.duckdb"
             con = duckdb.connect(duckdb_file)
 
-            # Загружаем данные в DuckDB
-            con.execute(
-                f"CREATE OR REPLACE TABLE documents AS SELECT * FROM '{parquet_file}'",
-            )
+            # View поверх датасетов: documents - индекс, "<таблица 1CD>" - поля
+            # таблицы (соединение по table_name, row_index); фильтры по месяцу
+            # отсекают файлы, остальные - группы строк по min/max статистике
+            writer.create_views(con)
 
-            # Создаем индексы для быстрого поиска
-            con.execute(
-                "CREATE INDEX IF NOT EXISTS idx_table_name ON documents(table_name)",
-            )
-            con.execute(
-                "CREATE INDEX IF NOT EXISTS idx_blob_count ON documents(blob_fields_count)",
+            # Сводные таблицы: пересчитываются только измененные месяцы
+            refreshed = RollupStore(con).refresh(
+                {"documents": writer.index_dir, "table_parts": writer.table_parts_dir},
             )
+            for rollup_name, months in refreshed.items():
+                print(f"🧮 {rollup_name}: пересчитано месяцев {months}")
 
-            # Выполняем аналитические запросы
+            # Выполняем аналитические запросы по сводным таблицам
             print("\n📊 Аналитические запросы:")
 
             # Статистика по таблицам
@@ -1621,11 +1684,10 @@ def convert_to_parquet_duckdb(all_results: dict) -> None:
                 """
                 SELECT
                     table_name,
-                    COUNT(*) as total_documents,
-                    SUM(blob_fields_count) as total_blobs,
-                    AVG(blob_fields_count) as avg_blobs_per_doc
-                FROM documents
-                GROUP BY table_name
+                    documents as total_documents,
+                    total_blobs,
+                    ROUND(total_blobs / documents, 2) as avg_blobs_per_doc
+                FROM blob_success_rates
                 ORDER BY total_documents DESC
             """,
             ).fetchdf()
@@ -1635,14 +1697,9 @@ def convert_to_parquet_duckdb(all_results: dict) -> None:
             # Топ таблиц по BLOB полям
             result = con.execute(
                 """
-                SELECT
-                    table_name,
-                    SUM(successful_blobs) as successful_blobs,
-                    SUM(failed_blobs) as failed_blobs,
-                    ROUND(SUM(successful_blobs) * 100.0 / (SUM(successful_blobs) + SUM(failed_blobs)), 2) as success_rate
-                FROM documents
+                SELECT table_name, successful_blobs, failed_blobs, success_rate
+                FROM blob_success_rates
                 WHERE successful_blobs + failed_blobs > 0
-                GROUP BY table_name
                 ORDER BY successful_blobs DESC
                 LIMIT 10
             """,
@@ -1650,14 +1707,14 @@ def convert_to_parquet_duckdb(all_results: dict) -> None:
             print("\n🏆 Топ таблиц по BLOB полям:")
             print(result)
 
-            # Анализ всех документов без фильтрации по ключевым словам
-            print("\n📊 Анализ всех документов:")
+            # Документы по типу и месяцу
+            print("\n📊 Документы по типу и месяцу:")
             result = con.execute(
                 """
-                SELECT table_name, COUNT(*) as total_documents
-                FROM documents
-                GROUP BY table_name
-                ORDER BY total_documents DESC
+                SELECT document_type, year_month, SUM(documents) as total_documents
+                FROM documents_by_type_month
+                GROUP BY document_type, year_month
+                ORDER BY year_month, total_documents DESC
                 """,
             ).fetchdf()
             print(result)
@@ -1818,9 +1875,12 @@ def create_all_available_xml(documents: dict) -> None:
 """
     )
 
-    # Добавляем все документы
-    for i, doc in enumerate(documents["documents"], 1):
-        xml_content += f"""    <Document>
+    # Документы пишутся в файл по одному, без накопления всего XML в памяти
+    with open("all_available_data.xml", "w", encoding="utf-8") as xml_file:
+        xml_file.write(xml_content)
+
+        for i, doc in enumerate(documents["documents"], 1):
+            xml_content = f"""    <Document>
       <ID>{doc["id"]}</ID>
       <TableName>{doc["table_name"]}</TableName>
       <RowIndex>{doc["row_index"]}</RowIndex>
@@ -1831,37 +1891,34 @@ def create_all_available_xml(documents: dict) -> None:
       </ExtractionStats>
       <Fields>
 """
-        for field_name, value in doc["fields"].items():
-            xml_content += f"""        <{field_name}>{value}</{field_name}>
+            for field_name, value in doc["fields"].items():
+                xml_content += f"""        <{field_name}>{value}</{field_name}>
 """
-        xml_content += """      </Fields>
+            xml_content += """      </Fields>
       <Blobs>
 """
-        for blob_name, blob_data in doc["blobs"].items():
-            xml_content += f"""        <{blob_name}>
+            for blob_name, blob_data in doc["blobs"].items():
+                xml_content += f"""        <{blob_name}>
           <FieldType>{blob_data["field_type"]}</FieldType>
           <Size>{blob_data["size"]}</Size>
           <ExtractionMethods>{", ".join(blob_data["extraction_methods"])}</ExtractionMethods>
 """
-            # Добавляем содержимое для каждого метода
-            for method in ["value", "iterator", "bytes"]:
-                if method in blob_data:
-                    content = blob_data[method]["content"]
-                    if isinstance(content, bytes):
-                        content = content.hex()
-                    xml_content += f"""          <{method.capitalize()}>{content}</{method.capitalize()}>
+                # Добавляем содержимое для каждого метода
+                for method in ["value", "iterator", "bytes"]:
+                    if method in blob_data:
+                        content = blob_data[method]["content"]
+                        if isinstance(content, bytes):
+                            content = content.hex()
+                        xml_content += f"""          <{method.capitalize()}>{content}</{method.capitalize()}>
 """
-            xml_content += f"""        </{blob_name}>
+                xml_content += f"""        </{blob_name}>
 """
-        xml_content += """      </Blobs>
+            xml_content += """      </Blobs>
     </Document>
 """
+            xml_file.write(xml_content)
 
-    xml_content += """  </Documents>
-</Documents>"""
-
-    with open("all_available_data.xml", "w", encoding="utf-8") as f:
-        f.write(xml_content)
+        xml_file.write("  </Documents>\n</Documents>")
 
     print("   📄 Создан XML со всеми доступными данными: all_available_data.xml")
 
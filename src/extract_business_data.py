@@ -15,9 +15,13 @@ sys.path.insert(
     0,
     os.path.join(os.path.dirname(__file__), "..", "tools", "onec_dtools"),
 )
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from onec_dtools.database_reader import DatabaseReader
 
+from src.utils.extraction_planner import ExtractionPlan, critical_tables
+from src.utils.table_reader import TableReader
+
 # Бизнес-поля для извлечения
 BUSINESS_FIELDS: set[str] = {
     "_NUMBER",  # номер документа
@@ -47,15 +51,6 @@ TECHNICAL_FIELDS: set[str] = {
     "_VERSION",
 }
 
-# Критические таблицы для извлечения
-CRITICAL_TABLES: list[str] = [
-    "_DOCUMENTJOURNAL5354",  # 4,458,509 записей
-    "_DOCUMENTJOURNAL5287",  # 2,798,531 записей
-    "_DOCUMENTJOURNAL5321",  # 973,975 записей
-    "_DOCUMENT138",  # 861,178 записей
-    "_DOCUMENT156",  # 571,213 записей
-]
-
 # Справочники для извлечения
 REFERENCE_TABLES: list[str] = [
     "_REFERENCE10",  # Номенклатура
@@ -84,6 +79,20 @@ def filter_business_fields(record_dict: dict[str, Any]) -> dict[str, Any]:
     return filtered
 
 
+def business_columns(reader: TableReader) -> list[str]:
+    """
+    Проекция для filter_business_fields: бизнес-поля и BLOB поля,
+    кроме технических (остальные колонки не декодируются)
+    """
+    blob_columns = set(reader.blob_columns())
+    return [
+        column
+        for column in reader.columns
+        if column in BUSINESS_FIELDS
+        or (column in blob_columns and column not in TECHNICAL_FIELDS)
+    ]
+
+
 def extract_blob_content(blob_obj: Any) -> dict[str, Any]:
     """Извлекает содержимое BLOB поля"""
     blob_data: dict[str, Any] = {
@@ -131,11 +140,14 @@ def extract_blob_content(blob_obj: Any) -> dict[str, Any]:
     return blob_data
 
 
-def extract_critical_tables(db: DatabaseReader) -> dict[str, list[dict]]:
-    """Извлекает критические таблицы"""
+def extract_critical_tables(
+    db: DatabaseReader,
+    plan: ExtractionPlan | None = None,
+) -> dict[str, list[dict]]:
+    """Извлекает критические таблицы (самые дорогие документы и журналы плана)"""
     results = {}
 
-    for table_name in CRITICAL_TABLES:
+    for table_name in critical_tables(db, plan=plan):
         if table_name not in db.tables:
             print(f"   ❌ Таблица {table_name} не найдена")
             continue
@@ -143,11 +155,9 @@ def extract_critical_tables(db: DatabaseReader) -> dict[str, list[dict]]:
         print(f"   🔄 Извлечение {table_name}...")
         table = db.tables[table_name]
 
-        # Получаем количество записей без вызова len()
+        # Количество записей по длине объекта данных (без чтения строк)
         try:
-            table_length = 0
-            for _ in table:
-                table_length += 1
+            table_length = len(table)
             print(f"      📊 Всего записей: {table_length:,}")
         except Exception as e:
             print(f"      ⚠️ Не удалось определить размер таблицы: {e}")
@@ -155,17 +165,15 @@ def extract_critical_tables(db: DatabaseReader) -> dict[str, list[dict]]:
 
         table_records = []
         successful_records = 0
-
-        # Обрабатываем все записи
-        for i, row in enumerate(table):
+        reader = TableReader(table, table_name)
+
+        # Обрабатываем все записи (НЕ пропускаем пустые), декодируя только
+        # колонки, которые оставит filter_business_fields
+        for i, row_dict in reader.iter_rows(
+            business_columns(reader),
+            skip_empty=False,
+        ):
             try:
-                # НЕ пропускаем пустые записи - обрабатываем все
-                # if hasattr(row, 'is_empty') and row.is_empty:
-                #     continue
-
-                # Извлекаем данные
-                row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
                 # Проверяем, есть ли данные в записи
                 if not row_dict:
                     continue
@@ -235,11 +243,9 @@ def extract_reference_tables(db: DatabaseReader) -> dict[str, list[dict]]:
 
         print(f"   🔄 Извлечение справочника {table_name}...")
         table = db.tables[table_name]
-        # Получаем количество записей без вызова len()
+        # Количество записей по длине объекта данных (без чтения строк)
         try:
-            table_length = 0
-            for _ in table:
-                table_length += 1
+            table_length = len(table)
             print(f"      📊 Всего записей: {table_length:,}")
         except Exception as e:
             print(f"      ⚠️ Не удалось определить размер таблицы: {e}")
@@ -247,17 +253,15 @@ def extract_reference_tables(db: DatabaseReader) -> dict[str, list[dict]]:
 
         table_records = []
         successful_records = 0
-
-        # Обрабатываем все записи
-        for i, row in enumerate(table):
+        reader = TableReader(table, table_name)
+
+        # Обрабатываем все записи (НЕ пропускаем пустые), декодируя только
+        # колонки, которые оставит filter_business_fields
+        for i, row_dict in reader.iter_rows(
+            business_columns(reader),
+            skip_empty=False,
+        ):
             try:
-                # НЕ пропускаем пустые записи - обрабатываем все
-                # if hasattr(row, 'is_empty') and row.is_empty:
-                #     continue
-
-                # Извлекаем данные
-                row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
                 # Проверяем, есть ли данные в записи
                 if not row_dict:
                     continue
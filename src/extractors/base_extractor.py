@@ -25,6 +25,7 @@ from onec_dtools.database_reader import DatabaseReader
 
 from src.utils.blob_processor import BlobProcessor
 from src.utils.blob_utils import safe_get_blob_content
+from src.utils.incremental_state import IncrementalState, state_file_for
 
 logger = logging.getLogger(__name__)
 
@@ -38,14 +39,28 @@ class BaseExtractor(ABC):
     чтобы устранить дублирование кода и улучшить поддерживаемость.
     """
 
-    def __init__(self, db_path: str = "data/raw/1Cv8.1CD"):
+    # Файл результатов в общем проходе ScanScheduler (в каталоге output_dir)
+    results_file = "extractor_results.json"
+
+    def __init__(
+        self,
+        db_path: str = "data/raw/1Cv8.1CD",
+        incremental: bool = False,
+        state_file: str | None = None,
+    ):
         """
         Инициализация базового extractor
 
         Args:
             db_path: Путь к файлу базы данных 1С
+            incremental: Обрабатывать только строки, измененные с прошлого запуска
+            state_file: Файл отпечатков таблиц для инкрементального режима
+                (по умолчанию - свой файл для каждого класса extractor)
         """
         self.db_path = db_path
+        self.incremental = incremental
+        self.state_file = state_file or state_file_for(self.__class__.__name__)
+        self.incremental_state: IncrementalState | None = None
         self.db: DatabaseReader | None = None
         self.db_file: Any | None = None  # ИСПРАВЛЕНО: Добавляем файловый объект
         self.results: dict[str, Any] = {}
@@ -130,6 +145,40 @@ class BaseExtractor(ABC):
         """
         return safe_get_blob_content(value)
 
+    def changed_row_ranges(
+        self,
+        table_name: str,
+        table: Any | None = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Диапазоны строк таблицы для обработки (ScanScheduler читает только их)
+
+        Args:
+            table_name: Имя таблицы
+            table: Таблица (по умолчанию - из открытой базы)
+
+        Returns:
+            List[tuple]: [(start_row, stop_row)] - вся таблица или, в инкрементальном
+            режиме, только добавленные и измененные с прошлого запуска строки
+        """
+        if table is None:
+            if not self.db or table_name not in self.db.tables:
+                return []
+            table = self.db.tables[table_name]
+
+        if not self.incremental:
+            return [(0, len(table))] if len(table) else []
+
+        if self.incremental_state is None:
+            self.incremental_state = IncrementalState(self.state_file)
+            self.metadata["incremental"] = True
+        return self.incremental_state.plan(table_name, table).ranges
+
+    def commit_incremental(self) -> None:
+        """Фиксирует отпечатки таблиц после успешного извлечения"""
+        if self.incremental and self.incremental_state is not None:
+            self.incremental_state.commit_pending()
+
     def save_results(self, output_file: str) -> bool:
         """
         Сохранение результатов в JSON файл
@@ -179,13 +228,62 @@ class BaseExtractor(ABC):
             Dict[str, Any]: Результаты извлечения
         """
 
-    def run(self) -> dict[str, Any]:
+    # Протокол посетителя общего прохода (src/extractors/scan_scheduler.py)
+
+    def begin_scan(self) -> dict[str, int | None]:
+        """
+        Подготовка результатов перед общим проходом по таблицам
+
+        Returns:
+            Dict[str, Optional[int]]: План - таблица → число первых строк
+            для просмотра (None - вся таблица)
+        """
+        return {}
+
+    def begin_table(self, table_name: str, table: Any) -> None:
+        """Начало строк таблицы из плана"""
+
+    def visit_row(
+        self,
+        table_name: str,
+        row_index: int,
+        row: dict[str, Any],
+    ) -> None:
+        """
+        Обработка непустой строки таблицы из плана
+
+        Args:
+            table_name: Имя таблицы
+            row_index: Номер строки
+            row: Декодированная строка {поле: значение}, общая для всех
+                посетителей - не изменять
+        """
+
+    def end_table(self, table_name: str, table: Any) -> None:
+        """Все строки таблицы из плана просмотрены"""
+
+    def finish_scan(self) -> dict[str, Any]:
+        """
+        Завершение общего прохода
+
+        Returns:
+            Dict[str, Any]: Результаты извлечения
+        """
+        return self.results
+
+    def run(self, incremental: bool | None = None) -> dict[str, Any]:
         """
         Запуск полного процесса извлечения
 
+        Args:
+            incremental: Переопределяет режим, заданный в конструкторе
+
         Returns:
             Dict[str, Any]: Результаты извлечения
         """
+        if incremental is not None:
+            self.incremental = incremental
+
         logger.info(f"🚀 Запуск {self.__class__.__name__}")
         logger.info("=" * 60)
 
@@ -198,6 +296,9 @@ class BaseExtractor(ABC):
             self.results = self.extract()
             self.results["metadata"] = self.metadata
 
+            # Отпечатки таблиц фиксируются только после успешного извлечения
+            self.commit_incremental()
+
             logger.info("✅ Извлечение завершено успешно")
             return self.results
 
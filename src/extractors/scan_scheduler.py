@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""
+ScanScheduler - общий проход по таблицам для нескольких extractors
+Extractors регистрируются как посетители потока строк: каждая таблица
+читается, а каждая строка декодируется один раз, и все посетители,
+запросившие таблицу, получают одну и ту же строку. Результаты каждого
+посетителя по-прежнему сохраняются в его собственный файл.
+"""
+
+import bisect
+import logging
+import math
+import os
+from collections.abc import Iterable
+from typing import Any
+
+from src.extractors.base_extractor import BaseExtractor
+from src.utils.incremental_state import merge_ranges
+from src.utils.stage_profiler import DEFAULT_REPORT_FILE, get_profiler
+from src.utils.table_reader import TableReader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = "data/results"
+
+
+def clip_ranges(
+    ranges: list[tuple[int, int]],
+    limit: int | None,
+) -> list[tuple[int, int]]:
+    """Диапазоны строк, обрезанные лимитом плана (None - без лимита)"""
+    if limit is None:
+        return ranges
+    return [(start, min(stop, limit)) for start, stop in ranges if start < limit]
+
+
+def row_in_ranges(row_index: int, ranges: list[tuple[int, int]]) -> bool:
+    """Строка входит в один из отсортированных непересекающихся диапазонов"""
+    position = bisect.bisect_right(ranges, (row_index, math.inf)) - 1
+    return position >= 0 and row_index < ranges[position][1]
+
+
+class ScanScheduler:
+    """
+    JTBD:
+    Как набор поисковых extractors, я хочу читать базу одним проходом,
+    в котором каждая строка декодируется один раз и раздается всем
+    посетителям, чтобы запуск всех extractors стоил одного сканирования,
+    а не пяти.
+    """
+
+    def __init__(self, visitors: Iterable[BaseExtractor] = ()) -> None:
+        self.visitors: list[BaseExtractor] = list(visitors)
+        self.stats: dict[str, int] = {
+            "tables_scanned": 0,
+            "rows_decoded": 0,
+            "rows_visited": 0,
+        }
+
+    def register(self, visitor: BaseExtractor) -> "ScanScheduler":
+        self.visitors.append(visitor)
+        return self
+
+    def scan(self, db: Any) -> list[dict[str, Any]]:
+        """
+        Один проход по таблицам, запрошенным посетителями.
+        Возвращает результаты посетителей в порядке регистрации
+        """
+        plans = [visitor.begin_scan() for visitor in self.visitors]
+
+        # Таблицы в порядке первого упоминания; читается объединение
+        # диапазонов посетителей, обрезанных их лимитами
+        table_names = list(dict.fromkeys(name for plan in plans for name in plan))
+
+        for table_name in table_names:
+            table = db.tables[table_name]
+            # Посетитель читает свои диапазоны строк: вся таблица или, в
+            # инкрементальном режиме, строки, измененные с его прошлого запуска
+            readers = []
+            for visitor, plan in zip(self.visitors, plans):
+                if table_name in plan:
+                    ranges = visitor.changed_row_ranges(table_name, table)
+                    readers.append((visitor, clip_ranges(ranges, plan[table_name])))
+            for visitor, _ranges in readers:
+                visitor.begin_table(table_name, table)
+
+            # Строка декодируется один раз; посетители не должны ее изменять
+            reader = TableReader(table, table_name)
+            scan_ranges = merge_ranges(
+                [row_range for _visitor, ranges in readers for row_range in ranges],
+            )
+            for start, stop in scan_ranges:
+                for row_index, row in reader.iter_rows(start=start, stop=stop):
+                    self.stats["rows_decoded"] += 1
+                    for visitor, ranges in readers:
+                        if not row_in_ranges(row_index, ranges):
+                            continue
+                        try:
+                            visitor.visit_row(table_name, row_index, row)
+                            self.stats["rows_visited"] += 1
+                        except Exception as e:
+                            logger.warning(
+                                f"Ошибка обработки записи {row_index} в таблице "
+                                f"{table_name} ({visitor.__class__.__name__}): {e}",
+                            )
+
+            for visitor, _ranges in readers:
+                visitor.end_table(table_name, table)
+            self.stats["tables_scanned"] += 1
+
+        return [visitor.finish_scan() for visitor in self.visitors]
+
+    def run(self, output_dir: str = DEFAULT_OUTPUT_DIR) -> dict[str, Any]:
+        """
+        Открывает базу один раз, выполняет общий проход и сохраняет
+        результаты каждого посетителя в output_dir/<results_file>
+        """
+        if not self.visitors:
+            return {}
+
+        opener = self.visitors[0]
+        if not opener.open_database():
+            return {"error": "Не удалось открыть базу данных"}
+
+        all_results: dict[str, Any] = {}
+        profiler = get_profiler()
+        try:
+            for visitor in self.visitors:
+                visitor.db = opener.db
+
+            with profiler.profiling():
+                scan_results = self.scan(opener.db)
+            for visitor, results in zip(self.visitors, scan_results):
+                visitor.results = results
+                visitor.results["metadata"] = visitor.metadata
+                # Отпечатки фиксируются только после записи результатов
+                if visitor.save_results(
+                    os.path.join(output_dir, visitor.results_file),
+                ):
+                    visitor.commit_incremental()
+                all_results[visitor.__class__.__name__] = visitor.results
+
+            print(
+                f"✅ Общий проход: {self.stats['tables_scanned']} таблиц, "
+                f"{self.stats['rows_decoded']:,} строк декодировано для "
+                f"{len(self.visitors)} extractors",
+            )
+            # Время этапов по таблицам рядом с результатами (EXTRACTOR_PROFILE)
+            if profiler.write_report(os.path.join(output_dir, DEFAULT_REPORT_FILE)):
+                print(profiler.summary())
+        except Exception as e:
+            logger.error(f"❌ Ошибка общего прохода: {e}")
+            all_results = {"error": str(e)}
+        finally:
+            for visitor in self.visitors:
+                visitor.db = None
+            if opener.db_file:
+                opener.db_file.close()
+                opener.db_file = None
+
+        return all_results
+
+
+def default_visitors(db_path: str = "data/raw/1Cv8.1CD") -> list[BaseExtractor]:
+    """Все поисковые extractors из src/extractors"""
+    from src.extractors.search_all_document_types import AllDocumentTypesExtractor
+    from src.extractors.search_all_missing_documents import (
+        AllMissingDocumentsExtractor,
+    )
+    from src.extractors.search_document_names_in_blob import (
+        DocumentNamesBlobExtractor,
+    )
+    from src.extractors.search_documents_by_criteria import (
+        DocumentsByCriteriaExtractor,
+    )
+    from src.extractors.search_quality_documents import QualityDocumentsExtractor
+
+    return [
+        AllDocumentTypesExtractor(db_path),
+        AllMissingDocumentsExtractor(db_path),
+        DocumentNamesBlobExtractor(db_path),
+        DocumentsByCriteriaExtractor(db_path),
+        QualityDocumentsExtractor(db_path),
+    ]
+
+
+def run_all_extractors(
+    db_path: str = "data/raw/1Cv8.1CD",
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+) -> dict[str, Any]:
+    """Запуск всех поисковых extractors за один проход по базе"""
+    return ScanScheduler(default_visitors(db_path)).run(output_dir)
+
+
+if __name__ == "__main__":
+    run_all_extractors()
@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Any
 
 from src.extractors.base_extractor import BaseExtractor
+from src.extractors.scan_scheduler import ScanScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -18,20 +19,33 @@ class AllDocumentTypesExtractor(BaseExtractor):
     чтобы отследить полный путь от сырья до цветочков в магазине.
     """
 
+    results_file = "all_document_types_search_results.json"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Состояние общего прохода (сбрасывается в begin_scan)
+        self.scan_results: dict[str, Any] = {}
+        self.samples: list[dict[str, Any]] = []
+        self.document_tables: set[str] = set()
+
     def extract(self) -> dict[str, Any]:
         """
         Поиск всех типов документов согласно уточненному плану
         ЦЕЛЬ: Отследить весь путь от сырья до цветочков в магазине
         """
-        print("🔍 ПОИСК ВСЕХ ТИПОВ ДОКУМЕНТОВ")
-        print("🎯 ЦЕЛЬ: Полный путь цветов от сырья до магазина")
-        print("=" * 60)
-
         if self.db is None:
             print("❌ База данных не открыта")
             return {"error": "База данных не открыта"}
 
-        results: dict[str, Any] = {
+        return ScanScheduler([self]).scan(self.db)[0]
+
+    def begin_scan(self) -> dict[str, int | None]:
+        """План: первые 20 строк 5 документов и первые 10 строк 3 справочников"""
+        print("🔍 ПОИСК ВСЕХ ТИПОВ ДОКУМЕНТОВ")
+        print("🎯 ЦЕЛЬ: Полный путь цветов от сырья до магазина")
+        print("=" * 60)
+
+        self.scan_results = {
             "document_types": {},
             "references": {},
             "accumulation_registers": {},
@@ -39,9 +53,10 @@ class AllDocumentTypesExtractor(BaseExtractor):
             "metadata": {
                 "extraction_date": datetime.now().isoformat(),
                 "source_file": self.metadata["source_file"],
-                "total_tables": len(self.db.tables),
+                "total_tables": len(self.db.tables) if self.db else 0,
             },
         }
+        self.samples = []
 
         # Получаем все типы таблиц
         document_tables = self.get_document_tables()
@@ -52,111 +67,65 @@ class AllDocumentTypesExtractor(BaseExtractor):
         print(f"📚 Справочники: {len(reference_tables)}")
         print(f"📊 Регистры: {len(register_tables)}")
 
-        # Анализируем документы
-        for table_name in document_tables[:5]:  # Ограничиваем для тестирования
+        # Ограничиваем для тестирования
+        self.document_tables = set(document_tables[:5])
+        plan: dict[str, int | None] = dict.fromkeys(document_tables[:5], 20)
+        plan.update(dict.fromkeys(reference_tables[:3], 10))
+        return plan
+
+    def begin_table(self, table_name: str, table: Any) -> None:
+        if table_name in self.document_tables:
             print(f"\n🔍 Анализ документа: {table_name}")
-            table = self.db.tables[table_name]
-            print(f"   📈 Всего записей: {len(table):,}")
-
-            # Анализируем первые 20 записей
-            sample_size = min(20, len(table))
-            doc_samples = []
-
-            for i in range(sample_size):
-                try:
-                    row = table[i]
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
-                        # Извлекаем основные поля
-                        doc_info: dict[str, Any] = {
-                            "table_name": table_name,
-                            "row_index": i,
-                            "fields": {},
-                            "field_count": len(row_dict),
-                        }
-
-                        # Анализируем поля
-                        for field_name, value in row_dict.items():
-                            if isinstance(value, (str, int, float, bool)):
-                                doc_info["fields"][field_name] = str(value)[
-                                    :100
-                                ]  # Ограничиваем длину
-
-                        doc_samples.append(doc_info)
-
-                except Exception as e:
-                    logger.warning(
-                        f"Ошибка обработки записи {i} в таблице {table_name}: {e}",
-                    )
-                    continue
-
-            if doc_samples:
-                results["document_types"][table_name] = {
-                    "total_records": len(table),
-                    "sample_records": doc_samples[:5],  # Первые 5 записей
-                    "field_names": (
-                        list(doc_samples[0]["fields"].keys())
-                        if doc_samples and doc_samples[0].get("fields")
-                        else []
-                    ),
-                }
-                print(f"   ✅ Найдено {len(doc_samples)} образцов документов")
-
-        # Анализируем справочники
-        for table_name in reference_tables[:3]:  # Ограничиваем для тестирования
+        else:
             print(f"\n📚 Анализ справочника: {table_name}")
-            table = self.db.tables[table_name]
-            print(f"   📈 Всего записей: {len(table):,}")
-
-            # Анализируем первые 10 записей
-            sample_size = min(10, len(table))
-            ref_samples = []
-
-            for i in range(sample_size):
-                try:
-                    row = table[i]
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
-                        ref_info = {
-                            "table_name": table_name,
-                            "row_index": i,
-                            "fields": {},
-                        }
-
-                        for field_name, value in row_dict.items():
-                            if isinstance(value, (str, int, float, bool)):
-                                if "fields" in ref_info and isinstance(
-                                    ref_info["fields"],
-                                    dict,
-                                ):
-                                    ref_info["fields"][field_name] = str(value)[:100]
-
-                        ref_samples.append(ref_info)
-
-                except Exception as e:
-                    logger.warning(
-                        f"Ошибка обработки записи {i} в таблице {table_name}: {e}",
-                    )
-                    continue
-
-            if ref_samples:
-                results["references"][table_name] = {
-                    "total_records": len(table),
-                    "sample_records": ref_samples[:3],  # Первые 3 записи
-                    "field_names": (
-                        list(ref_samples[0]["fields"].keys())
-                        if ref_samples
-                        and ref_samples[0]
-                        and "fields" in ref_samples[0]
-                        and isinstance(ref_samples[0]["fields"], dict)
-                        else []
-                    ),
-                }
-                print(f"   ✅ Найдено {len(ref_samples)} образцов справочников")
-
-        return results
+        print(f"   📈 Всего записей: {len(table):,}")
+        self.samples = []
+
+    def visit_row(
+        self,
+        table_name: str,
+        row_index: int,
+        row: dict[str, Any],
+    ) -> None:
+        # Извлекаем основные поля
+        sample: dict[str, Any] = {
+            "table_name": table_name,
+            "row_index": row_index,
+            "fields": {},
+        }
+        if table_name in self.document_tables:
+            sample["field_count"] = len(row)
+
+        # Анализируем поля
+        for field_name, value in row.items():
+            if isinstance(value, (str, int, float, bool)):
+                # Ограничиваем длину
+                sample["fields"][field_name] = str(value)[:100]
+
+        self.samples.append(sample)
+
+    def end_table(self, table_name: str, table: Any) -> None:
+        if not self.samples:
+            return
+
+        field_names = list(self.samples[0]["fields"].keys())
+        if table_name in self.document_tables:
+            self.scan_results["document_types"][table_name] = {
+                "total_records": len(table),
+                "sample_records": self.samples[:5],  # Первые 5 записей
+                "field_names": field_names,
+            }
+            print(f"   ✅ Найдено {len(self.samples)} образцов документов")
+        else:
+            self.scan_results["references"][table_name] = {
+                "total_records": len(table),
+                "sample_records": self.samples[:3],  # Первые 3 записи
+                "field_names": field_names,
+            }
+            print(f"   ✅ Найдено {len(self.samples)} образцов справочников")
+
+    def finish_scan(self) -> dict[str, Any]:
+        return self.scan_results
 
 
 def search_all_document_types() -> dict[str, Any]:
@@ -5,6 +5,9 @@ from datetime import datetime
 from typing import Any
 
 from src.extractors.base_extractor import BaseExtractor
+from src.extractors.scan_scheduler import ScanScheduler
+from src.utils.keyword_matcher import get_matcher
+from src.utils.stage_profiler import STAGE_KEYWORDS, profiled
 
 logger = logging.getLogger(__name__)
 
@@ -18,20 +21,55 @@ class AllMissingDocumentsExtractor(BaseExtractor):
     чтобы обеспечить полноту данных для JTBD сценариев.
     """
 
+    results_file = "all_missing_documents_search_results.json"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # JTBD ключевые слова для поиска
+        self.jtbd_keywords = {
+            "цвета": ["цвет", "красный", "белый", "розовый", "желтый", "синий"],
+            "букеты": [
+                "букет",
+                "композиция",
+                "аранжировка",
+                "свадебный",
+                "праздничный",
+            ],
+            "склады": ["склад", "хранилище", "холодильник", "температура"],
+            "подразделения": ["отдел", "подразделение", "магазин", "филиал"],
+            "поставщики": ["поставщик", "производитель", "ферма", "выращивание"],
+        }
+
+        # Слово → категории; все слова компилируются в один набор
+        self.keyword_categories: dict[str, list[str]] = {}
+        for category, keywords in self.jtbd_keywords.items():
+            for keyword in keywords:
+                self.keyword_categories.setdefault(keyword, []).append(category)
+        self.jtbd_matcher = get_matcher(self.keyword_categories)
+
+        # Состояние общего прохода (сбрасывается в begin_scan)
+        self.scan_results: dict[str, Any] = {}
+        self.jtbd_matches: list[dict[str, Any]] = []
+        self.reference_tables: set[str] = set()
+
     def extract(self) -> dict[str, Any]:
         """
         Поиск всех недостающих документов для JTBD сценариев
         ЦЕЛЬ: Найти справочники, регистры, документы с цветами и типами букетов
         """
-        print("🔍 ПОИСК ВСЕХ НЕДОСТАЮЩИХ ДОКУМЕНТОВ")
-        print("🎯 ЦЕЛЬ: JTBD сценарии - цвета, типы букетов, склады, подразделения")
-        print("=" * 60)
-
         if self.db is None:
             print("❌ База данных не открыта")
             return {"error": "База данных не открыта"}
 
-        results: dict[str, Any] = {
+        return ScanScheduler([self]).scan(self.db)[0]
+
+    def begin_scan(self) -> dict[str, int | None]:
+        """План: первые 20 строк 5 справочников и первые 10 строк 3 регистров"""
+        print("🔍 ПОИСК ВСЕХ НЕДОСТАЮЩИХ ДОКУМЕНТОВ")
+        print("🎯 ЦЕЛЬ: JTBD сценарии - цвета, типы букетов, склады, подразделения")
+        print("=" * 60)
+
+        self.scan_results = {
             "missing_documents": {},
             "found_references": {},
             "found_registers": {},
@@ -39,24 +77,11 @@ class AllMissingDocumentsExtractor(BaseExtractor):
             "metadata": {
                 "extraction_date": datetime.now().isoformat(),
                 "source_file": self.metadata["source_file"],
-                "total_tables": len(self.db.tables),
+                "total_tables": len(self.db.tables) if self.db else 0,
             },
         }
 
-        # JTBD ключевые слова для поиска
-        jtbd_keywords = {
-            "цвета": ["цвет", "красный", "белый", "розовый", "желтый", "синий"],
-            "букеты": [
-                "букет",
-                "композиция",
-                "аранжировка",
-                "свадебный",
-                "праздничный",
-            ],
-            "склады": ["склад", "хранилище", "холодильник", "температура"],
-            "подразделения": ["отдел", "подразделение", "магазин", "филиал"],
-            "поставщики": ["поставщик", "производитель", "ферма", "выращивание"],
-        }
+        self.jtbd_matches = []
 
         # Получаем все типы таблиц
         document_tables = self.get_document_tables()
@@ -67,123 +92,77 @@ class AllMissingDocumentsExtractor(BaseExtractor):
         print(f"📚 Справочники: {len(reference_tables)}")
         print(f"📊 Регистры: {len(register_tables)}")
 
-        # Анализируем справочники на предмет JTBD данных
-        for table_name in reference_tables[:5]:  # Ограничиваем для тестирования
+        # Анализируем справочники и регистры на предмет JTBD данных
+        # (ограничиваем для тестирования)
+        self.reference_tables = set(reference_tables[:5])
+        plan: dict[str, int | None] = dict.fromkeys(reference_tables[:5], 20)
+        plan.update(dict.fromkeys(register_tables[:3], 10))
+        return plan
+
+    def begin_table(self, table_name: str, table: Any) -> None:
+        if table_name in self.reference_tables:
             print(f"\n📚 Анализ справочника: {table_name}")
-            table = self.db.tables[table_name]
-            print(f"   📈 Всего записей: {len(table):,}")
-
-            # Анализируем первые 20 записей
-            sample_size = min(20, len(table))
-            jtbd_matches = []
-
-            for i in range(sample_size):
-                try:
-                    row = table[i]
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
-                        # Ищем JTBD ключевые слова
-                        for field_name, value in row_dict.items():
-                            if isinstance(value, str):
-                                for category, keywords in jtbd_keywords.items():
-                                    for keyword in keywords:
-                                        if keyword.lower() in value.lower():
-                                            jtbd_matches.append(
-                                                {
-                                                    "table_name": table_name,
-                                                    "field_name": field_name,
-                                                    "category": category,
-                                                    "keyword": keyword,
-                                                    "content": (
-                                                        value[:200] + "..."
-                                                        if len(value) > 200
-                                                        else value
-                                                    ),
-                                                    "row_index": i,
-                                                },
-                                            )
-
-                except Exception as e:
-                    logger.warning(
-                        f"Ошибка обработки записи {i} в таблице {table_name}: {e}",
-                    )
-                    continue
-
-            if jtbd_matches:
-                results["found_references"][table_name] = {
-                    "total_records": len(table),
-                    "jtbd_matches": jtbd_matches[:10],  # Первые 10 совпадений
-                    "categories": list(
-                        set(match["category"] for match in jtbd_matches),
-                    ),
-                }
-                print(f"   ✅ Найдено {len(jtbd_matches)} JTBD совпадений")
-
-        # Анализируем регистры на предмет JTBD данных
-        for table_name in register_tables[:3]:  # Ограничиваем для тестирования
+        else:
             print(f"\n📊 Анализ регистра: {table_name}")
-            table = self.db.tables[table_name]
-            print(f"   📈 Всего записей: {len(table):,}")
-
-            # Анализируем первые 10 записей
-            sample_size = min(10, len(table))
-            register_matches = []
-
-            for i in range(sample_size):
-                try:
-                    row = table[i]
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
-                        # Ищем JTBD ключевые слова в регистрах
-                        for field_name, value in row_dict.items():
-                            if isinstance(value, str):
-                                for category, keywords in jtbd_keywords.items():
-                                    for keyword in keywords:
-                                        if keyword.lower() in value.lower():
-                                            register_matches.append(
-                                                {
-                                                    "table_name": table_name,
-                                                    "field_name": field_name,
-                                                    "category": category,
-                                                    "keyword": keyword,
-                                                    "content": (
-                                                        value[:200] + "..."
-                                                        if len(value) > 200
-                                                        else value
-                                                    ),
-                                                    "row_index": i,
-                                                },
-                                            )
-
-                except Exception as e:
-                    logger.warning(
-                        f"Ошибка обработки записи {i} в таблице {table_name}: {e}",
-                    )
-                    continue
-
-            if register_matches:
-                results["found_registers"][table_name] = {
-                    "total_records": len(table),
-                    "jtbd_matches": register_matches[:5],  # Первые 5 совпадений
-                    "categories": list(
-                        set(match["category"] for match in register_matches),
-                    ),
-                }
-                print(f"   ✅ Найдено {len(register_matches)} JTBD совпадений")
-
+        print(f"   📈 Всего записей: {len(table):,}")
+        self.jtbd_matches = []
+
+    @profiled(STAGE_KEYWORDS)
+    def visit_row(
+        self,
+        table_name: str,
+        row_index: int,
+        row: dict[str, Any],
+    ) -> None:
+        # Ищем JTBD ключевые слова: все категории - один проход по тексту
+        for field_name, value in row.items():
+            if isinstance(value, str):
+                for keyword in self.jtbd_matcher.found(value):
+                    for category in self.keyword_categories[keyword]:
+                        self.jtbd_matches.append(
+                            {
+                                "table_name": table_name,
+                                "field_name": field_name,
+                                "category": category,
+                                "keyword": keyword,
+                                "content": (
+                                    value[:200] + "..." if len(value) > 200 else value
+                                ),
+                                "row_index": row_index,
+                            },
+                        )
+
+    def end_table(self, table_name: str, table: Any) -> None:
+        if not self.jtbd_matches:
+            return
+
+        categories = list(set(match["category"] for match in self.jtbd_matches))
+        if table_name in self.reference_tables:
+            self.scan_results["found_references"][table_name] = {
+                "total_records": len(table),
+                "jtbd_matches": self.jtbd_matches[:10],  # Первые 10 совпадений
+                "categories": categories,
+            }
+        else:
+            self.scan_results["found_registers"][table_name] = {
+                "total_records": len(table),
+                "jtbd_matches": self.jtbd_matches[:5],  # Первые 5 совпадений
+                "categories": categories,
+            }
+        print(f"   ✅ Найдено {len(self.jtbd_matches)} JTBD совпадений")
+
+    def finish_scan(self) -> dict[str, Any]:
         # Создаем сводку JTBD сценариев
         all_categories = set()
-        for ref_data in results["found_references"].values():
+        for ref_data in self.scan_results["found_references"].values():
             all_categories.update(ref_data.get("categories", []))
-        for reg_data in results["found_registers"].values():
+        for reg_data in self.scan_results["found_registers"].values():
             all_categories.update(reg_data.get("categories", []))
 
-        results["jtbd_scenarios"] = {
+        self.scan_results["jtbd_scenarios"] = {
             "found_categories": list(all_categories),
-            "total_references": len(results["found_references"]),
-            "total_registers": len(results["found_registers"]),
+            "total_references": len(self.scan_results["found_references"]),
+            "total_registers": len(self.scan_results["found_registers"]),
             "coverage_analysis": {
                 "цвета": "найдено" if "цвета" in all_categories else "не найдено",
                 "букеты": "найдено" if "букеты" in all_categories else "не найдено",
@@ -197,7 +176,7 @@ class AllMissingDocumentsExtractor(BaseExtractor):
             },
         }
 
-        return results
+        return self.scan_results
 
 
 def search_all_missing_documents() -> dict[str, Any]:
@@ -4,6 +4,7 @@ import logging
 from typing import Any
 
 from src.extractors.base_extractor import BaseExtractor
+from src.extractors.scan_scheduler import ScanScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +18,27 @@ class DocumentNamesBlobExtractor(BaseExtractor):
     чтобы понять назначение каждого типа документа.
     """
 
+    results_file = "document_names_in_blob_search_results.json"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Состояние общего прохода (сбрасывается в begin_scan)
+        self.scan_results: dict[str, Any] = {}
+        self.blob_samples: list[dict[str, Any]] = []
+
     def extract(self) -> dict[str, Any]:
         """
         Поиск названий документов в BLOB полях
         ЦЕЛЬ: Найти реальные названия документов для понимания их назначения
         """
-        print("🔍 ПОИСК НАЗВАНИЙ ДОКУМЕНТОВ В BLOB ПОЛЯХ")
-        print("🎯 ЦЕЛЬ: Определить назначение каждого типа документа")
-        print("=" * 60)
+        if self.db is None:
+            print("❌ База данных не открыта")
+            return self.empty_results()
 
-        results: dict[str, Any] = {
+        return ScanScheduler([self]).scan(self.db)[0]
+
+    def empty_results(self) -> dict[str, Any]:
+        return {
             "document_names": {},
             "blob_content_samples": {},
             "metadata": {
@@ -36,9 +48,16 @@ class DocumentNamesBlobExtractor(BaseExtractor):
             },
         }
 
+    def begin_scan(self) -> dict[str, int | None]:
+        """План: первые 100 строк 5 таблиц документов"""
+        print("🔍 ПОИСК НАЗВАНИЙ ДОКУМЕНТОВ В BLOB ПОЛЯХ")
+        print("🎯 ЦЕЛЬ: Определить назначение каждого типа документа")
+        print("=" * 60)
+
+        self.scan_results = self.empty_results()
+        self.blob_samples = []
         if self.db is None:
-            print("❌ База данных не открыта")
-            return results
+            return {}
 
         print(f"\n📊 Всего таблиц в базе: {len(self.db.tables):,}")
 
@@ -46,53 +65,47 @@ class DocumentNamesBlobExtractor(BaseExtractor):
         document_tables = self.get_document_tables()
         print(f"📄 Найдено таблиц документов: {len(document_tables)}")
 
-        # Анализируем каждую таблицу документов
-        for table_name in document_tables[:5]:  # Ограничиваем для тестирования
-            print(f"\n🔍 Анализ таблицы: {table_name}")
-            table = self.db.tables[table_name]
-            print(f"   📈 Всего записей: {len(table):,}")
-
-            # Анализируем первые 100 записей
-            sample_size = min(100, len(table))
-            blob_samples = []
-
-            for i in range(sample_size):
-                try:
-                    row = table[i]
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
-                        # Ищем BLOB поля
-                        for field_name, value in row_dict.items():
-                            if hasattr(value, "value") and value.value is not None:
-                                blob_content = self.extract_blob_content(value)
-                                if blob_content and len(blob_content) > 10:
-                                    blob_samples.append(
-                                        {
-                                            "table_name": table_name,
-                                            "field_name": field_name,
-                                            "content": (
-                                                blob_content[:200] + "..."
-                                                if len(blob_content) > 200
-                                                else blob_content
-                                            ),
-                                            "length": len(blob_content),
-                                        },
-                                    )
-
-                except Exception as e:
-                    logger.warning(
-                        f"Ошибка обработки записи {i} в таблице {table_name}: {e}",
+        # Ограничиваем для тестирования
+        return dict.fromkeys(document_tables[:5], 100)
+
+    def begin_table(self, table_name: str, table: Any) -> None:
+        print(f"\n🔍 Анализ таблицы: {table_name}")
+        print(f"   📈 Всего записей: {len(table):,}")
+        self.blob_samples = []
+
+    def visit_row(
+        self,
+        table_name: str,
+        row_index: int,
+        row: dict[str, Any],
+    ) -> None:
+        # Ищем BLOB поля
+        for field_name, value in row.items():
+            if hasattr(value, "value") and value.value is not None:
+                blob_content = self.extract_blob_content(value)
+                if blob_content and len(blob_content) > 10:
+                    self.blob_samples.append(
+                        {
+                            "table_name": table_name,
+                            "field_name": field_name,
+                            "content": (
+                                blob_content[:200] + "..."
+                                if len(blob_content) > 200
+                                else blob_content
+                            ),
+                            "length": len(blob_content),
+                        },
                     )
-                    continue
 
-            if blob_samples:
-                results["blob_content_samples"][table_name] = blob_samples[
-                    :10
-                ]  # Первые 10 образцов
-                print(f"   ✅ Найдено {len(blob_samples)} BLOB образцов")
+    def end_table(self, table_name: str, table: Any) -> None:
+        if self.blob_samples:
+            self.scan_results["blob_content_samples"][table_name] = self.blob_samples[
+                :10
+            ]  # Первые 10 образцов
+            print(f"   ✅ Найдено {len(self.blob_samples)} BLOB образцов")
 
-        return results
+    def finish_scan(self) -> dict[str, Any]:
+        return self.scan_results
 
 
 def search_document_names_in_blob() -> dict[str, Any]:
@@ -4,6 +4,9 @@ import logging
 from typing import Any
 
 from src.extractors.base_extractor import BaseExtractor
+from src.extractors.scan_scheduler import ScanScheduler
+from src.utils.keyword_matcher import get_matcher
+from src.utils.stage_profiler import STAGE_KEYWORDS, profiled
 
 logger = logging.getLogger(__name__)
 
@@ -17,26 +20,12 @@ class QualityDocumentsExtractor(BaseExtractor):
     чтобы получить данные для анализа качества цветов и флористики.
     """
 
-    def extract(self) -> dict[str, Any]:
-        """
-        Поиск документов качества
-        """
-        print("🔍 Поиск документов 'корректировка качества товара'")
-        print("🎯 ЦЕЛЬ: Найти первичные данные по качеству товаров")
-        print("=" * 60)
-
-        if self.db is None:
-            print("❌ База данных не открыта")
-            return {"error": "База данных не открыта"}
-
-        results: dict[str, Any] = {
-            "quality_documents": [],
-            "found_keywords": [],
-            "metadata": self.metadata,
-        }
+    results_file = "quality_documents_search_results.json"
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
         # Ключевые слова для поиска документов качества
-        quality_keywords = [
+        self.quality_keywords = [
             "корректировка качества",
             "качество товара",
             "брак",
@@ -49,63 +38,83 @@ class QualityDocumentsExtractor(BaseExtractor):
             "букет",
             "флористический",
         ]
+        self.quality_matcher = get_matcher(self.quality_keywords)
+
+        # Состояние общего прохода (сбрасывается в begin_scan)
+        self.scan_results: dict[str, Any] = {}
+        self.quality_docs: list[dict[str, Any]] = []
+
+    def extract(self) -> dict[str, Any]:
+        """
+        Поиск документов качества
+        """
+        if self.db is None:
+            print("❌ База данных не открыта")
+            return {"error": "База данных не открыта"}
+
+        return ScanScheduler([self]).scan(self.db)[0]
+
+    def begin_scan(self) -> dict[str, int | None]:
+        """План: первые 30 строк 3 таблиц документов"""
+        print("🔍 Поиск документов 'корректировка качества товара'")
+        print("🎯 ЦЕЛЬ: Найти первичные данные по качеству товаров")
+        print("=" * 60)
+
+        self.scan_results = {
+            "quality_documents": [],
+            "found_keywords": [],
+            "metadata": self.metadata,
+        }
+        self.quality_docs = []
 
         # Получаем таблицы документов
         document_tables = self.get_document_tables()
         print(f"📄 Найдено таблиц документов: {len(document_tables)}")
 
-        # Анализируем каждую таблицу документов
-        for table_name in document_tables[:3]:  # Ограничиваем для тестирования
-            print(f"\n🔍 Анализ таблицы: {table_name}")
-            table = self.db.tables[table_name]
-            print(f"   📈 Всего записей: {len(table):,}")
-
-            # Анализируем первые 30 записей
-            sample_size = min(30, len(table))
-            quality_docs = []
-
-            for i in range(sample_size):
-                try:
-                    row = table[i]
-                    if not hasattr(row, "is_empty") or not row.is_empty:
-                        row_dict = row.as_dict() if hasattr(row, "as_dict") else {}
-
-                        # Ищем ключевые слова в полях
-                        for field_name, value in row_dict.items():
-                            if isinstance(value, str):
-                                for keyword in quality_keywords:
-                                    if keyword.lower() in value.lower():
-                                        quality_docs.append(
-                                            {
-                                                "table_name": table_name,
-                                                "field_name": field_name,
-                                                "keyword": keyword,
-                                                "content": (
-                                                    value[:200] + "..."
-                                                    if len(value) > 200
-                                                    else value
-                                                ),
-                                                "row_index": i,
-                                            },
-                                        )
-                                        results["found_keywords"].append(keyword)
-
-                except Exception as e:
-                    logger.warning(
-                        f"Ошибка обработки записи {i} в таблице {table_name}: {e}",
+        # Ограничиваем для тестирования
+        return dict.fromkeys(document_tables[:3], 30)
+
+    def begin_table(self, table_name: str, table: Any) -> None:
+        print(f"\n🔍 Анализ таблицы: {table_name}")
+        print(f"   📈 Всего записей: {len(table):,}")
+        self.quality_docs = []
+
+    @profiled(STAGE_KEYWORDS)
+    def visit_row(
+        self,
+        table_name: str,
+        row_index: int,
+        row: dict[str, Any],
+    ) -> None:
+        # Ищем ключевые слова в полях
+        for field_name, value in row.items():
+            if isinstance(value, str):
+                for keyword in self.quality_matcher.found(value):
+                    self.quality_docs.append(
+                        {
+                            "table_name": table_name,
+                            "field_name": field_name,
+                            "keyword": keyword,
+                            "content": (
+                                value[:200] + "..." if len(value) > 200 else value
+                            ),
+                            "row_index": row_index,
+                        },
                     )
-                    continue
-
-            if quality_docs:
-                results["quality_documents"].extend(
-                    quality_docs[:5],
-                )  # Первые 5 документов
-                print(f"   ✅ Найдено {len(quality_docs)} документов качества")
-
-        results["metadata"]["total_quality_documents"] = len(
-            results["quality_documents"],
+                    self.scan_results["found_keywords"].append(keyword)
+
+    def end_table(self, table_name: str, table: Any) -> None:
+        if self.quality_docs:
+            self.scan_results["quality_documents"].extend(
+                self.quality_docs[:5],
+            )  # Первые 5 документов
+            print(f"   ✅ Найдено {len(self.quality_docs)} документов качества")
+
+    def finish_scan(self) -> dict[str, Any]:
+        self.scan_results["metadata"]["total_quality_documents"] = len(
+            self.scan_results["quality_documents"],
         )
-        return results
+        return self.scan_results
 
 
 def search_quality_documents() -> dict[str, Any]:
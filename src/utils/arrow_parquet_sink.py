@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+"""
+ArrowParquetSink - инкрементальная запись извлеченных записей в Parquet
+Записи собираются в pyarrow.RecordBatch по схеме из метаданных 1CD таблицы
+и дописываются в ParquetWriter группами строк, без промежуточного pandas DataFrame
+"""
+
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from typing import Any
+
+from src.utils.stage_profiler import STAGE_SINK, profiled
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_ROW_GROUP_SIZE = 100_000
+DEFAULT_COMPRESSION = "zstd"
+DICTIONARY_COLUMNS = ("table_name", "document_type")
+
+# Типы полей 1С, которые хранятся как бинарные данные
+BINARY_FIELD_TYPES = {"B", "I", "VB", "BINARY", "BLOB", "UUID"}
+
+
+def arrow_type_for_field(
+    field_type: str,
+    length: int = 0,
+    precision: int = 0,
+) -> "pa.DataType":
+    """
+    JTBD:
+    Как построитель схемы, я хочу сопоставить тип поля 1С типу Arrow,
+    чтобы числа, флаги и даты сохранялись в Parquet типизированно.
+    """
+    if field_type == "L":
+        return pa.bool_()
+    if field_type == "N":
+        # Целые до 18 разрядов помещаются в int64
+        if precision == 0 and length <= 18:
+            return pa.int64()
+        return pa.float64()
+    if field_type == "DT":
+        return pa.timestamp("s")
+    if field_type in BINARY_FIELD_TYPES:
+        return pa.binary()
+    return pa.string()
+
+
+def schema_from_table(table: Any, prefix: str = "") -> "pa.Schema":
+    """Схема Arrow по описанию полей таблицы onec_dtools (table.fields)"""
+    return pa.schema(
+        [
+            pa.field(
+                f"{prefix}{name}",
+                arrow_type_for_field(
+                    description.type,
+                    description.length,
+                    description.precision,
+                ),
+            )
+            for name, description in table.fields.items()
+        ],
+    )
+
+
+def _to_string(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_int(value: Any) -> int | None:
+    if isinstance(value, (bool, int)):
+        return int(value)
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _to_float(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value: Any) -> bool | None:
+    if isinstance(value, (bool, int, float)):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in ("true", "1", "да"):
+        return True
+    if text in ("false", "0", "нет"):
+        return False
+    return None
+
+
+def _to_timestamp(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _to_binary(value: Any) -> bytes | None:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return None
+
+
+def _converter_for(arrow_type: "pa.DataType") -> Any:
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return _to_string
+    if pa.types.is_integer(arrow_type):
+        return _to_int
+    if pa.types.is_floating(arrow_type):
+        return _to_float
+    if pa.types.is_boolean(arrow_type):
+        return _to_bool
+    if pa.types.is_timestamp(arrow_type):
+        return _to_timestamp
+    if pa.types.is_binary(arrow_type):
+        return _to_binary
+    return None
+
+
+def rows_to_record_batch(
+    rows: list[dict[str, Any]],
+    schema: "pa.Schema",
+) -> "pa.RecordBatch":
+    """
+    JTBD:
+    Как конвертер пакета, я хочу привести значения строк к типам схемы,
+    чтобы неоднородные значения (строка вместо числа) не ломали запись.
+    """
+    arrays = []
+    for field in schema:
+        converter = _converter_for(field.type)
+        values = []
+        for row in rows:
+            value = row.get(field.name)
+            if value is not None and converter is not None:
+                value = converter(value)
+            values.append(value)
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ArrowParquetSink:
+    """
+    JTBD:
+    Как sink извлечения, я хочу дописывать RecordBatch в открытый ParquetWriter,
+    чтобы Parquet рос инкрементально с контролем размера групп строк
+    и не переписывался целиком на каждом checkpoint.
+
+    enrich - преобразование каждого пакета перед записью (например, колонки
+    разрешенных ссылок ReferenceResolver.enrich_batch); schema описывает
+    строки до преобразования, схема файла выводится из преобразованного пакета.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        schema: "pa.Schema | None" = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = DEFAULT_COMPRESSION,
+        dictionary_columns: Iterable[str] = DICTIONARY_COLUMNS,
+        enrich: "Callable[[pa.RecordBatch], pa.RecordBatch] | None" = None,
+    ) -> None:
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow не установлен. Установите: pip install pyarrow")
+
+        self.path = path
+        self.row_schema = schema
+        self.enrich = enrich
+        self.schema = schema
+        if enrich is not None and schema is not None:
+            self.schema = enrich(pa.RecordBatch.from_pylist([], schema=schema)).schema
+        self.batch_size = batch_size
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.dictionary_columns = list(dictionary_columns)
+        self.rows_written = 0
+        self.dropped_columns: set[str] = set()
+
+        self._rows: list[dict[str, Any]] = []
+        self._batches: list[pa.RecordBatch] = []
+        self._buffered = 0
+        self._writer: pq.ParquetWriter | None = None
+        self._closed = False
+
+    def write_row(self, row: dict[str, Any]) -> None:
+        """Добавляет строку в текущий пакет"""
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._convert_rows()
+
+    def write_rows(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Добавляет строки потока"""
+        for row in rows:
+            self.write_row(row)
+
+    def write_batch(self, batch: "pa.RecordBatch") -> None:
+        """Добавляет готовый RecordBatch"""
+        if self.enrich is not None:
+            batch = self.enrich(batch)
+        if self.schema is None:
+            self.schema = batch.schema
+        self._batches.append(batch)
+        self._buffered += batch.num_rows
+        if self._buffered >= self.row_group_size:
+            self._flush_row_groups()
+
+    @profiled(STAGE_SINK)
+    def _convert_rows(self) -> None:
+        if not self._rows:
+            return
+        if self.row_schema is None:
+            # Нет метаданных таблицы - схема выводится по первому пакету
+            inferred = pa.RecordBatch.from_pylist(self._rows).schema
+            self.row_schema = pa.schema(
+                [
+                    (
+                        pa.field(field.name, pa.string())
+                        if pa.types.is_null(field.type)
+                        else field
+                    )
+                    for field in inferred
+                ],
+            )
+        unknown = {key for row in self._rows for key in row} - set(
+            self.row_schema.names,
+        )
+        if unknown - self.dropped_columns:
+            print(f"⚠️ Колонки вне схемы пропущены: {sorted(unknown)[:10]}")
+            self.dropped_columns |= unknown
+        batch = rows_to_record_batch(self._rows, self.row_schema)
+        self._rows = []
+        self.write_batch(batch)
+
+    def _open_writer(self) -> "pq.ParquetWriter":
+        if self._writer is None:
+            schema = self.schema
+            if schema is None:
+                raise ValueError(f"Схема Parquet для {self.path} не определена")
+            self._writer = pq.ParquetWriter(
+                self.path,
+                schema,
+                compression=self.compression,
+                use_dictionary=[
+                    name for name in self.dictionary_columns if name in schema.names
+                ],
+            )
+        return self._writer
+
+    @profiled(STAGE_SINK)
+    def _flush_row_groups(self, partial: bool = False) -> None:
+        """Пишет полные группы строк, остаток ждет следующих пакетов"""
+        if not self._batches:
+            return
+        table = pa.Table.from_batches(self._batches, schema=self.schema)
+        full_rows = table.num_rows - table.num_rows % self.row_group_size
+        if partial:
+            full_rows = table.num_rows
+        if full_rows:
+            self._open_writer().write_table(
+                table.slice(0, full_rows),
+                row_group_size=self.row_group_size,
+            )
+            self.rows_written += full_rows
+        rest = table.slice(full_rows)
+        self._batches = rest.to_batches() if rest.num_rows else []
+        self._buffered = rest.num_rows
+
+    def flush(self) -> None:
+        """Сбрасывает накопленные строки в файл"""
+        self._convert_rows()
+        self._flush_row_groups(partial=True)
+
+    @profiled(STAGE_SINK)
+    def close(self) -> int:
+        """Дописывает остаток и закрывает файл, возвращает число строк"""
+        if self._closed:
+            return self.rows_written
+        self._closed = True
+        self.flush()
+        if self._writer is None and self.schema is not None:
+            # Пустой файл с корректной схемой
+            self._open_writer()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.rows_written
+
+    def __enter__(self) -> "ArrowParquetSink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
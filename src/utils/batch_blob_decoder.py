@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+
+"""
+BatchBlobDecoder - классификация и декодирование содержимого BLOB полей 1С
+Каждое значение классифицируется отдельно (decode_blob): кодировка
+определяется по частотам байтов (доля старших байтов, шаблоны UTF-8
+и UTF-16LE, доля кириллицы cp1251), внутренние форматы 1С и файлы -
+по сигнатурам. Перебора кодировок через UnicodeDecodeError нет: выбранная
+кодировка декодирует с errors="replace". Extractors вызывают decode_blob
+(через inflate_or_decode) для каждого BLOB записи; decode_batch лишь
+собирает результаты нескольких значений в колонки text, encoding,
+content_type, size для pyarrow и не ускоряет сам разбор.
+"""
+
+import codecs
+import re
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.utils.stage_profiler import STAGE_BLOB_DECODE, profiled
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Классификация выполняется по первым байтам значения
+SAMPLE_BYTES = 64 * 1024
+SAMPLE_CHARS = 4096
+
+# Сигнатуры файлов и сжатых данных
+MAGIC_TYPES: tuple[tuple[bytes, str], ...] = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"\x00\x00\x01\x00", "ico"),
+    (b"%PDF", "pdf"),
+    (b"PK\x03\x04", "zip"),
+    (b"\x1f\x8b", "gzip"),
+)
+
+_MAGIC_PREFIXES = tuple(magic for magic, _content_type in MAGIC_TYPES)
+
+# Заголовок zlib: CMF 0x78 и FLG уровней сжатия 0-3
+_ZLIB_FLAGS = b"\x01\x5e\x9c\xda"
+# Пробная распаковка, подтверждающая заголовок zlib
+ZLIB_PROBE_BYTES = 1024
+ZLIB_PROBE_OUTPUT = 4096
+
+_HIGH = bytes(range(0x80, 0x100))
+_CONTINUATION = bytes(range(0x80, 0xC0))
+_LEAD2 = bytes(range(0xC2, 0xE0))
+_LEAD3 = bytes(range(0xE0, 0xF0))
+_LEAD4 = bytes(range(0xF0, 0xF5))
+# Буквы А-я и Ёё в cp1251
+_CP1251_LETTERS = bytes(range(0xC0, 0x100)) + b"\xa8\xb8"
+_ASCII_LETTERS = bytes(range(0x41, 0x5B)) + bytes(range(0x61, 0x7B))
+
+# Корректная последовательность UTF-8 (без overlong форм)
+_UTF8_RE = re.compile(
+    rb"(?:[\x00-\x7f]+|[\xc2-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}"
+    rb"|[\xf0-\xf4][\x80-\xbf]{3})*",
+)
+_CONTROL_RE = re.compile("[\x00-\x08\x0e-\x1f\ufffd]")
+_BASE64_RE = re.compile(r"[A-Za-z0-9+/]+={0,2}")
+_HEX_RE = re.compile(r"[0-9a-fA-F]+")
+_JSON_OBJECT_RE = re.compile(r'\{\s*(\}|"(?:[^"\\]|\\.)*"\s*:)')
+_JSON_SCALAR_RE = re.compile(r'-?\d+(\.\d+)?([eE][+-]?\d+)?|true|false|null|"[^"]*"')
+
+
+def _count(data: bytes, byte_set: bytes) -> int:
+    """Количество байтов из набора (подсчет на уровне C)"""
+    return len(data) - len(data.translate(None, byte_set))
+
+
+def detect_binary_type(data: bytes, deflate: bool = True) -> str | None:
+    """
+    Тип файла или сжатых данных по сигнатуре (None - сигнатуры нет).
+    Заголовок zlib подтверждается пробной распаковкой первых байтов:
+    текст вида "x 10 шт" или "x^2" сжатым не считается.
+    deflate=False - заголовок zlib не проверяется (значение не распаковалось)
+    """
+    if data.startswith(_MAGIC_PREFIXES):
+        for magic, content_type in MAGIC_TYPES:
+            if data.startswith(magic):
+                return content_type
+    if deflate and len(data) > 2 and data[0] == 0x78 and data[1] in _ZLIB_FLAGS:
+        probe = zlib.decompressobj()
+        try:
+            output = probe.decompress(data[:ZLIB_PROBE_BYTES], ZLIB_PROBE_OUTPUT)
+        except zlib.error:
+            return None
+        if output or probe.eof:
+            return "deflate"
+    return None
+
+
+def _is_utf8(sample: bytes, truncated: bool) -> bool:
+    """
+    Байты - корректный UTF-8: ведущие байты и байты продолжения идут
+    в правильном порядке. У обрезанной выборки допускается неполный
+    последний символ
+    """
+    match = _UTF8_RE.match(sample)
+    tail = sample[match.end() if match else 0 :]
+    if not tail:
+        return True
+    return (
+        truncated
+        and len(tail) < 4
+        and tail[0] >= 0xC2
+        and _count(tail[1:], _CONTINUATION) == len(tail) - 1
+    )
+
+
+def detect_encoding(data: bytes) -> str:
+    """Кодировка текста по BOM и частотам байтов"""
+    if data.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+
+    sample = data[:SAMPLE_BYTES]
+
+    # UTF-16LE (NT поля 1С): старшие байты символов - 0x00 (латиница,
+    # цифры) или 0x04 (кириллица)
+    if len(data) % 2 == 0 and len(sample) >= 2:
+        high_bytes = sample[1::2]
+        share = (high_bytes.count(0) + high_bytes.count(4)) / len(high_bytes)
+        if share >= 0.8:
+            return "utf-16-le"
+
+    if sample.isascii():
+        return "utf-8"
+    high = _count(sample, _HIGH)
+
+    # UTF-8: на каждый ведущий байт приходится 1-3 байта продолжения
+    # (подсчет отсекает остальные кодировки, порядок проверяется по выборке).
+    # Короткие cp1251 значения ("ПЦ022", "Да") состоят из одних ведущих байтов
+    lead2 = _count(sample, _LEAD2)
+    lead3 = _count(sample, _LEAD3)
+    lead4 = _count(sample, _LEAD4)
+    continuation = _count(sample, _CONTINUATION)
+    expected = lead2 + 2 * lead3 + 3 * lead4
+    truncated = len(data) > len(sample)
+    if (
+        continuation + lead2 + lead3 + lead4 == high
+        and expected
+        and 0 <= expected - continuation < 4
+        and _is_utf8(sample, truncated)
+    ):
+        return "utf-8"
+
+    # cp1251: русский текст почти целиком из старших байтов букв, в latin1
+    # старшие байты - редкие диакритические знаки среди ASCII букв
+    cyrillic = _count(sample, _CP1251_LETTERS)
+    ascii_letters = _count(sample, _ASCII_LETTERS)
+    if cyrillic >= 0.6 * high and cyrillic >= 0.3 * (cyrillic + ascii_letters):
+        return "cp1251"
+    return "latin1"
+
+
+def detect_text_type(text: str) -> str:
+    """Тип текстового содержимого по форме строки, без пробного разбора"""
+    if not text:
+        return "unknown"
+
+    stripped = text.strip()
+    first = stripped[:1]
+    if first == "{":
+        # JSON объект начинается с "ключ": или пуст; остальное - сериализованные
+        # значения 1С: {"#",...}, {"S",...}, {1,...}
+        if _JSON_OBJECT_RE.match(stripped):
+            return "json" if stripped.endswith("}") else "text"
+        return "onec_serialized"
+    if first == "[":
+        return "json" if stripped.endswith("]") else "text"
+    if first == "<":
+        return "xml" if stripped.endswith(">") else "text"
+    # Регулярные выражения только для строк, начинающихся с ASCII символа
+    if not first.isascii():
+        return "text"
+    if _JSON_SCALAR_RE.fullmatch(stripped):
+        return "json"
+    if len(stripped) % 4 == 0 and _BASE64_RE.fullmatch(stripped):
+        return "base64"
+    if _HEX_RE.fullmatch(stripped):
+        return "hex"
+    return "text"
+
+
+@dataclass(frozen=True)
+class DecodedBlob:
+    """Декодированное значение BLOB: text=None для двоичных данных"""
+
+    text: str | None
+    encoding: str
+    content_type: str
+    size: int
+
+
+@profiled(STAGE_BLOB_DECODE)
+def decode_blob(value: Any, deflate: bool = True) -> DecodedBlob:
+    """
+    Декодирует одно значение BLOB (bytes, str или None).
+    deflate=False - значение с заголовком zlib декодируется как текст
+    (распаковка уже не удалась)
+    """
+    if value is None:
+        return DecodedBlob(None, "none", "empty", 0)
+    if isinstance(value, str):
+        return DecodedBlob(value, "string", detect_text_type(value), len(value))
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        text = str(value)
+        return DecodedBlob(text, "str_convert", detect_text_type(text), len(text))
+
+    data = bytes(value)
+    if not data:
+        return DecodedBlob("", "none", "empty", 0)
+
+    binary_type = detect_binary_type(data, deflate)
+    if binary_type is not None:
+        return DecodedBlob(None, "binary", binary_type, len(data))
+
+    encoding = detect_encoding(data)
+    text = data.decode(encoding, errors="replace")
+    if _is_control_text(text[:SAMPLE_CHARS]):
+        return DecodedBlob(None, "binary", "binary", len(data))
+    return DecodedBlob(text, encoding, detect_text_type(text), len(data))
+
+
+def _is_control_text(prefix: str) -> bool:
+    """Больше 10% управляющих символов - двоичные данные, а не текст"""
+    return bool(
+        _CONTROL_RE.search(prefix)
+        and len(_CONTROL_RE.findall(prefix)) > len(prefix) / 10,
+    )
+
+
+def decode_stream(chunks: Iterable[bytes]) -> DecodedBlob:
+    """
+    Декодирует значение, поступающее порциями (например, из распаковки
+    deflate): тип и кодировка определяются по первым SAMPLE_BYTES,
+    остальные порции декодируются инкрементально, без сборки всех байтов
+    """
+    iterator = iter(chunks)
+    head = bytearray()
+    for chunk in iterator:
+        head += chunk
+        if len(head) >= SAMPLE_BYTES:
+            break
+    data = bytes(head)
+    if not data:
+        return DecodedBlob("", "none", "empty", 0)
+
+    binary_type = detect_binary_type(data)
+    if binary_type is not None:
+        size = len(data) + sum(len(chunk) for chunk in iterator)
+        return DecodedBlob(None, "binary", binary_type, size)
+
+    encoding = detect_encoding(data)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parts = [decoder.decode(data)]
+    size = len(data)
+    if _is_control_text(parts[0][:SAMPLE_CHARS]):
+        size += sum(len(chunk) for chunk in iterator)
+        return DecodedBlob(None, "binary", "binary", size)
+    for chunk in iterator:
+        size += len(chunk)
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    text = "".join(parts)
+    return DecodedBlob(text, encoding, detect_text_type(text), size)
+
+
+@dataclass
+class DecodedBatch:
+    """Колонки результатов decode_blob для нескольких значений"""
+
+    texts: list[str | None] = field(default_factory=list)
+    encodings: list[str] = field(default_factory=list)
+    content_types: list[str] = field(default_factory=list)
+    sizes: list[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def append(self, decoded: DecodedBlob) -> None:
+        self.texts.append(decoded.text)
+        self.encodings.append(decoded.encoding)
+        self.content_types.append(decoded.content_type)
+        self.sizes.append(decoded.size)
+
+    def to_pydict(self) -> dict[str, list[Any]]:
+        return {
+            "text": self.texts,
+            "encoding": self.encodings,
+            "content_type": self.content_types,
+            "size": self.sizes,
+        }
+
+    def to_arrow(self) -> "pa.Table":
+        """pyarrow.Table; encoding и content_type - словарные колонки"""
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow не установлен: pip install pyarrow")
+        return pa.table(
+            {
+                "text": pa.array(self.texts, type=pa.large_string()),
+                "encoding": pa.array(self.encodings).dictionary_encode(),
+                "content_type": pa.array(self.content_types).dictionary_encode(),
+                "size": pa.array(self.sizes, type=pa.int64()),
+            },
+        )
+
+
+def decode_batch(values: Iterable[Any]) -> DecodedBatch:
+    """
+    Колоночная обертка над decode_blob: значения классифицируются
+    по одному, результаты собираются в колонки DecodedBatch (to_arrow).
+    Используется бенчмарком и выгрузками, которым нужны колонки Arrow
+    """
+    batch = DecodedBatch()
+    for value in values:
+        batch.append(decode_blob(value))
+    return batch
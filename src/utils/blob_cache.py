@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""
+BlobCache - LRU кэш содержимого BLOB полей 1С с лимитом по байтам
+BLOB поле остается легким объектом Blob (объект BLOB таблицы, номер блока,
+размер) до первого обращения к содержимому. Прочитанное значение кэшируется
+по адресу BLOB, повторные обращения не перечитывают страницы файла.
+"""
+
+from collections import OrderedDict
+from typing import Any
+
+from src.utils.stage_profiler import STAGE_BLOB_READ, get_profiler
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def blob_address(blob_obj: Any) -> tuple[Any, ...] | None:
+    """
+    Адрес BLOB в файле: (файл, первая страница BLOB объекта, номер блока).
+    None - объект не является Blob из onec_dtools и не кэшируется
+    """
+    chunk_offset = getattr(blob_obj, "_blob_chunk_offset", None)
+    db_object = getattr(blob_obj, "_db_object", None)
+    if not isinstance(chunk_offset, int) or db_object is None:
+        return None
+
+    pages = getattr(db_object, "_data_pages_offsets", None)
+    if not isinstance(pages, list) or not pages:
+        return None
+
+    db_file = getattr(db_object, "_db_file", None)
+    file_key = getattr(db_file, "name", None)
+    if not isinstance(file_key, str):
+        file_key = id(db_file)
+    return (file_key, pages[0], chunk_offset)
+
+
+def content_size(value: Any) -> int:
+    """Оценка размера значения в байтах (str в 1С - UTF-16)"""
+    if isinstance(value, str):
+        return len(value) * 2
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+class BlobCache:
+    """
+    JTBD:
+    Как поиск по ключевым словам и извлекатели цветов/финансов, я хочу
+    получать содержимое BLOB через общий кэш с лимитом по байтам,
+    чтобы повторные обращения к одному BLOB не перечитывали страницы
+    файла, а память не росла с числом прочитанных BLOB.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: OrderedDict[tuple[Any, ...], tuple[Any, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple[Any, ...]) -> bool:
+        return key in self._entries
+
+    def get(self, key: tuple[Any, ...]) -> Any | None:
+        """Значение по адресу (None, если его нет в кэше)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: tuple[Any, ...], value: Any) -> None:
+        """Кладет значение и вытесняет давно неиспользуемые записи"""
+        size = content_size(value)
+        if size > self.max_bytes:
+            # Значение больше всего кэша не вытесняет остальные записи
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _key, (_value, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def read(self, blob_obj: Any) -> Any:
+        """Содержимое BLOB (blob_obj.value) через кэш"""
+        key = blob_address(blob_obj)
+        if key is None:
+            with get_profiler().stage(STAGE_BLOB_READ):
+                return blob_obj.value
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        with get_profiler().stage(STAGE_BLOB_READ):
+            value = blob_obj.value
+        self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        """Статистика попаданий и заполнения кэша"""
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "current_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / requests * 100) if requests else 0.0,
+        }
+
+
+# Общий кэш процесса для извлекателей и поиска
+_shared_cache: BlobCache | None = None
+
+
+def shared_blob_cache() -> BlobCache:
+    """Общий для процесса BlobCache"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = BlobCache()
+    return _shared_cache
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+"""
+BlobInflater - распаковка сжатых BLOB 1С в пуле потоков
+Сжатое значение (zlib или raw deflate без заголовка, как в базе 1С)
+определяется по заголовку и пробной распаковке первых байтов. Распаковка
+идет порциями decompressobj с лимитом выхода, порции сразу уходят
+в инкрементальный декодер текста (decode_stream): распакованные байты
+целиком в памяти не собираются, а один поток держит не больше max_output
+байт. zlib отпускает GIL на время inflate, поэтому потоки пула распаковывают
+BLOB на всех ядрах.
+"""
+
+import os
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any
+
+from src.utils.batch_blob_decoder import (
+    DecodedBatch,
+    DecodedBlob,
+    decode_blob,
+    decode_stream,
+    detect_binary_type,
+)
+from src.utils.stage_profiler import STAGE_BLOB_INFLATE, profiled
+
+# Пробная распаковка: вход и выход, по которым решается, сжато ли значение
+PROBE_BYTES = 1024
+PROBE_OUTPUT = 4096
+# Порция выхода inflate (четная: UTF-16 не режется между байтами символа)
+CHUNK_SIZE = 256 * 1024
+# Лимит распакованного значения на поток
+DEFAULT_MAX_OUTPUT = 64 * 1024 * 1024
+# Значений в очереди пула на поток: ограничивает память прочитанных BLOB
+PENDING_PER_WORKER = 4
+ENCODING_PREFIX = "deflate_"
+
+
+class InflateLimitError(ValueError):
+    """Распакованное значение больше лимита памяти потока"""
+
+
+def compression_wbits(data: bytes) -> int | None:
+    """
+    wbits распаковки: zlib.MAX_WBITS (заголовок zlib), -zlib.MAX_WBITS
+    (raw deflate) или None - значение не сжато
+    """
+    binary_type = detect_binary_type(data)
+    if binary_type == "deflate":
+        return zlib.MAX_WBITS
+    if binary_type is not None or len(data) < 2:
+        return None
+    head = data[:PROBE_BYTES]
+    # Текст ASCII разбирается как блок deflate, но сжатым не бывает
+    if head.isascii():
+        return None
+    probe = zlib.decompressobj(-zlib.MAX_WBITS)
+    try:
+        output = probe.decompress(head, PROBE_OUTPUT)
+    except zlib.error:
+        return None
+    return -zlib.MAX_WBITS if output or probe.eof else None
+
+
+def is_compressed(data: bytes) -> bool:
+    return compression_wbits(data) is not None
+
+
+def iter_inflate(
+    data: bytes,
+    wbits: int,
+    max_output: int = DEFAULT_MAX_OUTPUT,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Распаковка порциями не больше chunk_size байт. InflateLimitError -
+    выход превысил max_output, zlib.error - поток поврежден, не закончен
+    или короче значения
+    """
+    inflater = zlib.decompressobj(wbits)
+    produced = 0
+    chunk = inflater.decompress(data, chunk_size)
+    while True:
+        produced += len(chunk)
+        if produced > max_output:
+            raise InflateLimitError(
+                f"Распакованный BLOB больше {max_output:,} байт",
+            )
+        if chunk:
+            yield chunk
+        if inflater.eof or not (chunk or inflater.unconsumed_tail):
+            break
+        chunk = inflater.decompress(inflater.unconsumed_tail, chunk_size)
+    # Данные после конца потока - признак случайного совпадения с deflate
+    if not inflater.eof or inflater.unused_data:
+        raise zlib.error("Поток deflate не закончен или не совпадает с BLOB")
+
+
+@profiled(STAGE_BLOB_INFLATE)
+def inflate_blob(
+    data: bytes,
+    max_output: int = DEFAULT_MAX_OUTPUT,
+    chunk_size: int = CHUNK_SIZE,
+) -> DecodedBlob | None:
+    """
+    Распаковка и декодирование сжатого значения (encoding - deflate_<кодировка>,
+    size - размер распакованных данных). None - значение не сжато или
+    не распаковывается; сверх max_output - двоичное значение "deflate"
+    """
+    wbits = compression_wbits(data)
+    if wbits is None:
+        return None
+    # Заголовок zlib бывает и у raw deflate: при ошибке - без заголовка
+    for attempt in (wbits, -zlib.MAX_WBITS) if wbits > 0 else (wbits,):
+        try:
+            decoded = decode_stream(iter_inflate(data, attempt, max_output, chunk_size))
+        except InflateLimitError:
+            return DecodedBlob(None, "binary", "deflate", len(data))
+        except zlib.error:
+            continue
+        return replace(decoded, encoding=ENCODING_PREFIX + decoded.encoding)
+    return None
+
+
+def inflate_or_decode(value: Any, max_output: int = DEFAULT_MAX_OUTPUT) -> DecodedBlob:
+    """
+    decode_blob со сжатыми значениями, распакованными до декодирования.
+    Значение, которое не распаковалось, декодируется как текст
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        inflated = inflate_blob(bytes(value), max_output)
+        if inflated is not None:
+            return inflated
+    return decode_blob(value, deflate=False)
+
+
+class BlobInflater:
+    """
+    JTBD:
+    Как извлечение _DOCUMENT156 с миллионами сжатых BLOB, я хочу
+    распаковывать их в пуле потоков, пока основной поток читает строки,
+    чтобы декодирование BLOB занимало все ядра, а не шло по одному
+    значению, и память каждого потока оставалась ограниченной.
+
+    workers - потоки пула (по умолчанию os.cpu_count()), max_output -
+    лимит распакованного значения на поток, max_pending - значений
+    в очереди пула (по умолчанию PENDING_PER_WORKER на поток).
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_output: int = DEFAULT_MAX_OUTPUT,
+        max_pending: int | None = None,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_output = max_output
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="blob-inflate",
+            )
+        return self._pool
+
+    def inflate(self, data: bytes) -> DecodedBlob | None:
+        return inflate_blob(data, self.max_output)
+
+    def submit(self, data: bytes) -> "Future[DecodedBlob | None]":
+        """Распаковка в пуле (результат - как у inflate_blob)"""
+        return self._executor().submit(inflate_blob, data, self.max_output)
+
+    def decode(self, values: Iterable[Any]) -> Iterator[DecodedBlob]:
+        """
+        Декодирует значения в исходном порядке: сжатые распаковываются
+        в пуле, остальные декодируются в вызывающем потоке. В пуле не больше
+        max_pending значений
+        """
+        pending: deque[tuple[Any, Future[DecodedBlob | None] | None]] = deque()
+        for value in values:
+            future = None
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                data = bytes(value)
+                if is_compressed(data):
+                    future = self.submit(data)
+            pending.append((value, future))
+            while pending and (
+                len(pending) > self.max_pending or pending[0][1] is None
+            ):
+                yield self._result(*pending.popleft())
+        while pending:
+            yield self._result(*pending.popleft())
+
+    @staticmethod
+    def _result(value: Any, future: "Future[DecodedBlob | None] | None") -> DecodedBlob:
+        decoded: DecodedBlob | None = future.result() if future is not None else None
+        # Не распаковалось - декодируется как текст, как в inflate_or_decode
+        return decoded if decoded is not None else decode_blob(value, deflate=False)
+
+    def decode_batch(self, values: Iterable[Any]) -> DecodedBatch:
+        """decode_batch с распаковкой сжатых значений в пуле"""
+        batch = DecodedBatch()
+        for decoded in self.decode(values):
+            batch.append(decoded)
+        return batch
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "BlobInflater":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
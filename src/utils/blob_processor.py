@@ -9,6 +9,9 @@ import logging
 from datetime import datetime
 from typing import Any
 
+from src.utils.blob_cache import BlobCache, blob_address, shared_blob_cache
+from src.utils.blob_inflater import inflate_or_decode
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,10 +56,14 @@ class BlobProcessor:
     и обеспечить единую архитектуру обработки.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, blob_cache: BlobCache | None = None) -> None:
         """
         Инициализация BlobProcessor
+
+        Args:
+            blob_cache: Кэш содержимого BLOB (по умолчанию общий для процесса)
         """
+        self.blob_cache = blob_cache or shared_blob_cache()
         self.extraction_methods = [
             "onec_dtools_utf16",
             "onec_dtools_utf8",
@@ -127,59 +134,34 @@ class BlobProcessor:
 
             # Получаем значение BLOB
             if hasattr(blob_obj, "value"):
-                blob_value = blob_obj.value
+                blob_value = self.blob_cache.read(blob_obj)
 
                 # Обрабатываем в зависимости от типа данных
                 if isinstance(blob_value, bytes):
-                    # Для бинарных данных пробуем UTF-16 (стандарт для NT полей)
-                    try:
-                        content = blob_value.decode("utf-16")
-                        if content and len(content.strip()) > 0:
-                            result["content"] = content
-                            result["content_type"] = "text_utf16"
-                            result["content_length"] = len(content)
-                            result["quality_score"] = 0.9
-                            result["extraction_methods"].append("onec_dtools_utf16")
-                            self.stats["successful_extractions"] += 1
-                            self.stats["method_usage"]["onec_dtools_utf16"] = (
-                                self.stats["method_usage"].get("onec_dtools_utf16", 0)
-                                + 1
-                            )
-                            self.stats["encoding_stats"]["utf16"] = (
-                                self.stats["encoding_stats"].get("utf16", 0) + 1
-                            )
-                            return BlobExtractionResult(result)
-                    except UnicodeDecodeError:
-                        pass
-
-                    # Если UTF-16 не сработал, пробуем другие кодировки
-                    for encoding in ["utf-8", "cp1251", "latin1"]:
-                        try:
-                            content = blob_value.decode(encoding)
-                            if content and len(content.strip()) > 0:
-                                result["content"] = content
-                                result["content_type"] = f"text_{encoding}"
-                                result["content_length"] = len(content)
-                                result["quality_score"] = 0.8
-                                result["extraction_methods"].append(
-                                    f"onec_dtools_{encoding}",
-                                )
-                                self.stats["successful_extractions"] += 1
-                                self.stats["method_usage"][
-                                    f"onec_dtools_{encoding}"
-                                ] = (
-                                    self.stats["method_usage"].get(
-                                        f"onec_dtools_{encoding}",
-                                        0,
-                                    )
-                                    + 1
-                                )
-                                self.stats["encoding_stats"][encoding] = (
-                                    self.stats["encoding_stats"].get(encoding, 0) + 1
-                                )
-                                return BlobExtractionResult(result)
-                        except UnicodeDecodeError:
-                            continue
+                    # Кодировка по частотам байтов и сигнатурам, без перебора;
+                    # сжатые deflate данные распаковываются до декодирования
+                    decoded = inflate_or_decode(blob_value)
+                    if decoded.text and decoded.text.strip():
+                        content = decoded.text
+                        if decoded.encoding.startswith("utf-16"):
+                            # UTF-16 - стандарт для NT полей
+                            encoding, quality_score = "utf16", 0.9
+                        else:
+                            encoding, quality_score = decoded.encoding, 0.8
+                        method = f"onec_dtools_{encoding}"
+                        result["content"] = content
+                        result["content_type"] = f"text_{encoding}"
+                        result["content_length"] = len(content)
+                        result["quality_score"] = quality_score
+                        result["extraction_methods"].append(method)
+                        self.stats["successful_extractions"] += 1
+                        self.stats["method_usage"][method] = (
+                            self.stats["method_usage"].get(method, 0) + 1
+                        )
+                        self.stats["encoding_stats"][encoding] = (
+                            self.stats["encoding_stats"].get(encoding, 0) + 1
+                        )
+                        return BlobExtractionResult(result)
 
                     # Если все кодировки не сработали, используем hex
                     result["content"] = blob_value.hex()
@@ -251,9 +233,13 @@ class BlobProcessor:
             True если поле является BLOB полем
         """
         try:
+            # Blob onec_dtools определяется по адресу, без чтения содержимого
+            if blob_address(field_value) is not None:
+                return True
             # Проверяем типы, которые могут быть BLOB
             if isinstance(field_value, bytes) or (
-                hasattr(field_value, "value") and isinstance(field_value.value, bytes)
+                hasattr(field_value, "value")
+                and isinstance(self.blob_cache.read(field_value), bytes)
             ):
                 return True
             if hasattr(field_value, "__iter__") and not isinstance(
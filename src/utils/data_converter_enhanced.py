@@ -11,6 +11,18 @@ from typing import Any
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
+
+from src.utils.duckdb_sink import DuckDBSink
+from src.utils.partitioned_dataset import (
+    PARTITION_COLUMNS,
+    PartitionedParquetSink,
+    create_dataset_view,
+)
+from src.utils.rollups import RollupStore, has_rollup
+
+# Справочники и регистры без даты документа делятся только по таблице
+TABLE_PARTITION = ("table_name",)
 
 
 class DataConverterEnhanced:
@@ -40,6 +52,9 @@ class DataConverterEnhanced:
         Как система конвертации в Parquet, я хочу конвертировать результаты
         извлечения в Parquet формат, чтобы обеспечить быстрый доступ к данным
         для анализа.
+
+        Каждый вид данных - Hive датасет <output_dir>/<вид>_enhanced/
+        (документы по table_name/document_type/year_month).
         """
         try:
             os.makedirs(output_dir, exist_ok=True)
@@ -49,9 +64,12 @@ class DataConverterEnhanced:
                 documents_df = self._convert_documents_to_dataframe(
                     results["documents"],
                 )
-                parquet_file = os.path.join(output_dir, "documents_enhanced.parquet")
-                documents_df.to_parquet(parquet_file, index=False)
-                print(f"✅ Parquet файл создан: {parquet_file}")
+                dataset_dir = self._write_dataset(
+                    documents_df,
+                    os.path.join(output_dir, "documents_enhanced"),
+                    PARTITION_COLUMNS,
+                )
+                print(f"✅ Parquet датасет создан: {dataset_dir}")
                 self.conversion_stats["parquet_files_created"] += 1
                 self.conversion_stats["total_records_converted"] += len(documents_df)
 
@@ -60,9 +78,12 @@ class DataConverterEnhanced:
                 references_df = self._convert_references_to_dataframe(
                     results["references"],
                 )
-                parquet_file = os.path.join(output_dir, "references_enhanced.parquet")
-                references_df.to_parquet(parquet_file, index=False)
-                print(f"✅ Parquet файл создан: {parquet_file}")
+                dataset_dir = self._write_dataset(
+                    references_df,
+                    os.path.join(output_dir, "references_enhanced"),
+                    TABLE_PARTITION,
+                )
+                print(f"✅ Parquet датасет создан: {dataset_dir}")
                 self.conversion_stats["parquet_files_created"] += 1
                 self.conversion_stats["total_records_converted"] += len(references_df)
 
@@ -71,9 +92,12 @@ class DataConverterEnhanced:
                 registers_df = self._convert_registers_to_dataframe(
                     results["registers"],
                 )
-                parquet_file = os.path.join(output_dir, "registers_enhanced.parquet")
-                registers_df.to_parquet(parquet_file, index=False)
-                print(f"✅ Parquet файл создан: {parquet_file}")
+                dataset_dir = self._write_dataset(
+                    registers_df,
+                    os.path.join(output_dir, "registers_enhanced"),
+                    TABLE_PARTITION,
+                )
+                print(f"✅ Parquet датасет создан: {dataset_dir}")
                 self.conversion_stats["parquet_files_created"] += 1
                 self.conversion_stats["total_records_converted"] += len(registers_df)
 
@@ -83,58 +107,97 @@ class DataConverterEnhanced:
             print(f"❌ Ошибка конвертации в Parquet: {e}")
             return False
 
+    def _write_dataset(
+        self,
+        df: pd.DataFrame,
+        dataset_dir: str,
+        partition_by: tuple[str, ...],
+    ) -> str:
+        """Запись DataFrame в Hive датасет (каталог пересоздается)"""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with PartitionedParquetSink(
+            dataset_dir,
+            schema=table.schema,
+            partition_by=partition_by,
+        ) as sink:
+            for batch in table.to_batches():
+                sink.write_batch(batch)
+        return dataset_dir
+
+    def _create_dataset_views(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        parquet_dir: str | None,
+    ) -> set[str]:
+        """View поверх датасетов convert_to_parquet вместо копии строк в DuckDB"""
+        views: set[str] = set()
+        if parquet_dir is None:
+            return views
+        for name in ("documents_enhanced", "references_enhanced", "registers_enhanced"):
+            if create_dataset_view(con, name, os.path.join(parquet_dir, name)):
+                print(f"✅ View {name} → Parquet датасет")
+                views.add(name)
+        return views
+
     def convert_to_duckdb(
         self,
         results: dict[str, Any],
         output_dir: str = "data/results/duckdb",
+        parquet_dir: str | None = "data/results/parquet",
     ) -> bool:
         """
         JTBD:
         Как система конвертации в DuckDB, я хочу конвертировать результаты
         извлечения в DuckDB базу данных, чтобы обеспечить быстрые аналитические
         запросы.
+
+        Если в parquet_dir есть датасеты convert_to_parquet, создаются view
+        (DuckDB отсекает партиции и группы строк), иначе строки загружаются
+        в таблицы.
         """
         try:
             os.makedirs(output_dir, exist_ok=True)
 
             duckdb_file = os.path.join(output_dir, "analysis_enhanced.duckdb")
             con = duckdb.connect(duckdb_file)
-
-            # Загружаем документы
-            if results.get("documents"):
-                documents_df = self._convert_documents_to_dataframe(
-                    results["documents"],
-                )
-                con.execute(
-                    "CREATE OR REPLACE TABLE documents_enhanced AS SELECT * FROM documents_df",
-                )
-                print("✅ Таблица documents_enhanced создана в DuckDB")
-                _ = documents_df  # Используем переменную для SQL запроса
-
-            # Загружаем справочники
-            if results.get("references"):
-                references_df = self._convert_references_to_dataframe(
-                    results["references"],
-                )
-                con.execute(
-                    "CREATE OR REPLACE TABLE references_enhanced AS SELECT * FROM references_df",
-                )
-                print("✅ Таблица references_enhanced создана в DuckDB")
-                _ = references_df  # Используем переменную для SQL запроса
-
-            # Загружаем регистры
-            if results.get("registers"):
-                registers_df = self._convert_registers_to_dataframe(
-                    results["registers"],
-                )
-                con.execute(
-                    "CREATE OR REPLACE TABLE registers_enhanced AS SELECT * FROM registers_df",
+            views = self._create_dataset_views(con, parquet_dir)
+
+            # Без датасетов строки загружаются таблицей Arrow в транзакции
+            # (типы колонок из Arrow, без CREATE ... AS SELECT по DataFrame)
+            sink = DuckDBSink(con)
+            loaders = {
+                "documents_enhanced": (
+                    "documents",
+                    self._convert_documents_to_dataframe,
+                ),
+                "references_enhanced": (
+                    "references",
+                    self._convert_references_to_dataframe,
+                ),
+                "registers_enhanced": (
+                    "registers",
+                    self._convert_registers_to_dataframe,
+                ),
+            }
+            for table_name, (key, to_dataframe) in loaders.items():
+                if results.get(key) and table_name not in views:
+                    table = pa.Table.from_pandas(
+                        to_dataframe(results[key]),
+                        preserve_index=False,
+                    )
+                    sink.write_batch(table_name, table, replace=True)
+                    print(f"✅ Таблица {table_name} создана в DuckDB")
+
+            # Создаем индексы для быстрого поиска (у view индексов нет)
+            if "documents_enhanced" not in views:
+                self._create_duckdb_indexes(con)
+
+            # Сводные таблицы по датасету документов (только измененные месяцы)
+            if parquet_dir is not None and "documents_enhanced" in views:
+                RollupStore(con).refresh(
+                    {"documents": os.path.join(parquet_dir, "documents_enhanced")},
+                    views={"documents": "documents_enhanced"},
                 )
-                print("✅ Таблица registers_enhanced создана в DuckDB")
-                _ = registers_df  # Используем переменную для SQL запроса
-
-            # Создаем индексы для быстрого поиска
-            self._create_duckdb_indexes(con)
 
             # Выполняем аналитические запросы
             self._run_analytical_queries(con)
@@ -258,37 +321,58 @@ class DataConverterEnhanced:
             print(f"⚠️ Ошибка создания индексов: {e}")
 
     def _run_analytical_queries(self, con: duckdb.DuckDBPyConnection) -> None:
-        """Выполнить аналитические запросы"""
+        """
+        Выполнить аналитические запросы
+
+        При наличии сводной таблицы blob_success_by_table запросы читают ее,
+        а не группируют все документы заново
+        """
         try:
             print("\n📊 Аналитические запросы (улучшенная версия):")
 
-            # Статистика по таблицам
-            result = con.execute(
+            if has_rollup(con, "blob_success_by_table"):
+                source = "blob_success_rates"
+                table_stats = """
+                    SELECT
+                        table_name,
+                        documents as total_documents,
+                        total_blobs,
+                        total_blobs / documents as avg_blobs_per_doc
+                    FROM blob_success_rates
+                    ORDER BY total_documents DESC
                 """
-                SELECT
-                    table_name,
-                    COUNT(*) as total_documents,
-                    SUM(total_blobs) as total_blobs,
-                    AVG(total_blobs) as avg_blobs_per_doc
-                FROM documents_enhanced
-                GROUP BY table_name
-                ORDER BY total_documents DESC
-            """,
-            ).fetchdf()
+            else:
+                source = """(
+                    SELECT
+                        table_name,
+                        SUM(successful_blobs) as successful_blobs,
+                        SUM(failed_blobs) as failed_blobs,
+                        ROUND(SUM(successful_blobs) * 100.0 / (SUM(successful_blobs) + SUM(failed_blobs)), 2) as success_rate
+                    FROM documents_enhanced
+                    GROUP BY table_name
+                )"""
+                table_stats = """
+                    SELECT
+                        table_name,
+                        COUNT(*) as total_documents,
+                        SUM(total_blobs) as total_blobs,
+                        AVG(total_blobs) as avg_blobs_per_doc
+                    FROM documents_enhanced
+                    GROUP BY table_name
+                    ORDER BY total_documents DESC
+                """
+
+            # Статистика по таблицам
+            result = con.execute(table_stats).fetchdf()
             print("📈 Статистика по таблицам:")
             print(result)
 
             # Топ таблиц по BLOB полям
             result = con.execute(
-                """
-                SELECT
-                    table_name,
-                    SUM(successful_blobs) as successful_blobs,
-                    SUM(failed_blobs) as failed_blobs,
-                    ROUND(SUM(successful_blobs) * 100.0 / (SUM(successful_blobs) + SUM(failed_blobs)), 2) as success_rate
-                FROM documents_enhanced
+                f"""
+                SELECT table_name, successful_blobs, failed_blobs, success_rate
+                FROM {source}
                 WHERE successful_blobs + failed_blobs > 0
-                GROUP BY table_name
                 ORDER BY successful_blobs DESC
                 LIMIT 10
             """,
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+"""
+DocumentTables - хранение извлеченных документов без широкой таблицы
+Общий узкий индекс документов (номер, дата, магазин, сумма, счетчики BLOB)
+и по одной Parquet таблице на каждую таблицу 1CD с ее типизированной схемой:
+поля 1С - колонки своих типов, BLOB - метаданные и текст только этой таблицы.
+Индекс и таблицы связаны по (table_name, row_index) и id документа.
+Строки табличных частей (номенклатура, количество, сумма) пишутся
+отдельным датасетом по месяцу документа.
+"""
+
+import ast
+import os
+import shutil
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from src.utils.arrow_parquet_sink import (
+    BINARY_FIELD_TYPES,
+    PYARROW_AVAILABLE,
+    arrow_type_for_field,
+)
+from src.utils.partitioned_dataset import (
+    PartitionedParquetSink,
+    create_dataset_view,
+    partition_value,
+)
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+
+DEFAULT_ROOT = "data/results/parquet"
+INDEX_DIR = "documents"
+TABLES_DIR = "tables"
+TABLE_PARTS_DIR = "table_parts"
+
+# Колонки индекса документов (одинаковые для всех таблиц); дата документа -
+# timestamp, "N/A" и нераспознанная дата записываются как null
+INDEX_COLUMN_TYPES = {
+    "id": "string",
+    "table_name": "string",
+    "row_index": "int64",
+    "document_type": "string",
+    "document_number": "string",
+    "document_date": "timestamp[s]",
+    "store_name": "string",
+    "store_code": "string",
+    "total_amount": "float64",
+    "currency": "string",
+    "supplier_name": "string",
+    "buyer_name": "string",
+    "total_blobs": "int64",
+    "successful_blobs": "int64",
+    "failed_blobs": "int64",
+    "blob_fields_count": "int64",
+}
+
+# Строки табличных частей с реквизитами документа (для продаж по магазину и дню)
+TABLE_PART_COLUMN_TYPES = {
+    "document_id": "string",
+    "table_name": "string",
+    "row_index": "int64",
+    "document_type": "string",
+    "document_date": "timestamp[s]",
+    "store_name": "string",
+    "table_part": "string",
+    "line_index": "int64",
+    "nomenclature": "string",
+    "quantity": "float64",
+    "price": "float64",
+    "amount": "float64",
+}
+
+# Поля BLOB хранятся как метаданные извлечения, а не значением поля
+BLOB_FIELD_TYPES = {"NT", "I"}
+TABLE_DATE_COLUMN = "_DATE_TIME"
+
+
+def index_schema() -> "pa.Schema":
+    return pa.schema(
+        [
+            pa.field(name, pa.type_for_alias(type_name))
+            for name, type_name in INDEX_COLUMN_TYPES.items()
+        ],
+    )
+
+
+def table_part_schema() -> "pa.Schema":
+    return pa.schema(
+        [
+            pa.field(name, pa.type_for_alias(type_name))
+            for name, type_name in TABLE_PART_COLUMN_TYPES.items()
+        ],
+    )
+
+
+def field_columns(fields_meta: Mapping[str, list[Any]]) -> dict[str, tuple[str, Any]]:
+    """
+    Позиционное имя поля документа (field_N) → (колонка таблицы, описание).
+    Описание из метаданных извлечения: [тип, длина, точность, имя поля 1CD]
+    """
+    columns = {}
+    for key, description in fields_meta.items():
+        name = description[3] if len(description) > 3 else key
+        columns[key] = (name, description)
+    return columns
+
+
+def table_schema(fields_meta: Mapping[str, list[Any]]) -> "pa.Schema":
+    """
+    Схема таблицы документов: ключи связи с индексом, поля 1С их типов,
+    для каждого BLOB поля - способы извлечения и размер
+    """
+    schema_fields = [
+        pa.field("id", pa.string()),
+        pa.field("row_index", pa.int64()),
+    ]
+    blob_names = []
+    for name, description in field_columns(fields_meta).values():
+        field_type, length, precision = description[:3]
+        if field_type in BLOB_FIELD_TYPES:
+            blob_names.append(name)
+            continue
+        schema_fields.append(
+            pa.field(name, arrow_type_for_field(field_type, length, precision)),
+        )
+    for name in blob_names:
+        schema_fields.append(pa.field(f"blob_{name}_methods", pa.string()))
+        schema_fields.append(pa.field(f"blob_{name}_size", pa.int64()))
+    schema_fields.append(pa.field("blob_content", pa.string()))
+    return pa.schema(schema_fields)
+
+
+def binary_value(value: Any) -> bytes | None:
+    """
+    Байты поля после JSONL spool: bytes, hex строка или repr вида b'...'
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if not isinstance(value, str):
+        return None
+    if value[:2] in ("b'", 'b"'):
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return None
+        return parsed if isinstance(parsed, bytes) else None
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        return None
+
+
+def index_row(doc: dict[str, Any]) -> dict[str, Any]:
+    """Строка индекса документов"""
+    stats = doc.get("extraction_stats", {})
+    return {
+        "id": doc.get("id", ""),
+        "table_name": doc.get("table_name", ""),
+        "row_index": doc.get("row_index", 0),
+        "document_type": doc.get("document_type", "Неизвестно"),
+        "document_number": doc.get("document_number", "N/A"),
+        "document_date": doc.get("document_date"),
+        "store_name": doc.get("store_name", "N/A"),
+        "store_code": doc.get("store_code", "N/A"),
+        "total_amount": doc.get("total_amount", 0.0),
+        "currency": doc.get("currency", "RUB"),
+        "supplier_name": doc.get("supplier_name", "N/A"),
+        "buyer_name": doc.get("buyer_name", "N/A"),
+        "total_blobs": stats.get("total_blobs", 0),
+        "successful_blobs": stats.get("successful", 0),
+        "failed_blobs": stats.get("failed", 0),
+        "blob_fields_count": sum(
+            1
+            for blob_data in doc.get("blobs", {}).values()
+            if blob_data.get("extraction_methods")
+        ),
+    }
+
+
+def table_row(
+    doc: dict[str, Any],
+    columns: Mapping[str, tuple[str, Any]],
+) -> dict[str, Any]:
+    """Строка таблицы документов: значения полей под колонками 1CD"""
+    row: dict[str, Any] = {
+        "id": doc.get("id", ""),
+        "row_index": doc.get("row_index", 0),
+        "blob_content": doc.get("blob_content", ""),
+    }
+    for key, value in doc.get("fields", {}).items():
+        name, description = columns.get(key, (key, None))
+        if description is not None:
+            if description[0] in BLOB_FIELD_TYPES:
+                continue
+            if description[0] in BINARY_FIELD_TYPES:
+                value = binary_value(value)
+        row[name] = value
+    for key, blob_data in doc.get("blobs", {}).items():
+        name = columns.get(key, (key, None))[0]
+        if blob_data.get("extraction_methods"):
+            row[f"blob_{name}_methods"] = ",".join(blob_data["extraction_methods"])
+            row[f"blob_{name}_size"] = blob_data.get("size", 0)
+    return row
+
+
+def nomenclature_key(value: Any) -> str:
+    """Номенклатура строки: ссылка (байты) - hex, иначе текст"""
+    if isinstance(value, (bytes, bytearray)) or (
+        isinstance(value, str) and value[:2] in ("b'", 'b"')
+    ):
+        raw = binary_value(value)
+        if raw is not None:
+            return raw.hex()
+    return "" if value is None else str(value)
+
+
+def table_part_rows(doc: dict[str, Any]) -> Iterable[dict[str, Any]]:
+    """Строки табличных частей документа (extract_table_parts)"""
+    for table_part, lines in doc.get("table_parts", {}).items():
+        for line in lines:
+            yield {
+                "document_id": doc.get("id", ""),
+                "table_name": doc.get("table_name", ""),
+                "row_index": doc.get("row_index", 0),
+                "document_type": doc.get("document_type", "Неизвестно"),
+                "document_date": doc.get("document_date"),
+                "store_name": doc.get("store_name", "N/A"),
+                "table_part": table_part,
+                "line_index": line.get("row_index", 0),
+                "nomenclature": nomenclature_key(line.get("nomenclature")),
+                "quantity": line.get("quantity", 0),
+                "price": line.get("price", 0),
+                "amount": line.get("amount", 0),
+            }
+
+
+class DocumentTablesWriter:
+    """
+    JTBD:
+    Как конвертер результатов извлечения, я хочу писать документы в узкий
+    индекс и в типизированную таблицу своей 1CD таблицы, чтобы Parquet
+    не состоял из тысяч почти пустых строковых колонок field_*/blob_*,
+    а аналитика соединяла индекс с нужной таблицей по ключу.
+
+    <root>/documents/ - индекс (Hive датасет table_name/document_type/year_month),
+    <root>/tables/<таблица>/ - таблица 1CD (year_month по _DATE_TIME),
+    <root>/table_parts/ - строки табличных частей (year_month по дате документа).
+    table_fields - метаданные извлечения {таблица: {field_N: описание}}.
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_ROOT,
+        table_fields: Mapping[str, Mapping[str, list[Any]]] | None = None,
+    ) -> None:
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow не установлен. Установите: pip install pyarrow")
+
+        self.root = root
+        self.table_fields = dict(table_fields or {})
+        self.index = PartitionedParquetSink(self.index_dir, schema=index_schema())
+        self.tables: dict[str, PartitionedParquetSink] = {}
+        self.table_parts: PartitionedParquetSink | None = None
+        self._columns: dict[str, dict[str, tuple[str, Any]]] = {}
+
+    @property
+    def index_dir(self) -> str:
+        return os.path.join(self.root, INDEX_DIR)
+
+    def table_dir(self, table_name: str) -> str:
+        return os.path.join(self.root, TABLES_DIR, partition_value(table_name))
+
+    @property
+    def table_parts_dir(self) -> str:
+        return os.path.join(self.root, TABLE_PARTS_DIR)
+
+    def _table_parts_sink(self) -> PartitionedParquetSink:
+        if self.table_parts is None:
+            shutil.rmtree(self.table_parts_dir, ignore_errors=True)
+            self.table_parts = PartitionedParquetSink(
+                self.table_parts_dir,
+                schema=table_part_schema(),
+                partition_by=("year_month",),
+                date_column="document_date",
+            )
+        return self.table_parts
+
+    def _table_sink(self, table_name: str) -> PartitionedParquetSink:
+        sink = self.tables.get(table_name)
+        if sink is None:
+            fields_meta = self.table_fields.get(table_name, {})
+            self._columns[table_name] = field_columns(fields_meta)
+            schema = table_schema(fields_meta) if fields_meta else None
+            # Месяцы прежней выгрузки не должны остаться рядом с новыми
+            shutil.rmtree(self.table_dir(table_name), ignore_errors=True)
+            sink = PartitionedParquetSink(
+                self.table_dir(table_name),
+                schema=schema,
+                partition_by=("year_month",),
+                date_column=TABLE_DATE_COLUMN,
+            )
+            self.tables[table_name] = sink
+        return sink
+
+    def write(self, doc: dict[str, Any]) -> None:
+        table_name = doc.get("table_name", "")
+        self.index.write_row(index_row(doc))
+        sink = self._table_sink(table_name)
+        sink.write_row(table_row(doc, self._columns[table_name]))
+        if doc.get("table_parts"):
+            self._table_parts_sink().write_rows(table_part_rows(doc))
+
+    def close(self) -> dict[str, int]:
+        """Закрывает индекс и таблицы, возвращает число строк по таблицам"""
+        rows = {name: sink.close() for name, sink in self.tables.items()}
+        if self.table_parts is not None:
+            self.table_parts.close()
+        self.index.close()
+        return rows
+
+    def create_views(self, con: Any, index_view: str = "documents") -> list[str]:
+        """View DuckDB: индекс документов и по одному view на таблицу 1CD"""
+        views = []
+        if create_dataset_view(con, index_view, self.index_dir):
+            views.append(index_view)
+        for table_name in self.tables:
+            if create_dataset_view(con, table_name, self.table_dir(table_name)):
+                views.append(table_name)
+        # Каталог прежней выгрузки без табличных частей в view не попадает
+        if self.table_parts is not None and create_dataset_view(
+            con,
+            TABLE_PARTS_DIR,
+            self.table_parts_dir,
+        ):
+            views.append(TABLE_PARTS_DIR)
+        return views
+
+    def __enter__(self) -> "DocumentTablesWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
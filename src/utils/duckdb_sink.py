@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+"""
+DuckDBSink - загрузка извлеченных записей в DuckDB пакетами Arrow
+Пакет регистрируется в соединении как view и дописывается INSERT BY NAME
+в транзакции; таблица создается по схеме Arrow 1CD таблицы один раз,
+а не пересоздается из Parquet/pandas на каждом сохранении
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from src.utils.arrow_parquet_sink import DEFAULT_BATCH_SIZE, rows_to_record_batch
+from src.utils.stage_profiler import STAGE_SINK, profiled
+
+try:
+    import duckdb
+    import pyarrow as pa
+
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+# Имя view пакета в соединении на время INSERT
+BATCH_VIEW = "_sink_batch"
+
+
+def quote_identifier(name: str) -> str:
+    """Имя таблицы/колонки в кавычках DuckDB"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def infer_row_schema(rows: list[dict[str, Any]]) -> "pa.Schema":
+    """Схема по строкам без метаданных таблицы (колонки из None - строки)"""
+    inferred = pa.RecordBatch.from_pylist(rows).schema
+    return pa.schema(
+        [
+            pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+            for field in inferred
+        ],
+    )
+
+
+class DuckDBSink:
+    """
+    JTBD:
+    Как sink извлечения, я хочу дописывать пакеты Arrow в открытую базу
+    DuckDB, чтобы загрузка росла линейно с объемом данных, а таблицы
+    не переписывались целиком на каждом checkpoint.
+
+    database - путь к файлу .duckdb или открытое соединение (тогда sink
+    его не закрывает). Схема таблицы берется из первого пакета; колонки,
+    появившиеся позже (например, от enrich), добавляются ALTER TABLE.
+    """
+
+    def __init__(
+        self,
+        database: Any = ":memory:",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        if not DUCKDB_AVAILABLE:
+            raise ImportError(
+                "duckdb/pyarrow не установлены. Установите: pip install duckdb pyarrow",
+            )
+
+        self.owns_connection = isinstance(database, str)
+        self.path = database if self.owns_connection else None
+        self.conn = duckdb.connect(database) if self.owns_connection else database
+        self.batch_size = batch_size
+        self.rows_written: dict[str, int] = {}
+        self._columns: dict[str, list[str]] = {}
+        self._closed = False
+
+    def has_table(self, table_name: str) -> bool:
+        return self._table_columns(table_name) is not None
+
+    def _table_columns(self, table_name: str) -> list[str] | None:
+        """Колонки таблицы (кэш); None - таблицы нет"""
+        columns = self._columns.get(table_name)
+        if columns is not None:
+            return columns
+        columns = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT column_name FROM duckdb_columns() "
+                "WHERE table_name = ? ORDER BY column_index",
+                [table_name],
+            ).fetchall()
+        ]
+        if not columns:
+            return None
+        self._columns[table_name] = columns
+        return columns
+
+    def _create_table(self, table_name: str) -> None:
+        """Типизированная таблица по схеме зарегистрированного пакета"""
+        self.conn.execute(
+            f"CREATE TABLE {quote_identifier(table_name)} AS "
+            f"SELECT * FROM {BATCH_VIEW} LIMIT 0",
+        )
+        self._columns[table_name] = [
+            row[0]
+            for row in self.conn.execute(
+                f"DESCRIBE SELECT * FROM {BATCH_VIEW}",
+            ).fetchall()
+        ]
+
+    def _add_columns(self, table_name: str, names: list[str]) -> None:
+        """Новые колонки пакета: тип DuckDB выводится из схемы Arrow"""
+        columns = ", ".join(quote_identifier(name) for name in names)
+        described = self.conn.execute(
+            f"DESCRIBE SELECT {columns} FROM {BATCH_VIEW}",
+        ).fetchall()
+        for name, column_type, *_ in described:
+            self.conn.execute(
+                f"ALTER TABLE {quote_identifier(table_name)} "
+                f"ADD COLUMN {quote_identifier(name)} {column_type}",
+            )
+        self._columns[table_name].extend(names)
+
+    def _append_registered(self, table_name: str, schema: "pa.Schema") -> None:
+        columns = self._table_columns(table_name)
+        if columns is None:
+            self._create_table(table_name)
+        else:
+            new_columns = [name for name in schema.names if name not in columns]
+            if new_columns:
+                self._add_columns(table_name, new_columns)
+        self.conn.execute(
+            f"INSERT INTO {quote_identifier(table_name)} BY NAME "
+            f"SELECT * FROM {BATCH_VIEW}",
+        )
+
+    def _in_transaction(self, table_name: str, data: Any, action: Any) -> None:
+        """action() в транзакции с пакетом data, зарегистрированным как view"""
+        self.conn.begin()
+        try:
+            if data is not None:
+                self.conn.register(BATCH_VIEW, data)
+            action()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            # Кэш колонок мог разойтись с откатанным DDL
+            self._columns.pop(table_name, None)
+            raise
+        finally:
+            if data is not None:
+                self.conn.unregister(BATCH_VIEW)
+
+    @profiled(STAGE_SINK)
+    def write_batch(
+        self,
+        table_name: str,
+        batch: "pa.RecordBatch | pa.Table",
+        replace: bool = False,
+    ) -> int:
+        """
+        Дописывает пакет в таблицу (replace=True - таблица сначала
+        удаляется, в той же транзакции). Возвращает число строк пакета
+        """
+
+        def append() -> None:
+            if replace:
+                self.conn.execute(
+                    f"DROP TABLE IF EXISTS {quote_identifier(table_name)}",
+                )
+                self._columns.pop(table_name, None)
+                self.rows_written[table_name] = 0
+            self._append_registered(table_name, batch.schema)
+
+        self._in_transaction(table_name, batch, append)
+        self.rows_written[table_name] = (
+            self.rows_written.get(table_name, 0) + batch.num_rows
+        )
+        return int(batch.num_rows)
+
+    def write_rows(
+        self,
+        table_name: str,
+        rows: Iterable[dict[str, Any]],
+        schema: "pa.Schema | None" = None,
+        replace: bool = False,
+        enrich: Any = None,
+    ) -> int:
+        """
+        Дописывает строки пакетами batch_size по схеме 1CD таблицы
+        (без схемы - по первому пакету). enrich преобразует каждый пакет
+        """
+        written = 0
+        chunk: list[dict[str, Any]] = []
+
+        def flush() -> None:
+            nonlocal written, replace, schema
+            if schema is None:
+                schema = infer_row_schema(chunk)
+            batch = rows_to_record_batch(chunk, schema)
+            if enrich is not None:
+                batch = enrich(batch)
+            written += self.write_batch(table_name, batch, replace=replace)
+            replace = False
+            chunk.clear()
+
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.batch_size:
+                flush()
+        if chunk or (replace and schema is not None):
+            flush()
+        return written
+
+    @profiled(STAGE_SINK)
+    def replace_ranges(
+        self,
+        table_name: str,
+        batch: "pa.RecordBatch | pa.Table",
+        ranges: list[tuple[int, int]],
+    ) -> int:
+        """
+        Удаляет строки диапазонов (start, stop] по row_index и вставляет
+        пакет в одной транзакции: читатели видят таблицу до или после
+        """
+
+        def upsert() -> None:
+            if self.has_table(table_name):
+                for start_row, stop_row in ranges:
+                    self.conn.execute(
+                        f"DELETE FROM {quote_identifier(table_name)} "
+                        "WHERE row_index > ? AND row_index <= ?",
+                        [start_row, stop_row],
+                    )
+            self._append_registered(table_name, batch.schema)
+
+        self._in_transaction(table_name, batch, upsert)
+        return int(batch.num_rows)
+
+    def create_indexes(self, table_name: str, columns: Iterable[str]) -> None:
+        """ART индексы колонок (после загрузки: индекс замедляет вставку)"""
+        for column in columns:
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS "
+                f"{quote_identifier(f'idx_{table_name}_{column}')} "
+                f"ON {quote_identifier(table_name)}({quote_identifier(column)})",
+            )
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self.owns_connection:
+            self.conn.close()
+
+    def __enter__(self) -> "DuckDBSink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -5,14 +5,17 @@ Enhanced Blob Extractor
 Расширенный извлекатель BLOB данных с 7 методами извлечения
 """
 
-import base64
 import binascii
-import json
 import logging
 import re
 from dataclasses import dataclass, field
 from typing import Any
 
+from src.utils.batch_blob_decoder import detect_text_type
+from src.utils.blob_cache import BlobCache, shared_blob_cache
+from src.utils.blob_inflater import inflate_or_decode
+from src.utils.keyword_matcher import get_matcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,8 +37,9 @@ class BlobExtractionResult:
 class EnhancedBlobExtractor:
     """Расширенный извлекатель BLOB данных с 7 методами"""
 
-    def __init__(self) -> None:
-        """Инициализация извлекателя"""
+    def __init__(self, blob_cache: BlobCache | None = None) -> None:
+        """Инициализация извлекателя (blob_cache - кэш содержимого BLOB)"""
+        self.blob_cache = blob_cache or shared_blob_cache()
         self.methods = [
             "value",
             "iterator",
@@ -130,7 +134,7 @@ class EnhancedBlobExtractor:
 
             # Получаем значение BLOB
             try:
-                blob_value = blob_obj.value
+                blob_value = self.blob_cache.read(blob_obj)
             except Exception as e:
                 result.errors.append(f"Ошибка получения value: {e!s}")
                 return False
@@ -141,30 +145,17 @@ class EnhancedBlobExtractor:
 
             # Обрабатываем в зависимости от типа данных
             if isinstance(blob_value, bytes):
-                # Для бинарных данных пробуем UTF-16 (стандарт для NT полей)
-                try:
-                    content = blob_value.decode("utf-16")
-                    if content and len(content.strip()) > 0:
-                        result.content = content
-                        result.metadata["encoding"] = "utf-16"
-                        result.metadata["method"] = "utf16_decode"
-                        return True
-                except UnicodeDecodeError:
-                    pass
-
-                # Если UTF-16 не сработал, пробуем другие кодировки
-                for encoding in ["utf-8", "cp1251", "latin1"]:
-                    try:
-                        content = blob_value.decode(encoding)
-                        if content and len(content.strip()) > 0:
-                            result.content = content
-                            result.metadata["encoding"] = encoding
-                            result.metadata["method"] = f"{encoding}_decode"
-                            return True
-                    except UnicodeDecodeError:
-                        continue
-
-                # Если все кодировки не сработали, используем hex
+                # Сжатые данные распаковываются, кодировка и тип содержимого -
+                # по частотам байтов и сигнатурам
+                decoded = inflate_or_decode(blob_value)
+                result.metadata["content_type"] = decoded.content_type
+                if decoded.text and decoded.text.strip():
+                    result.content = decoded.text
+                    result.metadata["encoding"] = decoded.encoding
+                    result.metadata["method"] = f"{decoded.encoding}_decode"
+                    return True
+
+                # Двоичные данные (файлы, несжимаемые данные) - hex
                 result.content = blob_value.hex()
                 result.metadata["encoding"] = "hex"
                 result.metadata["method"] = "hex_dump"
@@ -196,7 +187,7 @@ class EnhancedBlobExtractor:
         """Попытка извлечения через value атрибут (правильный подход onec_dtools)"""
         try:
             if hasattr(blob_obj, "value"):
-                blob_value = blob_obj.value
+                blob_value = self.blob_cache.read(blob_obj)
 
                 # Проверяем размер BLOB
                 if hasattr(blob_obj, "__len__"):
@@ -210,19 +201,14 @@ class EnhancedBlobExtractor:
 
                 # Обрабатываем в зависимости от типа данных
                 if isinstance(blob_value, bytes):
-                    # Для бинарных данных пробуем разные кодировки
-                    for encoding in ["utf-16", "utf-8", "cp1251", "latin1"]:
-                        try:
-                            content = blob_value.decode(encoding)
-                            if content and len(content.strip()) > 0:
-                                result.content = content
-                                result.metadata["encoding"] = encoding
-                                result.metadata["blob_size"] = len(blob_value)
-                                return True
-                        except UnicodeDecodeError:
-                            continue
-
-                    # Если все кодировки не сработали, используем hex
+                    decoded = inflate_or_decode(blob_value)
+                    if decoded.text and decoded.text.strip():
+                        result.content = decoded.text
+                        result.metadata["encoding"] = decoded.encoding
+                        result.metadata["blob_size"] = len(blob_value)
+                        return True
+
+                    # Двоичные данные - hex
                     result.content = blob_value.hex()
                     result.metadata["encoding"] = "hex"
                     result.metadata["blob_size"] = len(blob_value)
@@ -374,69 +360,28 @@ class EnhancedBlobExtractor:
         if not content:
             return 0.0
 
-        bonus = 0.0
         flower_keywords = ["роз", "тюльпан", "гвоздик", "цвет", "букет"]
-        for keyword in flower_keywords:
-            if keyword in content.lower():
-                bonus += 0.1
-
-        return min(bonus, 0.3)
+        return min(get_matcher(flower_keywords).count(content) * 0.1, 0.3)
 
     def _calculate_temporal_quality_bonus(self, content: str) -> float:
         """Бонус качества для временных данных"""
         if not content:
             return 0.0
 
-        bonus = 0.0
         temporal_keywords = ["дата", "время", "период", "год", "месяц", "день"]
-        for keyword in temporal_keywords:
-            if keyword in content.lower():
-                bonus += 0.1
-
-        return min(bonus, 0.3)
+        return min(get_matcher(temporal_keywords).count(content) * 0.1, 0.3)
 
     def _calculate_financial_quality_bonus(self, content: str) -> float:
         """Бонус качества для финансовых данных"""
         if not content:
             return 0.0
 
-        bonus = 0.0
         financial_keywords = ["сумма", "рубл", "доллар", "евро", "цена", "стоимость"]
-        for keyword in financial_keywords:
-            if keyword in content.lower():
-                bonus += 0.1
-
-        return min(bonus, 0.3)
+        return min(get_matcher(financial_keywords).count(content) * 0.1, 0.3)
 
     def _detect_content_type(self, content: str) -> str:
         """Определение типа содержимого"""
-        if not content:
-            return "unknown"
-
-        # JSON
-        try:
-            json.loads(content)
-            return "json"
-        except Exception as e:
-            logger.debug(f"Ошибка при определении типа JSON: {e}")
-
-        # XML
-        if content.strip().startswith("<") and content.strip().endswith(">"):
-            return "xml"
-
-        # Base64
-        try:
-            base64.b64decode(content)
-            return "base64"
-        except Exception as e:
-            logger.debug(f"Ошибка при определении типа JSON: {e}")
-
-        # Hex
-        if re.match(r"^[0-9a-fA-F]+$", content):
-            return "hex"
-
-        # Text
-        return "text"
+        return detect_text_type(content)
 
     def extract_flower_data(self, blob_obj: Any) -> dict[str, Any]:
         """Извлечение данных о цветах"""
@@ -526,9 +471,9 @@ class EnhancedBlobExtractor:
 
             # Поиск событий
             event_keywords = ["дата", "время", "период", "создан", "изменен"]
-            for keyword in event_keywords:
-                if keyword in result.content.lower():
-                    temporal_info["events"].append(keyword)
+            temporal_info["events"].extend(
+                get_matcher(event_keywords).found(result.content),
+            )
 
         return {"extraction_result": result, "temporal_info": temporal_info}
 
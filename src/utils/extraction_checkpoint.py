@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+ExtractionCheckpoint - возобновляемое извлечение таблиц 1С
+Для каждой таблицы хранится небольшой manifest: watermark (смещение строки,
+до которой все записи сохранены) и список зафиксированных шардов.
+Checkpoint пишет только новые записи, поэтому его стоимость не растет с таблицей.
+"""
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any
+
+DEFAULT_CHECKPOINT_DIR = "data/results/checkpoints"
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Записывает JSON через временный файл и os.replace"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_jsonl_atomic(path: str, records: Iterable[dict[str, Any]]) -> int:
+    """Записывает JSONL через временный файл и os.replace, возвращает число строк"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str))
+            f.write("\n")
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+@dataclass
+class CheckpointManifest:
+    """Состояние извлечения таблицы"""
+
+    table_name: str
+    watermark: int = 0
+    records: int = 0
+    completed: bool = False
+    shards: list[dict[str, Any]] = field(default_factory=list)
+    updated_at: str = ""
+
+    def committed_ranges(self) -> set[tuple[int, int]]:
+        """Диапазоны строк [start_row, stop_row), уже сохраненные в шардах"""
+        return {(shard["start_row"], shard["stop_row"]) for shard in self.shards}
+
+
+class ExtractionCheckpoint:
+    """
+    JTBD:
+    Как система возобновляемого извлечения, я хочу фиксировать прогресс таблицы
+    в manifest с watermark и списком шардов, чтобы прерванный (SIGINT, kill)
+    запуск продолжался с последней сохраненной строки, а не с нуля.
+    """
+
+    def __init__(self, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR) -> None:
+        self.checkpoint_dir = checkpoint_dir
+
+    def table_dir(self, table_name: str) -> str:
+        return os.path.join(self.checkpoint_dir, table_name)
+
+    def manifest_path(self, table_name: str) -> str:
+        return os.path.join(self.table_dir(table_name), "manifest.json")
+
+    def shard_path(self, table_name: str, start_row: int, stop_row: int) -> str:
+        return os.path.join(
+            self.table_dir(table_name),
+            f"shard-{start_row:010d}-{stop_row:010d}.jsonl",
+        )
+
+    def load(self, table_name: str) -> CheckpointManifest:
+        """Загружает manifest таблицы (новый, если файла нет или он поврежден)"""
+        path = self.manifest_path(table_name)
+        if not os.path.exists(path):
+            return CheckpointManifest(table_name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return CheckpointManifest(**data)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️ Manifest {path} поврежден, начинаем заново: {e!s}")
+            return CheckpointManifest(table_name)
+
+    def save(self, manifest: CheckpointManifest) -> None:
+        """Атомарно сохраняет manifest"""
+        manifest.updated_at = datetime.now().isoformat()
+        write_json_atomic(self.manifest_path(manifest.table_name), asdict(manifest))
+
+    def commit(
+        self,
+        manifest: CheckpointManifest,
+        records: list[dict[str, Any]],
+        start_row: int,
+        stop_row: int,
+    ) -> CheckpointManifest:
+        """
+        Сохраняет записи строк [start_row, stop_row) в новый шард и сдвигает
+        watermark. Пишутся только новые записи - O(размер порции)
+        """
+        path = self.shard_path(manifest.table_name, start_row, stop_row)
+        written = write_jsonl_atomic(path, records)
+        return self.register_shard(manifest, path, start_row, stop_row, written)
+
+    def register_shard(
+        self,
+        manifest: CheckpointManifest,
+        path: str,
+        start_row: int,
+        stop_row: int,
+        records: int,
+    ) -> CheckpointManifest:
+        """Фиксирует уже записанный шард в manifest"""
+        manifest.shards = [
+            shard
+            for shard in manifest.shards
+            if (shard["start_row"], shard["stop_row"]) != (start_row, stop_row)
+        ]
+        manifest.shards.append(
+            {
+                "path": path,
+                "start_row": start_row,
+                "stop_row": stop_row,
+                "records": records,
+            },
+        )
+        manifest.shards.sort(key=lambda shard: shard["start_row"])
+        manifest.records = sum(shard["records"] for shard in manifest.shards)
+        manifest.watermark = self.contiguous_watermark(manifest)
+        self.save(manifest)
+        return manifest
+
+    @staticmethod
+    def contiguous_watermark(manifest: CheckpointManifest) -> int:
+        """Конец непрерывного покрытия шардами от первой строки"""
+        if not manifest.shards:
+            return 0
+        watermark = int(manifest.shards[0]["start_row"])
+        for shard in manifest.shards:
+            if shard["start_row"] > watermark:
+                break
+            watermark = max(watermark, int(shard["stop_row"]))
+        return watermark
+
+    def complete(self, manifest: CheckpointManifest) -> None:
+        """Отмечает таблицу как полностью извлеченную"""
+        manifest.completed = True
+        self.save(manifest)
+
+    def reset(self, table_name: str) -> CheckpointManifest:
+        """Удаляет шарды и manifest таблицы"""
+        manifest = self.load(table_name)
+        for shard in manifest.shards:
+            if os.path.exists(shard["path"]):
+                os.remove(shard["path"])
+        if os.path.exists(self.manifest_path(table_name)):
+            os.remove(self.manifest_path(table_name))
+        return CheckpointManifest(table_name)
+
+    def iter_records(self, manifest: CheckpointManifest) -> Iterator[dict[str, Any]]:
+        """Читает зафиксированные записи из шардов в порядке строк"""
+        for shard in manifest.shards:
+            with open(shard["path"], encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
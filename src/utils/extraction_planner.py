@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+
+"""
+ExtractionPlanner - план извлечения таблиц 1С по метаданным 1CD
+Таблицы находятся по каталогу базы (число строк, длина строки, BLOB поля и
+размер BLOB объекта), стоимость оценивается по измеренной скорости
+декодирования выборки строк. План - упорядоченный JSON manifest с бюджетом:
+большие таблицы разбиты на партиции и идут первыми, малые собраны в пакеты.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any
+
+from src.utils.extraction_checkpoint import write_json_atomic
+from src.utils.parallel_extractor import (
+    DEFAULT_ROWS_PER_PARTITION,
+    TablePartition,
+    plan_partitions,
+)
+from src.utils.row_decoder import FIELD_ROLES, ROLE_BLOB, CompiledRowDecoder
+from src.utils.table_analyzer import TableAnalyzer
+from src.utils.table_part_index import source_stamp
+
+DEFAULT_PLAN_FILE = "data/results/extraction_plan.json"
+DEFAULT_TARGET_TASK_SECONDS = 60.0
+DEFAULT_SAMPLE_ROWS = 256
+DEFAULT_SAMPLE_TABLES = 20
+DEFAULT_MIN_SAMPLE_ROWS = 10_000
+DEFAULT_CRITICAL_LIMIT = 5
+
+KIND_JOURNAL = "journal"
+KIND_DOCUMENT = "document"
+KIND_REFERENCE = "reference"
+KIND_REGISTER = "register"
+KIND_TABLE_PART = "table_part"
+KIND_OTHER = "other"
+DOCUMENT_KINDS = (KIND_JOURNAL, KIND_DOCUMENT)
+
+REGISTER_PREFIXES = ("_ACCUMRG", "_INFORG", "_ACCRG")
+
+
+def table_kind(table_name: str) -> str:
+    """Вид таблицы 1С по имени"""
+    name = table_name.upper()
+    if "_VT" in name:
+        return KIND_TABLE_PART
+    if name.startswith("_DOCUMENTJOURNAL"):
+        return KIND_JOURNAL
+    if name.startswith("_DOCUMENT"):
+        return KIND_DOCUMENT
+    if name.startswith("_REFERENCE"):
+        return KIND_REFERENCE
+    if name.startswith(REGISTER_PREFIXES):
+        return KIND_REGISTER
+    return KIND_OTHER
+
+
+@dataclass
+class TableProfile:
+    """Метаданные таблицы из каталога 1CD и оценка стоимости извлечения"""
+
+    table_name: str
+    kind: str
+    row_count: int
+    row_length: int
+    field_count: int
+    blob_fields: int
+    blob_bytes: int
+    priority: str
+    seconds_per_row: float = 0.0
+    rate_source: str = "estimated"
+
+    @property
+    def data_bytes(self) -> int:
+        return self.row_count * self.row_length
+
+    @property
+    def estimated_seconds(self) -> float:
+        return self.row_count * self.seconds_per_row
+
+
+@dataclass
+class PlanTask:
+    """Задача плана: таблица по партициям или пакет малых таблиц"""
+
+    kind: str
+    tables: list[str]
+    rows: int
+    estimated_seconds: float
+    rows_per_partition: int = 0
+    partitions: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class ExtractionPlan:
+    """Упорядоченный план извлечения (JSON manifest)"""
+
+    created_at: str = ""
+    source: dict[str, Any] = field(default_factory=dict)
+    workers: int = 1
+    budget_seconds: float | None = None
+    estimated_seconds: float = 0.0
+    tasks: list[PlanTask] = field(default_factory=list)
+    deferred: list[str] = field(default_factory=list)
+    tables: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def table_names(
+        self,
+        kinds: tuple[str, ...] | None = None,
+        limit: int | None = None,
+    ) -> list[str]:
+        """Таблицы в порядке плана (без отложенных), опционально по видам"""
+        names = [
+            name
+            for task in self.tasks
+            for name in task.tables
+            if kinds is None or self.tables[name]["kind"] in kinds
+        ]
+        return names if limit is None else names[:limit]
+
+    def critical_tables(self, limit: int = DEFAULT_CRITICAL_LIMIT) -> list[str]:
+        """Самые дорогие таблицы документов и журналов (идут первыми в плане)"""
+        return self.table_names(DOCUMENT_KINDS, limit)
+
+    def task_for(self, table_name: str) -> PlanTask | None:
+        for task in self.tasks:
+            if table_name in task.tables:
+                return task
+        return None
+
+    def rows_per_partition(
+        self,
+        table_name: str,
+        default: int = DEFAULT_ROWS_PER_PARTITION,
+    ) -> int:
+        """Размер партиции таблицы по плану"""
+        task = self.task_for(table_name)
+        if task is None or not task.rows_per_partition:
+            return default
+        return task.rows_per_partition
+
+    def partitions_for(self, table_name: str) -> list[TablePartition]:
+        """Партиции таблицы из задачи плана (пусто для пакетов и вне плана)"""
+        task = self.task_for(table_name)
+        if task is None:
+            return []
+        return [TablePartition(**partition) for partition in task.partitions]
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ExtractionPlan":
+        tasks = [PlanTask(**task) for task in data.get("tasks", [])]
+        return cls(**{**data, "tasks": tasks})
+
+    def save(self, path: str = DEFAULT_PLAN_FILE) -> str:
+        write_json_atomic(path, self.to_dict())
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PLAN_FILE) -> "ExtractionPlan | None":
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️ План {path} поврежден, строим заново: {e!s}")
+            return None
+
+
+def blob_object_length(table: Any) -> int:
+    """Размер BLOB объекта таблицы в байтах (читается только заголовок)"""
+    blob_offset = getattr(table, "blob_offset", 0)
+    if not blob_offset:
+        return 0
+    try:
+        import onec_dtools.database_reader as dr
+
+        return len(
+            dr.DBObject(table._db_file, table._version, table._page_size, blob_offset),
+        )
+    except Exception:
+        return 0
+
+
+def measure_seconds_per_row(
+    table: Any,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+) -> float:
+    """
+    Время декодирования строки (с чтением BLOB) на выборке подряд идущих
+    строк из середины таблицы
+    """
+    total = len(table)
+    sample_rows = min(sample_rows, total)
+    if not sample_rows:
+        return 0.0
+    start = (total - sample_rows) // 2
+    decoder = CompiledRowDecoder.from_table(table)
+
+    started = time.perf_counter()
+    for i in range(start, start + sample_rows):
+        try:
+            row = table[i]
+            if not getattr(row, "is_empty", False):
+                decoder.decode(row, read_blobs=bool(decoder.blob_indexes))
+        except Exception:
+            continue
+    return (time.perf_counter() - started) / sample_rows
+
+
+class ExtractionPlanner:
+    """
+    JTBD:
+    Как оркестратор извлечения, я хочу получать список таблиц и их стоимость
+    из каталога 1CD и измеренной скорости декодирования, чтобы большие журналы
+    дробились и стартовали первыми, малые таблицы шли пакетами, а списки
+    таблиц не поддерживались вручную в каждом extractor.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        workers: int | None = None,
+        budget_seconds: float | None = None,
+        target_task_seconds: float = DEFAULT_TARGET_TASK_SECONDS,
+        rows_per_partition: int = DEFAULT_ROWS_PER_PARTITION,
+        sample_rows: int = DEFAULT_SAMPLE_ROWS,
+        sample_tables: int = DEFAULT_SAMPLE_TABLES,
+        min_sample_rows: int = DEFAULT_MIN_SAMPLE_ROWS,
+    ) -> None:
+        self.db = db
+        self.workers = workers or os.cpu_count() or 1
+        self.budget_seconds = budget_seconds
+        self.target_task_seconds = target_task_seconds
+        self.rows_per_partition = rows_per_partition
+        self.sample_rows = sample_rows
+        self.sample_tables = sample_tables
+        self.min_sample_rows = min_sample_rows
+        self.analyzer = TableAnalyzer()
+
+    def profile_table(self, table_name: str, table: Any) -> TableProfile:
+        """Профиль таблицы по каталогу: строки, длина строки, BLOB"""
+        fields = getattr(table, "fields", {})
+        blob_fields = sum(
+            1
+            for description in fields.values()
+            if FIELD_ROLES.get(description.type) == ROLE_BLOB
+        )
+        row_count = len(table)
+        return TableProfile(
+            table_name=table_name,
+            kind=table_kind(table_name),
+            row_count=row_count,
+            row_length=getattr(table, "_row_length", 0),
+            field_count=len(fields),
+            blob_fields=blob_fields,
+            blob_bytes=blob_object_length(table) if blob_fields else 0,
+            priority=self.analyzer.get_table_priority(table_name, row_count),
+        )
+
+    def profile_tables(
+        self,
+        kinds: tuple[str, ...] | None = None,
+    ) -> list[TableProfile]:
+        """
+        Профили таблиц с оценкой стоимости: самые большие таблицы измеряются
+        на выборке строк, остальные получают медианную скорость своего класса
+        (с BLOB или без) или оценку TableAnalyzer.estimate_extraction_time
+        """
+        profiles = []
+        for table_name, table in self.db.tables.items():
+            if kinds is not None and table_kind(table_name) not in kinds:
+                continue
+            try:
+                profiles.append(self.profile_table(table_name, table))
+            except Exception as e:
+                print(f"   ⚠️ {table_name}: не удалось прочитать каталог: {e!s}")
+
+        by_size = sorted(profiles, key=lambda p: p.data_bytes + p.blob_bytes)
+        measured = [
+            p for p in reversed(by_size) if p.row_count >= self.min_sample_rows
+        ][: self.sample_tables]
+        for profile in measured:
+            profile.seconds_per_row = measure_seconds_per_row(
+                self.db.tables[profile.table_name],
+                self.sample_rows,
+            )
+            profile.rate_source = "measured"
+
+        rates: dict[bool, list[float]] = {True: [], False: []}
+        for profile in measured:
+            rates[profile.blob_fields > 0].append(profile.seconds_per_row)
+        for profile in profiles:
+            if profile.rate_source == "measured":
+                continue
+            class_rates = rates[profile.blob_fields > 0]
+            if class_rates:
+                profile.seconds_per_row = statistics.median(class_rates)
+            else:
+                complexity = "MEDIUM" if profile.blob_fields else "LOW"
+                profile.seconds_per_row = (
+                    self.analyzer.estimate_extraction_time(1, complexity) / 1000
+                )
+        return profiles
+
+    def _partitioned_task(self, profile: TableProfile) -> PlanTask:
+        """Таблица, которая дробится на партиции около target_task_seconds"""
+        partitions_count = math.ceil(
+            profile.estimated_seconds / self.target_task_seconds,
+        )
+        rows_per_partition = min(
+            self.rows_per_partition,
+            max(1, math.ceil(profile.row_count / max(partitions_count, 1))),
+        )
+        partitions = plan_partitions(
+            profile.table_name,
+            profile.row_count,
+            self.workers,
+            rows_per_partition,
+        )
+        return PlanTask(
+            kind="partitioned",
+            tables=[profile.table_name],
+            rows=profile.row_count,
+            estimated_seconds=profile.estimated_seconds,
+            rows_per_partition=rows_per_partition,
+            partitions=[asdict(partition) for partition in partitions],
+        )
+
+    def plan(self, kinds: tuple[str, ...] | None = None) -> ExtractionPlan:
+        """Упорядоченный план: партиционированные таблицы, затем пакеты"""
+        profiles = sorted(
+            self.profile_tables(kinds),
+            key=lambda p: (-p.estimated_seconds, p.table_name),
+        )
+
+        partitioned: list[PlanTask] = []
+        batches: list[PlanTask] = []
+        batch: PlanTask | None = None
+        for profile in profiles:
+            if (
+                profile.estimated_seconds > self.target_task_seconds
+                or profile.row_count > self.rows_per_partition
+            ):
+                partitioned.append(self._partitioned_task(profile))
+                continue
+            if batch is None:
+                batch = PlanTask(kind="batch", tables=[], rows=0, estimated_seconds=0)
+                batches.append(batch)
+            batch.tables.append(profile.table_name)
+            batch.rows += profile.row_count
+            batch.estimated_seconds += profile.estimated_seconds
+            if batch.estimated_seconds >= self.target_task_seconds:
+                batch = None
+
+        # Бюджет: суммарная оценка на workers процессах
+        tasks: list[PlanTask] = []
+        deferred: list[str] = []
+        scheduled = 0.0
+        for task in partitioned + batches:
+            wall = task.estimated_seconds / self.workers
+            if (
+                self.budget_seconds is not None
+                and scheduled + wall > self.budget_seconds
+            ):
+                deferred.extend(task.tables)
+                continue
+            tasks.append(task)
+            scheduled += wall
+
+        return ExtractionPlan(
+            created_at=datetime.now().isoformat(),
+            source=source_stamp(self.db),
+            workers=self.workers,
+            budget_seconds=self.budget_seconds,
+            estimated_seconds=scheduled,
+            tasks=tasks,
+            deferred=deferred,
+            tables={profile.table_name: asdict(profile) for profile in profiles},
+        )
+
+
+def plan_for(
+    db: Any,
+    plan_file: str | None = DEFAULT_PLAN_FILE,
+    **planner_options: Any,
+) -> ExtractionPlan:
+    """
+    План из manifest, если он построен по тому же 1CD файлу,
+    иначе новый план в памяти (manifest пишет CLI планировщика)
+    """
+    if plan_file is not None:
+        plan = ExtractionPlan.load(plan_file)
+        stamp = source_stamp(db)
+        if plan is not None and stamp and plan.source == stamp:
+            return plan
+    return ExtractionPlanner(db, **planner_options).plan()
+
+
+def critical_tables(
+    db: Any,
+    limit: int = DEFAULT_CRITICAL_LIMIT,
+    plan: ExtractionPlan | None = None,
+) -> list[str]:
+    """Критические таблицы документов и журналов по плану извлечения"""
+    plan = plan or plan_for(db)
+    return [name for name in plan.critical_tables(limit) if name in db.tables]
+
+
+def main() -> None:
+    """Построение плана извлечения и запись manifest"""
+    parser = argparse.ArgumentParser(description="План извлечения таблиц 1С")
+    parser.add_argument("--db", default="data/raw/1Cv8.1CD", help="Путь к 1CD файлу")
+    parser.add_argument("--output", default=DEFAULT_PLAN_FILE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--budget-minutes",
+        type=float,
+        default=None,
+        help="Бюджет времени извлечения (минуты на workers процессах)",
+    )
+    parser.add_argument(
+        "--target-task-seconds",
+        type=float,
+        default=DEFAULT_TARGET_TASK_SECONDS,
+    )
+    parser.add_argument(
+        "--kinds",
+        default=None,
+        help="Виды таблиц через запятую (journal,document,reference,register)",
+    )
+    args = parser.parse_args()
+
+    from onec_dtools.database_reader import DatabaseReader
+
+    from patches.onec_dtools.simple_patch import apply_simple_patch
+
+    apply_simple_patch()
+    with open(args.db, "rb") as f:
+        planner = ExtractionPlanner(
+            DatabaseReader(f),
+            workers=args.workers,
+            budget_seconds=(
+                args.budget_minutes * 60 if args.budget_minutes is not None else None
+            ),
+            target_task_seconds=args.target_task_seconds,
+        )
+        plan = planner.plan(tuple(args.kinds.split(",")) if args.kinds else None)
+    plan.save(args.output)
+
+    print(
+        f"✅ План: {len(plan.tasks)} задач, {len(plan.deferred)} таблиц отложено, "
+        f"оценка {plan.estimated_seconds / 60:.1f} мин на {plan.workers} процессах "
+        f"→ {args.output}",
+    )
+    for task in plan.tasks[:10]:
+        print(
+            f"   {task.kind}: {', '.join(task.tables[:3])}"
+            f"{'...' if len(task.tables) > 3 else ''} "
+            f"({task.rows:,} строк, {task.estimated_seconds:.0f} сек)",
+        )
+
+
+if __name__ == "__main__":
+    main()
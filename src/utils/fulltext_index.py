@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+
+"""
+FullTextIndex - постоянный полнотекстовый индекс по извлеченным записям 1С
+Инвертированный индекс на SQLite: термин → (запись, таблица, строка, поле).
+Текст приводится к нижнему регистру, ё → е, русские слова сокращаются
+до основы (Snowball стеммер), коды вида "ПЦ022" индексируются как есть.
+Индекс строится во время извлечения, поиск не перечитывает 1CD и JSON.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+DEFAULT_INDEX_PATH = "data/results/fulltext_index.sqlite"
+INDEX_FORMAT_VERSION = "1"
+SNIPPET_LENGTH = 160
+
+_TOKEN_RE = re.compile(r"[0-9a-zа-я]+")
+_LETTER_RE = re.compile(r"[a-zа-яё]", re.IGNORECASE)
+_CYRILLIC_WORD_RE = re.compile(r"[а-я]+")
+
+# Snowball стеммер для русского языка (окончания в порядке убывания длины)
+_VOWELS = frozenset("аеиоуыэюя")
+_PERFECTIVE_GERUND_1 = ("вшись", "вши", "в")
+_PERFECTIVE_GERUND_2 = ("ившись", "ывшись", "ивши", "ывши", "ив", "ыв")
+_REFLEXIVE = ("ся", "сь")
+_ADJECTIVE = (
+    "ими", "ыми", "его", "ого", "ему", "ому",
+    "ее", "ие", "ые", "ое", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом",
+    "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+)  # fmt: skip
+_PARTICIPLE_1 = ("ем", "нн", "вш", "ющ", "щ")
+_PARTICIPLE_2 = ("ивш", "ывш", "ующ")
+_VERB_1 = (
+    "ете", "йте", "ешь", "нно",
+    "ла", "на", "ли", "ем", "ло", "но", "ет", "ют", "ны", "ть", "й", "л", "н",
+)  # fmt: skip
+_VERB_2 = (
+    "ейте", "уйте",
+    "ила", "ыла", "ена", "ите", "или", "ыли", "ило", "ыло", "ено", "ует",
+    "уют", "ены", "ить", "ыть", "ишь",
+    "ей", "уй", "ил", "ыл", "им", "ым", "ен", "ят", "ит", "ыт", "ую", "ю",
+)  # fmt: skip
+_NOUN = (
+    "иями", "ями", "ами", "ией", "иям", "ием", "иях",
+    "ев", "ов", "ие", "ье", "еи", "ии", "ей", "ой", "ий", "ям", "ем", "ам",
+    "ом", "ах", "ях", "ию", "ью", "ия", "ья",
+    "а", "е", "и", "й", "о", "у", "ы", "ь", "ю", "я",
+)  # fmt: skip
+_SUPERLATIVE = ("ейше", "ейш")
+_DERIVATIONAL = ("ость", "ост")
+
+
+def _regions(word: str) -> tuple[int, int]:
+    """Начало областей RV и R2 (Snowball)"""
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in _VOWELS:
+            rv = i + 1
+            break
+
+    def next_region(start: int) -> int:
+        for i in range(start + 1, len(word)):
+            if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = next_region(0)
+    return rv, next_region(r1)
+
+
+def _longest_ending(
+    word: str,
+    start: int,
+    *groups: tuple[str, ...],
+) -> tuple[int, str] | None:
+    """Самое длинное окончание в области [start:] и номер его группы"""
+    best: tuple[int, str] | None = None
+    for group_index, endings in enumerate(groups):
+        for ending in endings:
+            if word.endswith(ending) and len(word) - len(ending) >= start:
+                if best is None or len(ending) > len(best[1]):
+                    best = (group_index, ending)
+                break
+    return best
+
+
+def _remove_ending(
+    word: str,
+    start: int,
+    after_a_ya: tuple[str, ...],
+    plain: tuple[str, ...] = (),
+) -> str | None:
+    """
+    Удаляет окончание; окончания первой группы удаляются только после а/я.
+    None - окончание не найдено
+    """
+    found = _longest_ending(word, start, after_a_ya, plain)
+    if found is None:
+        return None
+    group_index, ending = found
+    stem = word[: -len(ending)]
+    if group_index == 0 and (len(stem) <= start or stem[-1] not in "ая"):
+        return None
+    return stem
+
+
+def stem_russian(word: str) -> str:
+    """Основа русского слова (слово в нижнем регистре, ё заменена на е)"""
+    rv, r2 = _regions(word)
+    if rv >= len(word):
+        return word
+
+    # Шаг 1: деепричастие, иначе возвратная частица и
+    # прилагательное/причастие, глагол или существительное
+    stem = _remove_ending(word, rv, _PERFECTIVE_GERUND_1, _PERFECTIVE_GERUND_2)
+    if stem is None:
+        stem = word
+        reflexive = _longest_ending(stem, rv, _REFLEXIVE)
+        if reflexive is not None:
+            stem = stem[: -len(reflexive[1])]
+
+        adjective = _longest_ending(stem, rv, _ADJECTIVE)
+        if adjective is not None:
+            stem = stem[: -len(adjective[1])]
+            participle = _remove_ending(stem, rv, _PARTICIPLE_1, _PARTICIPLE_2)
+            if participle is not None:
+                stem = participle
+        else:
+            verb = _remove_ending(stem, rv, _VERB_1, _VERB_2)
+            if verb is not None:
+                stem = verb
+            else:
+                noun = _longest_ending(stem, rv, _NOUN)
+                if noun is not None:
+                    stem = stem[: -len(noun[1])]
+
+    # Шаг 2: и
+    if stem.endswith("и") and len(stem) - 1 >= rv:
+        stem = stem[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2
+    derivational = _longest_ending(stem, r2, _DERIVATIONAL)
+    if derivational is not None:
+        stem = stem[: -len(derivational[1])]
+
+    # Шаг 4: нн → н, превосходная степень, ь
+    if stem.endswith("нн") and len(stem) - 2 >= rv:
+        return stem[:-1]
+    superlative = _longest_ending(stem, rv, _SUPERLATIVE)
+    if superlative is not None:
+        stem = stem[: -len(superlative[1])]
+        if stem.endswith("нн") and len(stem) - 2 >= rv:
+            stem = stem[:-1]
+        return stem
+    if stem.endswith("ь") and len(stem) - 1 >= rv:
+        stem = stem[:-1]
+    return stem
+
+
+def normalize_term(token: str) -> str:
+    """Термин индекса: русские слова - основа, коды и латиница - как есть"""
+    if _CYRILLIC_WORD_RE.fullmatch(token):
+        return stem_russian(token)
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Термины текста (однобуквенные токены отбрасываются)"""
+    text = text.lower().replace("ё", "е")
+    return [
+        normalize_term(token) for token in _TOKEN_RE.findall(text) if len(token) > 1
+    ]
+
+
+def record_texts(record: Mapping[str, Any]) -> Iterator[tuple[str, str]]:
+    """
+    Текстовые значения извлеченной записи: поля (fields) и содержимое BLOB
+    (blobs[имя]["value"]["content"]). Числа, даты и repr байтов пропускаются
+    """
+    fields = record.get("fields")
+    if isinstance(fields, Mapping):
+        for name, value in fields.items():
+            if isinstance(value, str) and not value.startswith("b'"):
+                if _LETTER_RE.search(value):
+                    yield str(name), value
+
+    blobs = record.get("blobs")
+    if isinstance(blobs, Mapping):
+        for name, blob_data in blobs.items():
+            value = blob_data.get("value") if isinstance(blob_data, Mapping) else None
+            content = value.get("content") if isinstance(value, Mapping) else None
+            if isinstance(content, str) and _LETTER_RE.search(content):
+                yield str(name), content
+
+
+@dataclass
+class SearchHit:
+    """Найденная запись: поля, в которых встретились термины запроса"""
+
+    record_id: str
+    table_name: str
+    row_index: int | None
+    score: int
+    fields: dict[str, str] = field(default_factory=dict)
+
+
+class FullTextIndex:
+    """
+    JTBD:
+    Как поиск по магазинам, товарам и кодам, я хочу один раз построить
+    инвертированный индекс во время извлечения, чтобы находить записи
+    за миллисекунды, а не перечитывать 1CD файл или JSON результаты.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_INDEX_PATH,
+        reset: bool = False,
+        batch_size: int = 1000,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        if reset:
+            for stale in (path, f"{path}-wal", f"{path}-shm"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        # Идентификаторы назначаются в памяти, вставка идет пакетами
+        self._term_ids: dict[str, int] = dict(
+            self._conn.execute("SELECT term, term_id FROM terms"),
+        )
+        self._next_term_id = max(self._term_ids.values(), default=0) + 1
+        self._next_record_key = self._max_id("records", "record_key") + 1
+        self._next_entry_id = self._max_id("entries", "entry_id") + 1
+        self._record_ids: set[str] = set()
+        self._pending_records: list[tuple[Any, ...]] = []
+        self._pending_entries: list[tuple[Any, ...]] = []
+        self._pending_terms: list[tuple[int, str]] = []
+        self._pending_postings: list[tuple[int, int, int]] = []
+        self._pending_count = 0
+
+    def _create_schema(self) -> None:
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                record_key INTEGER PRIMARY KEY,
+                record_id TEXT UNIQUE,
+                table_name TEXT,
+                row_index INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                entry_id INTEGER PRIMARY KEY,
+                record_key INTEGER,
+                field TEXT,
+                snippet TEXT
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term_id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term_id INTEGER,
+                entry_id INTEGER,
+                hits INTEGER,
+                PRIMARY KEY (term_id, entry_id)
+            ) WITHOUT ROWID;
+            """,
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('format_version', ?)",
+            (INDEX_FORMAT_VERSION,),
+        )
+
+    def _max_id(self, table: str, column: str) -> int:
+        row = self._conn.execute(f"SELECT MAX({column}) FROM {table}").fetchone()
+        return row[0] or 0
+
+    def __enter__(self) -> "FullTextIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._next_term_id
+            self._next_term_id += 1
+            self._term_ids[term] = term_id
+            self._pending_terms.append((term_id, term))
+        return term_id
+
+    def _is_known(self, record_id: str) -> bool:
+        if record_id in self._record_ids:
+            return True
+        row = self._conn.execute(
+            "SELECT 1 FROM records WHERE record_id = ?",
+            (record_id,),
+        ).fetchone()
+        return row is not None
+
+    def add_record(
+        self,
+        record_id: str,
+        table_name: str,
+        row_index: int | None,
+        texts: Iterable[tuple[str, str]],
+    ) -> bool:
+        """
+        Индексирует текстовые поля записи (поле, текст).
+        False - запись уже есть в индексе или в ней нет терминов
+        """
+        if self._is_known(record_id):
+            return False
+
+        record_key = self._next_record_key
+        entries: list[tuple[Any, ...]] = []
+        postings: list[tuple[int, int, int]] = []
+        for field_name, text in texts:
+            counts: dict[int, int] = {}
+            for term in tokenize(text):
+                term_id = self._term_id(term)
+                counts[term_id] = counts.get(term_id, 0) + 1
+            if not counts:
+                continue
+
+            entry_id = self._next_entry_id + len(entries)
+            entries.append((entry_id, record_key, field_name, text[:SNIPPET_LENGTH]))
+            postings.extend(
+                (term_id, entry_id, hits) for term_id, hits in counts.items()
+            )
+
+        if not entries:
+            return False
+
+        self._next_record_key += 1
+        self._next_entry_id += len(entries)
+        self._record_ids.add(record_id)
+        self._pending_records.append((record_key, record_id, table_name, row_index))
+        self._pending_entries.extend(entries)
+        self._pending_postings.extend(postings)
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            self.flush()
+        return True
+
+    def index_record(self, record: Mapping[str, Any]) -> bool:
+        """
+        Индексирует запись в формате результатов извлечения (id, fields, blobs).
+        Запись без id получает ключ таблица:строка (без строки - уникальный)
+        """
+        table_name = str(record.get("table_name", ""))
+        row_index = record.get("row_index")
+        if not isinstance(row_index, int):
+            row_index = None
+        record_id = record.get("id")
+        if not record_id:
+            position = (
+                row_index if row_index is not None else f"#{self._next_record_key}"
+            )
+            record_id = f"{table_name}:{position}"
+        return self.add_record(
+            str(record_id),
+            table_name,
+            row_index,
+            record_texts(record),
+        )
+
+    def flush(self) -> None:
+        """Записывает накопленный пакет на диск"""
+        if not self._pending_count and not self._pending_terms:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO terms VALUES (?, ?)",
+                self._pending_terms,
+            )
+            self._conn.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?)",
+                self._pending_records,
+            )
+            self._conn.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?)",
+                self._pending_entries,
+            )
+            self._conn.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?)",
+                self._pending_postings,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('updated_at', ?)",
+                (datetime.now().isoformat(),),
+            )
+        self._pending_terms.clear()
+        self._pending_records.clear()
+        self._pending_entries.clear()
+        self._pending_postings.clear()
+        self._record_ids.clear()
+        self._pending_count = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def _term_ids_for(self, query_term: str) -> list[int]:
+        """Идентификаторы терминов: точное совпадение или префикс ("пц*")"""
+        if not query_term.endswith("*"):
+            term_id = self._term_ids.get(query_term)
+            return [term_id] if term_id is not None else []
+
+        prefix = query_term.rstrip("*").lower().replace("ё", "е")
+        if not prefix:
+            return []
+        rows = self._conn.execute(
+            "SELECT term_id FROM terms WHERE term >= ? AND term < ?",
+            (prefix, prefix + "\uffff"),
+        )
+        return [row[0] for row in rows]
+
+    def _entry_hits(self, term_ids: list[int]) -> dict[int, dict[int, int]]:
+        """record_key → {entry_id: число вхождений} для набора терминов"""
+        matched: dict[int, dict[int, int]] = {}
+        placeholders = ",".join("?" * len(term_ids))
+        rows = self._conn.execute(
+            "SELECT e.record_key, e.entry_id, p.hits FROM postings p "
+            "JOIN entries e ON e.entry_id = p.entry_id "
+            f"WHERE p.term_id IN ({placeholders})",
+            term_ids,
+        )
+        for record_key, entry_id, hits in rows:
+            entry_hits = matched.setdefault(record_key, {})
+            entry_hits[entry_id] = entry_hits.get(entry_id, 0) + hits
+        return matched
+
+    def search(
+        self,
+        query: str,
+        limit: int | None = 100,
+        table_name: str | None = None,
+    ) -> list[SearchHit]:
+        """
+        Записи, содержащие все слова запроса (в любых полях записи).
+        Слово с "*" на конце ищется как префикс термина
+        """
+        self.flush()
+        query_terms: list[str] = []
+        for word in query.split():
+            if word.endswith("*"):
+                query_terms.append(word)
+            else:
+                query_terms.extend(tokenize(word))
+        if not query_terms:
+            return []
+
+        # Пересечение записей по всем словам запроса, вхождения суммируются
+        records: dict[int, dict[int, int]] | None = None
+        for query_term in query_terms:
+            term_ids = self._term_ids_for(query_term)
+            matched = self._entry_hits(term_ids) if term_ids else {}
+            if records is not None:
+                matched = {
+                    record_key: entry_hits
+                    for record_key, entry_hits in matched.items()
+                    if record_key in records
+                }
+                for record_key, entry_hits in matched.items():
+                    for entry_id, hits in records[record_key].items():
+                        entry_hits[entry_id] = entry_hits.get(entry_id, 0) + hits
+            records = matched
+            if not records:
+                return []
+
+        ranked = sorted(
+            (records or {}).items(),
+            key=lambda item: (-sum(item[1].values()), item[0]),
+        )
+        results = []
+        for record_key, entry_hits in ranked:
+            record_id, record_table, row_index = self._conn.execute(
+                "SELECT record_id, table_name, row_index FROM records "
+                "WHERE record_key = ?",
+                (record_key,),
+            ).fetchone()
+            if table_name is not None and record_table != table_name:
+                continue
+
+            placeholders = ",".join("?" * len(entry_hits))
+            fields = dict(
+                self._conn.execute(
+                    "SELECT field, snippet FROM entries "
+                    f"WHERE entry_id IN ({placeholders}) ORDER BY entry_id",
+                    list(entry_hits),
+                ),
+            )
+            results.append(
+                SearchHit(
+                    record_id=record_id,
+                    table_name=record_table,
+                    row_index=row_index,
+                    score=sum(entry_hits.values()),
+                    fields=fields,
+                ),
+            )
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def get_stats(self) -> dict[str, Any]:
+        """Размер индекса"""
+        self.flush()
+        count = self._conn.execute
+        return {
+            "records": count("SELECT COUNT(*) FROM records").fetchone()[0],
+            "fields": count("SELECT COUNT(*) FROM entries").fetchone()[0],
+            "terms": count("SELECT COUNT(*) FROM terms").fetchone()[0],
+            "postings": count("SELECT COUNT(*) FROM postings").fetchone()[0],
+        }
+
+
+def iter_result_records(path: str) -> Iterator[dict[str, Any]]:
+    """Записи из JSONL spool файла или JSON результата (секции со списками)"""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    sections = data.values() if isinstance(data, dict) else [data]
+    for section in sections:
+        if isinstance(section, list):
+            for record in section:
+                if isinstance(record, dict):
+                    yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Полнотекстовый индекс данных 1С")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Файл индекса")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Построить индекс из результатов")
+    build.add_argument("sources", nargs="+", help="JSON/JSONL файлы результатов")
+
+    search = commands.add_parser("search", help="Поиск по индексу")
+    search.add_argument("query", help='Слова запроса, префикс: "пц*"')
+    search.add_argument("--table", default=None, help="Только указанная таблица")
+    search.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with FullTextIndex(args.index, reset=True) as index:
+            for source in args.sources:
+                print(f"📊 Индексация: {source}")
+                for record in iter_result_records(source):
+                    index.index_record(record)
+            stats = index.get_stats()
+        print(
+            f"✅ Индекс построен: {stats['records']:,} записей, "
+            f"{stats['terms']:,} терминов → {args.index}",
+        )
+        return
+
+    with FullTextIndex(args.index) as index:
+        started = datetime.now()
+        hits = index.search(args.query, limit=args.limit, table_name=args.table)
+        elapsed = (datetime.now() - started).total_seconds() * 1000
+
+    print(f"🔍 Найдено записей: {len(hits)} ({elapsed:.1f} мс)")
+    for hit in hits:
+        print(f"   📄 {hit.record_id} | {hit.table_name} | строка {hit.row_index}")
+        for field_name, snippet in hit.fields.items():
+            print(f"      {field_name}: {snippet}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+"""
+IncrementalState - инкрементальное повторное извлечение таблиц 1С
+Для каждой таблицы хранится число строк и отпечатки блоков строк (blake2b
+сырых байтов строки, куда входит и поле _VERSION). Следующий запуск сравнивает
+отпечатки и извлекает только добавленные или измененные диапазоны строк.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any
+
+DEFAULT_STATE_DIR = "data/results/incremental_state"
+DEFAULT_BLOCK_ROWS = 1024
+
+
+def state_file_for(consumer: str, state_dir: str = DEFAULT_STATE_DIR) -> str:
+    """
+    Файл состояния потребителя. Отпечатки фиксируются после успешного
+    извлечения конкретного потребителя, поэтому общий файл нельзя делить:
+    commit одного потребителя скрыл бы изменения строк от другого
+    """
+    return os.path.join(state_dir, f"{consumer}.json")
+
+
+DEFAULT_STATE_FILE = state_file_for("AdaptiveExtractor")
+
+
+@dataclass
+class TableState:
+    """Отпечаток таблицы на момент последнего извлечения"""
+
+    table_name: str
+    row_count: int = 0
+    row_length: int = 0
+    block_rows: int = DEFAULT_BLOCK_ROWS
+    blocks: list[str] = field(default_factory=list)
+    has_version: bool = False
+    updated_at: str = ""
+
+
+@dataclass
+class TableDelta:
+    """Диапазоны строк [start_row, stop_row), которые нужно извлечь заново"""
+
+    table_name: str
+    row_count: int
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+    full: bool = False
+
+    @property
+    def rows(self) -> int:
+        return sum(stop - start for start, stop in self.ranges)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.ranges
+
+
+def table_row_length(table: Any) -> int:
+    """Длина строки таблицы в байтах (0, если таблица не из onec_dtools)"""
+    return getattr(table, "_row_length", 0)
+
+
+def _raw_rows(table: Any, start: int, stop: int) -> bytes:
+    """Сырые байты строк [start, stop) одним чтением объекта данных"""
+    row_length = table_row_length(table)
+    data_object = getattr(table, "_data_object", None)
+    if row_length and data_object is not None:
+        data_object.seek(row_length * start)
+        data: bytes = data_object.read(row_length * (stop - start))
+        return data
+
+    # Таблица без доступа к объекту данных: отпечаток по значениям строк
+    parts = []
+    for i in range(start, stop):
+        row = table[i]
+        raw = getattr(row, "_row_bytes", None)
+        if raw is None:
+            raw = repr(row.as_list(False) if hasattr(row, "as_list") else row)
+            raw = raw.encode("utf-8")
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def fingerprint_blocks(
+    table: Any,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    row_count: int | None = None,
+) -> list[str]:
+    """
+    JTBD:
+    Как детектор изменений, я хочу хешировать блоки строк без декодирования
+    полей и BLOB, чтобы отпечаток таблицы стоил одно последовательное чтение.
+    """
+    row_count = len(table) if row_count is None else row_count
+    return [
+        block_digest(table, start, min(start + block_rows, row_count))
+        for start in range(0, row_count, block_rows)
+    ]
+
+
+def block_digest(table: Any, start: int, stop: int) -> str:
+    """Отпечаток строк [start, stop)"""
+    return hashlib.blake2b(_raw_rows(table, start, stop), digest_size=16).hexdigest()
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Объединяет соседние и пересекающиеся диапазоны строк"""
+    merged: list[tuple[int, int]] = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def diff_tables(
+    previous: TableState | None,
+    current: TableState,
+    tail_digest: str | None = None,
+) -> TableDelta:
+    """
+    Сравнивает отпечатки: измененные блоки и хвост новых строк.
+    Новая таблица, смена структуры или уменьшение числа строк - полное извлечение.
+
+    tail_digest - отпечаток текущих строк неполного последнего блока прошлого
+    запуска; если он совпал, дописанные строки извлекаются без этого блока.
+    """
+    delta = TableDelta(current.table_name, current.row_count)
+    if (
+        previous is None
+        or previous.row_length != current.row_length
+        or previous.block_rows != current.block_rows
+        or current.row_count < previous.row_count
+    ):
+        delta.full = True
+        delta.ranges = [(0, current.row_count)] if current.row_count else []
+        return delta
+
+    ranges = []
+    block_rows = current.block_rows
+    tail_index = len(previous.blocks) - 1
+    for index, digest in enumerate(current.blocks):
+        start = index * block_rows
+        if index == tail_index and tail_digest == previous.blocks[index]:
+            start = previous.row_count
+        elif index < len(previous.blocks) and previous.blocks[index] == digest:
+            continue
+        stop = min(index * block_rows + block_rows, current.row_count)
+        if start < stop:
+            ranges.append((start, stop))
+    delta.ranges = merge_ranges(ranges)
+    return delta
+
+
+class IncrementalState:
+    """
+    JTBD:
+    Как система ночного обновления, я хочу помнить отпечатки таблиц после
+    успешного извлечения, чтобы следующий запуск обрабатывал только
+    добавленные и измененные строки, а не всю растущую базу.
+    """
+
+    def __init__(
+        self,
+        state_file: str = DEFAULT_STATE_FILE,
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+    ) -> None:
+        self.state_file = state_file
+        self.block_rows = block_rows
+        self.tables: dict[str, TableState] = {}
+        self._pending: dict[str, TableState] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Загружает состояние (пустое, если файла нет или он поврежден)"""
+        self.tables = {}
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                data = json.load(f)
+            self.tables = {
+                name: TableState(**state)
+                for name, state in data.get("tables", {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            print(
+                f"⚠️ Состояние {self.state_file} повреждено, полное извлечение: {e!s}"
+            )
+
+    def save(self) -> None:
+        """Атомарно сохраняет состояние"""
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "updated_at": datetime.now().isoformat(),
+                    "tables": {
+                        name: asdict(state) for name, state in self.tables.items()
+                    },
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        os.replace(tmp_file, self.state_file)
+
+    def snapshot(self, table_name: str, table: Any) -> TableState:
+        """Текущий отпечаток таблицы"""
+        row_count = len(table)
+        return TableState(
+            table_name=table_name,
+            row_count=row_count,
+            row_length=table_row_length(table),
+            block_rows=self.block_rows,
+            blocks=fingerprint_blocks(table, self.block_rows, row_count),
+            has_version="_VERSION" in getattr(table, "fields", {}),
+            updated_at=datetime.now().isoformat(),
+        )
+
+    def plan(self, table_name: str, table: Any) -> TableDelta:
+        """
+        Вычисляет диапазоны строк для извлечения. Новый отпечаток фиксируется
+        только через commit после успешной записи результатов.
+        """
+        current = self.snapshot(table_name, table)
+        self._pending[table_name] = current
+        previous = self.tables.get(table_name)
+
+        # Неполный последний блок прошлого запуска сверяется по старым строкам
+        tail_digest = None
+        if (
+            previous is not None
+            and previous.blocks
+            and previous.row_count % previous.block_rows
+            and current.row_count > previous.row_count
+            and current.row_length == previous.row_length
+        ):
+            tail_start = (len(previous.blocks) - 1) * previous.block_rows
+            tail_digest = block_digest(table, tail_start, previous.row_count)
+
+        delta = diff_tables(previous, current, tail_digest)
+        if delta.full:
+            print(
+                f"   🆕 {table_name}: полное извлечение ({current.row_count:,} строк)"
+            )
+        else:
+            print(
+                f"   🔁 {table_name}: изменено {delta.rows:,} из "
+                f"{current.row_count:,} строк ({len(delta.ranges)} диапазонов)",
+            )
+        return delta
+
+    def commit_pending(self) -> None:
+        """Фиксирует отпечатки всех таблиц, спланированных в этом запуске"""
+        for table_name in list(self._pending):
+            self.commit(table_name)
+
+    def commit(self, table_name: str) -> None:
+        """Фиксирует отпечаток таблицы после успешного извлечения"""
+        state = self._pending.pop(table_name, None)
+        if state is None:
+            return
+        self.tables[table_name] = state
+        self.save()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+KeywordMatcher - многошаблонный поиск ключевых слов
+Набор ключевых слов приводится к нижнему регистру и компилируется один раз
+в общее регулярное выражение; текст приводится к нижнему регистру один раз
+и обходится одним проходом движка re: все вхождения всех слов со смещениями
+"""
+
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import lru_cache
+
+from src.utils.stage_profiler import STAGE_KEYWORDS, profiled
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    """Вхождение ключевого слова: [start, end) в тексте после lower()"""
+
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """
+    JTBD:
+    Как поисковик по BLOB и полям записей, я хочу один раз скомпилировать
+    набор ключевых слов, чтобы находить все вхождения всех слов за один
+    проход по тексту, а не lower() и поиск подстроки на каждое слово.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        # Порядок слов сохраняется, дубликаты и пустые строки отбрасываются
+        self.keywords = list(dict.fromkeys(k for k in keywords if k))
+
+        # Одному шаблону (после lower()) может соответствовать несколько слов
+        by_pattern: dict[str, list[str]] = {}
+        for keyword in self.keywords:
+            by_pattern.setdefault(keyword.lower(), []).append(keyword)
+
+        # Альтернатива в порядке убывания длины: в каждой позиции движок re
+        # находит самый длинный шаблон, более короткие в той же позиции -
+        # его префиксы, они добавляются из заранее вычисленной таблицы
+        patterns = sorted(by_pattern, key=len, reverse=True)
+        self._regex = (
+            re.compile("|".join(re.escape(p) for p in patterns)) if patterns else None
+        )
+        self._expansions: dict[str, tuple[tuple[str, int], ...]] = {
+            pattern: tuple(
+                (keyword, len(prefix))
+                for prefix in reversed(patterns)
+                if pattern.startswith(prefix)
+                for keyword in by_pattern[prefix]
+            )
+            for pattern in patterns
+        }
+
+    def iter_hits(self, text: str, lowered: bool = False) -> Iterator[KeywordHit]:
+        """Все вхождения (включая перекрывающиеся) по возрастанию (start, end)"""
+        if self._regex is None or not text:
+            return
+        if not lowered:
+            text = text.lower()
+
+        search = self._regex.search
+        expansions = self._expansions
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            for keyword, length in expansions[match.group()]:
+                yield KeywordHit(keyword, start, start + length)
+            # Следующее вхождение может начинаться внутри найденного
+            match = search(text, start + 1)
+
+    @profiled(STAGE_KEYWORDS)
+    def find_all(self, text: str) -> list[KeywordHit]:
+        """Список всех вхождений"""
+        return list(self.iter_hits(text))
+
+    @profiled(STAGE_KEYWORDS)
+    def found(self, text: str) -> list[str]:
+        """Найденные ключевые слова (каждое один раз, в порядке набора)"""
+        hits = {hit.keyword for hit in self.iter_hits(text)}
+        return [keyword for keyword in self.keywords if keyword in hits]
+
+    @profiled(STAGE_KEYWORDS)
+    def count(self, text: str) -> int:
+        """Количество различных найденных ключевых слов"""
+        return len({hit.keyword for hit in self.iter_hits(text)})
+
+
+@lru_cache(maxsize=128)
+def _compiled_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def get_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Общий для всех поисковиков скомпилированный набор ключевых слов"""
+    return _compiled_matcher(tuple(keywords))
@@ -10,6 +10,8 @@ from datetime import datetime
 from typing import Any
 
 from src.utils.blob_processor import BlobProcessor
+from src.utils.keyword_matcher import get_matcher
+from src.utils.stage_profiler import STAGE_KEYWORDS, profiled
 
 
 @dataclass
@@ -173,6 +175,15 @@ class KeywordSearcher:
 
         return result
 
+    @staticmethod
+    @profiled(STAGE_KEYWORDS)
+    def _first_offsets(text: str, keywords: list[str]) -> dict[str, int]:
+        """Первое смещение каждого найденного слова (один проход по тексту)"""
+        offsets: dict[str, int] = {}
+        for hit in get_matcher(keywords).iter_hits(text):
+            offsets.setdefault(hit.keyword, hit.start)
+        return offsets
+
     def _search_in_blob_field(
         self,
         field_name: str,
@@ -184,26 +195,27 @@ class KeywordSearcher:
 
         try:
             # Извлекаем содержимое BLOB
-            blob_content = self.blob_processor.safe_get_blob_content(field_value)
-            if not blob_content or len(blob_content) < 10:
+            blob_content = self.blob_processor.safe_get_blob_content(
+                field_value,
+            ).content
+            if not isinstance(blob_content, str) or len(blob_content) < 10:
                 return result
 
-            # Ищем ключевые слова
-            found_keywords = set()
-            for keyword in keywords:
-                if keyword.lower() in blob_content.lower():
-                    found_keywords.add(keyword)
-                    if result.matches is not None:
-                        result.matches.append(
-                            {
-                                "field_name": field_name,
-                                "keyword": keyword,
-                                "content_sample": blob_content[:200],
-                                "field_type": "blob",
-                            },
-                        )
-
-            result.found_keywords = list(found_keywords)
+            # Ищем все ключевые слова за один проход
+            offsets = self._first_offsets(blob_content, keywords)
+            if result.matches is not None:
+                for keyword, offset in offsets.items():
+                    result.matches.append(
+                        {
+                            "field_name": field_name,
+                            "keyword": keyword,
+                            "offset": offset,
+                            "content_sample": blob_content[:200],
+                            "field_type": "blob",
+                        },
+                    )
+
+            result.found_keywords = list(offsets)
 
         except Exception as e:
             if result.search_metadata is not None:
@@ -221,23 +233,22 @@ class KeywordSearcher:
         result = KeywordSearchResult()
 
         try:
-            field_str = str(field_value).lower()
-            found_keywords = set()
-
-            for keyword in keywords:
-                if keyword.lower() in field_str:
-                    found_keywords.add(keyword)
-                    if result.matches is not None:
-                        result.matches.append(
-                            {
-                                "field_name": field_name,
-                                "keyword": keyword,
-                                "content_sample": str(field_value),
-                                "field_type": "regular",
-                            },
-                        )
-
-            result.found_keywords = list(found_keywords)
+            field_str = str(field_value)
+            offsets = self._first_offsets(field_str, keywords)
+
+            if result.matches is not None:
+                for keyword, offset in offsets.items():
+                    result.matches.append(
+                        {
+                            "field_name": field_name,
+                            "keyword": keyword,
+                            "offset": offset,
+                            "content_sample": field_str,
+                            "field_type": "regular",
+                        },
+                    )
+
+            result.found_keywords = list(offsets)
 
         except Exception as e:
             if result.search_metadata is not None:
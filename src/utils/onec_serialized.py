@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+"""
+OneCSerialized - разбор внутреннего формата сериализации 1С
+Значения вида {"#",acf6192e-81ca-46ef-93a6-5a6968b78663,{"S","Магазин"},{"N",12.5}}
+читаются потоковым токенизатором (один проход регулярного выражения по
+строке) и стековым парсером без рекурсии. Строки создаются только для
+листовых значений; вложенные списки превращаются в типизированные значения
+(ссылки, строки, числа, даты), которые проецируются без поиска подстрок.
+"""
+
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from src.utils.blob_inflater import inflate_or_decode
+from src.utils.stage_profiler import STAGE_BLOB_DECODE, profiled
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Токены: строка в кавычках ("" - экранированная кавычка), скобки и запятая,
+# голое значение (число, GUID, идентификатор) до разделителя
+_TOKEN_RE = re.compile(r'"((?:[^"]|"")*)"|([{},])|([^\s{},"]+)')
+_INT_RE = re.compile(r"-?\d+")
+_DECIMAL_RE = re.compile(r"-?\d+\.\d+")
+_GUID_RE = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+)
+_DATE_FORMAT = "%Y%m%d%H%M%S"
+# Пустая дата 1С
+_EMPTY_DATE = "00010101000000"
+# Строковый лист с названием или кодом магазина
+_STORE_RE = re.compile(r"Магазин\s|ПЦ\d{3}")
+
+
+class OneCParseError(ValueError):
+    """Нарушена структура скобок сериализованного значения"""
+
+
+@dataclass(frozen=True)
+class OneCRef:
+    """Ссылка {"#",тип,значение}: type_id - GUID типа, value - данные ссылки"""
+
+    type_id: str
+    value: Any = None
+
+
+def iter_tokens(text: str) -> Iterator[tuple[str, Any]]:
+    """
+    Потоковый токенизатор: ("open"|"close"|"string"|"atom", значение).
+    Запятые пропускаются, пробелы и переводы строк между токенами игнорируются
+    """
+    for match in _TOKEN_RE.finditer(text):
+        quoted, delimiter, atom = match.groups()
+        if quoted is not None:
+            yield "string", quoted.replace('""', '"') if '""' in quoted else quoted
+        elif delimiter == "{":
+            yield "open", None
+        elif delimiter == "}":
+            yield "close", None
+        elif atom is not None:
+            yield "atom", _convert_atom(atom)
+
+
+def _convert_atom(atom: str) -> Any:
+    """Голое значение: целое, десятичное число или строка (GUID, идентификатор)"""
+    if _INT_RE.fullmatch(atom):
+        return int(atom)
+    if _DECIMAL_RE.fullmatch(atom):
+        return Decimal(atom)
+    return atom
+
+
+def _convert_date(value: Any) -> datetime | None:
+    text = str(value)
+    if text == _EMPTY_DATE:
+        return None
+    try:
+        return datetime.strptime(text, _DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def _typed(node: list[Any]) -> Any:
+    """Типизированное значение по тегу первого элемента ("S", "N", "D", "B", "U", "#")"""
+    if not node or not isinstance(node[0], str):
+        return node
+    tag = node[0]
+    if tag == "#" and len(node) >= 2 and isinstance(node[1], str):
+        return OneCRef(node[1], node[2] if len(node) == 3 else node[2:] or None)
+    if len(node) == 2:
+        value = node[1]
+        if tag == "S" and isinstance(value, str):
+            return value
+        if tag == "N" and isinstance(value, (int, Decimal)):
+            return value
+        if tag == "D":
+            return _convert_date(value)
+        if tag == "B" and value in (0, 1):
+            return bool(value)
+    if tag == "U" and len(node) == 1:
+        return None
+    return node
+
+
+def parse(text: str, typed: bool = True) -> Any:
+    """
+    Разбор сериализованного значения 1С во вложенные списки Python
+
+    Args:
+        text: Строка формата {...}
+        typed: Преобразовывать {"S",..}, {"N",..}, {"D",..}, {"B",..},
+            {"U"} и {"#",..} в str, число, datetime, bool, None и OneCRef
+
+    Returns:
+        Any: Корневое значение (обычно список)
+    """
+    stack: list[list[Any]] = []
+    root: list[Any] = []
+    current = root
+    for kind, value in iter_tokens(text):
+        if kind == "open":
+            stack.append(current)
+            current = []
+        elif kind == "close":
+            if not stack:
+                raise OneCParseError("Лишняя закрывающая скобка")
+            node = _typed(current) if typed else current
+            current = stack.pop()
+            current.append(node)
+        else:
+            current.append(value)
+    if stack:
+        raise OneCParseError(f"Не закрыто скобок: {len(stack)}")
+    return root[0] if len(root) == 1 else root
+
+
+@profiled(STAGE_BLOB_DECODE)
+def parse_blob(value: Any, typed: bool = True) -> Any | None:
+    """
+    Разбор BLOB значения: bytes (в том числе сжатые deflate) или строка
+
+    Returns:
+        Any | None: Разобранное значение или None, если содержимое
+        не является сериализованным значением 1С
+    """
+    # Сжатые значения распаковываются порциями с лимитом выхода
+    decoded = inflate_or_decode(value)
+    if decoded.text is None or decoded.content_type != "onec_serialized":
+        return None
+    try:
+        return parse(decoded.text, typed=typed)
+    except OneCParseError:
+        return None
+
+
+def iter_leaves(
+    node: Any,
+    path: tuple[int, ...] = (),
+) -> Iterator[tuple[tuple[int, ...], Any]]:
+    """Листовые значения с путем индексов от корня (обход без рекурсии)"""
+    pending: list[tuple[tuple[int, ...], Any]] = [(path, node)]
+    while pending:
+        current_path, current = pending.pop()
+        if isinstance(current, list):
+            pending.extend(
+                (current_path + (i,), child)
+                for i, child in reversed(list(enumerate(current)))
+            )
+        else:
+            yield current_path, current
+
+
+def get_path(node: Any, path: tuple[int, ...]) -> Any:
+    """Значение по пути индексов; None если пути нет"""
+    for index in path:
+        if not isinstance(node, list) or not -len(node) <= index < len(node):
+            return None
+        node = node[index]
+    return node
+
+
+def leaf_kind(value: Any) -> str:
+    """Вид листового значения для проекции"""
+    if isinstance(value, OneCRef):
+        return "ref"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, Decimal)):
+        return "number"
+    if isinstance(value, datetime):
+        return "date"
+    if value is None:
+        return "null"
+    if isinstance(value, str) and _GUID_RE.fullmatch(value):
+        return "guid"
+    return "string"
+
+
+def project(node: Any) -> dict[str, list[Any]]:
+    """
+    Проекция разобранного значения по видам листьев
+
+    Returns:
+        Dict[str, List]: {"string": [...], "number": [...], "date": [...],
+        "ref": [...], "guid": [...], "bool": [...]} в порядке обхода
+    """
+    projection: dict[str, list[Any]] = {
+        "string": [],
+        "number": [],
+        "date": [],
+        "ref": [],
+        "guid": [],
+        "bool": [],
+    }
+    for _path, value in iter_leaves(node):
+        kind = leaf_kind(value)
+        if kind in projection:
+            projection[kind].append(value)
+    return projection
+
+
+def projection_to_json(projection: dict[str, list[Any]]) -> dict[str, list[Any]]:
+    """Проекция в JSON-совместимом виде (Decimal, datetime и OneCRef - в строки и числа)"""
+    return {
+        "string": list(projection["string"]),
+        "number": [float(value) for value in projection["number"]],
+        "date": [value.isoformat() for value in projection["date"]],
+        "ref": [
+            {"type_id": ref.type_id, "value": str(ref.value)}
+            for ref in projection["ref"]
+        ],
+        "guid": list(projection["guid"]),
+        "bool": list(projection["bool"]),
+    }
+
+
+def _is_amount(value: Any) -> bool:
+    """Сумма - дробное число; целые листья - версии, счетчики и количества"""
+    if isinstance(value, Decimal):
+        return True
+    return isinstance(value, float) and not value.is_integer()
+
+
+def business_projection(projection: dict[str, list[Any]]) -> dict[str, Any]:
+    """
+    Магазин, номенклатура и сумма из проекции project() или projection_to_json()
+
+    Returns:
+        Dict: {"store_name": первая строка с магазином или None,
+        "nomenclature": остальные непустые строки,
+        "amount": сумма дробных чисел или None}
+    """
+    store_name = None
+    nomenclature = []
+    for value in projection.get("string", []):
+        text = value.strip()
+        if not text:
+            continue
+        if store_name is None and _STORE_RE.search(text):
+            store_name = text
+        else:
+            nomenclature.append(text)
+    amounts = [value for value in projection.get("number", []) if _is_amount(value)]
+    return {
+        "store_name": store_name,
+        "nomenclature": nomenclature,
+        "amount": float(sum(amounts)) if amounts else None,
+    }
+
+
+def leaves_to_arrow(node: Any) -> "pa.Table":
+    """
+    Листья разобранного значения как pyarrow.Table: path, kind и
+    типизированные колонки string_value, number_value, date_value, ref_type
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow не установлен: pip install pyarrow")
+
+    paths, kinds, strings, numbers, dates, ref_types = [], [], [], [], [], []
+    for path, value in iter_leaves(node):
+        kind = leaf_kind(value)
+        paths.append(".".join(map(str, path)))
+        kinds.append(kind)
+        strings.append(
+            (
+                value
+                if kind in ("string", "guid")
+                else str(value.value) if kind == "ref" else None
+            ),
+        )
+        numbers.append(float(value) if kind in ("number", "bool") else None)
+        dates.append(value if kind == "date" else None)
+        ref_types.append(value.type_id if kind == "ref" else None)
+
+    return pa.table(
+        {
+            "path": pa.array(paths, type=pa.string()),
+            "kind": pa.array(kinds, type=pa.string()).dictionary_encode(),
+            "string_value": pa.array(strings, type=pa.string()),
+            "number_value": pa.array(numbers, type=pa.float64()),
+            "date_value": pa.array(dates, type=pa.timestamp("s")),
+            "ref_type": pa.array(ref_types, type=pa.string()),
+        },
+    )
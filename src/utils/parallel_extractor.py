@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+
+"""
+ParallelTableExtractor - параллельное извлечение больших таблиц 1С
+Каждый процесс открывает свой DatabaseReader, читает диапазон строк
+и пишет собственный шард, координатор объединяет шарды и статистику
+"""
+
+import json
+import math
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from typing import Any
+
+from src.utils.extraction_checkpoint import ExtractionCheckpoint, write_jsonl_atomic
+
+DEFAULT_DB_PATH = "data/raw/1Cv8.1CD"
+DEFAULT_SHARDS_DIR = "data/results/shards"
+DEFAULT_ROWS_PER_PARTITION = 50_000
+
+
+@dataclass
+class TablePartition:
+    """Диапазон строк таблицы [start_row, stop_row) для одного процесса"""
+
+    table_name: str
+    index: int
+    start_row: int
+    stop_row: int
+
+    @property
+    def rows(self) -> int:
+        return self.stop_row - self.start_row
+
+
+def plan_partitions(
+    table_name: str,
+    total_rows: int,
+    workers: int,
+    rows_per_partition: int = DEFAULT_ROWS_PER_PARTITION,
+) -> list[TablePartition]:
+    """
+    JTBD:
+    Как планировщик параллельного извлечения, я хочу разбить таблицу на
+    непрерывные диапазоны строк, чтобы каждый процесс читал свои страницы
+    и все ядра были загружены до конца извлечения.
+    """
+    if total_rows <= 0:
+        return []
+
+    partitions_count = max(
+        max(workers, 1),
+        math.ceil(total_rows / max(rows_per_partition, 1)),
+    )
+    partitions_count = min(partitions_count, total_rows)
+    step = math.ceil(total_rows / partitions_count)
+
+    partitions = []
+    for index, start_row in enumerate(range(0, total_rows, step)):
+        partitions.append(
+            TablePartition(
+                table_name=table_name,
+                index=index,
+                start_row=start_row,
+                stop_row=min(start_row + step, total_rows),
+            ),
+        )
+    return partitions
+
+
+def clip_partitions(
+    partitions: list[TablePartition],
+    total_rows: int,
+) -> list[TablePartition]:
+    """
+    Партиции, обрезанные до total_rows строк; пусто, если они
+    не покрывают таблицу от начала до total_rows
+    """
+    clipped = [
+        replace(partition, stop_row=min(partition.stop_row, total_rows))
+        for partition in partitions
+        if partition.start_row < total_rows
+    ]
+    covered = 0
+    for partition in clipped:
+        if partition.start_row != covered:
+            return []
+        covered = partition.stop_row
+    return clipped if covered == total_rows else []
+
+
+def shard_path(output_dir: str, partition: TablePartition) -> str:
+    """
+    Путь к шарду партиции. Диапазон строк входит в имя файла: партиция
+    с тем же номером при другом rows_per_partition пишет отдельный шард
+    и не перезаписывает готовый шард из manifest прерванного запуска
+    """
+    return os.path.join(
+        output_dir,
+        partition.table_name,
+        f"part-{partition.index:05d}"
+        f"-{partition.start_row:010d}-{partition.stop_row:010d}.jsonl",
+    )
+
+
+def write_shard(records: list[dict[str, Any]], path: str) -> int:
+    """Записывает записи партиции в JSONL шард"""
+    return write_jsonl_atomic(path, records)
+
+
+def open_db_file(db_path: str, use_mmap: bool = False) -> Any:
+    """Открывает 1CD файл: обычное чтение или mmap (страницы из page cache ОС)"""
+    if use_mmap:
+        from patches.onec_dtools.mmap_patch import MmapFile, apply_mmap_patch
+
+        apply_mmap_patch()
+        return MmapFile(db_path)
+    return open(db_path, "rb")
+
+
+def extract_partition(
+    db_path: str,
+    partition: TablePartition,
+    output_dir: str,
+    use_mmap: bool = False,
+) -> dict[str, Any]:
+    """
+    JTBD:
+    Как рабочий процесс, я хочу открыть собственный DatabaseReader и извлечь
+    только свой диапазон строк, чтобы не делить файловый дескриптор и
+    состояние seek с другими процессами.
+    """
+    from onec_dtools.database_reader import DatabaseReader
+
+    from patches.onec_dtools.simple_patch import apply_simple_patch
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    apply_simple_patch()
+
+    started = time.time()
+    # Ядра заняты процессами партиций: BLOB распаковываются в потоке процесса
+    extractor = AdaptiveExtractor(blob_workers=1)
+    with open_db_file(db_path, use_mmap) as db_file:
+        db = DatabaseReader(db_file)
+        table = db.tables[partition.table_name]
+        records = extractor.extract_table_data(
+            partition.table_name,
+            table,
+            max_records=partition.rows,
+            start_record=partition.start_row,
+            checkpoints=False,
+        )
+
+    path = shard_path(output_dir, partition)
+    written = write_shard(records, path)
+
+    return {
+        "partition": asdict(partition),
+        "shard": path,
+        "records": written,
+        "elapsed": time.time() - started,
+        "stats": {
+            "successful_records": extractor.extraction_stats["successful_records"],
+            "failed_records": extractor.extraction_stats["failed_records"],
+            "blob_errors": extractor.extraction_stats["blob_errors"],
+        },
+    }
+
+
+def merge_shards(shards: list[str], output_file: str) -> int:
+    """Объединяет JSONL шарды в один файл в порядке партиций"""
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    merged = 0
+    with open(output_file, "w", encoding="utf-8") as out:
+        for shard in shards:
+            with open(shard, encoding="utf-8") as f:
+                for line in f:
+                    out.write(line)
+                    merged += 1
+    return merged
+
+
+def iter_shards(shards: list[str]) -> Iterator[dict[str, Any]]:
+    """Потоково читает записи из шардов в порядке партиций"""
+    for shard in shards:
+        with open(shard, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_shards(shards: list[str]) -> list[dict[str, Any]]:
+    """Читает записи из шардов в порядке партиций"""
+    return list(iter_shards(shards))
+
+
+def to_document(
+    record: dict[str, Any],
+    positional_names: dict[str, str],
+    ordinal: int,
+) -> dict[str, Any]:
+    """
+    Приводит запись пула к форме документа последовательного извлечения:
+    id {таблица}_{порядковый номер с 1}, row_index строки с 0, поля и BLOB
+    под позиционными именами field_N. Производные ключи amount_/quantity_
+    в документ не попадают, номер и дата берутся из _NUMBER и _DATE_TIME,
+    остальные реквизиты остаются значениями по умолчанию.
+
+    positional_names - имя поля 1CD → field_N (CompiledRowDecoder.names
+    и positional_names той же таблицы).
+    """
+    table_name = record["table_name"]
+    fields = {
+        positional_names[name]: value
+        for name, value in record.get("fields", {}).items()
+        if name in positional_names
+    }
+    blobs = {
+        positional_names.get(name, name): blob
+        for name, blob in record.get("blobs", {}).items()
+    }
+    number = record.get("fields", {}).get("_NUMBER")
+    date = record.get("fields", {}).get("_DATE_TIME")
+    if isinstance(date, str) and date:
+        # В шарде дата записана str(datetime), последовательный путь - isoformat
+        try:
+            date = datetime.fromisoformat(date).isoformat()
+        except ValueError:
+            pass
+    return {
+        "id": f"{table_name}_{ordinal}",
+        "table_name": table_name,
+        "row_index": record["row_index"] - 1,
+        "document_type": "Неизвестно",
+        "document_number": str(number) if number not in (None, "") else "N/A",
+        "document_date": str(date) if date not in (None, "") else "N/A",
+        "store_name": "N/A",
+        "store_code": "N/A",
+        "total_amount": 0.0,
+        "currency": "RUB",
+        "supplier_name": "N/A",
+        "buyer_name": "N/A",
+        "goods_received": "{}",
+        "goods_not_received": "{}",
+        "flower_names": "",
+        "flower_quantities": "",
+        "flower_prices": "",
+        "blob_content": "",
+        "fields": fields,
+        "blobs": blobs,
+        "extraction_stats": dict(
+            record.get(
+                "extraction_stats",
+                {"total_blobs": 0, "successful": 0, "failed": 0},
+            ),
+        ),
+    }
+
+
+class ParallelTableExtractor:
+    """
+    JTBD:
+    Как система извлечения больших таблиц, я хочу распределить диапазоны
+    строк по пулу процессов и собрать шарды вместе, чтобы время извлечения
+    _DOCUMENTJOURNAL5354 и _DOCUMENTJOURNAL5287 уменьшалось с числом ядер.
+    Готовые партиции фиксируются в manifest, прерванный запуск
+    пропускает их при повторе.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        workers: int | None = None,
+        output_dir: str = DEFAULT_SHARDS_DIR,
+        rows_per_partition: int = DEFAULT_ROWS_PER_PARTITION,
+        use_mmap: bool = False,
+    ) -> None:
+        self.db_path = db_path
+        self.use_mmap = use_mmap
+        self.workers = workers or os.cpu_count() or 1
+        self.output_dir = output_dir
+        self.rows_per_partition = rows_per_partition
+        self.checkpoint = ExtractionCheckpoint(output_dir)
+
+    def count_rows(self, table_name: str) -> int:
+        """Количество строк таблицы (читается только заголовок объекта)"""
+        from onec_dtools.database_reader import DatabaseReader
+
+        from patches.onec_dtools.simple_patch import apply_simple_patch
+
+        apply_simple_patch()
+        with open_db_file(self.db_path, self.use_mmap) as db_file:
+            db = DatabaseReader(db_file)
+            if table_name not in db.tables:
+                raise KeyError(f"Таблица {table_name} не найдена")
+            return len(db.tables[table_name])
+
+    def extract_table(
+        self,
+        table_name: str,
+        max_records: int | None = None,
+        merged_file: str | None = None,
+        should_stop: Callable[[], bool] | None = None,
+        partitions: list[TablePartition] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Извлекает таблицу по партициям и возвращает сводку координатора
+
+        partitions - партиции из плана извлечения; используются, если покрывают
+        таблицу, иначе партиции строятся по rows_per_partition. Партиции,
+        уже зафиксированные в manifest незавершенного запуска, не извлекаются
+        повторно. should_stop отменяет еще не начатые партиции.
+        """
+        started = time.time()
+        total_rows = self.count_rows(table_name)
+        if max_records is not None:
+            total_rows = min(total_rows, max_records)
+
+        partitions = clip_partitions(partitions or [], total_rows) or plan_partitions(
+            table_name,
+            total_rows,
+            self.workers,
+            self.rows_per_partition,
+        )
+        print(
+            f"🚀 {table_name}: {total_rows:,} строк → {len(partitions)} партиций "
+            f"на {self.workers} процессах",
+        )
+
+        manifest = self.checkpoint.load(table_name)
+        if manifest.completed:
+            manifest = self.checkpoint.reset(table_name)
+        committed = {
+            (shard["start_row"], shard["stop_row"]): shard for shard in manifest.shards
+        }
+
+        results: list[dict[str, Any]] = []
+        failed: list[dict[str, Any]] = []
+        pending: list[TablePartition] = []
+        for partition in partitions:
+            shard = committed.get((partition.start_row, partition.stop_row))
+            if shard and os.path.exists(shard["path"]):
+                results.append(
+                    {
+                        "partition": asdict(partition),
+                        "shard": shard["path"],
+                        "records": shard["records"],
+                        "elapsed": 0.0,
+                        "stats": {},
+                        "resumed": True,
+                    },
+                )
+            else:
+                pending.append(partition)
+        if results:
+            print(f"   ♻️ Пропущено готовых партиций: {len(results)}")
+
+        def commit(result: dict[str, Any]) -> None:
+            results.append(result)
+            self.checkpoint.register_shard(
+                manifest,
+                result["shard"],
+                result["partition"]["start_row"],
+                result["partition"]["stop_row"],
+                result["records"],
+            )
+
+        interrupted = False
+        if self.workers == 1:
+            for partition in pending:
+                if should_stop is not None and should_stop():
+                    interrupted = True
+                    break
+                try:
+                    commit(
+                        extract_partition(
+                            self.db_path,
+                            partition,
+                            self.output_dir,
+                            self.use_mmap,
+                        ),
+                    )
+                except Exception as e:
+                    failed.append({"partition": asdict(partition), "error": str(e)})
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    pool.submit(
+                        extract_partition,
+                        self.db_path,
+                        partition,
+                        self.output_dir,
+                        self.use_mmap,
+                    ): partition
+                    for partition in pending
+                }
+                for future in as_completed(futures):
+                    if not interrupted and should_stop is not None and should_stop():
+                        # Начатые партиции дописываются, остальные отменяются
+                        interrupted = True
+                        for other in futures:
+                            other.cancel()
+                    if future.cancelled():
+                        continue
+                    partition = futures[future]
+                    try:
+                        result = future.result()
+                        commit(result)
+                        print(
+                            f"   ✅ Партиция {partition.index}: "
+                            f"{result['records']:,} записей",
+                        )
+                    except Exception as e:
+                        print(f"   ❌ Партиция {partition.index}: {e!s}")
+                        failed.append(
+                            {"partition": asdict(partition), "error": str(e)},
+                        )
+
+        results.sort(key=lambda result: result["partition"]["index"])
+        summary = self.merge_results(table_name, total_rows, results, failed)
+        summary["resumed_partitions"] = sum(
+            1 for result in results if result.get("resumed")
+        )
+        summary["interrupted"] = interrupted
+        if not interrupted and not failed:
+            self.checkpoint.complete(manifest)
+        summary["elapsed"] = time.time() - started
+        summary["rows_per_second"] = (
+            total_rows / summary["elapsed"] if summary["elapsed"] > 0 else 0
+        )
+
+        if merged_file:
+            summary["merged_file"] = merged_file
+            summary["merged_records"] = merge_shards(summary["shards"], merged_file)
+
+        print(
+            f"✅ {table_name}: {summary['records']:,} записей за "
+            f"{summary['elapsed']:.1f} сек ({summary['rows_per_second']:,.0f} строк/сек)",
+        )
+        return summary
+
+    @staticmethod
+    def merge_results(
+        table_name: str,
+        total_rows: int,
+        results: list[dict[str, Any]],
+        failed: list[dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Объединяет статистику партиций"""
+        stats = {"successful_records": 0, "failed_records": 0, "blob_errors": 0}
+        for result in results:
+            for key in stats:
+                stats[key] += result["stats"].get(key, 0)
+
+        return {
+            "table_name": table_name,
+            "total_rows": total_rows,
+            "partitions": len(results) + len(failed),
+            "shards": [result["shard"] for result in results],
+            "records": sum(result["records"] for result in results),
+            "stats": stats,
+            "failed_partitions": failed,
+        }
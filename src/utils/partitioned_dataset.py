@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+"""
+PartitionedParquetSink - запись извлеченных строк в Hive-партиционированный
+Parquet датасет: table_name=.../document_type=.../year_month=.../part-N.parquet
+Каждая группа строк отсортирована по дате (и магазину), min/max статистика
+пишется для всех колонок, поэтому DuckDB через view отсекает файлы
+по партициям и группы строк по статистике без загрузки всей базы
+"""
+
+import os
+import shutil
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from src.utils.arrow_parquet_sink import PYARROW_AVAILABLE, ArrowParquetSink
+from src.utils.stage_profiler import STAGE_SINK, profiled
+
+if PYARROW_AVAILABLE:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+PARTITION_COLUMNS = ("table_name", "document_type", "year_month")
+# Колонки даты документа в порядке предпочтения
+DATE_COLUMNS = ("_DATE_TIME", "field__DATE_TIME", "document_date")
+STORE_COLUMNS = ("store_code", "store_name")
+# Значение партиции для NULL (так же его читают DuckDB и pyarrow)
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+DEFAULT_MAX_OPEN_FILES = 64
+
+# Символы, которые нельзя оставить в имени каталога партиции
+_ESCAPED_CHARACTERS = {
+    "%": "%25",
+    "/": "%2F",
+    "\\": "%5C",
+    "=": "%3D",
+}
+
+
+def partition_value(value: Any) -> str:
+    """Имя каталога для значения партиции (NULL и пустая строка - по умолчанию)"""
+    if value is None or value == "":
+        return DEFAULT_PARTITION
+    text = str(value)
+    for character, escaped in _ESCAPED_CHARACTERS.items():
+        text = text.replace(character, escaped)
+    return text
+
+
+def year_month(values: Any) -> "pa.Array":
+    """
+    Год-месяц (YYYY-MM) колонки даты: timestamp/date - strftime,
+    строка - ISO префикс YYYY-MM, иначе null
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if pa.types.is_timestamp(values.type) or pa.types.is_date(values.type):
+        return pc.strftime(values, format="%Y-%m")
+    if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+        iso = pc.match_substring_regex(values, r"^\d{4}-\d{2}")
+        return pc.if_else(
+            iso,
+            pc.utf8_slice_codeunits(values, 0, 7),
+            pa.scalar(None, pa.string()),
+        )
+    return pa.nulls(len(values), pa.string())
+
+
+class PartitionedParquetSink(ArrowParquetSink):
+    """
+    JTBD:
+    Как аналитик 80GB базы, я хочу получать извлеченные таблицы Hive датасетом,
+    разложенным по таблице, типу документа и месяцу, чтобы DuckDB читал только
+    нужные месяцы и магазины, а не загружал все строки в одну таблицу.
+
+    Интерфейс как у ArrowParquetSink (write_rows/write_batch/flush/close),
+    path - корень датасета. Колонки партиций не хранятся в файлах: их значения
+    восстанавливаются из путей (hive_partitioning). Каталог верхней партиции
+    (обычно table_name=...) очищается при первой записи в него.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        schema: "pa.Schema | None" = None,
+        partition_by: Sequence[str] = PARTITION_COLUMNS,
+        date_column: str | None = None,
+        sort_by: Sequence[str] | None = None,
+        table_name: str | None = None,
+        max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+        overwrite: bool = True,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(root, schema=schema, **kwargs)
+        self.root = root
+        self.partition_by = list(partition_by)
+        self.date_column = date_column
+        self.sort_by = None if sort_by is None else list(sort_by)
+        self.table_name = table_name
+        self.max_open_files = max_open_files
+        self.overwrite = overwrite
+        self.files: list[str] = []
+
+        self._pending: dict[tuple[str, ...], list[pa.Table]] = {}
+        self._pending_rows: dict[tuple[str, ...], int] = {}
+        self._writers: OrderedDict[tuple[str, ...], pq.ParquetWriter] = OrderedDict()
+        self._file_counts: dict[tuple[str, ...], int] = {}
+        self._cleared: set[str] = set()
+
+    def _date_column(self, schema: "pa.Schema") -> str | None:
+        if self.date_column is not None:
+            return self.date_column if self.date_column in schema.names else None
+        return next((name for name in DATE_COLUMNS if name in schema.names), None)
+
+    def _sort_keys(self, schema: "pa.Schema") -> list[str]:
+        if self.sort_by is not None:
+            return [name for name in self.sort_by if name in schema.names]
+        keys = [self._date_column(schema)]
+        keys += [name for name in STORE_COLUMNS if name in schema.names]
+        return [name for name in keys if name is not None]
+
+    def _partition_arrays(self, table: "pa.Table") -> list["pa.Array"]:
+        arrays = []
+        for column in self.partition_by:
+            if column == "year_month" and column not in table.column_names:
+                date_column = self._date_column(table.schema)
+                values = (
+                    year_month(table.column(date_column))
+                    if date_column is not None
+                    else pa.nulls(table.num_rows, pa.string())
+                )
+            elif column in table.column_names:
+                values = pc.cast(table.column(column).combine_chunks(), pa.string())
+            elif column == "table_name" and self.table_name is not None:
+                values = pa.repeat(self.table_name, table.num_rows)
+            else:
+                values = pa.nulls(table.num_rows, pa.string())
+            arrays.append(pc.fill_null(values, DEFAULT_PARTITION))
+        return arrays
+
+    def _split(self, table: "pa.Table") -> Iterable[tuple[tuple[str, ...], "pa.Table"]]:
+        """Строки пакета, сгруппированные по значениям партиций"""
+        if not self.partition_by:
+            yield (), table
+            return
+        keys = pc.binary_join_element_wise(*self._partition_arrays(table), "\x1f")
+        encoded = keys.dictionary_encode()
+        order = pc.sort_indices(encoded.indices)
+        codes = pc.take(encoded.indices, order).to_numpy(zero_copy_only=False)
+        table = table.take(order)
+
+        dictionary = encoded.dictionary.to_pylist()
+        bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        starts = [0, *bounds.tolist()]
+        stops = [*bounds.tolist(), len(codes)]
+        for start, stop in zip(starts, stops):
+            key = tuple(dictionary[codes[start]].split("\x1f"))
+            yield key, table.slice(start, stop - start)
+
+    @profiled(STAGE_SINK)
+    def _flush_row_groups(self, partial: bool = False) -> None:
+        """Раскладывает пакеты по партициям, полные группы строк пишет сразу"""
+        if self._batches:
+            table = pa.Table.from_batches(self._batches, schema=self.schema)
+            self._batches = []
+            self._buffered = 0
+            for key, part in self._split(table):
+                self._pending.setdefault(key, []).append(part)
+                self._pending_rows[key] = self._pending_rows.get(key, 0) + part.num_rows
+
+        for key in list(self._pending):
+            if partial or self._pending_rows[key] >= self.row_group_size:
+                self._write_partition(key)
+
+    def _partition_dir(self, key: tuple[str, ...]) -> str:
+        parts = [
+            f"{column}={partition_value(value)}"
+            for column, value in zip(self.partition_by, key)
+        ]
+        return os.path.join(self.root, *parts)
+
+    def _file_schema(self) -> "pa.Schema":
+        schema = self.schema
+        if schema is None:
+            raise ValueError(f"Схема датасета {self.root} не определена")
+        for column in self.partition_by:
+            if column in schema.names:
+                schema = schema.remove(schema.get_field_index(column))
+        return schema
+
+    def _partition_writer(self, key: tuple[str, ...]) -> "pq.ParquetWriter":
+        writer = self._writers.get(key)
+        if writer is not None:
+            self._writers.move_to_end(key)
+            return writer
+
+        directory = self._partition_dir(key)
+        if self.overwrite and self.partition_by:
+            top = os.path.join(
+                self.root, f"{self.partition_by[0]}={partition_value(key[0])}"
+            )
+            if top not in self._cleared:
+                self._cleared.add(top)
+                shutil.rmtree(top, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+        # Лимит открытых файлов: старый writer закрывается, следующая запись
+        # в его партицию откроет новый part файл
+        while len(self._writers) >= self.max_open_files:
+            _key, oldest = self._writers.popitem(last=False)
+            oldest.close()
+
+        number = self._file_counts.get(key, 0)
+        self._file_counts[key] = number + 1
+        path = os.path.join(directory, f"part-{number:05d}.parquet")
+        schema = self._file_schema()
+        options: dict[str, Any] = {}
+        sort_keys = self._sort_keys(schema)
+        if sort_keys and hasattr(pq, "SortingColumn"):
+            options["sorting_columns"] = list(
+                pq.SortingColumn.from_ordering(
+                    schema,
+                    [(name, "ascending") for name in sort_keys],
+                ),
+            )
+        writer = pq.ParquetWriter(
+            path,
+            schema,
+            compression=self.compression,
+            write_statistics=True,
+            use_dictionary=[
+                name for name in self.dictionary_columns if name in schema.names
+            ],
+            **options,
+        )
+        self._writers[key] = writer
+        self.files.append(path)
+        return writer
+
+    def _write_partition(self, key: tuple[str, ...]) -> None:
+        parts = self._pending.pop(key, [])
+        self._pending_rows.pop(key, None)
+        if not parts:
+            return
+        table = pa.concat_tables(parts)
+        sort_keys = self._sort_keys(table.schema)
+        if sort_keys:
+            table = table.sort_by([(name, "ascending") for name in sort_keys])
+        table = table.select(self._file_schema().names)
+        self._partition_writer(key).write_table(
+            table, row_group_size=self.row_group_size
+        )
+        self.rows_written += table.num_rows
+
+    @profiled(STAGE_SINK)
+    def close(self) -> int:
+        """Дописывает остатки партиций и закрывает все файлы"""
+        if self._closed:
+            return self.rows_written
+        self._closed = True
+        self.flush()
+        while self._writers:
+            _key, writer = self._writers.popitem(last=False)
+            writer.close()
+        return self.rows_written
+
+    def __enter__(self) -> "PartitionedParquetSink":
+        return self
+
+
+def dataset_glob(root: str) -> str:
+    """Абсолютный glob файлов датасета (view не зависит от текущего каталога)"""
+    return os.path.join(os.path.abspath(root), "**", "*.parquet")
+
+
+def _dataset_files(root: str) -> Iterable[str]:
+    for directory, _dirs, files in os.walk(root):
+        for name in files:
+            if name.endswith(".parquet"):
+                yield os.path.join(directory, name)
+
+
+def dataset_files(root: str) -> list[str]:
+    """Файлы Parquet датасета в порядке путей"""
+    return sorted(_dataset_files(root))
+
+
+def has_dataset_files(root: str) -> bool:
+    return next(iter(_dataset_files(root)), None) is not None
+
+
+def partition_names(root: str) -> list[str]:
+    """Колонки партиций датасета по пути первого файла"""
+    path = next(iter(_dataset_files(root)), None)
+    if path is None:
+        return []
+    directories = os.path.relpath(os.path.dirname(path), root).split(os.sep)
+    return [part.split("=", 1)[0] for part in directories if "=" in part]
+
+
+def create_dataset_view(con: Any, view_name: str, root: str) -> bool:
+    """
+    View DuckDB поверх Hive датасета: фильтры по table_name/document_type/
+    year_month отсекают каталоги, по остальным колонкам - группы строк
+    по min/max статистике. Возвращает False, если файлов нет
+    """
+    if not has_dataset_files(root):
+        return False
+    path = dataset_glob(root).replace("'", "''")
+    # Таблица с тем же именем от прежней загрузки заменяется view
+    tables = con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE table_name = ?",
+        [view_name],
+    ).fetchone()[0]
+    if tables:
+        con.execute(f'DROP TABLE "{view_name}"')
+    con.execute(
+        f'CREATE OR REPLACE VIEW "{view_name}" AS '
+        f"SELECT * FROM read_parquet('{path}', hive_partitioning = true, "
+        "hive_types_autocast = false, union_by_name = true)",
+    )
+    return True
+
+
+def read_dataset(
+    root: str,
+    columns: list[str] | None = None,
+    filter: Any = None,
+) -> "pa.Table":
+    """
+    Чтение датасета в pyarrow: колонки партиций строковые, а не словари
+    (словари с NULL партицией не переводятся в pandas)
+    """
+    import pyarrow.dataset as ds
+
+    # Партиции всегда строковые: тип не выводится, если все значения NULL
+    schema = pa.schema([(name, pa.string()) for name in partition_names(root)])
+    dataset = ds.dataset(
+        root,
+        format="parquet",
+        partitioning=ds.HivePartitioning(schema, null_fallback=DEFAULT_PARTITION),
+    )
+    return dataset.to_table(columns=columns, filter=filter)
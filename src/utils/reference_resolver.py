@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+"""
+ReferenceResolver - разрешение ссылок _IDRREF на элементы справочников 1С
+Каждая таблица _Reference* один раз читается проекцией (_IDRREF, _CODE,
+_DESCRIPTION), индекс сохраняется в Parquet. Колонки ссылок документов
+разрешаются пакетами Arrow: поиск в хэш-индексе только для уникальных ссылок
+пакета, значения раскладываются по строкам через take, без цикла по строкам.
+"""
+
+import argparse
+import os
+from collections.abc import Iterable
+from typing import Any
+
+from src.utils.table_part_index import source_stamp
+from src.utils.table_reader import TableReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_INDEX_DIR = "data/results/reference_index"
+REF_COLUMN = "_IDRREF"
+CODE_COLUMN = "_CODE"
+DESCRIPTION_COLUMN = "_DESCRIPTION"
+REF_SIZE = 16
+EMPTY_REF = b"\x00" * REF_SIZE
+
+# Суффиксы колонок, которые добавляет enrich_batch
+RESOLVED_SUFFIXES = ("_catalog", "_code", "_description")
+
+
+def is_reference_table(table_name: str) -> bool:
+    """Таблица справочника (_Reference*), но не его табличная часть"""
+    return table_name.upper().startswith("_REFERENCE") and "_VT" not in table_name
+
+
+def ref_columns(table: Any) -> list[str]:
+    """
+    Колонки ссылок таблицы: двоичные поля длиной 16 с именем *RREF,
+    кроме собственной ссылки _IDRREF
+    """
+    return [
+        name
+        for name, description in getattr(table, "fields", {}).items()
+        if description.type == "B"
+        and description.length == REF_SIZE
+        and name.upper().endswith("RREF")
+        and name != REF_COLUMN
+    ]
+
+
+def _to_text(value: Any) -> str | None:
+    if value is None:
+        return None
+    # NC поля дополнены пробелами до длины поля
+    return (value if isinstance(value, str) else str(value)).rstrip()
+
+
+class ReferenceResolver:
+    """
+    JTBD:
+    Как аналитик документов, я хочу видеть код и наименование элемента
+    справочника рядом с 16-байтной ссылкой, чтобы не соединять документы
+    со справочниками вручную и не искать элемент справочника на каждую строку.
+    """
+
+    def __init__(self, db: Any, index_dir: str | None = DEFAULT_INDEX_DIR) -> None:
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow не установлен. Установите: pip install pyarrow")
+
+        self.db = db
+        self.index_dir = index_dir
+        self._stamp = source_stamp(db)
+        self._tables: dict[str, pa.Table] = {}
+
+        # Общий индекс всех справочников: ссылка → позиция в колонках
+        # catalog, code, description
+        self._positions: dict[bytes, int] | None = None
+        self._columns: dict[str, pa.Array] = {}
+
+    def reference_tables(self) -> list[str]:
+        """Справочники базы, у которых есть _IDRREF и код или наименование"""
+        names = []
+        for name, table in self.db.tables.items():
+            fields = getattr(table, "fields", {})
+            if (
+                is_reference_table(name)
+                and REF_COLUMN in fields
+                and (CODE_COLUMN in fields or DESCRIPTION_COLUMN in fields)
+            ):
+                names.append(name)
+        return names
+
+    def index_path(self, table_name: str) -> str | None:
+        if self.index_dir is None:
+            return None
+        return os.path.join(self.index_dir, f"{table_name}.parquet")
+
+    def table_index(self, table_name: str) -> "pa.Table":
+        """Индекс справочника: ref, code, description (отсортирован по ref)"""
+        index = self._tables.get(table_name)
+        if index is None:
+            table = self.db.tables[table_name]
+            index = self._load(table_name, table)
+            if index is None:
+                index = self._build(table_name, table)
+            self._tables[table_name] = index
+        return index
+
+    def _metadata(self, table_name: str, table: Any) -> dict[bytes, bytes]:
+        return {
+            b"table_name": table_name.encode("utf-8"),
+            b"row_count": str(len(table)).encode(),
+            b"row_length": str(getattr(table, "_row_length", 0)).encode(),
+            b"source_size": str(self._stamp.get("size", "")).encode(),
+            b"source_mtime_ns": str(self._stamp.get("mtime_ns", "")).encode(),
+        }
+
+    def _load(self, table_name: str, table: Any) -> "pa.Table | None":
+        """Индекс с диска, если он построен по тому же файлу и таблице"""
+        path = self.index_path(table_name)
+        if path is None or not self._stamp or not os.path.exists(path):
+            return None
+        try:
+            index = pq.read_table(path)
+        except (OSError, pa.ArrowException) as e:
+            print(f"   ⚠️ Индекс {path} поврежден, перестраиваем: {e!s}")
+            return None
+
+        metadata = index.schema.metadata or {}
+        expected = self._metadata(table_name, table)
+        if any(metadata.get(key) != value for key, value in expected.items()):
+            return None
+        return index.replace_schema_metadata(None)
+
+    def _build(self, table_name: str, table: Any) -> "pa.Table":
+        """Один проход проекции (_IDRREF, _CODE, _DESCRIPTION) по справочнику"""
+        columns = [
+            name
+            for name in (REF_COLUMN, CODE_COLUMN, DESCRIPTION_COLUMN)
+            if name in table.fields
+        ]
+        entries = []
+        for _i, row in TableReader(table, table_name).iter_rows(columns):
+            ref = row.get(REF_COLUMN)
+            if ref is None or ref == EMPTY_REF:
+                continue
+            entries.append(
+                (
+                    bytes(ref),
+                    _to_text(row.get(CODE_COLUMN)),
+                    _to_text(row.get(DESCRIPTION_COLUMN)),
+                ),
+            )
+        entries.sort(key=lambda entry: entry[0])
+
+        index = pa.table(
+            {
+                "ref": pa.array([e[0] for e in entries], pa.binary(REF_SIZE)),
+                "code": pa.array([e[1] for e in entries], pa.string()),
+                "description": pa.array([e[2] for e in entries], pa.string()),
+            },
+        )
+        print(f"   📚 Индекс ссылок {table_name}: {index.num_rows:,} элементов")
+
+        path = self.index_path(table_name)
+        if path is not None and self._stamp:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            pq.write_table(
+                index.replace_schema_metadata(self._metadata(table_name, table)),
+                tmp_path,
+            )
+            os.replace(tmp_path, path)
+        return index
+
+    def _ensure_index(self) -> None:
+        """Общий хэш-индекс по всем справочникам (строится один раз)"""
+        if self._positions is not None:
+            return
+
+        positions: dict[bytes, int] = {}
+        catalogs, codes, descriptions = [], [], []
+        offset = 0
+        for table_name in self.reference_tables():
+            index = self.table_index(table_name)
+            for position, ref in enumerate(index.column("ref").to_pylist()):
+                positions.setdefault(ref, offset + position)
+            catalogs.append(pa.repeat(table_name, index.num_rows))
+            codes.append(index.column("code").combine_chunks())
+            descriptions.append(index.column("description").combine_chunks())
+            offset += index.num_rows
+
+        self._positions = positions
+        self._columns = {
+            name: pa.concat_arrays(arrays or [pa.array([], pa.string())])
+            for name, arrays in (
+                ("catalog", catalogs),
+                ("code", codes),
+                ("description", descriptions),
+            )
+        }
+
+    @property
+    def size(self) -> int:
+        """Число ссылок в индексе"""
+        self._ensure_index()
+        return len(self._positions or {})
+
+    def lookup(self, ref: Any) -> dict[str, Any] | None:
+        """Справочник, код и наименование одной ссылки"""
+        self._ensure_index()
+        position = (self._positions or {}).get(bytes(ref)) if ref else None
+        if position is None:
+            return None
+        return {
+            name: column[position].as_py() for name, column in self._columns.items()
+        }
+
+    def resolve(self, refs: Any) -> dict[str, "pa.Array"]:
+        """
+        Разрешает колонку ссылок (pyarrow Array/ChunkedArray или список bytes):
+        catalog, code, description по строкам, null для неизвестных ссылок
+        """
+        self._ensure_index()
+        if not isinstance(refs, (pa.Array, pa.ChunkedArray)):
+            refs = pa.array(list(refs), pa.binary())
+        if isinstance(refs, pa.ChunkedArray):
+            refs = refs.combine_chunks()
+
+        # Хэш-поиск только для уникальных ссылок пакета
+        encoded = refs.dictionary_encode()
+        positions = self._positions or {}
+        unique_positions = pa.array(
+            [positions.get(ref) for ref in encoded.dictionary.to_pylist()],
+            pa.int64(),
+        )
+        row_positions = pc.take(unique_positions, encoded.indices)
+        return {
+            name: pc.take(column, row_positions)
+            for name, column in self._columns.items()
+        }
+
+    def enrich_batch(self, batch: Any, columns: Iterable[str] | None = None) -> Any:
+        """
+        Добавляет к RecordBatch/Table колонки {column}_catalog, _code,
+        _description для каждой колонки ссылок (по умолчанию - двоичные
+        колонки *RREF, кроме _IDRREF). Существующие колонки заменяются.
+        """
+        if columns is None:
+            columns = [
+                field.name
+                for field in batch.schema
+                if pa.types.is_binary(field.type)
+                or pa.types.is_fixed_size_binary(field.type)
+            ]
+            columns = [
+                name
+                for name in columns
+                if name.upper().endswith("RREF") and not name.endswith(REF_COLUMN)
+            ]
+
+        for column in columns:
+            if column not in batch.schema.names:
+                continue
+            resolved = self.resolve(batch.column(column))
+            for suffix in RESOLVED_SUFFIXES:
+                name = f"{column}{suffix}"
+                values = resolved[suffix[1:]]
+                if name in batch.schema.names:
+                    batch = batch.set_column(
+                        batch.schema.get_field_index(name),
+                        name,
+                        values,
+                    )
+                else:
+                    batch = batch.append_column(name, values)
+        return batch
+
+    def build_all(self) -> dict[str, int]:
+        """Строит (или загружает) индексы всех справочников"""
+        return {
+            name: self.table_index(name).num_rows for name in self.reference_tables()
+        }
+
+
+def main() -> None:
+    """Предварительное построение индекса ссылок справочников"""
+    parser = argparse.ArgumentParser(description="Индекс ссылок справочников 1С")
+    parser.add_argument("--db", default="data/raw/1Cv8.1CD", help="Путь к 1CD файлу")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    args = parser.parse_args()
+
+    from onec_dtools.database_reader import DatabaseReader
+
+    with open(args.db, "rb") as f:
+        counts = ReferenceResolver(DatabaseReader(f), args.index_dir).build_all()
+    print(
+        f"✅ Индекс ссылок: {len(counts)} справочников, "
+        f"{sum(counts.values()):,} элементов → {args.index_dir}",
+    )
+
+
+if __name__ == "__main__":
+    main()
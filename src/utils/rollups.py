@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+
+"""
+RollupStore - материализованные сводные таблицы DuckDB поверх Hive датасетов
+Продажи по магазину × дню × номенклатуре, успешность BLOB по таблицам
+и число документов по типу и месяцу хранятся готовыми таблицами.
+Обновление пересчитывает только месяцы (партиции year_month), файлы
+которых изменились с прошлого обновления: отпечаток месяца - хэши
+содержимого его Parquet файлов, поэтому перезапись тех же данных
+не вызывает пересчета.
+"""
+
+import hashlib
+import os
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from src.utils.partitioned_dataset import DEFAULT_PARTITION, dataset_files
+
+# Состояние: файлы датасетов на момент последнего обновления
+STATE_TABLE = "_rollup_files"
+MONTH_COLUMN = "year_month"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """
+    Сводная таблица: SELECT по view источника с условием {where}
+    на месяцы; в результате обязательна колонка year_month
+    """
+
+    name: str
+    source: str
+    select: str
+    required: tuple[str, ...]
+
+
+ROLLUPS = (
+    Rollup(
+        name="sales_by_store_day_nomenclature",
+        source="table_parts",
+        select="""
+            SELECT
+                year_month,
+                document_type,
+                store_name,
+                CAST(TRY_CAST(document_date AS TIMESTAMP) AS DATE) AS sale_date,
+                nomenclature,
+                count(DISTINCT document_id) AS documents,
+                count(*) AS lines,
+                sum(TRY_CAST(quantity AS DOUBLE)) AS quantity,
+                sum(TRY_CAST(amount AS DOUBLE)) AS amount
+            FROM {source}
+            WHERE {where}
+            GROUP BY ALL
+        """,
+        required=(
+            "document_id",
+            "document_type",
+            "store_name",
+            "document_date",
+            "nomenclature",
+            "quantity",
+            "amount",
+        ),
+    ),
+    Rollup(
+        name="blob_success_by_table",
+        source="documents",
+        select="""
+            SELECT
+                year_month,
+                table_name,
+                count(*) AS documents,
+                sum(total_blobs) AS total_blobs,
+                sum(successful_blobs) AS successful_blobs,
+                sum(failed_blobs) AS failed_blobs
+            FROM {source}
+            WHERE {where}
+            GROUP BY ALL
+        """,
+        required=("table_name", "total_blobs", "successful_blobs", "failed_blobs"),
+    ),
+    Rollup(
+        name="documents_by_type_month",
+        source="documents",
+        select="""
+            SELECT
+                year_month,
+                table_name,
+                document_type,
+                count(*) AS documents,
+                sum(TRY_CAST(total_amount AS DOUBLE)) AS total_amount
+            FROM {source}
+            WHERE {where}
+            GROUP BY ALL
+        """,
+        required=("table_name", "document_type", "total_amount"),
+    ),
+)
+
+# View поверх сводных таблиц (доли считаются по суммам, а не усредняются)
+ROLLUP_VIEWS = {
+    "blob_success_rates": """
+        SELECT
+            table_name,
+            sum(documents) AS documents,
+            sum(total_blobs) AS total_blobs,
+            sum(successful_blobs) AS successful_blobs,
+            sum(failed_blobs) AS failed_blobs,
+            ROUND(
+                sum(successful_blobs) * 100.0
+                / NULLIF(sum(successful_blobs) + sum(failed_blobs), 0),
+                2
+            ) AS success_rate
+        FROM blob_success_by_table
+        GROUP BY table_name
+    """,
+}
+
+
+def month_of(path: str, root: str) -> str | None:
+    """Месяц файла по каталогу year_month=... (None - партиция по умолчанию)"""
+    for part in os.path.relpath(os.path.dirname(path), root).split(os.sep):
+        name, _, value = part.partition("=")
+        if name == MONTH_COLUMN:
+            return None if value == DEFAULT_PARTITION else value
+    return None
+
+
+def month_predicate(months: Iterable[str | None]) -> str:
+    """Условие SQL на колонку year_month для набора месяцев"""
+    months = set(months)
+    parts = []
+    values = sorted(month for month in months if month is not None)
+    if values:
+        quoted = ", ".join("'" + month.replace("'", "''") + "'" for month in values)
+        parts.append(f"{MONTH_COLUMN} IN ({quoted})")
+    if None in months:
+        parts.append(f"{MONTH_COLUMN} IS NULL")
+    return " OR ".join(parts) or "FALSE"
+
+
+def has_rollup(con: Any, name: str) -> bool:
+    """Материализована ли сводная таблица name в соединении"""
+    count: int = con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE table_name = ?",
+        [name],
+    ).fetchone()[0]
+    return count > 0
+
+
+def file_digest(path: str) -> str:
+    """blake2b содержимого файла"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RollupStore:
+    """
+    JTBD:
+    Как аналитик и ноутбук parquet_analysis, я хочу читать небольшие
+    готовые сводные таблицы продаж, успешности BLOB и документов
+    по месяцам, чтобы не пересчитывать GROUP BY по всем документам
+    при каждом запуске, а обновление пересчитывало только изменившиеся
+    месяцы.
+
+    con - соединение DuckDB, где уже созданы view источников (например,
+    create_dataset_view). Сводные таблицы и состояние хранятся в нем же.
+    """
+
+    def __init__(self, con: Any, rollups: Iterable[Rollup] = ROLLUPS) -> None:
+        self.con = con
+        self.rollups = list(rollups)
+        self.con.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                source VARCHAR,
+                path VARCHAR,
+                size BIGINT,
+                mtime_ns BIGINT,
+                digest VARCHAR,
+                year_month VARCHAR
+            )
+            """,
+        )
+
+    def _columns(self, view: str) -> set[str]:
+        try:
+            rows = self.con.execute(f'DESCRIBE "{view}"').fetchall()
+        except Exception:
+            return set()
+        return {row[0] for row in rows}
+
+    def _scan(self, source: str, root: str) -> list[tuple[Any, ...]]:
+        """
+        Файлы датасета (путь, размер, mtime, хэш, месяц); хэш файла
+        с прежними размером и mtime берется из состояния без чтения
+        """
+        known = {
+            path: (size, mtime_ns, digest)
+            for path, size, mtime_ns, digest in self.con.execute(
+                f"SELECT path, size, mtime_ns, digest FROM {STATE_TABLE} "
+                "WHERE source = ?",
+                [source],
+            ).fetchall()
+        }
+        files = []
+        for path in dataset_files(root):
+            stat = os.stat(path)
+            relative = os.path.relpath(path, root)
+            cached = known.get(relative)
+            if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                digest = cached[2]
+            else:
+                digest = file_digest(path)
+            files.append(
+                (
+                    source,
+                    relative,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    digest,
+                    month_of(path, root),
+                ),
+            )
+        return files
+
+    def _changed_months(
+        self,
+        source: str,
+        files: list[tuple[Any, ...]],
+    ) -> set[str | None]:
+        """Месяцы, набор файлов или содержимое которых изменились"""
+        current: dict[str | None, set[tuple[str, str]]] = {}
+        for _source, path, _size, _mtime, digest, month in files:
+            current.setdefault(month, set()).add((path, digest))
+        stored: dict[str | None, set[tuple[str, str]]] = {}
+        for path, digest, month in self.con.execute(
+            f"SELECT path, digest, year_month FROM {STATE_TABLE} WHERE source = ?",
+            [source],
+        ).fetchall():
+            stored.setdefault(month, set()).add((path, digest))
+        return {
+            month
+            for month in set(current) | set(stored)
+            if current.get(month) != stored.get(month)
+        }
+
+    def _materialize(self, rollup: Rollup, view: str, months: Any) -> None:
+        """Пересчет месяцев months (None - все месяцы, таблица создается)"""
+        where = "TRUE" if months is None else month_predicate(months)
+        select = rollup.select.format(source=f'"{view}"', where=where)
+        if months is None:
+            self.con.execute(f'CREATE OR REPLACE TABLE "{rollup.name}" AS {select}')
+            return
+        self.con.execute(f'DELETE FROM "{rollup.name}" WHERE {where}')
+        self.con.execute(f'INSERT INTO "{rollup.name}" BY NAME {select}')
+
+    def refresh(
+        self,
+        sources: Mapping[str, str],
+        views: Mapping[str, str] | None = None,
+    ) -> dict[str, int]:
+        """
+        Обновляет сводные таблицы источников sources (источник → корень
+        датасета). views - имена view источников, если отличаются.
+        Возвращает число пересчитанных месяцев по сводным таблицам
+        """
+        views = dict(views or {})
+        refreshed: dict[str, int] = {}
+        for source, root in sources.items():
+            view = views.get(source, source)
+            rollups = [rollup for rollup in self.rollups if rollup.source == source]
+            columns = self._columns(view)
+            if not rollups or not columns or not dataset_files(root):
+                continue
+
+            files = self._scan(source, root)
+            changed = self._changed_months(source, files)
+            all_months = {file[-1] for file in files}
+
+            self.con.begin()
+            try:
+                for rollup in rollups:
+                    missing = set(rollup.required) - columns
+                    if missing:
+                        print(
+                            f"⚠️ {rollup.name}: в {view} нет колонок "
+                            f"{', '.join(sorted(missing))}",
+                        )
+                        continue
+                    if not has_rollup(self.con, rollup.name):
+                        self._materialize(rollup, view, None)
+                        refreshed[rollup.name] = len(all_months)
+                    elif changed:
+                        self._materialize(rollup, view, changed)
+                        refreshed[rollup.name] = len(changed)
+                    else:
+                        refreshed[rollup.name] = 0
+                self.con.execute(
+                    f"DELETE FROM {STATE_TABLE} WHERE source = ?",
+                    [source],
+                )
+                self.con.executemany(
+                    f"INSERT INTO {STATE_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+                    files,
+                )
+                self.con.commit()
+            except Exception:
+                self.con.rollback()
+                raise
+
+        self.create_views()
+        return refreshed
+
+    def create_views(self) -> list[str]:
+        """View поверх сводных таблиц, которые уже материализованы"""
+        views = []
+        for name, select in ROLLUP_VIEWS.items():
+            try:
+                self.con.execute(f'CREATE OR REPLACE VIEW "{name}" AS {select}')
+            except Exception:
+                continue
+            views.append(name)
+        return views
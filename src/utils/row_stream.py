@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+"""
+RowStream - потоковая обработка строк таблиц 1С
+Источник строк → декодирование полей → обработка документа → sink на диске,
+пиковая память зависит от размера пакета, а не от размера таблицы
+"""
+
+import json
+import os
+import textwrap
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from src.utils.stage_profiler import STAGE_DECODE, STAGE_FETCH, get_profiler
+
+
+def iter_non_empty_rows(
+    table: Any,
+    start: int = 0,
+    stop: int | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> Iterator[tuple[int, Any]]:
+    """
+    JTBD:
+    Как источник строк, я хочу отдавать непустые строки таблицы по одной,
+    чтобы не держать в памяти список всех (row_index, row) таблицы.
+    """
+    stop = len(table) if stop is None else min(stop, len(table))
+    profiler = get_profiler()
+    for i in range(start, stop):
+        if should_stop is not None and should_stop():
+            print(f"   🛑 ПРЕРЫВАНИЕ: Остановка чтения на записи {i}")
+            return
+
+        try:
+            with profiler.stage(STAGE_FETCH):
+                row = table[i]
+        except Exception as e:
+            print(f"   ⚠️ Ошибка при проверке записи {i}: {e!s}")
+            continue
+
+        if not hasattr(row, "is_empty") or not row.is_empty:
+            yield i, row
+
+
+def decode_rows(
+    rows: Iterable[tuple[int, Any]],
+    read_blobs: bool = True,
+    decoder: Any = None,
+) -> Iterator[tuple[int, Any, list[Any]]]:
+    """
+    JTBD:
+    Как стадия декодирования полей, я хочу превращать строку в список значений
+    по мере чтения, чтобы декодирование шло в темпе потребителя.
+
+    decoder - CompiledRowDecoder таблицы; без него используется row.as_list
+    (этап decode с read_blobs включает чтение BLOB)
+    """
+    profiler = get_profiler()
+    for row_index, row in rows:
+        try:
+            with profiler.stage(STAGE_DECODE):
+                if decoder is not None:
+                    values = decoder.decode(row, read_blobs)
+                elif hasattr(row, "as_list"):
+                    values = row.as_list(read_blobs)
+                else:
+                    values = []
+        except Exception as e:
+            print(f"   ⚠️ Ошибка при декодировании записи {row_index}: {e!s}")
+            continue
+        if values:
+            yield row_index, row, values
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Группирует элементы потока в пакеты заданного размера"""
+    batch: list[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class JsonlSpool:
+    """
+    JTBD:
+    Как sink извлечения, я хочу сразу сбрасывать записи в JSONL на диск
+    и вести счетчики по таблицам, чтобы итоговые JSON/XML/Parquet можно было
+    построить повторным чтением без списка всех документов в памяти.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.count = 0
+        self.table_stats: dict[str, dict[str, int]] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file: Any = open(path, "w", encoding="utf-8")
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Записывает запись и обновляет счетчики таблицы"""
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._file.write("\n")
+        self.count += 1
+
+        stats = self.table_stats.setdefault(
+            record.get("table_name", ""),
+            {"records": 0, "blob_fields": 0, "failed_blob_fields": 0},
+        )
+        stats["records"] += 1
+        for blob_data in record.get("blobs", {}).values():
+            if blob_data.get("value", {}).get("content"):
+                stats["blob_fields"] += 1
+            else:
+                stats["failed_blob_fields"] += 1
+
+    def stats_for(self, table_name: str) -> dict[str, int]:
+        """Счетчики записей и BLOB полей по таблице"""
+        return self.table_stats.get(
+            table_name,
+            {"records": 0, "blob_fields": 0, "failed_blob_fields": 0},
+        )
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Повторно читает записи с диска"""
+        if not self._file.closed:
+            self._file.flush()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "JsonlSpool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def write_json_sections(
+    output_file: str,
+    sections: dict[str, Iterable[dict[str, Any]]],
+    metadata: dict[str, Any],
+    indent: int = 2,
+) -> None:
+    """
+    JTBD:
+    Как writer результатов, я хочу писать JSON по одной записи,
+    чтобы структура {"documents": [...], ..., "metadata": {...}} сохранилась,
+    а память не росла с количеством документов.
+    """
+    item_prefix = " " * indent * 2
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for name, items in sections.items():
+            f.write(f"{' ' * indent}{json.dumps(name)}: [")
+            empty = True
+            for item in items:
+                f.write("\n" if empty else ",\n")
+                text = json.dumps(item, ensure_ascii=False, indent=indent, default=str)
+                f.write(textwrap.indent(text, item_prefix))
+                empty = False
+            f.write("]" if empty else f"\n{' ' * indent}]")
+            f.write(",\n")
+        text = json.dumps(metadata, ensure_ascii=False, indent=indent, default=str)
+        f.write(f"{' ' * indent}\"metadata\": ")
+        f.write(textwrap.indent(text, " " * indent).lstrip())
+        f.write("\n}")
+    os.replace(tmp_file, output_file)
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+"""
+StageProfiler - учет времени этапов извлечения по таблицам
+Этапы: чтение строки из DatabaseReader, декодирование полей, чтение BLOB,
+декодирование BLOB, распаковка сжатых BLOB, поиск ключевых слов и запись
+в sink. Для каждой пары (таблица, этап) копятся суммарное время и число
+вызовов; дополнительно включается cProfile или статистический сэмплер стеков.
+
+Учет выключен по умолчанию и включается переменной окружения
+EXTRACTOR_PROFILE=stages|cprofile|sample или флагом --profile CLI;
+выключенный профайлер стоит одного вызова метода на этап.
+"""
+
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from typing import Any, TypeVar, cast
+
+PROFILE_ENV = "EXTRACTOR_PROFILE"
+MODE_STAGES = "stages"
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+PROFILE_MODES = (MODE_STAGES, MODE_CPROFILE, MODE_SAMPLE)
+
+STAGE_FETCH = "fetch"
+STAGE_DECODE = "decode"
+STAGE_BLOB_READ = "blob_read"
+STAGE_BLOB_DECODE = "blob_decode"
+STAGE_BLOB_INFLATE = "blob_inflate"
+STAGE_KEYWORDS = "keywords"
+STAGE_SINK = "sink"
+STAGES = (
+    STAGE_FETCH,
+    STAGE_DECODE,
+    STAGE_BLOB_READ,
+    STAGE_BLOB_DECODE,
+    STAGE_BLOB_INFLATE,
+    STAGE_KEYWORDS,
+    STAGE_SINK,
+)
+
+DEFAULT_REPORT_FILE = "stage_profile.json"
+DEFAULT_SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+
+_DISABLED_STAGE = nullcontext()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def profiler_mode(value: str | None) -> str | None:
+    """Режим по значению переменной окружения или флага (None - выключен)"""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "off", "false", "no"):
+        return None
+    if value in ("1", "on", "true", "yes"):
+        return MODE_STAGES
+    if value not in PROFILE_MODES:
+        raise ValueError(
+            f"Неизвестный режим профилирования: {value} "
+            f"(допустимо: {', '.join(PROFILE_MODES)})",
+        )
+    return value
+
+
+class _StageTimer:
+    """Замер одного входа в этап; вложенный вход в тот же этап не считается"""
+
+    __slots__ = ("profiler", "stage", "table_name", "start")
+
+    def __init__(self, profiler: "StageProfiler", stage: str, table_name: str):
+        self.profiler = profiler
+        self.stage = stage
+        self.table_name = table_name
+        self.start = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.profiler._active().add(self.stage)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        seconds = time.perf_counter() - self.start
+        self.profiler._active().discard(self.stage)
+        self.profiler.add(self.stage, seconds, table_name=self.table_name)
+
+
+class StackSampler:
+    """
+    Статистический сэмплер: фоновый поток раз в interval секунд снимает
+    стек профилируемого потока и считает свернутые стеки (формат folded
+    для flamegraph) и функции на вершине стека
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        thread_id: int | None = None,
+    ) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self.leaves: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def _frame_name(frame: Any) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        names = []
+        leaf = f"{self._frame_name(frame)}:{frame.f_lineno}"
+        while frame is not None:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+        self.leaves[leaf] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="stage-profiler-sampler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageProfiler:
+    """
+    JTBD:
+    Как разработчик, разбирающий медленный проход по _DOCUMENTJOURNAL5354,
+    я хочу видеть, сколько времени и вызовов пришлось на чтение строк,
+    декодирование, BLOB, поиск ключевых слов и запись по каждой таблице,
+    чтобы знать, куда уходят часы, а не угадывать по строке прогресса.
+
+    mode=None - профайлер выключен: stage() возвращает пустой контекст.
+    """
+
+    def __init__(
+        self,
+        mode: str | None = None,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> None:
+        self.mode = profiler_mode(mode)
+        self.enabled = self.mode is not None
+        self.sample_interval = sample_interval
+        self.table_name = ""
+        self.stats: dict[tuple[str, str], list[float]] = {}
+        self.report_written = False
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started: float | None = None
+        self._elapsed = 0.0
+        self._cprofile: cProfile.Profile | None = None
+        self._sampler: StackSampler | None = None
+
+    def _active(self) -> set[str]:
+        active = getattr(self._local, "stages", None)
+        if active is None:
+            active = self._local.stages = set()
+        return active
+
+    def set_table(self, table_name: str) -> None:
+        """Таблица, к которой относятся этапы без явного имени таблицы"""
+        self.table_name = table_name
+
+    def stage(self, stage: str, table_name: str | None = None) -> Any:
+        """Контекст замера этапа (таблица по умолчанию - текущая)"""
+        if not self.enabled or stage in self._active():
+            return _DISABLED_STAGE
+        return _StageTimer(self, stage, table_name or self.table_name)
+
+    def add(
+        self,
+        stage: str,
+        seconds: float,
+        count: int = 1,
+        table_name: str | None = None,
+    ) -> None:
+        """Добавляет время этапа (для замеров вне stage())"""
+        if not self.enabled:
+            return
+        key = (table_name or self.table_name, stage)
+        with self._lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                self.stats[key] = [seconds, count]
+            else:
+                entry[0] += seconds
+                entry[1] += count
+
+    def start(self) -> None:
+        """Начало профилируемого прохода: wall clock, cProfile или сэмплер"""
+        if not self.enabled or self._started is not None:
+            return
+        self._started = time.perf_counter()
+        if self.mode == MODE_CPROFILE:
+            if self._cprofile is None:
+                self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self.mode == MODE_SAMPLE:
+            if self._sampler is None:
+                self._sampler = StackSampler(self.sample_interval)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        if self._started is None:
+            return
+        self._elapsed += time.perf_counter() - self._started
+        self._started = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    @contextmanager
+    def profiling(self) -> Iterator["StageProfiler"]:
+        """start()/stop() вокруг блока"""
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    @property
+    def wall_seconds(self) -> float:
+        running = 0.0
+        if self._started is not None:
+            running = time.perf_counter() - self._started
+        return self._elapsed + running
+
+    def table_stats(self, table_name: str) -> dict[str, dict[str, float]]:
+        """Этапы одной таблицы: время, вызовы, среднее в мс"""
+        return {
+            stage: _stage_entry(*self.stats[(table_name, stage)])
+            for stage in STAGES
+            if (table_name, stage) in self.stats
+        }
+
+    def progress_line(self, table_name: str) -> str:
+        """Краткая разбивка по этапам для строки прогресса"""
+        parts = [
+            f"{stage} {entry['seconds']:.1f}с"
+            for stage, entry in self.table_stats(table_name).items()
+        ]
+        return " | ".join(parts)
+
+    def report(self) -> dict[str, Any]:
+        """Сводка: этапы по таблицам, итоги этапов и данные профайлера"""
+        tables: dict[str, dict[str, Any]] = {}
+        totals: dict[str, list[float]] = {}
+        for (table_name, stage), (seconds, count) in sorted(self.stats.items()):
+            tables.setdefault(table_name or "-", {})[stage] = _stage_entry(
+                seconds,
+                count,
+            )
+            total = totals.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += count
+
+        wall = self.wall_seconds
+        stages = {}
+        for stage in [*STAGES, *sorted(set(totals) - set(STAGES))]:
+            if stage in totals:
+                entry = _stage_entry(*totals[stage])
+                entry["share"] = round(entry["seconds"] / wall, 4) if wall else None
+                stages[stage] = entry
+
+        report: dict[str, Any] = {
+            "mode": self.mode,
+            "wall_seconds": round(wall, 3),
+            "stages": stages,
+            "tables": tables,
+        }
+        if self._cprofile is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(self._cprofile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            report["cprofile"] = stream.getvalue().splitlines()
+        if self._sampler is not None:
+            report["samples"] = {
+                "interval": self.sample_interval,
+                "count": self._sampler.samples,
+                "top": [
+                    {"function": leaf, "samples": count}
+                    for leaf, count in self._sampler.leaves.most_common(TOP_FUNCTIONS)
+                ],
+            }
+        return report
+
+    def summary(self) -> str:
+        """Текстовая таблица этапов по таблицам"""
+        report = self.report()
+        lines = [
+            f"⏱️ Этапы извлечения ({report['mode']}), "
+            f"всего {report['wall_seconds']:.1f} с",
+            f"{'таблица':<28}{'этап':<14}{'сек':>10}{'вызовов':>12}{'мс/вызов':>10}",
+        ]
+        for table_name, stages in report["tables"].items():
+            for stage, entry in stages.items():
+                lines.append(
+                    f"{table_name:<28}{stage:<14}{entry['seconds']:>10.2f}"
+                    f"{entry['count']:>12,}{entry['avg_ms']:>10.3f}",
+                )
+        return "\n".join(lines)
+
+    def write_report(self, path: str = DEFAULT_REPORT_FILE) -> str | None:
+        """
+        JSON сводка в path; рядом - stage_profile.prof (cProfile, для pstats/
+        snakeviz) или stage_profile.folded (сэмплер, для flamegraph)
+        """
+        if not self.enabled:
+            return None
+        self.stop()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        base = os.path.splitext(path)[0]
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(f"{base}.prof")
+        if self._sampler is not None:
+            self._sampler.write_folded(f"{base}.folded")
+        self.report_written = True
+        return path
+
+    def reset(self) -> None:
+        self.stop()
+        self.stats.clear()
+        self._elapsed = 0.0
+        self._cprofile = None
+        self._sampler = None
+        self.report_written = False
+
+
+def _stage_entry(seconds: float, count: float) -> dict[str, Any]:
+    return {
+        "seconds": round(seconds, 6),
+        "count": int(count),
+        "avg_ms": round(seconds / count * 1000, 4) if count else 0.0,
+    }
+
+
+# Общий профайлер процесса
+_profiler: StageProfiler | None = None
+
+
+def _write_at_exit() -> None:
+    if _profiler is not None and _profiler.enabled and not _profiler.report_written:
+        _profiler.write_report()
+        print(_profiler.summary())
+
+
+def get_profiler() -> StageProfiler:
+    """
+    Общий для процесса StageProfiler (режим из EXTRACTOR_PROFILE).
+    Включенный через окружение профайлер пишет отчет при выходе,
+    если точка входа не записала его сама
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = StageProfiler(os.environ.get(PROFILE_ENV))
+        if _profiler.enabled:
+            _profiler.start()
+            atexit.register(_write_at_exit)
+    return _profiler
+
+
+def configure_profiler(mode: str | None) -> StageProfiler:
+    """Новый общий профайлер в режиме mode (флаг --profile CLI)"""
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = StageProfiler(mode)
+    return _profiler
+
+
+def profiled(stage: str) -> Callable[[F], F]:
+    """Декоратор: вызов функции учитывается как этап stage"""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = get_profiler()
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage):
+                return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorate
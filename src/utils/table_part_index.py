@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+TablePartIndex - индекс табличных частей документов 1С
+Для каждой таблицы _VT один раз строится карта ссылка на документ →
+номера строк, карта сохраняется на диск. Строки табличной части документа
+берутся поиском по ссылке, без обхода всех _VT таблиц на каждый документ.
+"""
+
+import json
+import os
+from typing import Any
+
+from src.utils.extraction_checkpoint import write_json_atomic
+from src.utils.row_decoder import CompiledRowDecoder
+
+DEFAULT_INDEX_DIR = "data/results/table_part_index"
+
+
+def parent_ref_column(table_part: Any, table_name: str) -> str | None:
+    """
+    Поле ссылки на документ-владелец: {table_name}_IDRREF
+    (или любое *_IDRREF поле, кроме собственного _IDRREF)
+    """
+    fields: dict[str, Any] = getattr(table_part, "fields", {})
+    column = f"{table_name}_IDRREF"
+    if column in fields:
+        return column
+    for name in fields:
+        if name.endswith("_IDRREF") and name != "_IDRREF":
+            return name
+    return None
+
+
+def source_stamp(db: Any) -> dict[str, Any]:
+    """Размер и время изменения 1CD файла для проверки актуальности индекса"""
+    path = getattr(getattr(db, "_db_file", None), "name", None)
+    if not isinstance(path, str) or not os.path.exists(path):
+        return {}
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class TablePartIndex:
+    """
+    JTBD:
+    Как извлечение документов с табличными частями, я хочу получать строки
+    табличной части документа поиском по ссылке, чтобы извлечение таблицы
+    документов было линейным, а не (документы × строки _VT).
+    """
+
+    def __init__(self, db: Any, index_dir: str | None = DEFAULT_INDEX_DIR) -> None:
+        self.db = db
+        self.index_dir = index_dir
+        self._stamp = source_stamp(db)
+        self._parts: dict[str, list[str]] = {}
+        self._offsets: dict[str, dict[str, list[int]]] = {}
+        self._decoders: dict[str, CompiledRowDecoder] = {}
+
+    def parts_for(self, table_name: str) -> list[str]:
+        """Табличные части документа (таблицы {table_name}_VT*)"""
+        parts = self._parts.get(table_name)
+        if parts is None:
+            prefix = f"{table_name}_VT"
+            parts = [name for name in self.db.tables if name.startswith(prefix)]
+            self._parts[table_name] = parts
+        return parts
+
+    def decoder(self, part_name: str) -> CompiledRowDecoder:
+        """Декодер строк табличной части (компилируется один раз)"""
+        decoder = self._decoders.get(part_name)
+        if decoder is None:
+            decoder = CompiledRowDecoder.from_table(self.db.tables[part_name])
+            self._decoders[part_name] = decoder
+        return decoder
+
+    def index_path(self, part_name: str) -> str | None:
+        if self.index_dir is None:
+            return None
+        return os.path.join(self.index_dir, f"{part_name}.json")
+
+    def offsets(self, table_name: str, part_name: str) -> dict[str, list[int]]:
+        """Карта ссылка (hex) → номера строк табличной части"""
+        offsets = self._offsets.get(part_name)
+        if offsets is None:
+            table_part = self.db.tables[part_name]
+            offsets = self._load(part_name, table_part)
+            if offsets is None:
+                offsets = self._build(table_name, part_name, table_part)
+            self._offsets[part_name] = offsets
+        return offsets
+
+    def rows_for(self, table_name: str, parent_ref: Any) -> dict[str, list[int]]:
+        """Номера строк каждой табличной части, принадлежащих документу"""
+        if parent_ref is None:
+            return {}
+        key = bytes(parent_ref).hex()
+        rows = {}
+        for part_name in self.parts_for(table_name):
+            offsets = self.offsets(table_name, part_name).get(key)
+            if offsets:
+                rows[part_name] = offsets
+        return rows
+
+    def _header(self, part_name: str, table_part: Any) -> dict[str, Any]:
+        return {
+            "table_name": part_name,
+            "row_count": len(table_part),
+            "row_length": getattr(table_part, "_row_length", 0),
+            "source": self._stamp,
+        }
+
+    def _load(self, part_name: str, table_part: Any) -> dict[str, list[int]] | None:
+        """Индекс с диска, если он построен по тому же файлу и таблице"""
+        path = self.index_path(part_name)
+        if path is None or not self._stamp or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️ Индекс {path} поврежден, перестраиваем: {e!s}")
+            return None
+
+        header = self._header(part_name, table_part)
+        if any(data.get(key) != value for key, value in header.items()):
+            return None
+        offsets: dict[str, list[int]] = data.get("offsets", {})
+        return offsets
+
+    def _build(
+        self,
+        table_name: str,
+        part_name: str,
+        table_part: Any,
+    ) -> dict[str, list[int]]:
+        """Один проход по колонке ссылки табличной части"""
+        offsets: dict[str, list[int]] = {}
+        column = parent_ref_column(table_part, table_name)
+        if column is None:
+            print(f"   ⚠️ {part_name}: нет поля ссылки на документ")
+            return offsets
+
+        decoder = CompiledRowDecoder.from_table(table_part, columns=[column])
+        for i in range(len(table_part)):
+            row = table_part[i]
+            if getattr(row, "is_empty", False):
+                continue
+            (parent_ref,) = decoder.decode(row)
+            if parent_ref is not None:
+                offsets.setdefault(bytes(parent_ref).hex(), []).append(i)
+
+        print(
+            f"   🗂️ Индекс {part_name}: {len(offsets):,} документов, "
+            f"{sum(len(rows) for rows in offsets.values()):,} строк",
+        )
+        path = self.index_path(part_name)
+        if path is not None and self._stamp:
+            write_json_atomic(
+                path,
+                {
+                    **self._header(part_name, table_part),
+                    "parent_column": column,
+                    "offsets": offsets,
+                },
+            )
+        return offsets
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+TableReader - чтение строк таблицы 1С с проекцией колонок
+Декодируются только запрошенные поля: остальные байты строки не разбираются,
+BLOB объекты для непрошенных полей не создаются и не читаются
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from src.utils.row_decoder import ROLE_BLOB, CompiledRowDecoder
+from src.utils.stage_profiler import STAGE_DECODE, STAGE_FETCH, get_profiler
+
+
+class TableReader:
+    """
+    JTBD:
+    Как extractor широкой таблицы документов, я хочу запрашивать у таблицы
+    только нужные колонки, чтобы не тратить CPU и чтение BLOB на поля,
+    которые потом все равно отбрасываются фильтром.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        table_name: str = "",
+        business_fields: Iterable[str] = (),
+    ) -> None:
+        self.table = table
+        self.table_name = table_name
+        self.business_fields = tuple(business_fields)
+        self._decoders: dict[tuple[str, ...] | None, CompiledRowDecoder] = {}
+
+    @property
+    def columns(self) -> list[str]:
+        """Все колонки таблицы в порядке описания"""
+        return list(self.table.fields)
+
+    def blob_columns(self) -> list[str]:
+        """Колонки BLOB (NT, I)"""
+        return [
+            field.name for field in self.decoder().fields if field.role == ROLE_BLOB
+        ]
+
+    def decoder(self, columns: Iterable[str] | None = None) -> CompiledRowDecoder:
+        """Декодер проекции (компилируется один раз на набор колонок)"""
+        key = None if columns is None else tuple(sorted(set(columns)))
+        decoder = self._decoders.get(key)
+        if decoder is None:
+            decoder = CompiledRowDecoder.from_table(
+                self.table,
+                self.business_fields,
+                key,
+            )
+            if decoder.missing_columns:
+                print(
+                    f"   ⚠️ {self.table_name}: нет колонок "
+                    f"{', '.join(decoder.missing_columns)}",
+                )
+            self._decoders[key] = decoder
+        return decoder
+
+    def iter_rows(
+        self,
+        columns: Iterable[str] | None = None,
+        start: int = 0,
+        stop: int | None = None,
+        read_blobs: bool = False,
+        skip_empty: bool = True,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Строки таблицы как (row_index, {колонка: значение}) только
+        для колонок проекции (None - все колонки)
+        """
+        decoder = self.decoder(columns)
+        stop = len(self.table) if stop is None else min(stop, len(self.table))
+        profiler = get_profiler()
+        if self.table_name:
+            profiler.set_table(self.table_name)
+        for i in range(start, stop):
+            if should_stop is not None and should_stop():
+                print(f"   🛑 ПРЕРЫВАНИЕ: Остановка чтения на записи {i}")
+                return
+
+            try:
+                with profiler.stage(STAGE_FETCH):
+                    row = self.table[i]
+                if skip_empty and getattr(row, "is_empty", False):
+                    continue
+                with profiler.stage(STAGE_DECODE):
+                    values = decoder.decode(row, read_blobs)
+            except Exception as e:
+                print(f"   ⚠️ Ошибка при декодировании записи {i}: {e!s}")
+                continue
+
+            yield i, dict(zip(decoder.names, values))
+
+    def arrow_batches(
+        self,
+        columns: Iterable[str] | None = None,
+        **kwargs: Any,
+    ) -> Iterator[Any]:
+        """
+        Колонки фиксированной ширины (N, DT, L, RV, B) пакетами Arrow
+        через постраничное чтение (см. PageColumnReader.iter_batches)
+        """
+        from src.utils.page_column_reader import PageColumnReader
+
+        return PageColumnReader(self.table, self.table_name).iter_batches(
+            columns,
+            **kwargs,
+        )
+
+
+def iter_rows(
+    table: Any,
+    columns: Iterable[str] | None = None,
+    **kwargs: Any,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Строки таблицы с проекцией колонок (см. TableReader.iter_rows)"""
+    return TableReader(table).iter_rows(columns, **kwargs)
@@ -0,0 +1 @@
+# Benchmarks package: замеры пропускной способности извлечения
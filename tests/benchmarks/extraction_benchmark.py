@@ -0,0 +1,695 @@
+#!/usr/bin/env python3
+
+"""
+Бенчмарк извлечения на синтетической 1CD базе
+Генерирует базу заданного размера (строки, типы полей simple_patch,
+размер и сжатие BLOB), замеряет строки/с, МБ/с и пиковый RSS этапов:
+AdaptiveExtractor, поисковые extractors (BaseExtractor через ScanScheduler),
+обработчики BLOB и Parquet/DuckDB sink. Результат - JSON с хэшем коммита,
+который сравнивается с результатом прежнего коммита.
+
+bytes этапа - объем его входа или выхода: размер 1CD (доля прочитанных
+таблиц) для extractors, размер значений BLOB для обработчиков BLOB,
+размер записанных Parquet файлов для sink.
+
+Запуск:
+    python -m tests.benchmarks.extraction_benchmark --rows 20000 \\
+        --compare data/benchmarks/extraction_<commit>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows: пиковый RSS не замеряется
+    resource = None
+
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+)
+
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+DEFAULT_TOLERANCE = 0.10
+COMPRESSIONS = ("none", "deflate", "zlib")
+# Поля новых типов (patches/onec_dtools/simple_patch.py) в таблице документа
+DEFAULT_FIELD_TYPES = ("UUID", "BOOLEAN", "DECIMAL", "TEXT", "VB")
+PATCHED_FIELD_LENGTH = 32
+
+# Результат замера этапа: (строк, байтов, секунд)
+CaseResult = tuple[int, int, float]
+
+
+@dataclass
+class BenchmarkConfig:
+    """Параметры синтетической базы и замера"""
+
+    rows: int = 10_000
+    tables: int = 1
+    blob_size: int = 1024
+    compression: str = "deflate"
+    field_types: tuple[str, ...] = DEFAULT_FIELD_TYPES
+    empty_every: int = 0
+    repeat: int = 1
+    cases: list[str] = field(default_factory=list)
+
+
+def blob_payload(index: int, size: int) -> str:
+    """Сериализованное значение 1С примерно size байт (UTF-8)"""
+    items = []
+    length = 2
+    n = 0
+    while length < size or not items:
+        item = (
+            f'{{"Букет роз №{index}-{n}",{n % 50},{100 + n * 7}.5,'
+            f'"ПЦ0{(index + n) % 30:02d}"}}'
+        )
+        items.append(item)
+        length += len(item.encode("utf-8")) + 1
+        n += 1
+    return "{" + ",".join(items) + "}"
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    """Сжатие BLOB как в базе 1С: raw deflate, zlib или без сжатия"""
+    if compression == "deflate":
+        packer = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        return packer.compress(data) + packer.flush()
+    if compression == "zlib":
+        return zlib.compress(data)
+    if compression == "none":
+        return data
+    raise ValueError(f"Неизвестное сжатие: {compression}")
+
+
+def benchmark_fields(field_types: tuple[str, ...]) -> list[FieldSpec]:
+    """Поля таблицы документа + двоичный BLOB + поля новых типов"""
+    fields = [*document_table_fields(), FieldSpec("_FLD104", "I", null_exists=True)]
+    for n, field_type in enumerate(field_types):
+        fields.append(FieldSpec(f"_FLD{200 + n}", field_type, PATCHED_FIELD_LENGTH))
+    return fields
+
+
+def patched_value(field_type: str, index: int) -> Any:
+    """Значение поля нового типа (onec_dtools отдает его байтами)"""
+    if field_type == "BOOLEAN":
+        return index % 2 == 0
+    if field_type == "TEXT":
+        return f"Комментарий {index}"
+    return (index + 1).to_bytes(16, "big")
+
+
+def benchmark_rows(config: BenchmarkConfig) -> list[dict[str, Any] | None]:
+    """Строки таблицы: текстовый BLOB (NT) и сжатый двоичный BLOB (I)"""
+    rows = make_document_rows(config.rows, config.empty_every)
+    for i, row in enumerate(rows):
+        if row is None:
+            continue
+        # NT хранится в UTF-16: вдвое меньший текст дает около blob_size байт
+        row["_FLD103"] = blob_payload(i, config.blob_size // 2)
+        row["_FLD104"] = compress(
+            blob_payload(i, config.blob_size).encode("utf-8"),
+            config.compression,
+        )
+        for n, field_type in enumerate(config.field_types):
+            row[f"_FLD{200 + n}"] = patched_value(field_type, i)
+    return rows
+
+
+def generate_database(path: str, config: BenchmarkConfig) -> dict[str, Any]:
+    """Записывает синтетическую 1CD базу и возвращает ее описание"""
+    writer = Synthetic1CDWriter()
+    fields = benchmark_fields(config.field_types)
+    rows = benchmark_rows(config)
+    blob_bytes = sum(
+        len(row["_FLD103"]) * 2 + len(row["_FLD104"]) for row in rows if row
+    )
+    for n in range(config.tables):
+        writer.add_table(f"_DOCUMENT{156 + n}", fields, rows)
+    writer.write(path)
+    return {
+        "path": path,
+        "size_bytes": os.path.getsize(path),
+        "tables": config.tables,
+        "rows": config.rows * config.tables,
+        "blob_bytes": blob_bytes * config.tables,
+    }
+
+
+def _open_database(db_path: str) -> tuple[Any, Any]:
+    from onec_dtools.database_reader import DatabaseReader
+
+    db_file = open(db_path, "rb")
+    return db_file, DatabaseReader(db_file)
+
+
+def _read_blobs(db: Any, read_values: bool) -> list[Any]:
+    """Все BLOB поля базы: объекты Blob или прочитанные значения"""
+    from src.utils.row_decoder import CompiledRowDecoder
+
+    blobs = []
+    for table in db.tables.values():
+        decoder = CompiledRowDecoder.from_table(table)
+        for row in table:
+            if row.is_empty:
+                continue
+            values = decoder.decode(row)
+            for index in decoder.blob_indexes:
+                if values[index] is not None:
+                    blobs.append(values[index].value if read_values else values[index])
+    return blobs
+
+
+def _blob_bytes(values: list[Any]) -> int:
+    from src.utils.blob_cache import content_size
+
+    return sum(content_size(value) for value in values)
+
+
+def _extract_all(extractor: Any, db: Any) -> dict[str, list[dict[str, Any]]]:
+    return {
+        name: extractor.extract_table_data(name, table, checkpoints=False)
+        for name, table in db.tables.items()
+    }
+
+
+def _parquet_rows(paths: list[str]) -> tuple[int, int]:
+    """Строки (по метаданным Parquet) и размер записанных файлов"""
+    import pyarrow.parquet as pq
+
+    rows = sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+    return rows, sum(os.path.getsize(path) for path in paths)
+
+
+def _dataset_paths(root: str) -> list[str]:
+    return [
+        os.path.join(directory, name)
+        for directory, _dirs, files in os.walk(root)
+        for name in files
+        if name.endswith(".parquet")
+    ]
+
+
+def case_adaptive_extractor(db_path: str, workdir: str) -> CaseResult:
+    """AdaptiveExtractor.extract_table_data по всем таблицам (с BLOB)"""
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    extractor = AdaptiveExtractor(checkpoint_dir=workdir, plan_file=None)
+    db_file, db = _open_database(db_path)
+    try:
+        start = time.perf_counter()
+        results = _extract_all(extractor, db)
+        seconds = time.perf_counter() - start
+    finally:
+        db_file.close()
+    rows = sum(len(records) for records in results.values())
+    return rows, os.path.getsize(db_path), seconds
+
+
+def case_scan_extractors(db_path: str, workdir: str) -> CaseResult:
+    """
+    Поисковые extractors (подклассы BaseExtractor) одним проходом
+    ScanScheduler; лимиты строк планов сняты, читаются таблицы целиком
+    """
+    from src.extractors.scan_scheduler import ScanScheduler, default_visitors
+
+    visitors = default_visitors(db_path)
+    for visitor in visitors:
+        visitor.begin_scan = _whole_tables(visitor.begin_scan)
+    db_file, db = _open_database(db_path)
+    try:
+        total_rows = sum(len(table) for table in db.tables.values())
+        for visitor in visitors:
+            visitor.db = db
+        scheduler = ScanScheduler(visitors)
+        start = time.perf_counter()
+        scheduler.scan(db)
+        seconds = time.perf_counter() - start
+    finally:
+        db_file.close()
+    rows = scheduler.stats["rows_decoded"]
+    # Доля базы, прочитанная проходом (таблицы вне планов не читаются)
+    size = os.path.getsize(db_path) * rows // max(total_rows, 1)
+    return rows, size, seconds
+
+
+def _whole_tables(begin_scan: Callable[[], dict[str, int | None]]) -> Any:
+    def plan() -> dict[str, int | None]:
+        return dict.fromkeys(begin_scan(), None)
+
+    return plan
+
+
+def case_blob_processor(db_path: str, workdir: str) -> CaseResult:
+    """BlobProcessor.extract_blob_content: чтение BLOB и подбор кодировки"""
+    from src.utils.blob_cache import BlobCache
+    from src.utils.blob_processor import BlobProcessor
+
+    processor = BlobProcessor(blob_cache=BlobCache())
+    db_file, db = _open_database(db_path)
+    try:
+        blobs = _read_blobs(db, read_values=False)
+        start = time.perf_counter()
+        results = [processor.extract_blob_content(blob) for blob in blobs]
+        seconds = time.perf_counter() - start
+    finally:
+        db_file.close()
+    size = sum(result.to_dict()["metadata"]["blob_size"] for result in results)
+    return len(blobs), size, seconds
+
+
+def case_batch_blob_decoder(db_path: str, workdir: str) -> CaseResult:
+    """decode_batch по прочитанным значениям BLOB"""
+    from src.utils.batch_blob_decoder import decode_batch
+
+    db_file, db = _open_database(db_path)
+    try:
+        values = _read_blobs(db, read_values=True)
+    finally:
+        db_file.close()
+    start = time.perf_counter()
+    decode_batch(values)
+    seconds = time.perf_counter() - start
+    return len(values), _blob_bytes(values), seconds
+
+
+def case_onec_serialized(db_path: str, workdir: str) -> CaseResult:
+    """parse_blob: распаковка deflate и разбор сериализованных значений 1С"""
+    from src.utils.onec_serialized import parse_blob
+
+    db_file, db = _open_database(db_path)
+    try:
+        values = _read_blobs(db, read_values=True)
+    finally:
+        db_file.close()
+    start = time.perf_counter()
+    for value in values:
+        parse_blob(value)
+    seconds = time.perf_counter() - start
+    return len(values), _blob_bytes(values), seconds
+
+
+def case_blob_inflater(db_path: str, workdir: str) -> CaseResult:
+    """BlobInflater.decode_batch: распаковка сжатых BLOB в пуле потоков"""
+    from src.utils.blob_inflater import BlobInflater
+
+    db_file, db = _open_database(db_path)
+    try:
+        values = _read_blobs(db, read_values=True)
+    finally:
+        db_file.close()
+    with BlobInflater() as inflater:
+        start = time.perf_counter()
+        inflater.decode_batch(values)
+        seconds = time.perf_counter() - start
+    return len(values), _blob_bytes(values), seconds
+
+
+def case_arrow_parquet_sink(db_path: str, workdir: str) -> CaseResult:
+    """AdaptiveExtractor.save_to_parquet: файл Parquet на таблицу"""
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    extractor = AdaptiveExtractor(checkpoint_dir=workdir, plan_file=None)
+    db_file, db = _open_database(db_path)
+    try:
+        results = _extract_all(extractor, db)
+        start = time.perf_counter()
+        extractor.save_to_parquet(results)
+        seconds = time.perf_counter() - start
+    finally:
+        db_file.close()
+    paths = [f"complete_1c_database_{name}.parquet" for name in results]
+    rows, size = _parquet_rows([path for path in paths if os.path.exists(path)])
+    return rows, size, seconds
+
+
+def case_duckdb_sink(db_path: str, workdir: str) -> CaseResult:
+    """
+    AdaptiveExtractor.save_to_duckdb: записи дописываются пакетами Arrow,
+    по половине записей за вызов (как на checkpoint) и финальный вызов
+    """
+    import duckdb
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    extractor = AdaptiveExtractor(checkpoint_dir=workdir, plan_file=None)
+    db_file, db = _open_database(db_path)
+    try:
+        results = _extract_all(extractor, db)
+        start = time.perf_counter()
+        for table_name, records in results.items():
+            half = {table_name: records[: len(records) // 2]}
+            extractor.save_to_duckdb(half, final=False)
+        extractor.save_to_duckdb(results)
+        extractor.close_duckdb()
+        seconds = time.perf_counter() - start
+    finally:
+        db_file.close()
+    conn = duckdb.connect(extractor.duckdb_file, read_only=True)
+    try:
+        rows = sum(
+            conn.execute(f'SELECT count(*) FROM "{name}"').fetchone()[0]
+            for name in results
+        )
+    finally:
+        conn.close()
+    return rows, os.path.getsize(extractor.duckdb_file), seconds
+
+
+def case_partitioned_parquet_sink(db_path: str, workdir: str) -> CaseResult:
+    """save_to_parquet в режиме датасета: Hive партиции PartitionedParquetSink"""
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    dataset_dir = os.path.join(workdir, "dataset")
+    extractor = AdaptiveExtractor(
+        checkpoint_dir=workdir,
+        plan_file=None,
+        dataset_dir=dataset_dir,
+    )
+    db_file, db = _open_database(db_path)
+    try:
+        results = _extract_all(extractor, db)
+        start = time.perf_counter()
+        extractor.save_to_parquet(results)
+        seconds = time.perf_counter() - start
+    finally:
+        db_file.close()
+    rows, size = _parquet_rows(_dataset_paths(dataset_dir))
+    return rows, size, seconds
+
+
+def case_duckdb_dataset_view(db_path: str, workdir: str) -> CaseResult:
+    """
+    save_to_duckdb в режиме датасета (view поверх партиций) и агрегат
+    по каждому view: стоимость первого запроса аналитика к выгрузке
+    """
+    import duckdb
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    dataset_dir = os.path.join(workdir, "dataset")
+    extractor = AdaptiveExtractor(
+        checkpoint_dir=workdir,
+        plan_file=None,
+        dataset_dir=dataset_dir,
+    )
+    db_file, db = _open_database(db_path)
+    try:
+        results = _extract_all(extractor, db)
+        extractor.save_to_parquet(results)
+    finally:
+        db_file.close()
+
+    start = time.perf_counter()
+    extractor.save_to_duckdb(results)
+    conn = duckdb.connect("complete_1c_database.duckdb")
+    try:
+        rows = sum(
+            conn.execute(
+                f'SELECT count(*), sum(total_blobs) FROM "{name}"',
+            ).fetchone()[0]
+            for name in results
+        )
+    finally:
+        conn.close()
+    seconds = time.perf_counter() - start
+    _rows, size = _parquet_rows(_dataset_paths(dataset_dir))
+    return rows, size, seconds
+
+
+# Этапы бенчмарка в порядке запуска
+CASES: dict[str, Callable[[str, str], CaseResult]] = {
+    "adaptive_extractor": case_adaptive_extractor,
+    "scan_extractors": case_scan_extractors,
+    "blob_processor": case_blob_processor,
+    "batch_blob_decoder": case_batch_blob_decoder,
+    "onec_serialized": case_onec_serialized,
+    "blob_inflater": case_blob_inflater,
+    "arrow_parquet_sink": case_arrow_parquet_sink,
+    "duckdb_sink": case_duckdb_sink,
+    "partitioned_parquet_sink": case_partitioned_parquet_sink,
+    "duckdb_dataset_view": case_duckdb_dataset_view,
+}
+
+
+def peak_rss_mb() -> float | None:
+    """Пиковый RSS текущего процесса (ru_maxrss: КБ в Linux, байты в macOS)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / scale, 1)
+
+
+def measure_case(name: str, db_path: str, workdir: str, repeat: int = 1) -> dict:
+    """
+    Замер одного этапа: лучшее время из repeat запусков, пиковый RSS
+    процесса и его рост за этап (вместе с импортом модулей этапа).
+    Вывод extractors подавляется, рабочий каталог - workdir этапа
+    """
+    from patches.onec_dtools.simple_patch import apply_simple_patch
+
+    case = CASES[name]
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    logging.disable(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            apply_simple_patch()
+            rss_before = peak_rss_mb()
+            runs = [case(db_path, workdir) for _ in range(max(repeat, 1))]
+    finally:
+        logging.disable(logging.NOTSET)
+        os.chdir(cwd)
+
+    rows, size, seconds = min(runs, key=lambda run: run[2])
+    rss_after = peak_rss_mb()
+    seconds = max(seconds, 1e-9)
+    return {
+        "rows": rows,
+        "bytes": size,
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(rows / seconds, 1),
+        "mb_per_sec": round(size / seconds / (1024 * 1024), 3),
+        "peak_rss_mb": rss_after,
+        "rss_growth_mb": (
+            round(rss_after - rss_before, 1)
+            if rss_after is not None and rss_before is not None
+            else None
+        ),
+    }
+
+
+def run_case(
+    name: str,
+    db_path: str,
+    workdir: str,
+    repeat: int = 1,
+    isolate: bool = True,
+) -> dict:
+    """
+    Этап в отдельном процессе (spawn): пиковый RSS не включает память
+    генератора и прежних этапов. isolate=False - замер в текущем процессе
+    """
+    if not isolate:
+        return measure_case(name, db_path, workdir, repeat)
+    with get_context("spawn").Pool(1) as pool:
+        return pool.apply(measure_case, (name, db_path, workdir, repeat))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+    config: BenchmarkConfig,
+    workdir: str,
+    isolate: bool = True,
+) -> dict[str, Any]:
+    """
+    JTBD:
+    Как разработчик, я хочу воспроизводимо замерять скорость и память этапов
+    извлечения на синтетической базе заданного размера, чтобы сравнивать
+    результаты между коммитами, а не полагаться на оценки времени.
+    """
+    workdir = os.path.abspath(workdir)
+    os.makedirs(workdir, exist_ok=True)
+    database = generate_database(os.path.join(workdir, "benchmark.1CD"), config)
+
+    results = {}
+    for name in config.cases or list(CASES):
+        if name not in CASES:
+            raise ValueError(f"Неизвестный этап бенчмарка: {name}")
+        results[name] = run_case(
+            name,
+            database["path"],
+            os.path.join(workdir, name),
+            config.repeat,
+            isolate,
+        )
+
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": asdict(config),
+        "database": database,
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """
+    Регрессии относительно прежнего результата: строки/с ниже больше чем
+    на tolerance или пиковый RSS выше больше чем на tolerance
+    """
+    regressions = []
+    for name, result in current.get("results", {}).items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        if result["rows_per_sec"] < before["rows_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['rows_per_sec']:,.0f} строк/с "
+                f"(было {before['rows_per_sec']:,.0f})",
+            )
+        if (
+            result.get("peak_rss_mb") is not None
+            and before.get("peak_rss_mb") is not None
+            and result["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{name}: пиковый RSS {result['peak_rss_mb']} МБ "
+                f"(было {before['peak_rss_mb']} МБ)",
+            )
+    return regressions
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"📊 Бенчмарк {report.get('commit') or 'без коммита'}: "
+        f"{report['database']['rows']:,} строк, "
+        f"{report['database']['size_bytes'] / (1024 * 1024):.1f} МБ",
+        f"{'этап':<26}{'строк/с':>12}{'МБ/с':>10}{'RSS МБ':>10}",
+    ]
+    for name, result in report["results"].items():
+        lines.append(
+            f"{name:<26}{result['rows_per_sec']:>12,.0f}"
+            f"{result['mb_per_sec']:>10.2f}{result['peak_rss_mb'] or 0:>10.1f}",
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк извлечения на синтетической 1CD базе",
+    )
+    parser.add_argument("--rows", type=int, default=BenchmarkConfig.rows)
+    parser.add_argument("--tables", type=int, default=BenchmarkConfig.tables)
+    parser.add_argument(
+        "--blob-size",
+        type=int,
+        default=BenchmarkConfig.blob_size,
+        help="Размер BLOB до сжатия (байты)",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=COMPRESSIONS,
+        default=BenchmarkConfig.compression,
+    )
+    parser.add_argument(
+        "--field-types",
+        default=",".join(DEFAULT_FIELD_TYPES),
+        help="Типы полей simple_patch через запятую (пусто - без них)",
+    )
+    parser.add_argument("--empty-every", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--cases",
+        default=None,
+        help=f"Этапы через запятую ({','.join(CASES)})",
+    )
+    parser.add_argument("--workdir", default=None, help="Каталог базы и выгрузок")
+    parser.add_argument("--output", default=None, help="JSON результата")
+    parser.add_argument("--compare", default=None, help="JSON прежнего результата")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Все этапы в текущем процессе (RSS накапливается)",
+    )
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        rows=args.rows,
+        tables=args.tables,
+        blob_size=args.blob_size,
+        compression=args.compression,
+        field_types=tuple(filter(None, args.field_types.split(","))),
+        empty_every=args.empty_every,
+        repeat=args.repeat,
+        cases=args.cases.split(",") if args.cases else [],
+    )
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(
+            tempfile.TemporaryDirectory(prefix="benchmark_1cd_"),
+        )
+        report = run_benchmark(config, workdir, isolate=not args.in_process)
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR,
+        f"extraction_{report['commit'] or 'local'}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(format_report(report))
+    print(f"💾 Результат: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Регрессия: {regression}")
+        if regressions:
+            return 1
+        print(f"✅ Без регрессий относительно {baseline.get('commit')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+
+"""
+Генератор синтетических 1CD файлов (формат 8.3.8) для тестов
+Создает минимальную, но валидную для onec_dtools базу с таблицами и BLOB полями
+"""
+
+import math
+import struct
+import sys
+import types
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+BLOB_CHUNK_SIZE = 256
+BLOB_CHUNK_DATA = 250
+DB_OBJECT_HEADER = "2sH3IQ"
+
+# Типы patches/onec_dtools/simple_patch.py: размер фиксирован или равен длине
+PATCHED_FIELD_SIZES = {
+    "UUID": 16,
+    "DATE": 8,
+    "DECIMAL": 16,
+    "MONEY": 16,
+    "BOOLEAN": 1,
+    "REFERENCE": 16,
+    "CATALOG": 16,
+    "DOCUMENT": 16,
+    "ENUM": 16,
+    "REGISTER": 16,
+    "COLOR": 4,
+    "HASHED": 32,
+}
+PATCHED_LENGTH_TYPES = {"VB", "BLOB", "JSON", "XML", "BINARY", "ARRAY", "OBJECT"}
+
+
+@dataclass
+class FieldSpec:
+    """Описание поля синтетической таблицы"""
+
+    name: str
+    type: str
+    length: int = 0
+    precision: int = 0
+    null_exists: bool = False
+    case_sensitive: bool = False
+
+    @property
+    def data_length(self) -> int:
+        """Длина данных поля в строке (с флагом NULL)"""
+        return (1 if self.null_exists else 0) + field_size(self.type, self.length)
+
+
+@dataclass
+class TableSpec:
+    """Описание синтетической таблицы"""
+
+    name: str
+    fields: list[FieldSpec]
+    rows: list[dict[str, Any] | None] = field(default_factory=list)
+
+
+def field_size(field_type: str, length: int) -> int:
+    """Размер данных поля в байтах (как calc_field_size в onec_dtools)"""
+    sizes = {"L": 1, "RV": 16, "NT": 8, "I": 8, "DT": 7}
+    if field_type in sizes:
+        return sizes[field_type]
+    if field_type == "B":
+        return length
+    if field_type == "N":
+        return length // 2 + 1
+    if field_type == "NC":
+        return length * 2
+    if field_type == "NVC":
+        return length * 2 + 2
+    if field_type in PATCHED_FIELD_SIZES:
+        return PATCHED_FIELD_SIZES[field_type]
+    if field_type in PATCHED_LENGTH_TYPES:
+        return length
+    if field_type == "TEXT":
+        return length * 2
+    raise ValueError(f"Неподдерживаемый тип поля: {field_type}")
+
+
+def encode_numeric(value: float | int, length: int, precision: int) -> bytes:
+    """Кодирует число в BCD формат Numeric 1С"""
+    sign = "1" if value >= 0 else "0"
+    scaled = round(abs(value) * 10**precision)
+    digits = str(scaled).rjust(length, "0")[-length:]
+    nibbles = sign + digits
+    nibbles = nibbles.ljust(2 * (length // 2 + 1), "0")
+    return bytes.fromhex(nibbles)
+
+
+def encode_datetime(value: datetime | None) -> bytes:
+    """Кодирует дату в BCD формат DT 1С"""
+    if value is None:
+        return b"\x00" * 7
+    return bytes.fromhex(value.strftime("%Y%m%d%H%M%S"))
+
+
+class _BlobStorage:
+    """Накопитель BLOB данных таблицы в виде цепочек блоков по 256 байт"""
+
+    def __init__(self) -> None:
+        # Блок 0 зарезервирован
+        self.chunks: list[bytes] = [b"\x00" * BLOB_CHUNK_SIZE]
+
+    def add(self, data: bytes) -> int:
+        """Добавляет BLOB и возвращает номер первого блока"""
+        if not data:
+            return 0
+        first = len(self.chunks)
+        pieces = [
+            data[i : i + BLOB_CHUNK_DATA] for i in range(0, len(data), BLOB_CHUNK_DATA)
+        ]
+        for n, piece in enumerate(pieces):
+            next_block = first + n + 1 if n + 1 < len(pieces) else 0
+            self.chunks.append(
+                struct.pack("Ih250s", next_block, len(piece), piece),
+            )
+        return first
+
+    def to_bytes(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+class Synthetic1CDWriter:
+    """
+    JTBD:
+    Как система тестирования, я хочу создавать синтетические 1CD файлы,
+    чтобы проверять извлечение на реальном формате без 81GB базы.
+    """
+
+    def __init__(self, page_size: int = 4096) -> None:
+        self.page_size = page_size
+        self.tables: list[TableSpec] = []
+        self._pages: list[bytes] = []
+
+    def add_table(
+        self,
+        name: str,
+        fields: list[FieldSpec],
+        rows: list[dict[str, Any] | None],
+    ) -> None:
+        """Добавляет таблицу. None в rows означает пустую (удаленную) строку"""
+        self.tables.append(TableSpec(name, fields, rows))
+
+    def _allocate(self, data: bytes) -> list[int]:
+        """Размещает данные на страницах и возвращает их номера"""
+        numbers = []
+        for i in range(0, len(data), self.page_size):
+            chunk = data[i : i + self.page_size].ljust(self.page_size, b"\x00")
+            numbers.append(len(self._pages))
+            self._pages.append(chunk)
+        return numbers
+
+    def _write_object(self, data: bytes, header_page: int | None = None) -> int:
+        """Записывает объект БД (заголовок + страницы данных)"""
+        if header_page is None:
+            header_page = len(self._pages)
+            self._pages.append(b"")
+        data_pages = self._allocate(data)
+        slots = (self.page_size - struct.calcsize(DB_OBJECT_HEADER)) // 4
+        if len(data_pages) <= slots:
+            fat_level = 0
+            offsets = data_pages
+        else:
+            fat_level = 1
+            per_index = self.page_size // 4
+            index_data = [
+                data_pages[i : i + per_index]
+                for i in range(0, len(data_pages), per_index)
+            ]
+            offsets = []
+            for entries in index_data:
+                offsets.append(len(self._pages))
+                self._pages.append(
+                    struct.pack(f"{len(entries)}I", *entries).ljust(
+                        self.page_size,
+                        b"\x00",
+                    ),
+                )
+        header = struct.pack(
+            f"{DB_OBJECT_HEADER}{len(offsets)}I",
+            b"\x1c\xfd",
+            fat_level,
+            0,
+            0,
+            0,
+            len(data),
+            *offsets,
+        )
+        self._pages[header_page] = header.ljust(self.page_size, b"\x00")
+        return header_page
+
+    def _encode_value(
+        self,
+        spec: FieldSpec,
+        value: Any,
+        blobs: _BlobStorage,
+    ) -> bytes:
+        prefix = b""
+        if spec.null_exists:
+            if value is None:
+                return b"\x00" * spec.data_length
+            prefix = b"\x01"
+        size = field_size(spec.type, spec.length)
+        if spec.type == "B":
+            raw = bytes(value or b"").ljust(size, b"\x00")[:size]
+        elif spec.type == "L":
+            raw = b"\x01" if value else b"\x00"
+        elif spec.type == "N":
+            raw = encode_numeric(value or 0, spec.length, spec.precision)
+        elif spec.type == "NC":
+            raw = (value or "").ljust(spec.length)[: spec.length].encode("utf-16-le")
+        elif spec.type == "NVC":
+            text = (value or "")[: spec.length]
+            raw = struct.pack("H", len(text)) + text.encode("utf-16-le")
+            raw = raw.ljust(size, b"\x00")
+        elif spec.type == "RV":
+            raw = struct.pack("4i", *(value or (0, 0, 0, 0)))
+        elif spec.type in ("NT", "I"):
+            if isinstance(value, str):
+                data = value.encode("utf-16-le")
+            else:
+                data = bytes(value or b"")
+            raw = struct.pack("2I", blobs.add(data), len(data))
+        elif spec.type == "DT":
+            raw = encode_datetime(value)
+        elif spec.type == "BOOLEAN":
+            raw = b"\x01" if value else b"\x00"
+        elif spec.type in PATCHED_FIELD_SIZES or spec.type in PATCHED_LENGTH_TYPES:
+            # Поля новых типов onec_dtools отдает байтами как есть
+            data = value.encode("utf-8") if isinstance(value, str) else value
+            raw = bytes(data or b"").ljust(size, b"\x00")[:size]
+        elif spec.type == "TEXT":
+            raw = (value or "").ljust(spec.length)[: spec.length].encode("utf-16-le")
+        else:
+            raise ValueError(f"Неподдерживаемый тип поля: {spec.type}")
+        return prefix + raw
+
+    def _table_layout(self, table: TableSpec) -> tuple[list[int], int]:
+        offset = 17 if any(f.type == "RV" for f in table.fields) else 1
+        offsets = []
+        for spec in table.fields:
+            if spec.type == "RV":
+                offsets.append(1)
+            else:
+                offsets.append(offset)
+                offset += spec.data_length
+        return offsets, max(offset, 5)
+
+    def _encode_rows(self, table: TableSpec, blobs: _BlobStorage) -> bytes:
+        offsets, row_length = self._table_layout(table)
+        rows = []
+        for row in table.rows:
+            buffer = bytearray(row_length)
+            if row is None:
+                buffer[0] = 1
+            else:
+                for spec, offset in zip(table.fields, offsets):
+                    encoded = self._encode_value(spec, row.get(spec.name), blobs)
+                    buffer[offset : offset + len(encoded)] = encoded
+            rows.append(bytes(buffer))
+        return b"".join(rows)
+
+    def _describe(self, table: TableSpec, files: tuple[int, int, int]) -> str:
+        fields = ",\n".join(
+            '{{"{0}","{1}",{2},{3},{4},"{5}"}}'.format(
+                spec.name,
+                spec.type,
+                1 if spec.null_exists else 0,
+                spec.length,
+                spec.precision,
+                "CS" if spec.case_sensitive else "CI",
+            )
+            for spec in table.fields
+        )
+        return (
+            f'{{"{table.name}",0,\n{{"Fields",\n{fields}\n}},\n{{"Indexes"}},\n'
+            f'{{"Recordlock","0"}},\n{{"Files",{files[0]},{files[1]},{files[2]}}}\n}}'
+        )
+
+    def write(self, path: str) -> str:
+        """Записывает 1CD файл и возвращает путь"""
+        self._pages = [b"", b"\x00" * self.page_size, b""]
+
+        descriptions = []
+        for table in self.tables:
+            blobs = _BlobStorage()
+            rows = self._encode_rows(table, blobs)
+            data_page = self._write_object(rows)
+            blob_page = self._write_object(blobs.to_bytes())
+            descriptions.append(self._describe(table, (data_page, blob_page, 0)))
+
+        # Корневой объект: заголовок с блока 1, затем описания таблиц
+        encoded = [description.encode("utf-8") for description in descriptions]
+        header_length = struct.calcsize("32si") + 4 * len(encoded)
+        next_chunk = 1 + math.ceil(header_length / BLOB_CHUNK_DATA)
+        description_chunks = []
+        for data in encoded:
+            description_chunks.append(next_chunk)
+            next_chunk += math.ceil(len(data) / BLOB_CHUNK_DATA)
+        header = struct.pack("32si", b"ru_RU", len(encoded)) + struct.pack(
+            f"{len(encoded)}i",
+            *description_chunks,
+        )
+        root = _BlobStorage()
+        root.add(header)
+        for data in encoded:
+            root.add(data)
+        self._write_object(root.to_bytes(), header_page=2)
+
+        total_pages = len(self._pages)
+        header_page = struct.pack(
+            "8s4bIiI",
+            b"1CDBMSV8",
+            8,
+            3,
+            8,
+            0,
+            total_pages,
+            0,
+            self.page_size,
+        )
+        self._pages[0] = header_page.ljust(self.page_size, b"\x00")
+
+        with open(path, "wb") as f:
+            for page in self._pages:
+                f.write(page)
+        return path
+
+
+def document_table_fields() -> list[FieldSpec]:
+    """Типовой набор полей таблицы документа"""
+    return [
+        FieldSpec("_IDRREF", "B", 16),
+        FieldSpec("_VERSION", "RV"),
+        FieldSpec("_MARKED", "L"),
+        FieldSpec("_DATE_TIME", "DT"),
+        FieldSpec("_NUMBER", "NC", 11),
+        FieldSpec("_POSTED", "L"),
+        FieldSpec("_FLD100", "N", 15, 2),
+        FieldSpec("_FLD101", "N", 5, 0),
+        FieldSpec("_FLD102", "NVC", 50),
+        FieldSpec("_FLD103", "NT", null_exists=True),
+    ]
+
+
+def make_document_rows(
+    count: int,
+    empty_every: int = 0,
+    start_date: datetime | None = None,
+) -> list[dict[str, Any] | None]:
+    """Строки таблицы документа с предсказуемыми значениями"""
+    base = start_date or datetime(2024, 1, 1, 9, 0, 0)
+    rows: list[dict[str, Any] | None] = []
+    for i in range(count):
+        if empty_every and i % empty_every == empty_every - 1:
+            rows.append(None)
+            continue
+        rows.append(
+            {
+                "_IDRREF": (i + 1).to_bytes(16, "big"),
+                "_VERSION": (i, 0, 0, 1),
+                "_MARKED": False,
+                "_DATE_TIME": base.replace(day=1 + i % 28, hour=9 + i % 10),
+                "_NUMBER": f"ПЦ{i:07d}",
+                "_POSTED": i % 2 == 0,
+                "_FLD100": 100 + i * 1.5,
+                "_FLD101": i % 50,
+                "_FLD102": f"Магазин Братиславский {i % 3}",
+                "_FLD103": f"Букет роз №{i} ПЦ022",
+            },
+        )
+    return rows
+
+
+def write_sample_database(
+    path: str,
+    rows: int = 50,
+    empty_every: int = 0,
+    table_name: str = "_DOCUMENT156",
+) -> str:
+    """Создает 1CD с одной таблицей документов"""
+    writer = Synthetic1CDWriter()
+    writer.add_table(
+        table_name,
+        document_table_fields(),
+        make_document_rows(rows, empty_every),
+    )
+    return writer.write(path)
+
+
+def restore_onec_dtools(monkeypatch: Any) -> None:
+    """Возвращает настоящий onec_dtools, если другой тест подменил его моком"""
+    for name in ("onec_dtools", "onec_dtools.database_reader"):
+        module = sys.modules.get(name)
+        if module is not None and not isinstance(module, types.ModuleType):
+            monkeypatch.delitem(sys.modules, name)
@@ -0,0 +1,173 @@
+"""
+Unit тесты для ArrowParquetSink
+Согласно TDD Documentation Standard
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.arrow_parquet_sink import (
+    ArrowParquetSink,
+    arrow_type_for_field,
+    rows_to_record_batch,
+    schema_from_table,
+)
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+@pytest.fixture
+def sample_table(tmp_path, monkeypatch):
+    """Таблица _DOCUMENT156 из синтетической 1CD базы"""
+    restore_onec_dtools(monkeypatch)
+    from onec_dtools.database_reader import DatabaseReader
+
+    db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=30)
+    with open(db_path, "rb") as f:
+        yield DatabaseReader(f).tables["_DOCUMENT156"]
+
+
+class TestSchema:
+    """Тесты для схемы Arrow по метаданным 1CD"""
+
+    def test_field_types_mapping(self):
+        """
+        JTBD:
+        Как построитель схемы, я хочу типизировать поля 1С,
+        чтобы числа и даты не хранились строками.
+        """
+        assert arrow_type_for_field("L") == pa.bool_()
+        assert arrow_type_for_field("N", 5, 0) == pa.int64()
+        assert arrow_type_for_field("N", 15, 2) == pa.float64()
+        assert arrow_type_for_field("DT") == pa.timestamp("s")
+        assert arrow_type_for_field("B", 16) == pa.binary()
+        assert arrow_type_for_field("NVC", 50) == pa.string()
+
+    def test_schema_from_table_metadata(self, sample_table):
+        """
+        JTBD:
+        Как sink, я хочу получить схему из описания таблицы,
+        чтобы схема не зависела от значений первого пакета.
+        """
+        # Act
+        schema = schema_from_table(sample_table, prefix="field_")
+
+        # Assert
+        assert schema.field("field__POSTED").type == pa.bool_()
+        assert schema.field("field__FLD100").type == pa.float64()
+        assert schema.field("field__DATE_TIME").type == pa.timestamp("s")
+
+
+def test_rows_to_record_batch_coerces_values():
+    """
+    JTBD:
+    Как конвертер пакета, я хочу приводить значения к типам схемы,
+    чтобы строка "12" в числовом поле не ломала запись.
+    """
+    # Arrange
+    schema = pa.schema([("amount", pa.int64()), ("posted", pa.bool_())])
+    rows = [{"amount": "12", "posted": "True"}, {"amount": "abc"}]
+
+    # Act
+    batch = rows_to_record_batch(rows, schema)
+
+    # Assert
+    assert batch.column(0).to_pylist() == [12, None]
+    assert batch.column(1).to_pylist() == [True, None]
+
+
+class TestArrowParquetSink:
+    """Тесты для инкрементальной записи Parquet"""
+
+    def test_row_groups_compression_and_dictionary(self, tmp_path):
+        """
+        JTBD:
+        Как sink, я хочу писать группы строк заданного размера с zstd и словарями,
+        чтобы Parquet был компактным и читался по группам.
+        """
+        # Arrange
+        schema = pa.schema(
+            [
+                ("id", pa.string()),
+                ("table_name", pa.string()),
+                ("blob_content", pa.string()),
+            ],
+        )
+        path = tmp_path / "documents.parquet"
+
+        # Act
+        with ArrowParquetSink(
+            str(path),
+            schema=schema,
+            batch_size=4,
+            row_group_size=10,
+        ) as sink:
+            sink.write_rows(
+                {"id": str(i), "table_name": "_DOCUMENT156", "blob_content": f"т{i}"}
+                for i in range(25)
+            )
+
+        # Assert
+        metadata = pq.ParquetFile(path).metadata
+        assert sink.rows_written == 25
+        assert metadata.num_rows == 25
+        assert metadata.num_row_groups == 3
+        table_name_chunk = metadata.row_group(0).column(1)
+        content_chunk = metadata.row_group(0).column(2)
+        assert table_name_chunk.compression == "ZSTD"
+        assert any("DICTIONARY" in encoding for encoding in table_name_chunk.encodings)
+        assert not any("DICTIONARY" in encoding for encoding in content_chunk.encodings)
+
+    def test_infers_schema_without_metadata(self, tmp_path):
+        """
+        JTBD:
+        Как sink, я хочу выводить схему по первому пакету,
+        чтобы записывать данные без метаданных 1CD.
+        """
+        # Arrange
+        path = tmp_path / "inferred.parquet"
+
+        # Act
+        with ArrowParquetSink(str(path)) as sink:
+            sink.write_rows([{"id": "1", "size": 10, "note": None}, {"id": "2"}])
+
+        # Assert
+        table = pq.read_table(path)
+        assert table.column("size").to_pylist() == [10, None]
+        assert table.schema.field("note").type == pa.string()
+
+
+def test_adaptive_extractor_appends_checkpoints(tmp_path, monkeypatch, sample_table):
+    """
+    JTBD:
+    Как адаптивный извлекатель, я хочу дописывать в Parquet только новые записи
+    на checkpoint, чтобы файл не переписывался целиком.
+    """
+    # Arrange
+    monkeypatch.chdir(tmp_path)
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    extractor = AdaptiveExtractor()
+    records = extractor.extract_table_data(
+        "_DOCUMENT156",
+        sample_table,
+        checkpoints=False,
+    )
+
+    # Act
+    extractor.save_to_parquet({"_DOCUMENT156": records[:10]}, final=False)
+    extractor.save_to_parquet({"_DOCUMENT156": records})
+
+    # Assert
+    table = pq.read_table(tmp_path / "complete_1c_database__DOCUMENT156.parquet")
+    assert table.num_rows == len(records) == 30
+    assert table.column("row_index").to_pylist() == list(range(1, 31))
+    assert table.schema.field("field__DATE_TIME").type == pa.timestamp("ms")
+    assert table.column("blob__FLD103_type").to_pylist()[0] == "str_direct"
+    # Checkpoint не сбрасывает неполную группу строк
+    assert (
+        pq.ParquetFile(
+            tmp_path / "complete_1c_database__DOCUMENT156.parquet",
+        ).metadata.num_row_groups
+        == 1
+    )
@@ -0,0 +1,232 @@
+"""
+Unit тесты для пакетного декодирования BLOB (batch_blob_decoder)
+Согласно TDD Documentation Standard
+"""
+
+import zlib
+
+import pytest
+
+from src.utils.batch_blob_decoder import (
+    decode_batch,
+    decode_blob,
+    detect_binary_type,
+    detect_encoding,
+    detect_text_type,
+)
+
+
+class TestDetectEncoding:
+    """Тесты для определения кодировки по частотам байтов"""
+
+    @pytest.mark.parametrize(
+        ("data", "expected"),
+        [
+            ("Букет роз №3 ПЦ022".encode("utf-16-le"), "utf-16-le"),
+            ("Букет роз".encode(), "utf-8"),
+            ("Поступление ПЦ022 Rosa".encode("cp1251"), "cp1251"),
+            ("café crème brûlée".encode("latin1"), "latin1"),
+            (b"Caf\xe9 au lait", "latin1"),
+            ("ПЦ022".encode("cp1251"), "cp1251"),
+            ("Да".encode("cp1251"), "cp1251"),
+            ("ООО".encode("cp1251"), "cp1251"),
+            (b"plain ascii", "utf-8"),
+            ("BOM".encode("utf-16"), "utf-16"),
+        ],
+    )
+    def test_encodings(self, data, expected):
+        """
+        JTBD:
+        Как декодер BLOB, я хочу выбирать кодировку по байтам значения,
+        чтобы не перебирать кодировки через UnicodeDecodeError.
+        """
+        # Act
+        encoding = detect_encoding(data)
+
+        # Assert
+        assert encoding == expected
+        assert data.decode(encoding)
+
+    def test_truncated_sample_keeps_utf8(self):
+        """
+        JTBD:
+        Как декодер длинных BLOB, я хочу распознавать UTF-8, даже если
+        выборка SAMPLE_BYTES обрезает последний символ.
+        """
+        # Arrange
+        data = b"a" + "Букет роз ".encode() * 10_000
+
+        # Act
+        encoding = detect_encoding(data)
+
+        # Assert
+        assert encoding == "utf-8"
+
+    def test_text_types_without_trial_parsing(self):
+        """
+        JTBD:
+        Как определитель типа содержимого, я хочу различать JSON, XML,
+        сериализованные значения 1С, base64 и hex по форме строки.
+        """
+        # Act
+        types = [
+            detect_text_type(text)
+            for text in [
+                '{"name": "test"}',
+                '{"#",acf6192e-81ca-46ef-93a6-5a6968b78663,{1}}',
+                "<root>test</root>",
+                "SGVsbG8gV29ybGQ=",
+                "48656c6c6f",
+                "Розы красные цветы",
+                "",
+            ]
+        ]
+
+        # Assert
+        assert types == [
+            "json",
+            "onec_serialized",
+            "xml",
+            "base64",
+            "hex",
+            "text",
+            "unknown",
+        ]
+
+
+class TestDecodeBlob:
+    """Тесты для декодирования отдельных значений"""
+
+    @pytest.mark.parametrize(
+        "text",
+        ["ПЦ022", "Да", "ООО", "Café au lait"],
+    )
+    def test_short_single_byte_values_stay_text(self, text):
+        """
+        JTBD:
+        Как декодер BLOB, я хочу декодировать короткие cp1251 и latin1 значения
+        как текст, а не как UTF-8 с U+FFFD, отброшенный как двоичные данные.
+        """
+        # Arrange
+        encoding = "latin1" if text.isascii() or "é" in text else "cp1251"
+
+        # Act
+        decoded = decode_blob(text.encode(encoding))
+
+        # Assert
+        assert decoded.text == text
+        assert decoded.encoding == encoding
+        assert decoded.content_type == "text"
+
+    @pytest.mark.parametrize("text", ["x 10 шт", "x^2 + 1", "x}"])
+    def test_text_with_zlib_like_header_stays_text(self, text):
+        """
+        JTBD:
+        Как декодер BLOB, я хочу считать сжатыми только значения с настоящим
+        заголовком zlib, чтобы текст, начинающийся с "x", не терялся.
+        """
+        # Act
+        decoded = decode_blob(text.encode())
+
+        # Assert
+        assert decoded.text == text
+        assert decoded.content_type == "text"
+
+    def test_deflate_false_skips_zlib_header(self):
+        """
+        JTBD:
+        Как распаковщик BLOB, я хочу отключать проверку заголовка zlib
+        для значения, которое не распаковалось, чтобы декодировать его байты.
+        """
+        # Arrange
+        data = zlib.compress("Розы".encode() * 20)
+
+        # Act
+        detected = detect_binary_type(data)
+        skipped = detect_binary_type(data, deflate=False)
+
+        # Assert
+        assert detected == "deflate"
+        assert skipped is None
+
+
+class TestDecodeBatch:
+    """Тесты для пакетного декодирования"""
+
+    def test_batch_columns(self):
+        """
+        JTBD:
+        Как выгрузка BLOB, я хочу за один вызов получать текст, кодировку
+        и тип содержимого для смеси текстов, файлов и сжатых данных.
+        """
+        # Arrange
+        values = [
+            "Букет роз №3 ПЦ022".encode("utf-16-le"),
+            '{"#",acf6,{1}}'.encode("utf-16-le"),
+            b"\xff\xd8\xff\xe0\x00\x10JFIF",
+            zlib.compress("Розы".encode() * 20),
+            bytes(range(32)) * 4,
+            "Готовая строка",
+            None,
+        ]
+
+        # Act
+        batch = decode_batch(values)
+
+        # Assert
+        assert len(batch) == 7
+        assert batch.texts[0] == "Букет роз №3 ПЦ022"
+        assert batch.content_types == [
+            "text",
+            "onec_serialized",
+            "jpeg",
+            "deflate",
+            "binary",
+            "text",
+            "empty",
+        ]
+        assert batch.encodings[2:5] == ["binary"] * 3
+        assert batch.texts[2:5] == [None] * 3
+        assert batch.sizes[0] == 36
+
+    def test_to_arrow(self):
+        """
+        JTBD:
+        Как запись в Parquet, я хочу получать результат как pyarrow.Table
+        со словарными колонками кодировки и типа содержимого.
+        """
+        # Arrange
+        pa = pytest.importorskip("pyarrow")
+        batch = decode_batch(["Розы".encode("cp1251"), b"\x89PNG\r\n\x1a\n...."])
+
+        # Act
+        table = batch.to_arrow()
+
+        # Assert
+        assert table.column("text").to_pylist() == ["Розы", None]
+        assert pa.types.is_dictionary(table.schema.field("content_type").type)
+        assert table.column("content_type").to_pylist() == ["text", "png"]
+
+
+def test_blob_processor_decodes_cp1251_without_utf16_guess():
+    """
+    JTBD:
+    Как BlobProcessor, я хочу декодировать cp1251 BLOB четной длины как cp1251,
+    а не как UTF-16 (первая кодировка прежнего перебора).
+    """
+    # Arrange
+    from unittest.mock import Mock
+
+    from src.utils.blob_cache import BlobCache
+    from src.utils.blob_processor import BlobProcessor
+
+    blob = Mock(spec=["value"])
+    blob.value = "Розы красные".encode("cp1251")
+
+    # Act
+    result = BlobProcessor(blob_cache=BlobCache()).extract_blob_content(blob)
+
+    # Assert
+    assert result.content == "Розы красные"
+    assert result.content_type == "text_cp1251"
+    assert decode_blob(blob.value).encoding == "cp1251"
@@ -0,0 +1,130 @@
+"""
+Unit тесты для LRU кэша содержимого BLOB (BlobCache)
+Согласно TDD Documentation Standard
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from src.utils.blob_cache import BlobCache, blob_address
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+@pytest.fixture
+def document_table(tmp_path, monkeypatch):
+    """Таблица _DOCUMENT156 с BLOB полем _FLD103"""
+    restore_onec_dtools(monkeypatch)
+    from onec_dtools.database_reader import DatabaseReader
+
+    path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=10)
+    with open(path, "rb") as f:
+        table = DatabaseReader(f).tables["_DOCUMENT156"]
+        len(table)
+        yield table
+
+
+class TestBlobCache:
+    """Тесты для вытеснения по байтам"""
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        """
+        JTBD:
+        Как кэш с лимитом по байтам, я хочу вытеснять давно неиспользуемые
+        значения, чтобы память не росла с числом прочитанных BLOB.
+        """
+        # Arrange
+        cache = BlobCache(max_bytes=10)
+        cache.put(("f", 1, 1), b"aaaa")
+        cache.put(("f", 1, 2), b"bbbb")
+        cache.get(("f", 1, 1))
+
+        # Act
+        cache.put(("f", 1, 3), b"cccc")
+
+        # Assert
+        assert ("f", 1, 1) in cache
+        assert ("f", 1, 2) not in cache
+        assert cache.current_bytes == 8
+        assert cache.evictions == 1
+
+    def test_oversized_value_is_not_cached(self):
+        """
+        JTBD:
+        Как кэш, я хочу не принимать значения больше лимита,
+        чтобы один большой BLOB не вытеснял весь кэш.
+        """
+        # Arrange
+        cache = BlobCache(max_bytes=4)
+        cache.put(("f", 1, 1), b"ab")
+
+        # Act
+        cache.put(("f", 1, 2), b"abcdefgh")
+
+        # Assert
+        assert len(cache) == 1
+        assert cache.get(("f", 1, 2)) is None
+
+    def test_objects_without_address_are_read_directly(self):
+        """
+        JTBD:
+        Как кэш, я хочу читать значение объектов без адреса BLOB напрямую,
+        чтобы чужие объекты не попадали в кэш под случайным ключом.
+        """
+        # Arrange
+        cache = BlobCache()
+        blob = Mock(value=b"data")
+
+        # Act
+        value = cache.read(blob)
+
+        # Assert
+        assert value == b"data"
+        assert blob_address(blob) is None
+        assert len(cache) == 0
+
+
+def test_repeated_reads_hit_cache(document_table, monkeypatch):
+    """
+    JTBD:
+    Как поиск и извлекатели, я хочу повторно получать содержимое BLOB
+    из кэша по адресу, чтобы не перечитывать страницы файла.
+    """
+    # Arrange
+    from onec_dtools.database_reader import Blob
+
+    cache = BlobCache()
+    first = document_table[3]["_FLD103"]
+    again = document_table[3]["_FLD103"]
+    cache.read(first)
+
+    # Act
+    monkeypatch.setattr(Blob, "value", property(lambda self: pytest.fail("чтение")))
+    value = cache.read(again)
+
+    # Assert
+    assert value == "Букет роз №3 ПЦ022"
+    assert blob_address(first) == blob_address(again)
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_blob_processor_detects_blob_without_reading(document_table, monkeypatch):
+    """
+    JTBD:
+    Как BlobProcessor, я хочу определять BLOB поле по адресу,
+    чтобы проверка типа поля не читала содержимое BLOB.
+    """
+    # Arrange
+    from onec_dtools.database_reader import Blob
+
+    from src.utils.blob_processor import BlobProcessor
+
+    processor = BlobProcessor(blob_cache=BlobCache())
+    blob = document_table[1]["_FLD103"]
+    monkeypatch.setattr(Blob, "value", property(lambda self: pytest.fail("чтение")))
+
+    # Act
+    is_blob = processor.is_blob_field(blob)
+
+    # Assert
+    assert is_blob is True
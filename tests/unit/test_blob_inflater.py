@@ -0,0 +1,212 @@
+"""
+Unit тесты для распаковки сжатых BLOB в пуле потоков (BlobInflater)
+Согласно TDD Documentation Standard
+"""
+
+import zlib
+
+import pytest
+
+from src.utils.batch_blob_decoder import decode_blob, decode_stream
+from src.utils.blob_inflater import (
+    BlobInflater,
+    InflateLimitError,
+    compression_wbits,
+    inflate_blob,
+    inflate_or_decode,
+    iter_inflate,
+)
+from tests.benchmarks.extraction_benchmark import (
+    BenchmarkConfig,
+    blob_payload,
+    compress,
+    generate_database,
+)
+from tests.fixtures.synthetic_1cd import restore_onec_dtools
+
+PAYLOAD = blob_payload(3, 4096).encode("utf-8")
+
+
+class TestInflateBlob:
+    """Тесты для определения и распаковки сжатых значений"""
+
+    def test_compressed_values_are_inflated(self):
+        """
+        JTBD:
+        Как извлечение BLOB, я хочу распаковывать raw deflate и zlib
+        до декодирования, чтобы сжатые значения 1С становились текстом,
+        а не мусором latin1 или hex.
+        """
+        # Arrange
+        raw = compress(PAYLOAD, "deflate")
+        text = "Букет роз №3 ПЦ022".encode("cp1251") * 20
+
+        # Act
+        inflated = inflate_blob(raw)
+        with_header = inflate_blob(compress(PAYLOAD, "zlib"))
+
+        # Assert
+        assert decode_blob(raw).text != PAYLOAD.decode("utf-8")
+        assert inflated.text == PAYLOAD.decode("utf-8")
+        assert inflated.encoding == "deflate_utf-8"
+        assert inflated.content_type == "onec_serialized"
+        assert inflated.size == len(PAYLOAD)
+        assert with_header.text == inflated.text
+        assert compression_wbits(raw) == -zlib.MAX_WBITS
+        assert compression_wbits(text) is None
+        assert compression_wbits(PAYLOAD) is None
+        assert inflate_blob(raw[: len(raw) // 2]) is None
+
+    def test_output_is_streamed_under_limit(self):
+        """
+        JTBD:
+        Как поток пула, я хочу получать распакованные данные порциями
+        и прерывать распаковку сверх лимита, чтобы один большой BLOB
+        не занимал память потока целиком.
+        """
+        # Arrange
+        raw = compress(PAYLOAD * 8, "deflate")
+
+        # Act
+        chunks = list(iter_inflate(raw, -zlib.MAX_WBITS, chunk_size=1024))
+        streamed = decode_stream(iter(chunks))
+        limited = inflate_blob(raw, max_output=len(PAYLOAD))
+
+        # Assert
+        assert max(len(chunk) for chunk in chunks) <= 1024
+        assert streamed.text == (PAYLOAD * 8).decode("utf-8")
+        assert limited.text is None
+        assert limited.content_type == "deflate"
+        with pytest.raises(InflateLimitError):
+            list(iter_inflate(raw, -zlib.MAX_WBITS, max_output=1000))
+
+    def test_values_that_do_not_inflate_stay_text(self):
+        """
+        JTBD:
+        Как извлечение BLOB, я хочу декодировать как текст значения,
+        похожие на заголовок zlib ("x 10 шт"), и поврежденные потоки,
+        чтобы они не терялись как двоичные "deflate".
+        """
+        # Arrange
+        texts = ["x 10 шт", "x^2 + 1", "x}"]
+        damaged = compress(PAYLOAD, "zlib") + b"tail"
+
+        # Act
+        decoded = [inflate_or_decode(text.encode()) for text in texts]
+        with BlobInflater(workers=2) as inflater:
+            pooled = list(inflater.decode([text.encode() for text in texts]))
+        broken = inflate_or_decode(damaged)
+
+        # Assert
+        assert [blob.text for blob in decoded] == texts
+        assert [blob.text for blob in pooled] == texts
+        assert inflate_blob(damaged) is None
+        assert broken.content_type != "deflate"
+        assert broken.size == len(damaged)
+
+
+def test_pool_keeps_order_and_matches_sequential_decode():
+    """
+    JTBD:
+    Как decode_batch по миллионам BLOB, я хочу распаковывать сжатые
+    значения в пуле потоков и получать результаты в исходном порядке,
+    чтобы колонки пакета совпадали с последовательным декодированием.
+    """
+    # Arrange
+    values = []
+    for i in range(40):
+        payload = blob_payload(i, 2048).encode("utf-8")
+        values.append(compress(payload, "deflate") if i % 3 else payload)
+    values += [None, "Розы", b""]
+
+    # Act
+    with BlobInflater(workers=4, max_pending=3) as inflater:
+        batch = inflater.decode_batch(values)
+
+    # Assert
+    assert len(batch) == 43
+    assert batch.texts[:40] == [blob_payload(i, 2048) for i in range(40)]
+    assert batch.encodings[1] == "deflate_utf-8"
+    assert batch.encodings[3] == "utf-8"
+    assert batch.content_types[-3:] == ["empty", "text", "empty"]
+
+
+def test_adaptive_extractor_inflates_blobs_in_pool(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как AdaptiveExtractor, я хочу распаковывать сжатые BLOB строк в пуле,
+    пока читаются следующие строки, чтобы записи совпадали с извлечением
+    в одном потоке, а содержимое было текстом, а не hex.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    config = BenchmarkConfig(rows=30, blob_size=512, field_types=())
+    database = generate_database(str(tmp_path / "bench.1CD"), config)
+
+    def extract(blob_workers):
+        extractor = AdaptiveExtractor(
+            checkpoint_dir=str(tmp_path),
+            plan_file=None,
+            blob_workers=blob_workers,
+        )
+        with open(database["path"], "rb") as f:
+            table = DatabaseReader(f).tables["_DOCUMENT156"]
+            records = extractor.extract_table_data(
+                "_DOCUMENT156",
+                table,
+                checkpoints=False,
+            )
+        extractor.blob_inflater.close()
+        return records
+
+    # Act
+    pooled = extract(4)
+    sequential = extract(1)
+
+    # Assert
+    assert pooled == sequential
+    blob = pooled[3]["blobs"]["_FLD104"]
+    assert list(pooled[3]["blobs"]) == list(sequential[3]["blobs"])
+    assert blob["extraction_methods"] == ["value_deflate_utf-8"]
+    assert blob["value"]["content"].startswith('{{"Букет роз №3-0"')
+    assert all(record["extraction_stats"]["failed"] == 0 for record in pooled)
+
+
+def test_damaged_stream_in_pool_matches_sequential(tmp_path):
+    """
+    JTBD:
+    Как AdaptiveExtractor, я хочу декодировать поврежденный сжатый поток
+    из пула так же, как в одном потоке, чтобы текст BLOB не превращался
+    в hex "deflate" от числа потоков распаковки.
+    """
+    # Arrange
+    from types import SimpleNamespace
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    blob_obj = SimpleNamespace(value=compress(PAYLOAD, "zlib") + b"tail")
+    extractor = AdaptiveExtractor(
+        checkpoint_dir=str(tmp_path),
+        plan_file=None,
+        blob_workers=2,
+    )
+    record = {
+        "blobs": {},
+        "extraction_stats": {"total_blobs": 0, "successful": 0, "failed": 0},
+    }
+
+    # Act
+    sequential = extractor.extract_blob_content(blob_obj)
+    deferred = extractor.defer_blob(record, "_FLD104", blob_obj)
+    extractor.resolve_blobs()
+    extractor.blob_inflater.close()
+
+    # Assert
+    assert deferred
+    assert record["blobs"]["_FLD104"] == sequential
+    assert sequential["value"]["content_type"] != "deflate"
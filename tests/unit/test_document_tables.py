@@ -0,0 +1,182 @@
+"""
+Unit тесты для хранения документов индексом и типизированными таблицами
+Согласно TDD Documentation Standard
+"""
+
+from datetime import datetime
+
+import duckdb
+import pyarrow as pa
+
+from src.utils.document_tables import (
+    INDEX_COLUMN_TYPES,
+    DocumentTablesWriter,
+    binary_value,
+)
+from src.utils.partitioned_dataset import read_dataset
+from src.utils.row_stream import JsonlSpool
+
+TABLE_FIELDS = {
+    "_DOCUMENT156": {
+        "field_0": ["B", 16, 0, "_IDRREF"],
+        "field_1": ["DT", 0, 0, "_DATE_TIME"],
+        "field_2": ["N", 10, 0, "_FLD101"],
+        "field_3": ["N", 15, 2, "_FLD100"],
+        "field_4": ["NT", 0, 0, "_FLD103"],
+    },
+    "_DOCUMENT138": {
+        "field_0": ["NVC", 50, 0, "_FLD102"],
+        "field_1": ["L", 1, 0, "_POSTED"],
+    },
+}
+
+
+def make_document(table_name, i):
+    """Документ в форме extract_all_available_data (до JSONL spool)"""
+    document = {
+        "id": f"{table_name}_{i}",
+        "table_name": table_name,
+        "row_index": i,
+        "document_type": "Реализация",
+        "document_number": f"ПЦ{i:07d}",
+        "document_date": f"2024-0{1 + i % 2}-15T10:00:00",
+        "store_name": "Братиславский",
+        "total_amount": 100.0 + i,
+        "blob_content": f"Букет роз №{i}",
+        "extraction_stats": {"total_blobs": 1, "successful": 1, "failed": 0},
+        "blobs": {},
+    }
+    if table_name == "_DOCUMENT156":
+        document["fields"] = {
+            "field_0": (i + 1).to_bytes(16, "big"),
+            "field_1": datetime(2024, 1 + i % 2, 15, 10),
+            "field_2": i,
+            "field_3": 100 + i * 1.5,
+        }
+        document["blobs"] = {
+            "field_4": {"size": 42, "extraction_methods": ["utf16"]},
+        }
+    else:
+        document["fields"] = {"field_0": "Магазин Южный", "field_1": i % 2 == 0}
+    return document
+
+
+def spooled_documents(tmp_path, count):
+    """Документы после записи в JSONL spool (значения - как в выгрузке)"""
+    spool = JsonlSpool(str(tmp_path / "documents.jsonl"))
+    for i in range(count):
+        table_name = "_DOCUMENT156" if i % 3 else "_DOCUMENT138"
+        spool.write(make_document(table_name, i))
+    spool.close()
+    return spool
+
+
+class TestDocumentTablesWriter:
+    """Тесты для индекса документов и таблиц 1CD"""
+
+    def test_index_is_narrow_and_tables_are_typed(self, tmp_path):
+        """
+        JTBD:
+        Как аналитик, я хочу получать узкий индекс документов и таблицу
+        на каждую 1CD таблицу с типами ее полей, чтобы файлы не содержали
+        строковых колонок всех полей всех таблиц.
+        """
+        # Arrange
+        documents = spooled_documents(tmp_path, 30)
+
+        # Act
+        with DocumentTablesWriter(str(tmp_path), TABLE_FIELDS) as writer:
+            for doc in documents:
+                writer.write(doc)
+
+        # Assert
+        index = read_dataset(writer.index_dir)
+        assert index.num_rows == 30
+        assert set(index.column_names) == {*INDEX_COLUMN_TYPES, "year_month"}
+
+        sales = read_dataset(writer.table_dir("_DOCUMENT156")).sort_by("row_index")
+        assert sales.num_rows == 20
+        assert sales.schema.field("_IDRREF").type == pa.binary()
+        assert pa.types.is_timestamp(sales.schema.field("_DATE_TIME").type)
+        assert sales.schema.field("_FLD101").type == pa.int64()
+        assert sales.schema.field("_FLD100").type == pa.float64()
+        assert "_FLD103" not in sales.column_names
+        assert sales.column("_IDRREF")[0].as_py() == (2).to_bytes(16, "big")
+        assert sales.column("blob__FLD103_methods")[0].as_py() == "utf16"
+        assert set(sales.column("year_month").to_pylist()) == {"2024-01", "2024-02"}
+
+        moves = read_dataset(writer.table_dir("_DOCUMENT138"))
+        assert moves.num_rows == 10
+        assert moves.schema.field("_POSTED").type == pa.bool_()
+        assert not any(name.startswith("blob__FLD103") for name in moves.column_names)
+
+    def test_duckdb_views_join_index_and_table(self, tmp_path):
+        """
+        JTBD:
+        Как аналитик DuckDB, я хочу соединять индекс документов с таблицей
+        1CD по ключу, чтобы получать поля документа только нужной таблицы.
+        """
+        # Arrange
+        documents = spooled_documents(tmp_path, 12)
+        conn = duckdb.connect()
+
+        # Act
+        with DocumentTablesWriter(str(tmp_path), TABLE_FIELDS) as writer:
+            for doc in documents:
+                writer.write(doc)
+        views = writer.create_views(conn)
+        rows = conn.execute(
+            """
+            SELECT d.document_number, t._FLD101
+            FROM documents d
+            JOIN "_DOCUMENT156" t USING (row_index)
+            WHERE d.table_name = '_DOCUMENT156' AND t._FLD101 < 3
+            ORDER BY t._FLD101
+            """,
+        ).fetchall()
+        conn.close()
+
+        # Assert
+        assert views == ["documents", "_DOCUMENT138", "_DOCUMENT156"]
+        assert rows == [("ПЦ0000001", 1), ("ПЦ0000002", 2)]
+
+
+def test_document_date_is_timestamp_or_null(tmp_path):
+    """
+    JTBD:
+    Как аналитик, я хочу фильтровать индекс и табличные части по дате
+    документа как по timestamp, чтобы документ без даты давал null,
+    а не строку "N/A".
+    """
+    # Arrange
+    dated = make_document("_DOCUMENT138", 1)
+    dated["table_parts"] = {"_VT201": [{"row_index": 1, "amount": 10.0}]}
+    undated = {**make_document("_DOCUMENT138", 2), "document_date": "N/A"}
+
+    # Act
+    with DocumentTablesWriter(str(tmp_path), TABLE_FIELDS) as writer:
+        writer.write(dated)
+        writer.write(undated)
+
+    # Assert
+    index = read_dataset(writer.index_dir).sort_by("row_index")
+    assert pa.types.is_timestamp(index.schema.field("document_date").type)
+    assert index.column("document_date").to_pylist() == [
+        datetime(2024, 2, 15, 10),
+        None,
+    ]
+    parts = read_dataset(writer.table_parts_dir)
+    assert pa.types.is_timestamp(parts.schema.field("document_date").type)
+    assert parts.column("year_month").to_pylist() == ["2024-02"]
+
+
+def test_binary_value_after_spool():
+    """
+    JTBD:
+    Как конвертер, я хочу восстанавливать байты ссылок из repr и hex,
+    чтобы _IDRREF в таблице был двоичным ключом, а не строкой b'...'.
+    """
+    raw = bytes(range(16))
+    assert binary_value(str(raw)) == raw
+    assert binary_value(raw.hex()) == raw
+    assert binary_value("не байты") is None
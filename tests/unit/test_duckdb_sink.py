@@ -0,0 +1,168 @@
+"""
+Unit тесты для загрузки записей в DuckDB пакетами Arrow (DuckDBSink)
+Согласно TDD Documentation Standard
+"""
+
+import duckdb
+import pyarrow as pa
+import pytest
+
+from src.utils.arrow_parquet_sink import rows_to_record_batch
+from src.utils.duckdb_sink import DuckDBSink
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+ROW_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("row_index", pa.int64()),
+        ("total_amount", pa.float64()),
+        ("posted", pa.bool_()),
+    ],
+)
+
+
+def make_rows(start, stop):
+    return [
+        {
+            "id": f"_DOCUMENT156_{i}",
+            "row_index": i,
+            "total_amount": str(100 + i),
+            "posted": i % 2 == 0,
+        }
+        for i in range(start, stop)
+    ]
+
+
+class TestDuckDBSink:
+    """Тесты для дописывания пакетов в открытую базу"""
+
+    def test_batches_are_appended_to_typed_table(self, tmp_path):
+        """
+        JTBD:
+        Как sink извлечения, я хочу дописывать пакеты в таблицу с типами
+        схемы 1CD таблицы, чтобы checkpoint не пересоздавал таблицу,
+        а суммы и флаги оставались числами и булевыми.
+        """
+        # Arrange
+        path = str(tmp_path / "sink.duckdb")
+
+        # Act
+        with DuckDBSink(path, batch_size=7) as sink:
+            first = sink.write_rows("_DOCUMENT156", make_rows(0, 10), ROW_SCHEMA)
+            second = sink.write_rows("_DOCUMENT156", make_rows(10, 25), ROW_SCHEMA)
+        conn = duckdb.connect(path)
+        types = {
+            name: column_type
+            for name, column_type, *_ in conn.execute(
+                'DESCRIBE "_DOCUMENT156"',
+            ).fetchall()
+        }
+        count, amount = conn.execute(
+            'SELECT count(*), sum(total_amount) FROM "_DOCUMENT156"',
+        ).fetchone()
+        conn.close()
+
+        # Assert
+        assert (first, second) == (10, 15)
+        assert sink.rows_written == {"_DOCUMENT156": 25}
+        assert count == 25
+        assert amount == sum(100 + i for i in range(25))
+        assert types == {
+            "id": "VARCHAR",
+            "row_index": "BIGINT",
+            "total_amount": "DOUBLE",
+            "posted": "BOOLEAN",
+        }
+
+    def test_new_columns_and_replace(self):
+        """
+        JTBD:
+        Как sink с enrich, я хочу, чтобы колонки, появившиеся в поздних
+        пакетах, добавлялись в таблицу, а replace пересоздавал таблицу
+        в той же транзакции, что и вставка.
+        """
+        # Arrange
+        sink = DuckDBSink()
+        enriched = pa.table({"row_index": [30], "_FLD100RREF_name": ["Братиславский"]})
+
+        # Act
+        sink.write_rows("_DOCUMENT156", make_rows(0, 3), ROW_SCHEMA)
+        sink.write_batch("_DOCUMENT156", enriched)
+        names = sink.conn.execute(
+            'SELECT row_index, "_FLD100RREF_name" FROM "_DOCUMENT156" ORDER BY 1',
+        ).fetchall()
+        sink.write_rows("_DOCUMENT156", make_rows(5, 7), ROW_SCHEMA, replace=True)
+        replaced = sink.conn.execute(
+            'SELECT row_index FROM "_DOCUMENT156" ORDER BY 1',
+        ).fetchall()
+
+        # Assert
+        assert names == [(0, None), (1, None), (2, None), (30, "Братиславский")]
+        assert replaced == [(5,), (6,)]
+        assert sink.rows_written["_DOCUMENT156"] == 2
+
+    def test_replace_ranges_is_atomic(self):
+        """
+        JTBD:
+        Как инкрементальное обновление, я хочу удалять строки измененных
+        диапазонов и вставлять новые в одной транзакции, чтобы ошибка
+        вставки не оставляла таблицу без удаленных строк.
+        """
+        # Arrange
+        sink = DuckDBSink()
+        sink.write_rows("_DOCUMENT156", make_rows(1, 11), ROW_SCHEMA)
+        changed = rows_to_record_batch(make_rows(3, 5), ROW_SCHEMA)
+        broken = pa.table({"row_index": ["не число"]})
+
+        # Act
+        sink.replace_ranges("_DOCUMENT156", changed, [(2, 4)])
+        with pytest.raises(duckdb.Error):
+            sink.replace_ranges("_DOCUMENT156", broken, [(0, 10)])
+        rows = sink.conn.execute(
+            'SELECT row_index FROM "_DOCUMENT156" ORDER BY 1',
+        ).fetchall()
+
+        # Assert
+        assert [row[0] for row in rows] == list(range(1, 11))
+        assert sink.has_table("_DOCUMENT156")
+
+
+def test_adaptive_extractor_appends_on_checkpoints(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как AdaptiveExtractor, я хочу на checkpoint дописывать в DuckDB только
+    новые записи, а финальное сохранение - остаток и индексы, чтобы
+    таблица содержала каждую запись один раз без полных перезаписей.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=30)
+    extractor = AdaptiveExtractor(checkpoint_dir=str(tmp_path), plan_file=None)
+    with open(db_path, "rb") as f:
+        records = extractor.extract_table_data(
+            "_DOCUMENT156",
+            DatabaseReader(f).tables["_DOCUMENT156"],
+            checkpoints=False,
+        )
+
+    # Act
+    extractor.save_to_duckdb({"_DOCUMENT156": records[:12]}, final=False)
+    extractor.save_to_duckdb({"_DOCUMENT156": records})
+    extractor.close_duckdb()
+    conn = duckdb.connect(str(tmp_path / "complete_1c_database.duckdb"))
+    count, distinct = conn.execute(
+        'SELECT count(*), count(DISTINCT row_index) FROM "_DOCUMENT156"',
+    ).fetchone()
+    indexes = conn.execute(
+        "SELECT index_name FROM duckdb_indexes() ORDER BY 1",
+    ).fetchall()
+    conn.close()
+
+    # Assert
+    assert count == distinct == 30
+    assert indexes == [("idx__DOCUMENT156_id",), ("idx__DOCUMENT156_table_name",)]
@@ -0,0 +1,145 @@
+"""
+Unit тесты для бенчмарка извлечения на синтетической 1CD базе
+Согласно TDD Documentation Standard
+"""
+
+import json
+
+from src.utils.blob_inflater import compression_wbits, iter_inflate
+from src.utils.row_decoder import CompiledRowDecoder
+from tests.benchmarks.extraction_benchmark import (
+    BenchmarkConfig,
+    compare_results,
+    generate_database,
+    main,
+    run_benchmark,
+)
+from tests.fixtures.synthetic_1cd import restore_onec_dtools
+
+
+def keep_calc_field_size(monkeypatch):
+    """simple_patch заменяет calc_field_size: после теста вернется исходная"""
+    restore_onec_dtools(monkeypatch)
+    import onec_dtools.database_reader as dr
+
+    monkeypatch.setattr(dr, "calc_field_size", dr.calc_field_size)
+
+
+class TestSyntheticDatabase:
+    """Тесты для генерации базы бенчмарка"""
+
+    def test_patched_types_and_compressed_blobs(self, tmp_path, monkeypatch):
+        """
+        JTBD:
+        Как бенчмарк, я хочу генерировать базу с полями типов simple_patch
+        и сжатыми BLOB, чтобы замер покрывал те же пути, что и реальная база.
+        """
+        # Arrange
+        keep_calc_field_size(monkeypatch)
+        from onec_dtools.database_reader import DatabaseReader
+
+        from patches.onec_dtools.simple_patch import apply_simple_patch
+
+        config = BenchmarkConfig(rows=20, field_types=("UUID", "BOOLEAN", "TEXT"))
+
+        # Act
+        database = generate_database(str(tmp_path / "bench.1CD"), config)
+        apply_simple_patch()
+        with open(database["path"], "rb") as f:
+            table = DatabaseReader(f).tables["_DOCUMENT156"]
+            decoder = CompiledRowDecoder.from_table(table)
+            row = decoder.decode_dict(table[3], read_blobs=True)
+            expected = table[3].as_dict(True)
+
+        # Assert
+        assert database["rows"] == len(table) == 20
+        # Типы simple_patch onec_dtools не разбирает: значения None, как в as_dict
+        for name in ("_FLD200", "_FLD201", "_FLD202"):
+            assert row[name] is None
+            assert expected[name] is None
+        assert row["_FLD103"].startswith('{{"Букет роз №3-0"')
+        wbits = compression_wbits(row["_FLD104"])
+        assert wbits is not None
+        payload = b"".join(iter_inflate(row["_FLD104"], wbits)).decode("utf-8")
+        assert payload.startswith('{{"Букет роз №3-0"')
+        assert len(payload.encode("utf-8")) >= config.blob_size
+
+
+class TestRunBenchmark:
+    """Тесты для замера этапов и сравнения результатов"""
+
+    def test_report_metrics_and_regressions(self, tmp_path, monkeypatch):
+        """
+        JTBD:
+        Как разработчик, я хочу получать по каждому этапу строки/с, МБ/с
+        и пиковый RSS, а при сравнении с прежним коммитом - список регрессий,
+        чтобы замечать замедление до выгрузки 80GB базы.
+        """
+        # Arrange
+        keep_calc_field_size(monkeypatch)
+        config = BenchmarkConfig(
+            rows=40,
+            blob_size=300,
+            cases=["adaptive_extractor", "batch_blob_decoder", "arrow_parquet_sink"],
+        )
+
+        # Act
+        report = run_benchmark(config, str(tmp_path), isolate=False)
+        slower = json.loads(json.dumps(report))
+        slower["results"]["batch_blob_decoder"]["rows_per_sec"] /= 2
+
+        # Assert
+        assert list(report["results"]) == config.cases
+        extractor = report["results"]["adaptive_extractor"]
+        assert extractor["rows"] == 40
+        assert extractor["bytes"] == report["database"]["size_bytes"]
+        assert extractor["rows_per_sec"] > 0
+        assert extractor["peak_rss_mb"] > 0
+        assert report["results"]["batch_blob_decoder"]["rows"] == 80
+        assert report["results"]["arrow_parquet_sink"]["rows"] == 40
+        assert compare_results(report, report) == []
+        regressions = compare_results(report, slower)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("batch_blob_decoder")
+
+
+def test_cli_writes_json_and_fails_on_regression(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как CI, я хочу получать JSON результата и ненулевой код выхода
+    при регрессии относительно прежнего JSON, чтобы сравнение коммитов
+    не требовало ручного просмотра цифр.
+    """
+    # Arrange
+    keep_calc_field_size(monkeypatch)
+    output = tmp_path / "current.json"
+    baseline = tmp_path / "baseline.json"
+    args = [
+        "--rows",
+        "20",
+        "--cases",
+        "batch_blob_decoder",
+        "--in-process",
+        "--workdir",
+        str(tmp_path / "work"),
+    ]
+
+    # Act
+    code = main([*args, "--output", str(output)])
+    report = json.loads(output.read_text(encoding="utf-8"))
+    report["results"]["batch_blob_decoder"]["rows_per_sec"] *= 1000
+    baseline.write_text(json.dumps(report), encoding="utf-8")
+    regression_code = main(
+        [*args, "--output", str(tmp_path / "next.json"), "--compare", str(baseline)],
+    )
+
+    # Assert
+    assert code == 0
+    assert report["config"]["field_types"] == [
+        "UUID",
+        "BOOLEAN",
+        "DECIMAL",
+        "TEXT",
+        "VB",
+    ]
+    assert regression_code == 1
@@ -0,0 +1,226 @@
+"""
+Unit тесты для ExtractionCheckpoint и возобновляемого извлечения
+Согласно TDD Documentation Standard
+"""
+
+import json
+
+import pytest
+
+from src.utils.extraction_checkpoint import CheckpointManifest, ExtractionCheckpoint
+from src.utils.parallel_extractor import ParallelTableExtractor
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+class InterruptingTable:
+    """Таблица, которая поднимает флаг прерывания на заданной строке"""
+
+    def __init__(self, table, extractor, interrupt_at=None):
+        self.table = table
+        self.extractor = extractor
+        self.interrupt_at = interrupt_at
+        self.fields = table.fields
+        self.read_rows = []
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        self.read_rows.append(index)
+        if index == self.interrupt_at:
+            self.extractor.interrupted = True
+        return self.table[index]
+
+
+@pytest.fixture
+def sample_table(tmp_path, monkeypatch):
+    """Таблица _DOCUMENT156 из синтетической 1CD базы"""
+    restore_onec_dtools(monkeypatch)
+    from onec_dtools.database_reader import DatabaseReader
+
+    db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=40, empty_every=7)
+    with open(db_path, "rb") as f:
+        yield DatabaseReader(f).tables["_DOCUMENT156"]
+
+
+class TestExtractionCheckpoint:
+    """Тесты для manifest с watermark"""
+
+    def test_commit_writes_only_delta_and_moves_watermark(self, tmp_path):
+        """
+        JTBD:
+        Как checkpoint, я хочу писать в шард только новые записи,
+        чтобы стоимость checkpoint не росла с количеством извлеченных строк.
+        """
+        # Arrange
+        checkpoint = ExtractionCheckpoint(str(tmp_path))
+        manifest = checkpoint.load("_DOCUMENT156")
+
+        # Act
+        checkpoint.commit(manifest, [{"row_index": 1}, {"row_index": 2}], 0, 10)
+        checkpoint.commit(manifest, [{"row_index": 11}], 10, 20)
+
+        # Assert
+        reloaded = checkpoint.load("_DOCUMENT156")
+        assert reloaded.watermark == 20
+        assert reloaded.records == 3
+        assert [shard["records"] for shard in reloaded.shards] == [2, 1]
+        rows = [record["row_index"] for record in checkpoint.iter_records(reloaded)]
+        assert rows == [1, 2, 11]
+
+    def test_watermark_stops_at_gap(self, tmp_path):
+        """
+        JTBD:
+        Как checkpoint параллельных партиций, я хочу считать watermark только
+        по непрерывному покрытию, чтобы пропущенная партиция не была потеряна.
+        """
+        # Arrange
+        checkpoint = ExtractionCheckpoint(str(tmp_path))
+        manifest = CheckpointManifest("_DOCUMENT156")
+
+        # Act
+        checkpoint.commit(manifest, [], 0, 10)
+        checkpoint.commit(manifest, [], 20, 30)
+
+        # Assert
+        assert manifest.watermark == 10
+        assert manifest.committed_ranges() == {(0, 10), (20, 30)}
+
+    def test_corrupt_manifest_starts_fresh(self, tmp_path):
+        """
+        JTBD:
+        Как checkpoint, я хочу начинать заново при поврежденном manifest,
+        чтобы оборванная запись не блокировала извлечение.
+        """
+        # Arrange
+        checkpoint = ExtractionCheckpoint(str(tmp_path))
+        path = tmp_path / "_DOCUMENT156" / "manifest.json"
+        path.parent.mkdir()
+        path.write_text("{broken", encoding="utf-8")
+
+        # Act
+        manifest = checkpoint.load("_DOCUMENT156")
+
+        # Assert
+        assert manifest.watermark == 0
+        assert manifest.shards == []
+
+
+def test_interrupted_extraction_resumes_from_watermark(
+    tmp_path,
+    monkeypatch,
+    sample_table,
+):
+    """
+    JTBD:
+    Как адаптивный извлекатель, я хочу после прерывания продолжать с watermark,
+    чтобы повторный запуск не читал таблицу с нулевой строки.
+    """
+    # Arrange
+    monkeypatch.chdir(tmp_path)
+    import src.adaptive_extractor as adaptive_extractor
+
+    monkeypatch.setattr(adaptive_extractor, "CHECKPOINT_INTERVAL", 10)
+    monkeypatch.setattr(adaptive_extractor, "PARQUET_DUCKDB_AVAILABLE", False)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+
+    expected = adaptive_extractor.AdaptiveExtractor(
+        checkpoint_dir=str(tmp_path / "full"),
+    ).extract_table_data("_DOCUMENT156", sample_table)
+
+    first = adaptive_extractor.AdaptiveExtractor(checkpoint_dir=checkpoint_dir)
+    first.extract_table_data(
+        "_DOCUMENT156",
+        InterruptingTable(sample_table, first, interrupt_at=25),
+    )
+
+    # Act
+    second = adaptive_extractor.AdaptiveExtractor(checkpoint_dir=checkpoint_dir)
+    table = InterruptingTable(sample_table, second)
+    records = second.extract_table_data("_DOCUMENT156", table)
+
+    # Assert
+    assert min(table.read_rows) == 26
+    assert [record["id"] for record in records] == [record["id"] for record in expected]
+    manifest = json.loads(
+        (tmp_path / "checkpoints" / "_DOCUMENT156" / "manifest.json").read_text(
+            encoding="utf-8",
+        ),
+    )
+    assert manifest["completed"] is True
+    assert manifest["watermark"] == 40
+    assert not list(tmp_path.glob("checkpoint_*.json"))
+
+
+def test_resume_with_smaller_limit_stops_at_limit(
+    tmp_path,
+    monkeypatch,
+    sample_table,
+):
+    """
+    JTBD:
+    Как адаптивный извлекатель, я хочу при возобновлении с меньшим лимитом
+    возвращать только строки в пределах лимита, чтобы checkpoint прошлого
+    запуска не расширял диапазон текущего.
+    """
+    # Arrange
+    monkeypatch.chdir(tmp_path)
+    import src.adaptive_extractor as adaptive_extractor
+
+    monkeypatch.setattr(adaptive_extractor, "CHECKPOINT_INTERVAL", 10)
+    monkeypatch.setattr(adaptive_extractor, "PARQUET_DUCKDB_AVAILABLE", False)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+
+    first = adaptive_extractor.AdaptiveExtractor(checkpoint_dir=checkpoint_dir)
+    first.extract_table_data(
+        "_DOCUMENT156",
+        InterruptingTable(sample_table, first, interrupt_at=35),
+    )
+
+    # Act
+    second = adaptive_extractor.AdaptiveExtractor(checkpoint_dir=checkpoint_dir)
+    table = InterruptingTable(sample_table, second)
+    records = second.extract_table_data("_DOCUMENT156", table, max_records=20)
+
+    # Assert
+    assert table.read_rows == []
+    assert records
+    assert max(record["row_index"] for record in records) <= 20
+
+
+def test_parallel_extraction_skips_committed_partitions(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как координатор партиций, я хочу пропускать партиции из manifest,
+    чтобы повтор прерванного параллельного запуска не извлекал их заново.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=40)
+    parallel = ParallelTableExtractor(
+        db_path=db_path,
+        workers=1,
+        output_dir=str(tmp_path / "shards"),
+        rows_per_partition=10,
+    )
+    calls = {"count": 0}
+
+    def stop_after_two():
+        calls["count"] += 1
+        return calls["count"] > 2
+
+    interrupted = parallel.extract_table("_DOCUMENT156", should_stop=stop_after_two)
+
+    # Act
+    summary = parallel.extract_table("_DOCUMENT156")
+
+    # Assert
+    assert interrupted["interrupted"] is True
+    assert interrupted["records"] == 20
+    assert summary["resumed_partitions"] == 2
+    assert summary["records"] == 40
+    assert parallel.checkpoint.load("_DOCUMENT156").completed is True
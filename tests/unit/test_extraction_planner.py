@@ -0,0 +1,186 @@
+"""
+Unit тесты для планировщика извлечения (ExtractionPlanner)
+Согласно TDD Documentation Standard
+"""
+
+import pytest
+
+from src.utils.extraction_planner import (
+    ExtractionPlan,
+    ExtractionPlanner,
+    critical_tables,
+    plan_for,
+    table_kind,
+)
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+
+@pytest.fixture
+def catalog_db(tmp_path, monkeypatch):
+    """Журнал, документы разного размера и малые справочники"""
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    reference_fields = [
+        FieldSpec("_IDRREF", "B", 16),
+        FieldSpec("_CODE", "NC", 9),
+        FieldSpec("_DESCRIPTION", "NVC", 50),
+    ]
+
+    writer = Synthetic1CDWriter()
+    writer.add_table(
+        "_DOCUMENTJOURNAL5354",
+        document_table_fields(),
+        make_document_rows(400),
+    )
+    writer.add_table("_DOCUMENT156", document_table_fields(), make_document_rows(120))
+    writer.add_table("_DOCUMENT138", document_table_fields(), make_document_rows(30))
+    for i in range(4):
+        writer.add_table(
+            f"_REFERENCE{10 + i}",
+            reference_fields,
+            [
+                {"_IDRREF": bytes([i, j]) * 8, "_CODE": str(j), "_DESCRIPTION": "x"}
+                for j in range(5)
+            ],
+        )
+    return writer.write(str(tmp_path / "1Cv8.1CD"))
+
+
+def make_planner(db, **options):
+    return ExtractionPlanner(
+        db,
+        workers=2,
+        rows_per_partition=100,
+        min_sample_rows=0,
+        **options,
+    )
+
+
+class TestExtractionPlanner:
+    """Тесты для плана извлечения по каталогу 1CD"""
+
+    def test_table_kinds(self):
+        """
+        JTBD:
+        Как планировщик, я хочу различать виды таблиц по имени,
+        чтобы критическими считались только документы и журналы.
+        """
+        assert table_kind("_DOCUMENTJOURNAL5354") == "journal"
+        assert table_kind("_DOCUMENT156") == "document"
+        assert table_kind("_DOCUMENT156_VT200") == "table_part"
+        assert table_kind("_Reference42") == "reference"
+        assert table_kind("_AccumRGT1000") == "register"
+        assert table_kind("_CONFIG") == "other"
+
+    def test_profiles_are_read_from_catalog(self, catalog_db):
+        """
+        JTBD:
+        Как планировщик, я хочу брать размер таблицы и BLOB из каталога,
+        чтобы не поддерживать комментарии с числом записей вручную.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        # Act
+        with open(catalog_db, "rb") as f:
+            profiles = {
+                p.table_name: p
+                for p in make_planner(DatabaseReader(f)).profile_tables()
+            }
+
+        # Assert
+        journal = profiles["_DOCUMENTJOURNAL5354"]
+        assert journal.row_count == 400
+        assert journal.blob_fields == 1
+        assert journal.blob_bytes > 0
+        assert journal.rate_source == "measured"
+        assert journal.seconds_per_row > 0
+        assert profiles["_REFERENCE10"].blob_fields == 0
+        assert profiles["_REFERENCE10"].priority == "LOW"
+
+    def test_big_tables_split_first_small_batched(self, catalog_db):
+        """
+        JTBD:
+        Как оркестратор, я хочу получать большие таблицы разбитыми на партиции
+        в начале плана, а малые - пакетами, чтобы ядра не простаивали в конце.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        # Act
+        with open(catalog_db, "rb") as f:
+            plan = make_planner(DatabaseReader(f), target_task_seconds=3600).plan()
+
+        # Assert
+        assert [task.kind for task in plan.tasks] == [
+            "partitioned",
+            "partitioned",
+            "batch",
+        ]
+        assert plan.tasks[0].tables == ["_DOCUMENTJOURNAL5354"]
+        assert len(plan.tasks[0].partitions) == 4
+        assert plan.tasks[0].partitions[-1]["stop_row"] == 400
+        assert plan.rows_per_partition("_DOCUMENTJOURNAL5354") == 100
+        assert [
+            (partition.start_row, partition.stop_row)
+            for partition in plan.partitions_for("_DOCUMENTJOURNAL5354")
+        ] == [(0, 100), (100, 200), (200, 300), (300, 400)]
+        assert plan.partitions_for(plan.tasks[2].tables[0]) == []
+        assert len(plan.tasks[2].tables) == 5
+        assert plan.critical_tables() == [
+            "_DOCUMENTJOURNAL5354",
+            "_DOCUMENT156",
+            "_DOCUMENT138",
+        ]
+
+    def test_budget_defers_tasks(self, catalog_db):
+        """
+        JTBD:
+        Как оператор с ограниченным окном, я хочу задать бюджет времени,
+        чтобы задачи сверх бюджета откладывались, а не запускались.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        # Act
+        with open(catalog_db, "rb") as f:
+            plan = make_planner(DatabaseReader(f), budget_seconds=0).plan()
+
+        # Assert
+        assert plan.tasks == []
+        assert "_DOCUMENTJOURNAL5354" in plan.deferred
+        assert plan.critical_tables() == []
+
+
+def test_manifest_round_trip_is_consumed(catalog_db):
+    """
+    JTBD:
+    Как extractor, я хочу читать критические таблицы из manifest планировщика,
+    чтобы план строился один раз и использовался всеми extractors.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.extract_business_data import extract_critical_tables
+
+    with open(catalog_db, "rb") as f:
+        db = DatabaseReader(f)
+        plan = make_planner(db, target_task_seconds=3600).plan(("document",))
+        plan.save()
+
+        # Act
+        loaded = plan_for(db)
+        tables = critical_tables(db)
+        results = extract_critical_tables(db)
+
+    # Assert
+    assert isinstance(loaded, ExtractionPlan)
+    assert loaded.to_dict() == plan.to_dict()
+    assert tables == ["_DOCUMENT156", "_DOCUMENT138"]
+    assert list(results) == ["_DOCUMENT156", "_DOCUMENT138"]
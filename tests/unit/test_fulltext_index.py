@@ -0,0 +1,169 @@
+"""
+Unit тесты для полнотекстового индекса (FullTextIndex)
+Согласно TDD Documentation Standard
+"""
+
+import pytest
+
+from src.utils.fulltext_index import (
+    FullTextIndex,
+    record_texts,
+    stem_russian,
+    tokenize,
+)
+
+
+def make_document(i, store, text):
+    """Запись в формате результатов extract_all_available_data"""
+    return {
+        "id": f"_DOCUMENT156_{i}",
+        "table_name": "_DOCUMENT156",
+        "row_index": i,
+        "fields": {
+            "field_0": "b'\\x00\\x01'",
+            "field_3": "2024-01-01 09:00:00",
+            "field_8": f"Магазин {store}",
+        },
+        "blobs": {"_FLD103": {"value": {"content": text}}},
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Индекс с тремя документами"""
+    with FullTextIndex(str(tmp_path / "index.sqlite"), batch_size=2) as index:
+        index.index_record(make_document(0, "Братиславский", "Букет роз ПЦ022"))
+        index.index_record(make_document(1, "Марьино", "Розы красные ПЦ023"))
+        index.index_record(make_document(2, "Братиславская", "Доставка тюльпанов"))
+        yield index
+
+
+class TestTokenize:
+    """Тесты для нормализации терминов"""
+
+    def test_word_forms_share_stem(self):
+        """
+        JTBD:
+        Как поиск по-русски, я хочу сводить формы слова к одной основе,
+        чтобы "Братиславская" находила "Братиславский" и "розы" - "роз".
+        """
+        # Act
+        stems = {stem_russian(w) for w in ["братиславский", "братиславская"]}
+
+        # Assert
+        assert stems == {"братиславск"}
+        assert stem_russian("розы") == stem_russian("роз")
+        assert stem_russian("поступления") == stem_russian("поступление")
+
+    def test_codes_are_kept_and_short_tokens_dropped(self):
+        """
+        JTBD:
+        Как поиск по кодам магазинов, я хочу индексировать коды как есть,
+        а ё приводить к е и отбрасывать однобуквенные токены.
+        """
+        # Act
+        terms = tokenize("Ёлка №5 в ПЦ022")
+
+        # Assert
+        assert terms == ["елк", "пц022"]
+
+    def test_record_texts_skip_dates_and_bytes(self):
+        """
+        JTBD:
+        Как индексатор, я хочу брать только текстовые поля и содержимое BLOB,
+        чтобы даты, числа и repr байтов не раздували индекс.
+        """
+        # Act
+        texts = dict(record_texts(make_document(0, "Братиславский", "Букет")))
+
+        # Assert
+        assert texts == {"field_8": "Магазин Братиславский", "_FLD103": "Букет"}
+
+
+class TestFullTextIndex:
+    """Тесты для построения индекса и поиска"""
+
+    def test_search_matches_all_words_across_fields(self, index):
+        """
+        JTBD:
+        Как аналитик, я хочу находить записи, где встречаются все слова
+        запроса, в любых полях записи, с таблицей, строкой и полями.
+        """
+        # Act
+        hits = index.search("братиславская роза")
+
+        # Assert
+        assert [hit.record_id for hit in hits] == ["_DOCUMENT156_0"]
+        assert hits[0].row_index == 0
+        assert hits[0].fields == {
+            "field_8": "Магазин Братиславский",
+            "_FLD103": "Букет роз ПЦ022",
+        }
+
+    def test_prefix_and_table_filter(self, index):
+        """
+        JTBD:
+        Как поиск по кодам, я хочу искать по префиксу термина ("пц02*")
+        и ограничивать поиск таблицей.
+        """
+        # Act
+        hits = index.search("пц02*")
+        other_table = index.search("пц02*", table_name="_Reference1")
+
+        # Assert
+        assert sorted(hit.record_id for hit in hits) == [
+            "_DOCUMENT156_0",
+            "_DOCUMENT156_1",
+        ]
+        assert other_table == []
+        assert index.search("несуществующее") == []
+
+    def test_index_is_persisted(self, tmp_path):
+        """
+        JTBD:
+        Как повторный запуск поиска, я хочу открывать построенный индекс
+        с диска и не добавлять повторно уже проиндексированные записи.
+        """
+        # Arrange
+        path = str(tmp_path / "index.sqlite")
+        with FullTextIndex(path) as index:
+            index.index_record(make_document(0, "Братиславский", "Букет роз"))
+
+        # Act
+        with FullTextIndex(path) as index:
+            added = index.index_record(make_document(0, "Братиславский", "Букет"))
+            hits = index.search("букет")
+            stats = index.get_stats()
+
+        # Assert
+        assert added is False
+        assert [hit.record_id for hit in hits] == ["_DOCUMENT156_0"]
+        assert stats["records"] == 1
+
+    def test_records_without_id_are_not_deduplicated(self, tmp_path):
+        """
+        JTBD:
+        Как индекс справочников и регистров, я хочу индексировать записи без id
+        по таблице и строке, чтобы они не пропускались как уже известные.
+        """
+        # Arrange
+        first = make_document(0, "Братиславский", "Букет роз")
+        second = make_document(1, "Марьино", "Букет тюльпанов")
+        without_row = make_document(2, "Марьино", "Букет лилий")
+        for record in (first, second, without_row):
+            del record["id"]
+        del without_row["row_index"]
+
+        # Act
+        with FullTextIndex(str(tmp_path / "index.sqlite")) as index:
+            added = [index.index_record(record) for record in (first, second)]
+            added.append(index.index_record(without_row))
+            repeated = index.index_record(first)
+            hits = index.search("букет")
+
+        # Assert
+        assert added == [True, True, True]
+        assert repeated is False
+        record_ids = sorted(hit.record_id for hit in hits)
+        assert record_ids[1:] == ["_DOCUMENT156:0", "_DOCUMENT156:1"]
+        assert record_ids[0].startswith("_DOCUMENT156:#")
@@ -0,0 +1,248 @@
+"""
+Unit тесты для IncrementalState и инкрементального извлечения
+Согласно TDD Documentation Standard
+"""
+
+import os
+
+import duckdb
+import pyarrow.parquet as pq
+
+from src.utils.incremental_state import IncrementalState, TableState, diff_tables
+from tests.fixtures.synthetic_1cd import (
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+
+def write_database(path, rows):
+    """1CD с таблицей _DOCUMENT156 из заданных строк"""
+    writer = Synthetic1CDWriter()
+    writer.add_table("_DOCUMENT156", document_table_fields(), rows)
+    return writer.write(str(path))
+
+
+def make_state(blocks, row_count, block_rows=10, row_length=100):
+    return TableState(
+        "_DOCUMENT156",
+        row_count=row_count,
+        row_length=row_length,
+        block_rows=block_rows,
+        blocks=blocks,
+    )
+
+
+class TestDiffTables:
+    """Тесты для сравнения отпечатков"""
+
+    def test_first_run_is_full(self):
+        """
+        JTBD:
+        Как детектор изменений, я хочу извлекать новую таблицу целиком,
+        чтобы первый запуск создавал полные Parquet/DuckDB.
+        """
+        # Act
+        delta = diff_tables(None, make_state(["a", "b"], 15))
+
+        # Assert
+        assert delta.full is True
+        assert delta.ranges == [(0, 15)]
+
+    def test_changed_and_appended_blocks(self):
+        """
+        JTBD:
+        Как детектор изменений, я хочу находить измененные блоки и хвост,
+        чтобы извлекать только их, а не всю таблицу.
+        """
+        # Arrange
+        previous = make_state(["a", "b", "c", "d"], 35)
+        current = make_state(["a", "B", "c", "D", "e"], 47)
+
+        # Act
+        delta = diff_tables(previous, current)
+
+        # Assert
+        assert delta.full is False
+        assert delta.ranges == [(10, 20), (30, 47)]
+        assert delta.rows == 27
+
+    def test_structure_change_is_full(self):
+        """
+        JTBD:
+        Как детектор изменений, я хочу извлекать таблицу целиком при смене
+        структуры строки, чтобы старые отпечатки не давали ложных совпадений.
+        """
+        # Arrange
+        previous = make_state(["a"], 5, row_length=100)
+        current = make_state(["a"], 5, row_length=120)
+
+        # Act
+        delta = diff_tables(previous, current)
+
+        # Assert
+        assert delta.full is True
+
+
+def test_state_detects_modified_row_in_1cd(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как детектор изменений, я хочу видеть изменение одной строки 1CD по
+    отпечатку блока, чтобы повторный запуск читал только этот блок.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    from onec_dtools.database_reader import DatabaseReader
+
+    rows = make_document_rows(30)
+    state = IncrementalState(str(tmp_path / "state.json"), block_rows=8)
+    with open(write_database(tmp_path / "v1.1CD", rows), "rb") as f:
+        state.plan("_DOCUMENT156", DatabaseReader(f).tables["_DOCUMENT156"])
+    state.commit("_DOCUMENT156")
+
+    rows[12]["_FLD102"] = "Магазин Пискаревский"
+    rows[12]["_VERSION"] = (12, 0, 0, 2)
+
+    # Act
+    reloaded = IncrementalState(str(tmp_path / "state.json"), block_rows=8)
+    with open(write_database(tmp_path / "v2.1CD", rows), "rb") as f:
+        delta = reloaded.plan("_DOCUMENT156", DatabaseReader(f).tables["_DOCUMENT156"])
+
+    # Assert
+    assert delta.full is False
+    assert delta.ranges == [(8, 16)]
+
+
+def test_adaptive_extractor_upserts_changed_rows(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как ночное обновление, я хочу дописывать новые и заменять измененные
+    строки в существующих Parquet/DuckDB, чтобы не извлекать базу заново.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    rows = make_document_rows(30)
+    state_file = str(tmp_path / "state.json")
+    with open(write_database(tmp_path / "v1.1CD", rows), "rb") as f:
+        AdaptiveExtractor().extract_table_incremental(
+            "_DOCUMENT156",
+            DatabaseReader(f).tables["_DOCUMENT156"],
+            IncrementalState(state_file, block_rows=8),
+        )
+
+    rows[3]["_FLD103"] = "Букет тюльпанов"
+    rows += make_document_rows(40)[30:]
+
+    # Act
+    with open(write_database(tmp_path / "v2.1CD", rows), "rb") as f:
+        records = AdaptiveExtractor().extract_table_incremental(
+            "_DOCUMENT156",
+            DatabaseReader(f).tables["_DOCUMENT156"],
+            IncrementalState(state_file, block_rows=8),
+        )
+
+    # Assert
+    assert [record["row_index"] for record in records] == [
+        *range(1, 9),
+        *range(31, 41),
+    ]
+    table = pq.read_table(tmp_path / "complete_1c_database__DOCUMENT156.parquet")
+    assert table.column("row_index").to_pylist() == list(range(1, 41))
+    assert table.column("blob__FLD103_content")[3].as_py() == "Букет тюльпанов"
+    conn = duckdb.connect(str(tmp_path / "complete_1c_database.duckdb"))
+    assert conn.execute('SELECT count(*) FROM "_DOCUMENT156"').fetchone()[0] == 40
+    conn.close()
+
+
+def test_upsert_merge_keeps_row_order_across_batches():
+    """
+    JTBD:
+    Как обновление Parquet, я хочу вставлять новые строки между пакетами
+    сохраненных строк по row_index, чтобы файл оставался упорядоченным
+    без перевода пакетов в Python строки.
+    """
+    # Arrange
+    import pyarrow as pa
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    schema = pa.schema([("row_index", pa.int64()), ("value", pa.string())])
+    batches = [
+        pa.RecordBatch.from_pylist(
+            [{"row_index": i, "value": "old"} for i in indexes],
+            schema=schema,
+        )
+        for indexes in ([1, 2, 5, 6], [9, 10])
+    ]
+    rows = [{"row_index": i, "value": "new"} for i in (3, 4, 7, 8, 11)]
+
+    # Act
+    merged = pa.Table.from_batches(
+        list(AdaptiveExtractor._merge_by_row_index(batches, rows, schema)),
+    )
+
+    # Assert
+    assert merged.column("row_index").to_pylist() == list(range(1, 12))
+    assert merged.column("value").to_pylist().count("new") == 5
+
+
+def test_base_extractor_run_scans_only_changed_rows(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как extractor на BaseExtractor, я хочу в инкрементальном run() получать
+    в общем проходе только измененные строки, а отпечатки хранить в своем
+    файле, чтобы запуск другого extractor не скрывал от меня изменения.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    from onec_dtools.database_reader import DatabaseReader
+
+    import src.extractors.base_extractor as base_extractor
+    from src.extractors.scan_scheduler import ScanScheduler
+    from src.utils.incremental_state import state_file_for
+
+    monkeypatch.setattr(base_extractor, "DatabaseReader", DatabaseReader)
+
+    class TableExtractor(base_extractor.BaseExtractor):
+        def extract(self):
+            return ScanScheduler([self]).scan(self.db)[0]
+
+        def begin_scan(self):
+            self.rows = []
+            return {"_DOCUMENT156": None}
+
+        def visit_row(self, table_name, row_index, row):
+            self.rows.append(row_index)
+
+        def finish_scan(self):
+            return {"rows": self.rows}
+
+    class OtherExtractor(TableExtractor):
+        pass
+
+    db_path = str(tmp_path / "1Cv8.1CD")
+    rows = make_document_rows(20)
+    write_database(db_path, rows)
+    first = TableExtractor(db_path, incremental=True).run()
+
+    rows += make_document_rows(25)[20:]
+    write_database(db_path, rows)
+
+    # Act
+    second = TableExtractor(db_path, incremental=True).run()
+    other = OtherExtractor(db_path, incremental=True).run()
+
+    # Assert
+    assert first["rows"] == list(range(20))
+    assert second["rows"] == list(range(20, 25))
+    assert second["metadata"]["incremental"] is True
+    assert other["rows"] == list(range(25))
+    assert os.path.exists(state_file_for("TableExtractor"))
+    assert os.path.exists(state_file_for("OtherExtractor"))
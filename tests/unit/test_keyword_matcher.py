@@ -0,0 +1,145 @@
+"""
+Unit тесты для многошаблонного поиска ключевых слов (KeywordMatcher)
+Согласно TDD Documentation Standard
+"""
+
+from unittest.mock import Mock
+
+from src.utils.keyword_matcher import KeywordHit, KeywordMatcher, get_matcher
+from src.utils.keyword_searcher import KeywordSearcher
+
+
+class TestKeywordMatcher:
+    """Тесты для скомпилированного набора ключевых слов"""
+
+    def test_finds_overlapping_hits_with_offsets(self):
+        """
+        JTBD:
+        Как поисковик, я хочу получать все вхождения, включая вложенные
+        и перекрывающиеся слова, с их смещениями за один проход по тексту.
+        """
+        # Arrange
+        matcher = KeywordMatcher(["цвет", "цветы", "яндекс маркет", "маркет"])
+
+        # Act
+        hits = matcher.find_all("Цветы: Яндекс Маркет, цвет")
+
+        # Assert
+        assert hits == [
+            KeywordHit("цвет", 0, 4),
+            KeywordHit("цветы", 0, 5),
+            KeywordHit("яндекс маркет", 7, 20),
+            KeywordHit("маркет", 14, 20),
+            KeywordHit("цвет", 22, 26),
+        ]
+
+    def test_found_matches_substring_search(self):
+        """
+        JTBD:
+        Как замена цикла по ключевым словам, я хочу находить тот же набор
+        слов, что и проверка keyword.lower() in text.lower().
+        """
+        # Arrange
+        searcher = KeywordSearcher()
+        keywords = searcher.quality_keywords + [
+            keyword
+            for keyword_list in searcher.document_type_keywords.values()
+            for keyword in keyword_list
+        ]
+        text = "Поступление товара на склад: Розы, брак 2 шт, корректировка остатков"
+
+        # Act
+        found = KeywordMatcher(keywords).found(text)
+
+        # Assert
+        expected = list(
+            dict.fromkeys(k for k in keywords if k.lower() in text.lower()),
+        )
+        assert found == expected
+
+    def test_case_variants_and_empty_inputs(self):
+        """
+        JTBD:
+        Как поисковик, я хочу сохранять исходное написание слова в результате
+        и корректно обрабатывать пустые набор слов и текст.
+        """
+        # Arrange
+        matcher = KeywordMatcher(["Склад", "склад", ""])
+
+        # Act
+        found = matcher.found("СКЛАД отгрузки")
+
+        # Assert
+        assert found == ["Склад", "склад"]
+        assert KeywordMatcher([]).find_all("склад") == []
+        assert matcher.find_all("") == []
+
+    def test_get_matcher_is_shared(self):
+        """
+        JTBD:
+        Как набор поисковиков, я хочу использовать один скомпилированный
+        объект на набор слов, чтобы не компилировать его на каждую запись.
+        """
+        # Act
+        first = get_matcher(["роз", "букет"])
+        second = get_matcher(["роз", "букет"])
+
+        # Assert
+        assert first is second
+
+
+def test_keyword_searcher_searches_blob_content():
+    """
+    JTBD:
+    Как KeywordSearcher, я хочу искать слова в содержимом BLOB
+    и возвращать смещение найденного слова.
+    """
+    # Arrange
+    searcher = KeywordSearcher()
+    blob = Mock()
+    blob.value = "Букет роз Магазин Братиславский"
+    searcher.blob_processor.is_blob_field = Mock(return_value=True)
+
+    # Act
+    result = searcher.search_keywords_in_record({"_FLD103": blob}, ["магазин", "роз"])
+
+    # Assert
+    offsets = {match["keyword"]: match["offset"] for match in result.matches}
+    assert sorted(result.found_keywords) == ["магазин", "роз"]
+    assert offsets == {"роз": 6, "магазин": 10}
+
+
+def test_search_extractors_match_substring_search():
+    """
+    JTBD:
+    Как поисковые extractors, я хочу находить через общий набор те же
+    ключевые слова полей, что и поиск подстроки по каждому слову.
+    """
+    # Arrange
+    from src.extractors.search_all_missing_documents import (
+        AllMissingDocumentsExtractor,
+    )
+    from src.extractors.search_quality_documents import QualityDocumentsExtractor
+
+    value = "Розовый БУКЕТ премиум, склад №2: брак"
+    quality = QualityDocumentsExtractor()
+    quality.begin_scan()
+    missing = AllMissingDocumentsExtractor()
+    missing.begin_scan()
+
+    # Act
+    quality.visit_row("_DOCUMENT156", 0, {"_FLD103": value, "_FLD104": 7})
+    missing.visit_row("_Reference90", 0, {"_DESCRIPTION": value})
+
+    # Assert
+    assert [doc["keyword"] for doc in quality.quality_docs] == [
+        keyword
+        for keyword in quality.quality_keywords
+        if keyword.lower() in value.lower()
+    ]
+    assert [(m["category"], m["keyword"]) for m in missing.jtbd_matches] == [
+        (category, keyword)
+        for category, keywords in missing.jtbd_keywords.items()
+        for keyword in keywords
+        if keyword in value.lower()
+    ]
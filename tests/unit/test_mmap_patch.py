@@ -0,0 +1,139 @@
+"""
+Unit тесты для mmap патча onec_dtools
+Согласно TDD Documentation Standard
+"""
+
+import pickle
+
+import pytest
+
+from patches.onec_dtools.mmap_patch import MmapFile, open_mmap_database
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+@pytest.fixture
+def sample_db(tmp_path, monkeypatch):
+    """Синтетическая 1CD база с пустыми строками и BLOB полями"""
+    restore_onec_dtools(monkeypatch)
+    return write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=40, empty_every=7)
+
+
+def read_all(db):
+    table = db.tables["_DOCUMENT156"]
+    return [
+        None if table[i].is_empty else table[i].as_list(True) for i in range(len(table))
+    ]
+
+
+class TestMmapFile:
+    """Тесты для файла, отображенного в память"""
+
+    def test_read_returns_memoryview_slices(self, tmp_path):
+        """
+        JTBD:
+        Как источник данных, я хочу отдавать срезы memoryview,
+        чтобы чтение страниц не копировало байты.
+        """
+        # Arrange
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"0123456789")
+
+        # Act
+        with MmapFile(str(path)) as f:
+            f.seek(2)
+            chunk = f.read(3)
+            position = f.tell()
+            rest = bytes(f.read())
+
+        # Assert
+        assert isinstance(chunk, memoryview)
+        assert position == 5
+        assert rest == b"56789"
+
+    def test_pickle_reopens_by_path(self, tmp_path):
+        """
+        JTBD:
+        Как рабочий процесс, я хочу получать файл по пути и отображать его сам,
+        чтобы процессы делили страницы через page cache ОС.
+        """
+        # Arrange
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"abc")
+
+        # Act
+        with MmapFile(str(path)) as f:
+            clone = pickle.loads(pickle.dumps(f))
+
+        # Assert
+        assert bytes(clone.read()) == b"abc"
+        clone.close()
+
+
+def test_mmap_reader_matches_buffered_reader(sample_db):
+    """
+    JTBD:
+    Как DatabaseReader в режиме mmap, я хочу возвращать те же строки и BLOB,
+    что и при чтении обычного файла, чтобы режим включался без риска.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    with open(sample_db, "rb") as f:
+        expected = read_all(DatabaseReader(f))
+
+    # Act
+    db_file, db = open_mmap_database(sample_db)
+    rows = read_all(db)
+    db_file.close()
+
+    # Assert
+    assert rows == expected
+    assert rows[0][-1] == "Букет роз №0 ПЦ022"
+    assert isinstance(rows[0][0], bytes)
+
+
+def test_blob_objects_share_allocation_table(sample_db):
+    """
+    JTBD:
+    Как читатель BLOB, я хочу читать таблицу размещения BLOB объекта один раз,
+    чтобы каждое BLOB поле не перечитывало страницы заголовка.
+    """
+    # Arrange
+    db_file, db = open_mmap_database(sample_db)
+    table = db.tables["_DOCUMENT156"]
+    len(table)
+
+    # Act
+    for i in range(5):
+        table[i].as_list(True)
+
+    # Assert
+    # Корневой объект, данные таблицы и один BLOB объект на все строки
+    assert set(db_file.objects) == {2, table.data_offset, table.blob_offset}
+    db_file.close()
+
+
+def test_parallel_extraction_with_mmap(tmp_path, monkeypatch, sample_db):
+    """
+    JTBD:
+    Как координатор партиций, я хочу запускать процессы в режиме mmap,
+    чтобы каждый процесс читал свой диапазон из общего page cache.
+    """
+    # Arrange
+    monkeypatch.chdir(tmp_path)
+    from src.utils.parallel_extractor import ParallelTableExtractor
+
+    parallel = ParallelTableExtractor(
+        db_path=sample_db,
+        workers=1,
+        output_dir=str(tmp_path / "shards"),
+        rows_per_partition=15,
+        use_mmap=True,
+    )
+
+    # Act
+    summary = parallel.extract_table("_DOCUMENT156")
+
+    # Assert
+    assert summary["records"] == 35
+    assert summary["failed_partitions"] == []
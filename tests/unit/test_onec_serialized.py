@@ -0,0 +1,201 @@
+"""
+Unit тесты для разбора сериализованных значений 1С (onec_serialized)
+Согласно TDD Documentation Standard
+"""
+
+import zlib
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.utils.onec_serialized import (
+    OneCParseError,
+    OneCRef,
+    business_projection,
+    get_path,
+    iter_tokens,
+    parse,
+    parse_blob,
+    project,
+    projection_to_json,
+)
+
+TYPE_ID = "acf6192e-81ca-46ef-93a6-5a6968b78663"
+SAMPLE = (
+    '{1,\r\n{"#",' + TYPE_ID + ",1:80c5000c29c3f3a411e8},\r\n"
+    '{"S","Магазин Братиславский (ПЦ022)"},{"N",1250.50},'
+    '{"D",20230315120000},{"B",1},{"U"},\r\n'
+    '{"S","Букет ""Розовый"""},{-3,0.5}}'
+)
+
+
+class TestParse:
+    """Тесты для токенизатора и парсера"""
+
+    def test_typed_values(self):
+        """
+        JTBD:
+        Как выгрузка BLOB, я хочу получать из сериализованного значения
+        ссылки, строки, числа, даты и булевы значения в типизированном виде.
+        """
+        # Act
+        value = parse(SAMPLE)
+
+        # Assert
+        assert value == [
+            1,
+            OneCRef(TYPE_ID, "1:80c5000c29c3f3a411e8"),
+            "Магазин Братиславский (ПЦ022)",
+            Decimal("1250.50"),
+            datetime(2023, 3, 15, 12, 0),
+            True,
+            None,
+            'Букет "Розовый"',
+            [-3, Decimal("0.5")],
+        ]
+        assert get_path(value, (8, 1)) == Decimal("0.5")
+        assert get_path(value, (9, 0)) is None
+
+    def test_untyped_keeps_tags(self):
+        """
+        JTBD:
+        Как анализ формата, я хочу получать исходные списки с тегами,
+        если типизация не нужна.
+        """
+        # Act
+        value = parse('{"S","ПЦ022"}', typed=False)
+        tokens = [kind for kind, _value in iter_tokens('{"S",1}')]
+
+        # Assert
+        assert value == ["S", "ПЦ022"]
+        assert tokens == ["open", "string", "atom", "close"]
+
+    @pytest.mark.parametrize("text", ["{1,{2}", "{1}}"])
+    def test_unbalanced_braces(self, text):
+        """
+        JTBD:
+        Как парсер, я хочу сообщать о нарушенной структуре скобок,
+        а не возвращать частичный результат.
+        """
+        # Act & Assert
+        with pytest.raises(OneCParseError):
+            parse(text)
+
+    def test_deep_nesting_without_recursion(self):
+        """
+        JTBD:
+        Как парсер, я хочу разбирать глубоко вложенные значения без
+        переполнения стека рекурсии.
+        """
+        # Act
+        value = parse("{" * 5000 + "1" + "}" * 5000)
+
+        # Assert
+        assert project(value)["number"] == [1]
+
+
+class TestParseBlob:
+    """Тесты для разбора BLOB значений"""
+
+    @pytest.mark.parametrize(
+        "blob",
+        [
+            SAMPLE.encode("utf-16-le"),
+            SAMPLE.encode("utf-8-sig"),
+            zlib.compress(SAMPLE.encode()),
+            zlib.compress(SAMPLE.encode())[2:-4],
+        ],
+        ids=["utf16", "utf8_bom", "zlib", "raw_deflate"],
+    )
+    def test_encoded_and_compressed(self, blob):
+        """
+        JTBD:
+        Как выгрузка BLOB, я хочу разбирать сериализованные значения
+        в UTF-16, UTF-8 с BOM и сжатые deflate одинаково.
+        """
+        # Act
+        value = parse_blob(blob)
+
+        # Assert
+        assert project(value)["string"] == [
+            "Магазин Братиславский (ПЦ022)",
+            'Букет "Розовый"',
+        ]
+
+    def test_non_serialized_content(self):
+        """
+        JTBD:
+        Как выгрузка BLOB, я хочу получать None для JSON, текста и файлов,
+        чтобы обрабатывать их прежним способом.
+        """
+        # Act & Assert
+        assert parse_blob('{"name": "test"}') is None
+        assert parse_blob("Букет роз".encode()) is None
+        assert parse_blob(b"\xff\xd8\xff\xe0\x00\x10JFIF") is None
+
+    def test_projection_to_json(self):
+        """
+        JTBD:
+        Как запись документа в JSON, я хочу получать проекцию без Decimal,
+        datetime и OneCRef.
+        """
+        # Act
+        projection = projection_to_json(project(parse(SAMPLE)))
+
+        # Assert
+        assert projection["number"] == [1.0, 1250.5, -3.0, 0.5]
+        assert projection["date"] == ["2023-03-15T12:00:00"]
+        assert projection["ref"] == [
+            {"type_id": TYPE_ID, "value": "1:80c5000c29c3f3a411e8"},
+        ]
+        assert projection["bool"] == [True]
+
+    def test_business_projection(self):
+        """
+        JTBD:
+        Как конвертация в Parquet, я хочу получать магазин, номенклатуру
+        и сумму из типизированных листьев, а не поиском подстрок по тексту,
+        одинаково из проекции и из ее JSON вида.
+        """
+        # Arrange
+        projection = project(parse(SAMPLE))
+
+        # Act
+        values = business_projection(projection)
+        json_values = business_projection(projection_to_json(projection))
+
+        # Assert
+        assert values == {
+            "store_name": "Магазин Братиславский (ПЦ022)",
+            "nomenclature": ['Букет "Розовый"'],
+            "amount": 1251.0,
+        }
+        assert json_values == values
+        assert business_projection({}) == {
+            "store_name": None,
+            "nomenclature": [],
+            "amount": None,
+        }
+
+
+def test_leaves_to_arrow():
+    """
+    JTBD:
+    Как запись в Parquet, я хочу получать листья значения как pyarrow.Table
+    с путями и типизированными колонками.
+    """
+    # Arrange
+    pytest.importorskip("pyarrow")
+    from src.utils.onec_serialized import leaves_to_arrow
+
+    # Act
+    table = leaves_to_arrow(parse(SAMPLE))
+
+    # Assert
+    assert table.num_rows == 10
+    rows = table.to_pylist()
+    assert rows[2]["path"] == "2"
+    assert rows[2]["string_value"] == "Магазин Братиславский (ПЦ022)"
+    assert rows[3]["number_value"] == 1250.5
+    assert rows[1]["ref_type"] == TYPE_ID
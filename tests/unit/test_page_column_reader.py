@@ -0,0 +1,251 @@
+"""
+Unit тесты для колоночного чтения страниц (PageColumnReader)
+Согласно TDD Documentation Standard
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from patches.onec_dtools.mmap_patch import open_mmap_database
+from src.utils.page_column_reader import (
+    PageColumnReader,
+    decode_datetime,
+    decode_numeric,
+    fixed_width_columns,
+)
+from src.utils.row_decoder import CompiledRowDecoder
+from src.utils.table_reader import TableReader
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    document_table_fields,
+    encode_datetime,
+    encode_numeric,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+NUMERIC_COLUMNS = ["_MARKED", "_DATE_TIME", "_POSTED", "_FLD100", "_FLD101"]
+
+
+@pytest.fixture
+def journal_db(tmp_path, monkeypatch):
+    """Журнал на несколько страниц с пустыми строками и NULL полями"""
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    fields = [
+        *document_table_fields(),
+        FieldSpec("_FLD104", "N", 11, 3, null_exists=True),
+        FieldSpec("_FLD105", "DT", null_exists=True),
+    ]
+    rows = make_document_rows(300, empty_every=7)
+    for i, row in enumerate(rows):
+        if row is not None:
+            row["_FLD101"] = -i if i % 3 else i
+            row["_FLD104"] = None if i % 4 == 0 else i / 8
+            row["_FLD105"] = (
+                None if i % 5 == 0 else datetime(2023, 12, 31, 23, 59, i % 60)
+            )
+
+    writer = Synthetic1CDWriter()
+    writer.add_table("_DOCUMENTJOURNAL5354", fields, rows)
+    return writer.write(str(tmp_path / "1Cv8.1CD"))
+
+
+def expected_rows(table, columns):
+    """Значения построчного декодера для сравнения"""
+    decoder = CompiledRowDecoder.from_table(table, columns=columns)
+    return [
+        dict(zip(decoder.names, decoder.decode(row)))
+        for row in table
+        if not row.is_empty
+    ]
+
+
+class TestDecodeKernels:
+    """Тесты для векторных ядер BCD"""
+
+    def test_numeric_kernel_matches_encoding(self):
+        """
+        JTBD:
+        Как колоночный reader, я хочу разбирать BCD Numeric всей колонкой,
+        чтобы суммы и количества получались без строки цифр на значение.
+        """
+        # Arrange
+        values = [0, 123.45, -99.5, 1e10 + 0.01]
+        data = np.frombuffer(
+            b"".join(encode_numeric(v, 15, 2) for v in values),
+            dtype=np.uint8,
+        ).reshape(len(values), -1)
+
+        # Act
+        decoded, invalid = decode_numeric(data, 15, 2)
+
+        # Assert
+        assert decoded.tolist() == values
+        assert not invalid.any()
+        # Четная длина: последняя тетрада - выравнивание, а не цифра
+        even = np.frombuffer(encode_numeric(-0.125, 10, 3), dtype=np.uint8)
+        assert decode_numeric(even.reshape(1, -1), 10, 3)[0].tolist() == [-0.125]
+
+    def test_datetime_kernel_nulls_empty_and_invalid(self):
+        """
+        JTBD:
+        Как колоночный reader, я хочу получать null для пустой (0000 год)
+        и невозможной даты, чтобы мусор в странице не становился датой.
+        """
+        # Arrange
+        raw = [
+            encode_datetime(datetime(2024, 2, 29, 10, 30, 5)),
+            encode_datetime(None),
+            bytes.fromhex("20230231000000"),
+        ]
+        data = np.frombuffer(b"".join(raw), dtype=np.uint8).reshape(3, 7)
+
+        # Act
+        decoded, invalid = decode_datetime(data)
+
+        # Assert
+        assert decoded[0] == np.datetime64("2024-02-29T10:30:05")
+        assert invalid.tolist() == [False, True, True]
+
+
+class TestPageColumnReader:
+    """Тесты для постраничной выгрузки в Arrow"""
+
+    def test_batches_match_row_decoder(self, journal_db):
+        """
+        JTBD:
+        Как аналитик журналов, я хочу получать из постраничного чтения те же
+        значения, что и из построчного декодера, чтобы быстрый путь не менял
+        данные выгрузки.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        columns = [*NUMERIC_COLUMNS, "_IDRREF", "_VERSION", "_FLD104", "_FLD105"]
+
+        # Act
+        with open(journal_db, "rb") as f:
+            table = DatabaseReader(f).tables["_DOCUMENTJOURNAL5354"]
+            reader = PageColumnReader(table)
+            # Пакеты не кратны строкам страницы: строки на границе страниц
+            batches = list(reader.iter_batches(columns, batch_rows=37))
+            expected = expected_rows(table, columns)
+
+        # Assert
+        result = pa.Table.from_batches(batches)
+        assert len(batches) == 9
+        assert result.num_rows == len(expected) == 258
+        assert result.schema.field("_FLD101").type == pa.int64()
+        assert result.schema.field("_DATE_TIME").type == pa.timestamp("s")
+        assert result.to_pylist() == expected
+        assert reader.invalid_values == {}
+
+    def test_even_length_numeric_matches_row_decoder(self, tmp_path, monkeypatch):
+        """
+        JTBD:
+        Как выгрузка сумм N(10,2), я хочу получать одно и то же число из
+        постраничного чтения и построчного декодера, чтобы тетрада
+        выравнивания четной длины не попадала в целую часть.
+        """
+        # Arrange
+        restore_onec_dtools(monkeypatch)
+        from onec_dtools.database_reader import DatabaseReader
+
+        values = [0.0, 12345678.91, -0.05, 99.99]
+        rows = make_document_rows(len(values))
+        for row, value in zip(rows, values):
+            row["_FLD110"] = value
+        writer = Synthetic1CDWriter()
+        writer.add_table(
+            "_DOCUMENT156",
+            [*document_table_fields(), FieldSpec("_FLD110", "N", 10, 2)],
+            rows,
+        )
+        db_path = writer.write(str(tmp_path / "1Cv8.1CD"))
+
+        # Act
+        with open(db_path, "rb") as f:
+            table = DatabaseReader(f).tables["_DOCUMENT156"]
+            batches = list(PageColumnReader(table).iter_batches(["_FLD110"]))
+            expected = expected_rows(table, ["_FLD110"])
+
+        # Assert
+        assert [row["_FLD110"] for row in expected] == values
+        assert pa.Table.from_batches(batches).to_pylist() == expected
+
+    def test_mmap_and_row_index(self, journal_db):
+        """
+        JTBD:
+        Как выгрузка через mmap, я хочу получать колонки поверх страниц
+        без копирования и с номером строки таблицы, чтобы соединять
+        колоночную проекцию с построчной выгрузкой.
+        """
+        # Arrange
+        db_file, db = open_mmap_database(journal_db)
+
+        # Act
+        try:
+            table = db.tables["_DOCUMENTJOURNAL5354"]
+            result = PageColumnReader(table).read_table(
+                ["_FLD100"],
+                start=5,
+                stop=20,
+                row_index="row_index",
+            )
+            rows = dict(TableReader(table).iter_rows(["_FLD100"], start=5, stop=20))
+        finally:
+            db_file.close()
+
+        # Assert
+        assert result.column_names == ["row_index", "_FLD100"]
+        assert result.column("row_index").to_pylist() == list(rows)
+        assert 6 not in rows and 13 not in rows
+        assert result.column("_FLD100").to_pylist() == [
+            row["_FLD100"] for row in rows.values()
+        ]
+
+    def test_variable_fields_are_rejected(self, journal_db):
+        """
+        JTBD:
+        Как разработчик, я хочу явную ошибку для NVC и BLOB полей,
+        чтобы они читались через TableReader, а не выгружались байтами.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        with open(journal_db, "rb") as f:
+            table = DatabaseReader(f).tables["_DOCUMENTJOURNAL5354"]
+
+            # Act / Assert
+            assert "_FLD102" not in fixed_width_columns(table)
+            assert "_FLD103" not in fixed_width_columns(table)
+            with pytest.raises(ValueError, match="TableReader"):
+                PageColumnReader(table).schema(["_FLD102"])
+
+    def test_write_parquet(self, journal_db, tmp_path):
+        """
+        JTBD:
+        Как аналитик, я хочу выгружать числовую проекцию журнала в Parquet,
+        чтобы считать суммы в DuckDB без построчного извлечения.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        output = str(tmp_path / "journal.parquet")
+
+        # Act
+        with open(journal_db, "rb") as f:
+            table = DatabaseReader(f).tables["_DOCUMENTJOURNAL5354"]
+            written = PageColumnReader(table).write_parquet(output, NUMERIC_COLUMNS)
+
+        # Assert
+        result = pq.read_table(output)
+        assert written == result.num_rows == 258
+        assert result.column_names == NUMERIC_COLUMNS
+        assert result.column("_FLD100").to_pylist()[:2] == [100.0, 101.5]
@@ -0,0 +1,344 @@
+"""
+Unit тесты для ParallelTableExtractor
+Согласно TDD Documentation Standard
+"""
+
+import json
+
+import pytest
+
+from src.utils.parallel_extractor import (
+    ParallelTableExtractor,
+    TablePartition,
+    clip_partitions,
+    iter_shards,
+    merge_shards,
+    plan_partitions,
+    read_shards,
+    to_document,
+)
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+@pytest.fixture
+def real_onec_dtools(monkeypatch):
+    """Настоящий onec_dtools для чтения синтетической базы"""
+    restore_onec_dtools(monkeypatch)
+
+
+class TestPlanPartitions:
+    """Тесты для планирования партиций"""
+
+    def test_partitions_cover_table_without_overlap(self):
+        """
+        JTBD:
+        Как планировщик, я хочу разбить таблицу на непрерывные диапазоны,
+        чтобы каждая строка была извлечена ровно одним процессом.
+        """
+        # Act
+        partitions = plan_partitions("_DOCUMENT156", 1001, workers=4)
+
+        # Assert
+        assert partitions[0].start_row == 0
+        assert partitions[-1].stop_row == 1001
+        for previous, current in zip(partitions, partitions[1:]):
+            assert previous.stop_row == current.start_row
+        assert sum(partition.rows for partition in partitions) == 1001
+        assert [partition.index for partition in partitions] == list(
+            range(len(partitions)),
+        )
+
+    def test_partitions_respect_rows_per_partition(self):
+        """
+        JTBD:
+        Как планировщик, я хочу ограничить размер партиции,
+        чтобы память рабочего процесса не зависела от размера таблицы.
+        """
+        # Act
+        partitions = plan_partitions(
+            "_DOCUMENTJOURNAL5354",
+            10_000,
+            workers=2,
+            rows_per_partition=1_000,
+        )
+
+        # Assert
+        assert len(partitions) == 10
+        assert max(partition.rows for partition in partitions) <= 1_000
+
+    def test_empty_table_has_no_partitions(self):
+        """
+        JTBD:
+        Как планировщик, я хочу пропускать пустые таблицы,
+        чтобы не запускать процессы без работы.
+        """
+        assert plan_partitions("_DOCUMENT156", 0, workers=4) == []
+
+
+class TestParallelTableExtractor:
+    """Тесты для параллельного извлечения на синтетической 1CD базе"""
+
+    def test_parallel_matches_sequential_extraction(
+        self, tmp_path, monkeypatch, real_onec_dtools
+    ):
+        """
+        JTBD:
+        Как координатор, я хочу получить из шардов те же записи, что и при
+        последовательном извлечении, чтобы параллельный режим был безопасен.
+        """
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        db_path = write_sample_database(
+            str(tmp_path / "1Cv8.1CD"),
+            rows=600,
+            empty_every=9,
+        )
+        from onec_dtools.database_reader import DatabaseReader
+
+        from src.adaptive_extractor import AdaptiveExtractor
+
+        with open(db_path, "rb") as f:
+            db = DatabaseReader(f)
+            sequential = AdaptiveExtractor().extract_table_data(
+                "_DOCUMENT156",
+                db.tables["_DOCUMENT156"],
+                checkpoints=False,
+            )
+
+        extractor = ParallelTableExtractor(
+            db_path=db_path,
+            workers=2,
+            output_dir=str(tmp_path / "shards"),
+            rows_per_partition=150,
+        )
+
+        # Act
+        summary = extractor.extract_table(
+            "_DOCUMENT156",
+            merged_file=str(tmp_path / "merged.jsonl"),
+        )
+
+        # Assert
+        assert summary["partitions"] == 4
+        assert summary["failed_partitions"] == []
+        assert summary["records"] == len(sequential) == 600 - 600 // 9
+        assert summary["stats"]["successful_records"] == len(sequential)
+        merged = read_shards(summary["shards"])
+        assert [record["id"] for record in merged] == [
+            record["id"] for record in sequential
+        ]
+        assert summary["merged_records"] == len(sequential)
+
+    def test_max_records_limits_partitioned_extraction(
+        self, tmp_path, monkeypatch, real_onec_dtools
+    ):
+        """
+        JTBD:
+        Как пользователь, я хочу ограничить число строк в параллельном режиме,
+        чтобы быстро проверить извлечение на части таблицы.
+        """
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=200)
+        extractor = ParallelTableExtractor(
+            db_path=db_path,
+            workers=1,
+            output_dir=str(tmp_path / "shards"),
+            rows_per_partition=40,
+        )
+
+        # Act
+        summary = extractor.extract_table("_DOCUMENT156", max_records=100)
+
+        # Assert
+        assert summary["total_rows"] == 100
+        assert summary["records"] == 100
+        assert read_shards(summary["shards"])[-1]["row_index"] == 100
+
+    def test_resume_after_partition_size_change_keeps_committed_shards(
+        self, tmp_path, monkeypatch, real_onec_dtools
+    ):
+        """
+        JTBD:
+        Как координатор, я хочу возобновлять извлечение после смены
+        rows_per_partition, чтобы шард с тем же номером партиции
+        не перезаписал готовый шард другого диапазона строк.
+        """
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=100)
+
+        def run(rows_per_partition, partitions_before_stop=None):
+            calls = []
+
+            def should_stop():
+                calls.append(1)
+                return (
+                    partitions_before_stop is not None
+                    and len(calls) > partitions_before_stop
+                )
+
+            extractor = ParallelTableExtractor(
+                db_path=db_path,
+                workers=1,
+                output_dir=str(tmp_path / "shards"),
+                rows_per_partition=rows_per_partition,
+            )
+            return extractor.extract_table("_DOCUMENT156", should_stop=should_stop)
+
+        # Act
+        run(40, partitions_before_stop=1)
+        run(30, partitions_before_stop=1)
+        summary = run(40)
+
+        # Assert
+        assert [record["row_index"] for record in read_shards(summary["shards"])] == (
+            list(range(1, 101))
+        )
+
+    def test_planned_partitions_drive_extraction(
+        self, tmp_path, monkeypatch, real_onec_dtools
+    ):
+        """
+        JTBD:
+        Как оркестратор, я хочу извлекать таблицу по партициям задачи плана,
+        чтобы диапазоны строк из manifest планировщика и были шардами.
+        """
+        # Arrange
+        monkeypatch.chdir(tmp_path)
+        db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=100)
+        planned = [
+            TablePartition("_DOCUMENT156", 0, 0, 70),
+            TablePartition("_DOCUMENT156", 1, 70, 100),
+        ]
+        extractor = ParallelTableExtractor(
+            db_path=db_path,
+            workers=1,
+            output_dir=str(tmp_path / "shards"),
+            rows_per_partition=10,
+        )
+
+        # Act
+        summary = extractor.extract_table("_DOCUMENT156", partitions=planned)
+
+        # Assert
+        assert summary["partitions"] == 2
+        assert [
+            record["row_index"] for record in read_shards(summary["shards"])
+        ] == list(range(1, 101))
+
+
+def test_clip_partitions_to_limit_or_fall_back():
+    """
+    JTBD:
+    Как координатор, я хочу обрезать партиции плана по лимиту строк и
+    отбрасывать план, который не покрывает таблицу, чтобы не терять строки.
+    """
+    # Arrange
+    planned = plan_partitions("_DOCUMENT156", 400, workers=1, rows_per_partition=100)
+
+    # Act
+    clipped = clip_partitions(planned, 150)
+    stale = clip_partitions(planned, 500)
+
+    # Assert
+    assert [(p.start_row, p.stop_row) for p in clipped] == [(0, 100), (100, 150)]
+    assert stale == []
+    assert clip_partitions(planned[1:], 400) == []
+
+
+def test_to_document_matches_sequential_document_shape():
+    """
+    JTBD:
+    Как координатор, я хочу записывать документы пула в той же форме,
+    что и последовательный путь, чтобы JSONL секция, индекс и Parquet
+    таблицы не зависели от числа процессов.
+    """
+    # Arrange
+    record = {
+        "id": "_DOCUMENT156_8",
+        "table_name": "_DOCUMENT156",
+        "row_index": 8,
+        "fields": {
+            "_NUMBER": "000123",
+            "_DATE_TIME": "2024-03-01 10:30:00",
+            "_FLD4239": 1500.0,
+            "amount__FLD4239": 1500.0,
+        },
+        "blobs": {"_FLD100": {"size": 3}},
+        "extraction_stats": {"total_blobs": 1, "successful": 1, "failed": 0},
+    }
+    positional_names = {
+        "_NUMBER": "field_1",
+        "_DATE_TIME": "field_2",
+        "_FLD4239": "field_5",
+        "_FLD100": "field_7",
+    }
+
+    # Act
+    document = to_document(record, positional_names, ordinal=3)
+
+    # Assert
+    assert document["id"] == "_DOCUMENT156_3"
+    assert document["row_index"] == 7
+    assert document["fields"] == {
+        "field_1": "000123",
+        "field_2": "2024-03-01 10:30:00",
+        "field_5": 1500.0,
+    }
+    assert document["blobs"] == {"field_7": {"size": 3}}
+    assert document["document_number"] == "000123"
+    assert document["document_date"] == "2024-03-01T10:30:00"
+    assert document["total_amount"] == 0.0
+
+
+def test_merge_shards_keeps_partition_order(tmp_path):
+    """
+    JTBD:
+    Как координатор, я хочу объединять шарды в порядке партиций,
+    чтобы итоговый файл сохранял порядок строк таблицы.
+    """
+    # Arrange
+    shards = []
+    for index in range(3):
+        shard = tmp_path / f"part-{index:05d}.jsonl"
+        shard.write_text(
+            json.dumps({"row_index": index}) + "\n",
+            encoding="utf-8",
+        )
+        shards.append(str(shard))
+
+    # Act
+    merged = merge_shards(shards, str(tmp_path / "merged.jsonl"))
+
+    # Assert
+    assert merged == 3
+    lines = (tmp_path / "merged.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["row_index"] for line in lines] == [0, 1, 2]
+
+
+def test_iter_shards_streams_records_in_partition_order(tmp_path):
+    """
+    JTBD:
+    Как координатор, я хочу читать записи шардов потоково,
+    чтобы передавать их в JSONL секции и индекс без списка в памяти.
+    """
+    # Arrange
+    shards = []
+    for index in range(2):
+        shard = tmp_path / f"part-{index:05d}.jsonl"
+        shard.write_text(
+            json.dumps({"row_index": index * 2})
+            + "\n\n"
+            + json.dumps({"row_index": index * 2 + 1})
+            + "\n",
+            encoding="utf-8",
+        )
+        shards.append(str(shard))
+
+    # Act
+    records = iter_shards(shards)
+
+    # Assert
+    assert not isinstance(records, list)
+    assert [record["row_index"] for record in records] == [0, 1, 2, 3]
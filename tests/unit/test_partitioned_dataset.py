@@ -0,0 +1,254 @@
+"""
+Unit тесты для Hive-партиционированного Parquet датасета
+Согласно TDD Documentation Standard
+"""
+
+import os
+from datetime import datetime
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.incremental_state import IncrementalState
+from src.utils.partitioned_dataset import (
+    DEFAULT_PARTITION,
+    PartitionedParquetSink,
+    create_dataset_view,
+    partition_value,
+    read_dataset,
+)
+from tests.fixtures.synthetic_1cd import (
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("table_name", pa.string()),
+        ("document_type", pa.string()),
+        ("document_date", pa.timestamp("s")),
+        ("store_code", pa.string()),
+        ("total_amount", pa.float64()),
+    ],
+)
+
+
+def make_rows(count):
+    """Документы двух таблиц за три месяца, часть без типа"""
+    return [
+        {
+            "id": str(i),
+            "table_name": "_DOCUMENT156" if i % 2 else "_DOCUMENT138",
+            "document_type": None if i % 5 == 0 else "Реализация",
+            "document_date": datetime(2024, 1 + i % 3, 28 - i % 20, 10),
+            "store_code": f"ПЦ0{i % 4}",
+            "total_amount": float(i),
+        }
+        for i in range(count)
+    ]
+
+
+def write_dataset(root, rows, **options):
+    with PartitionedParquetSink(str(root), schema=SCHEMA, **options) as sink:
+        sink.write_rows(rows)
+    return sink
+
+
+class TestPartitionedParquetSink:
+    """Тесты для записи датасета по партициям"""
+
+    def test_layout_sorted_row_groups_and_statistics(self, tmp_path):
+        """
+        JTBD:
+        Как аналитик, я хочу получать файлы по таблице, типу документа
+        и месяцу с отсортированными по дате группами строк и статистикой,
+        чтобы DuckDB пропускал ненужные каталоги и группы строк.
+        """
+        # Act
+        sink = write_dataset(tmp_path / "documents", make_rows(120), row_group_size=8)
+
+        # Assert
+        assert sink.rows_written == 120
+        assert len(sink.files) == 12
+        relative = os.path.relpath(sink.files[0], tmp_path / "documents")
+        assert relative.split(os.sep)[0].startswith("table_name=_DOCUMENT")
+        assert any(f"document_type={DEFAULT_PARTITION}" in p for p in sink.files)
+
+        metadata = pq.ParquetFile(sink.files[0]).metadata
+        assert metadata.schema.to_arrow_schema().names == [
+            "id",
+            "document_date",
+            "store_code",
+            "total_amount",
+        ]
+        assert metadata.num_row_groups > 1
+        sorting = metadata.row_group(0).sorting_columns
+        assert sorting[0].column_index == 1
+        dates = pq.read_table(sink.files[0]).column("document_date").to_pylist()
+        assert dates == sorted(dates)
+        statistics = metadata.row_group(0).column(1).statistics
+        assert statistics.has_min_max
+
+    def test_read_dataset_restores_partition_columns(self, tmp_path):
+        """
+        JTBD:
+        Как аналитик в pandas, я хочу читать датасет с колонками партиций
+        и NULL вместо партиции по умолчанию, чтобы строки не терялись.
+        """
+        # Arrange
+        write_dataset(tmp_path / "documents", make_rows(50))
+
+        # Act
+        table = read_dataset(str(tmp_path / "documents"))
+        df = table.to_pandas()
+
+        # Assert
+        assert len(df) == 50
+        assert df["document_type"].isna().sum() == 10
+        assert set(df["year_month"]) == {"2024-01", "2024-02", "2024-03"}
+        assert sorted(df["id"].astype(int)) == list(range(50))
+
+    def test_partition_value_escapes_path_characters(self):
+        """
+        JTBD:
+        Как sink, я хочу экранировать разделители путей в значениях партиций,
+        чтобы тип документа со слешем не создавал лишний каталог.
+        """
+        assert partition_value("Приход/Расход") == "Приход%2FРасход"
+        assert partition_value("") == DEFAULT_PARTITION
+        assert partition_value(None) == DEFAULT_PARTITION
+
+
+def test_duckdb_view_filters_partitions(tmp_path):
+    """
+    JTBD:
+    Как аналитик DuckDB, я хочу запрашивать датасет через view по месяцу
+    и магазину, чтобы не загружать все строки в таблицу базы.
+    """
+    # Arrange
+    root = tmp_path / "documents"
+    write_dataset(root, make_rows(90))
+    conn = duckdb.connect(str(tmp_path / "analysis.duckdb"))
+    conn.execute("CREATE TABLE documents AS SELECT 1 AS id")
+
+    # Act
+    created = create_dataset_view(conn, "documents", str(root))
+    count, amount = conn.execute(
+        "SELECT count(*), sum(total_amount) FROM documents "
+        "WHERE year_month = '2024-02' AND table_name = '_DOCUMENT156' "
+        "AND store_code = 'ПЦ01'",
+    ).fetchone()
+    nulls = conn.execute(
+        "SELECT count(*) FROM documents WHERE document_type IS NULL",
+    ).fetchone()[0]
+    kind = conn.execute(
+        "SELECT table_type FROM information_schema.tables "
+        "WHERE table_name = 'documents'",
+    ).fetchone()[0]
+    conn.close()
+
+    # Assert
+    expected = [i for i in range(90) if i % 3 == 1 and i % 2 and i % 4 == 1]
+    assert created is True
+    assert count == len(expected)
+    assert amount == sum(expected)
+    assert nulls == 18
+    assert kind == "VIEW"
+    assert create_dataset_view(duckdb.connect(), "empty", str(tmp_path / "x")) is False
+
+
+def test_adaptive_extractor_dataset_upsert(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как ночное обновление в режиме датасета, я хочу заменять измененные
+    строки в партиции таблицы и видеть их через view DuckDB,
+    чтобы инкрементальная выгрузка не требовала одного файла на таблицу.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    def write_database(path, rows):
+        writer = Synthetic1CDWriter()
+        writer.add_table("_DOCUMENT156", document_table_fields(), rows)
+        return writer.write(str(path))
+
+    rows = make_document_rows(30)
+    state_file = str(tmp_path / "state.json")
+    dataset_dir = str(tmp_path / "dataset")
+    with open(write_database(tmp_path / "v1.1CD", rows), "rb") as f:
+        AdaptiveExtractor(dataset_dir=dataset_dir).extract_table_incremental(
+            "_DOCUMENT156",
+            DatabaseReader(f).tables["_DOCUMENT156"],
+            IncrementalState(state_file, block_rows=8),
+        )
+
+    rows[3]["_FLD103"] = "Букет тюльпанов"
+    rows += make_document_rows(40)[30:]
+
+    # Act
+    with open(write_database(tmp_path / "v2.1CD", rows), "rb") as f:
+        AdaptiveExtractor(dataset_dir=dataset_dir).extract_table_incremental(
+            "_DOCUMENT156",
+            DatabaseReader(f).tables["_DOCUMENT156"],
+            IncrementalState(state_file, block_rows=8),
+        )
+
+    # Assert
+    assert not os.path.exists("complete_1c_database__DOCUMENT156.parquet")
+    table = read_dataset(os.path.join(dataset_dir, "table_name=_DOCUMENT156"))
+    table = table.sort_by("row_index")
+    assert table.column("row_index").to_pylist() == list(range(1, 41))
+    assert table.column("blob__FLD103_content")[3].as_py() == "Букет тюльпанов"
+    conn = duckdb.connect(str(tmp_path / "complete_1c_database.duckdb"))
+    assert conn.execute('SELECT count(*) FROM "_DOCUMENT156"').fetchone()[0] == 40
+    assert conn.execute(
+        'SELECT DISTINCT table_name FROM "_DOCUMENT156"',
+    ).fetchall() == [("_DOCUMENT156",)]
+    conn.close()
+
+
+def test_adaptive_extractor_dataset_checkpoints_keep_row_groups(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как запись датасета на checkpoint, я хочу только передавать строки sink,
+    чтобы каждая партиция не дробилась на мелкие группы строк.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    writer = Synthetic1CDWriter()
+    writer.add_table("_DOCUMENT156", document_table_fields(), make_document_rows(30))
+    dataset_dir = str(tmp_path / "dataset")
+    extractor = AdaptiveExtractor(dataset_dir=dataset_dir)
+    with open(writer.write(str(tmp_path / "1Cv8.1CD")), "rb") as f:
+        records = extractor.extract_table_data(
+            "_DOCUMENT156",
+            DatabaseReader(f).tables["_DOCUMENT156"],
+            checkpoints=False,
+        )
+
+    # Act
+    extractor.save_to_parquet({"_DOCUMENT156": records[:10]}, final=False)
+    extractor.save_to_parquet({"_DOCUMENT156": records})
+
+    # Assert
+    files = [
+        os.path.join(directory, name)
+        for directory, _dirs, names in os.walk(dataset_dir)
+        for name in names
+    ]
+    assert files
+    assert {pq.ParquetFile(path).metadata.num_row_groups for path in files} == {1}
+    assert sum(pq.ParquetFile(path).metadata.num_rows for path in files) == 30
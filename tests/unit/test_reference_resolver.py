@@ -0,0 +1,241 @@
+"""
+Unit тесты для разрешения ссылок справочников (ReferenceResolver)
+Согласно TDD Documentation Standard
+"""
+
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.arrow_parquet_sink import ArrowParquetSink
+from src.utils.reference_resolver import ReferenceResolver, ref_columns
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    restore_onec_dtools,
+)
+
+
+def catalog_ref(catalog: int, item: int) -> bytes:
+    return bytes([catalog]) + item.to_bytes(15, "big")
+
+
+def reference_fields(code_type: str = "NC"):
+    return [
+        FieldSpec("_IDRREF", "B", 16),
+        FieldSpec("_VERSION", "RV"),
+        FieldSpec("_MARKED", "L"),
+        FieldSpec("_CODE", code_type, 9),
+        FieldSpec("_DESCRIPTION", "NVC", 50),
+    ]
+
+
+@pytest.fixture
+def db_with_references(tmp_path, monkeypatch):
+    """Справочники номенклатуры и складов и документ со ссылками на них"""
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    nomenclature = [
+        {
+            "_IDRREF": catalog_ref(1, i),
+            "_CODE": f"НФ{i:05d}",
+            "_DESCRIPTION": f"Роза {i}",
+        }
+        for i in range(1, 21)
+    ]
+    nomenclature.insert(5, None)
+    stores = [
+        {"_IDRREF": catalog_ref(2, i), "_CODE": i, "_DESCRIPTION": f"Склад {i}"}
+        for i in range(1, 4)
+    ]
+    documents = [
+        {
+            "_IDRREF": catalog_ref(9, i),
+            "_FLD300RREF": catalog_ref(1, 1 + i % 20),
+            "_FLD301RREF": catalog_ref(2, 1 + i % 3) if i % 4 else b"\x00" * 16,
+            "_FLD302": i,
+        }
+        for i in range(40)
+    ]
+
+    writer = Synthetic1CDWriter()
+    writer.add_table("_Reference42", reference_fields(), nomenclature)
+    writer.add_table("_Reference43", reference_fields("N"), stores)
+    writer.add_table(
+        "_DOCUMENT156",
+        [
+            FieldSpec("_IDRREF", "B", 16),
+            FieldSpec("_FLD300RREF", "B", 16),
+            FieldSpec("_FLD301RREF", "B", 16),
+            FieldSpec("_FLD302", "N", 5),
+        ],
+        documents,
+    )
+    return writer.write(str(tmp_path / "1Cv8.1CD")), documents
+
+
+class TestReferenceResolver:
+    """Тесты для индекса ссылка → код и наименование справочника"""
+
+    def test_resolve_batch_columns(self, db_with_references):
+        """
+        JTBD:
+        Как извлечение документов, я хочу разрешать колонку ссылок пакетом,
+        чтобы код и наименование справочника появлялись без поиска по строкам.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        path, documents = db_with_references
+
+        # Act
+        with open(path, "rb") as f:
+            db = DatabaseReader(f)
+            resolver = ReferenceResolver(db)
+            columns = ref_columns(db.tables["_DOCUMENT156"])
+            batch = pa.RecordBatch.from_pylist(
+                [{name: d[name] for name in columns} for d in documents],
+            )
+            enriched = resolver.enrich_batch(batch)
+
+        # Assert
+        assert columns == ["_FLD300RREF", "_FLD301RREF"]
+        assert resolver.size == 23
+        rows = enriched.to_pylist()
+        assert rows[3]["_FLD300RREF_catalog"] == "_Reference42"
+        assert rows[3]["_FLD300RREF_code"] == "НФ00004"
+        assert rows[3]["_FLD300RREF_description"] == "Роза 4"
+        assert rows[1]["_FLD301RREF_code"] == "2"
+        assert rows[1]["_FLD301RREF_description"] == "Склад 2"
+        # Пустая ссылка не разрешается
+        assert rows[4]["_FLD301RREF_description"] is None
+
+    def test_lookup_unknown_ref(self, db_with_references):
+        """
+        JTBD:
+        Как аналитик, я хочу получать None для ссылки вне справочников,
+        чтобы битые ссылки не подменялись чужими значениями.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        path, _documents = db_with_references
+
+        # Act
+        with open(path, "rb") as f:
+            resolver = ReferenceResolver(DatabaseReader(f))
+            known = resolver.lookup(catalog_ref(2, 3))
+            unknown = resolver.lookup(catalog_ref(7, 1))
+
+        # Assert
+        assert known == {
+            "catalog": "_Reference43",
+            "code": "3",
+            "description": "Склад 3",
+        }
+        assert unknown is None
+
+    def test_index_is_persisted_and_reused(self, db_with_references, monkeypatch):
+        """
+        JTBD:
+        Как повторный запуск, я хочу загружать индекс справочников с диска,
+        чтобы не перечитывать справочники на каждое извлечение.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        path, _documents = db_with_references
+        with open(path, "rb") as f:
+            ReferenceResolver(DatabaseReader(f)).build_all()
+
+        # Act
+        monkeypatch.setattr(
+            ReferenceResolver,
+            "_build",
+            lambda *args: pytest.fail("индекс должен загружаться с диска"),
+        )
+        with open(path, "rb") as f:
+            resolver = ReferenceResolver(DatabaseReader(f))
+            entry = resolver.lookup(catalog_ref(1, 7))
+
+        # Assert
+        index = pq.read_table("data/results/reference_index/_Reference42.parquet")
+        assert index.num_rows == 20
+        assert index.column("ref").to_pylist() == sorted(
+            index.column("ref").to_pylist(),
+        )
+        assert entry["description"] == "Роза 7"
+
+
+def test_sink_enriches_batches(db_with_references, tmp_path):
+    """
+    JTBD:
+    Как Parquet sink, я хочу записывать разрешенные ссылки вместе с данными,
+    чтобы схема файла содержала колонки кода и наименования с первой строки.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    path, documents = db_with_references
+    output = str(tmp_path / "documents.parquet")
+    schema = pa.schema([("id", pa.int64()), ("_FLD300RREF", pa.binary())])
+
+    # Act
+    with open(path, "rb") as f:
+        resolver = ReferenceResolver(DatabaseReader(f))
+        with ArrowParquetSink(
+            output,
+            schema=schema,
+            batch_size=16,
+            enrich=resolver.enrich_batch,
+        ) as sink:
+            sink.write_rows(
+                {"id": i, "_FLD300RREF": d["_FLD300RREF"]}
+                for i, d in enumerate(documents)
+            )
+
+    # Assert
+    table = pq.read_table(output)
+    assert os.path.exists(output)
+    assert table.num_rows == 40
+    assert table.schema.field("_FLD300RREF_code").type == pa.string()
+    assert table.column("_FLD300RREF_description").to_pylist()[:2] == [
+        "Роза 1",
+        "Роза 2",
+    ]
+
+
+def test_adaptive_extractor_writes_resolved_refs(db_with_references):
+    """
+    JTBD:
+    Как AdaptiveExtractor с --resolve-refs, я хочу сохранять в Parquet
+    наименования справочников рядом со ссылками документа.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    path, _documents = db_with_references
+
+    # Act
+    with open(path, "rb") as f:
+        db = DatabaseReader(f)
+        extractor = AdaptiveExtractor(
+            checkpoint_dir="checkpoints",
+            references=ReferenceResolver(db),
+        )
+        records = extractor.extract_table_data(
+            "_DOCUMENT156",
+            db.tables["_DOCUMENT156"],
+            checkpoints=False,
+        )
+        extractor.save_to_parquet({"_DOCUMENT156": records})
+
+    # Assert
+    table = pq.read_table("complete_1c_database__DOCUMENT156.parquet")
+    assert table.num_rows == 40
+    assert table.column("field__FLD300RREF_description").to_pylist()[0] == "Роза 1"
+    assert table.column("field__FLD301RREF_catalog").to_pylist()[1] == "_Reference43"
@@ -0,0 +1,195 @@
+"""
+Unit тесты для материализованных сводных таблиц DuckDB (RollupStore)
+Согласно TDD Documentation Standard
+"""
+
+import duckdb
+
+from src.utils.document_tables import DocumentTablesWriter, nomenclature_key
+from src.utils.partitioned_dataset import create_dataset_view
+from src.utils.rollups import RollupStore, has_rollup, month_of, month_predicate
+
+NOMENCLATURE = (7).to_bytes(16, "big")
+
+
+def make_document(i, bump=0.0):
+    """Продажа с табличной частью: месяцы 2024-01..2024-03 и одна без даты"""
+    date = "N/A" if i == 0 else f"2024-0{1 + i % 3}-1{i % 5}T10:00:00"
+    return {
+        "id": f"_DOCUMENT156_{i}",
+        "table_name": "_DOCUMENT156",
+        "row_index": i,
+        "document_type": "Реализация",
+        "document_number": f"ПЦ{i:07d}",
+        "document_date": date,
+        "store_name": "Братиславский" if i % 2 else "Южный",
+        "total_amount": 100.0 + i + bump,
+        "extraction_stats": {"total_blobs": 2, "successful": 1, "failed": 1},
+        "fields": {},
+        "blobs": {},
+        "table_parts": {
+            "_DOCUMENT156_VT1": [
+                {
+                    "row_index": line,
+                    "nomenclature": NOMENCLATURE if line else str(NOMENCLATURE),
+                    "quantity": 2,
+                    "price": 50.0,
+                    "amount": 100.0 + bump,
+                }
+                for line in range(2)
+            ],
+        },
+    }
+
+
+def write_documents(root, bump_month=""):
+    """Выгрузка 12 документов; bump_month - месяц с измененными суммами"""
+    with DocumentTablesWriter(root) as writer:
+        for i in range(12):
+            month = None if i == 0 else f"2024-0{1 + i % 3}"
+            writer.write(make_document(i, 10.0 if month == bump_month else 0.0))
+    return writer
+
+
+def refresh(con, writer):
+    writer.create_views(con)
+    return RollupStore(con).refresh(
+        {"documents": writer.index_dir, "table_parts": writer.table_parts_dir},
+    )
+
+
+class TestRollupStore:
+    """Тесты для обновления сводных таблиц по измененным месяцам"""
+
+    def test_rollups_match_full_aggregation(self, tmp_path):
+        """
+        JTBD:
+        Как аналитик, я хочу, чтобы сводные таблицы продаж и документов
+        совпадали с GROUP BY по исходным датасетам, чтобы читать их
+        вместо сканирования всех документов.
+        """
+        # Arrange
+        con = duckdb.connect()
+        writer = write_documents(str(tmp_path))
+
+        # Act
+        refreshed = refresh(con, writer)
+        sales = con.execute(
+            """
+            SELECT store_name, nomenclature, sum(lines), sum(quantity), sum(amount)
+            FROM sales_by_store_day_nomenclature
+            GROUP BY ALL ORDER BY store_name
+            """,
+        ).fetchall()
+        rates = con.execute(
+            "SELECT documents, total_blobs, success_rate FROM blob_success_rates",
+        ).fetchall()
+        months = con.execute(
+            "SELECT year_month, documents FROM documents_by_type_month ORDER BY 1",
+        ).fetchall()
+
+        # Assert
+        assert refreshed == {
+            "blob_success_by_table": 4,
+            "documents_by_type_month": 4,
+            "sales_by_store_day_nomenclature": 4,
+        }
+        assert sales == [
+            ("Братиславский", NOMENCLATURE.hex(), 12, 24.0, 1200.0),
+            ("Южный", NOMENCLATURE.hex(), 12, 24.0, 1200.0),
+        ]
+        assert rates == [(12, 24, 50.0)]
+        assert months == [("2024-01", 3), ("2024-02", 4), ("2024-03", 4), (None, 1)]
+
+    def test_only_changed_months_are_recomputed(self, tmp_path):
+        """
+        JTBD:
+        Как ежедневная выгрузка, я хочу, чтобы перезапись тех же данных
+        ничего не пересчитывала, а изменение одного месяца пересчитывало
+        только его, чтобы обновление не зависело от размера истории.
+        """
+        # Arrange
+        database = str(tmp_path / "analysis.duckdb")
+        root = str(tmp_path / "parquet")
+        con = duckdb.connect(database)
+        refresh(con, write_documents(root))
+        con.close()
+
+        # Act
+        con = duckdb.connect(database)
+        unchanged = refresh(con, write_documents(root))
+        changed = refresh(con, write_documents(root, bump_month="2024-02"))
+        amounts = con.execute(
+            """
+            SELECT year_month, sum(amount)
+            FROM sales_by_store_day_nomenclature
+            GROUP BY ALL ORDER BY 1
+            """,
+        ).fetchall()
+        con.close()
+
+        # Assert
+        assert set(unchanged.values()) == {0}
+        assert changed["sales_by_store_day_nomenclature"] == 1
+        assert changed["documents_by_type_month"] == 1
+        assert amounts == [
+            ("2024-01", 600.0),
+            ("2024-02", 880.0),
+            ("2024-03", 800.0),
+            (None, 200.0),
+        ]
+
+    def test_rollup_without_columns_is_skipped(self, tmp_path):
+        """
+        JTBD:
+        Как конвертер старого датасета без табличных частей, я хочу,
+        чтобы сводные таблицы без нужных колонок пропускались, а остальные
+        строились, чтобы конвертация не падала на старой схеме.
+        """
+        # Arrange
+        con = duckdb.connect()
+        writer = write_documents(str(tmp_path))
+        create_dataset_view(con, "documents_enhanced", writer.index_dir)
+        con.execute(
+            "CREATE VIEW documents_old AS "
+            "SELECT * EXCLUDE (document_type) FROM documents_enhanced",
+        )
+
+        # Act
+        refreshed = RollupStore(con).refresh(
+            {"documents": writer.index_dir},
+            views={"documents": "documents_old"},
+        )
+        skipped = RollupStore(con).refresh({"table_parts": str(tmp_path / "нет")})
+
+        # Assert
+        assert refreshed == {"blob_success_by_table": 4}
+        assert skipped == {}
+        assert not has_rollup(con, "documents_by_type_month")
+
+
+def test_month_partitions_and_predicate():
+    """
+    JTBD:
+    Как RollupStore, я хочу получать месяц по каталогу year_month=...
+    и условие на набор месяцев с партицией без даты, чтобы пересчет
+    затрагивал и строки с year_month IS NULL.
+    """
+    root = "/data/documents"
+    assert (
+        month_of(f"{root}/table_name=_DOCUMENT156/year_month=2024-01/a.parquet", root)
+        == "2024-01"
+    )
+    assert (
+        month_of(f"{root}/year_month=__HIVE_DEFAULT_PARTITION__/a.parquet", root)
+        is None
+    )
+    assert (
+        month_predicate(["2024-02", "2024-01"])
+        == "year_month IN ('2024-01', '2024-02')"
+    )
+    assert month_predicate(["2024-01", None]) == (
+        "year_month IN ('2024-01') OR year_month IS NULL"
+    )
+    assert month_predicate([]) == "FALSE"
+    assert nomenclature_key(str(NOMENCLATURE)) == NOMENCLATURE.hex()
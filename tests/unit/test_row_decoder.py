@@ -0,0 +1,177 @@
+"""
+Unit тесты для скомпилированного декодера строк (CompiledRowDecoder)
+Согласно TDD Documentation Standard
+"""
+
+import pytest
+
+from src.utils.row_decoder import ROLE_BLOB, ROLE_NUMERIC, CompiledRowDecoder
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+
+@pytest.fixture
+def document_table(tmp_path, monkeypatch):
+    """Таблица документа с пустыми строками, NULL и отрицательными числами"""
+    restore_onec_dtools(monkeypatch)
+    from onec_dtools.database_reader import DatabaseReader
+
+    fields = document_table_fields() + [
+        FieldSpec("_FLD104", "N", 11, 3, null_exists=True),
+        FieldSpec("_FLD105", "DT", null_exists=True),
+    ]
+    rows = make_document_rows(30, empty_every=6)
+    for i, row in enumerate(rows):
+        if row is not None:
+            row["_FLD104"] = None if i % 4 == 0 else -12.345 * i
+            row["_FLD105"] = None if i % 5 == 0 else row["_DATE_TIME"]
+            if i % 3 == 0:
+                row["_FLD103"] = None
+
+    writer = Synthetic1CDWriter()
+    writer.add_table("_DOCUMENT156", fields, rows)
+    f = open(writer.write(str(tmp_path / "1Cv8.1CD")), "rb")
+    table = DatabaseReader(f).tables["_DOCUMENT156"]
+    len(table)
+    yield table
+    f.close()
+
+
+class TestCompiledRowDecoder:
+    """Тесты для декодера строк, скомпилированного по описанию полей"""
+
+    def test_matches_as_list(self, document_table):
+        """
+        JTBD:
+        Как замена row.as_list, я хочу возвращать те же значения полей,
+        чтобы извлечение не меняло результат при переходе на декодер.
+        """
+        # Arrange
+        decoder = CompiledRowDecoder.from_table(document_table)
+
+        # Act / Assert
+        for i in range(len(document_table)):
+            row = document_table[i]
+            assert decoder.decode(row, read_blobs=True) == row.as_list(True)
+
+    def test_blob_fields_stay_blob_objects(self, document_table):
+        """
+        JTBD:
+        Как AdaptiveExtractor, я хочу получать BLOB поля объектами Blob,
+        чтобы содержимое читалось только там, где оно действительно нужно.
+        """
+        # Arrange
+        from onec_dtools.database_reader import Blob
+
+        decoder = CompiledRowDecoder.from_table(document_table)
+
+        # Act
+        values = [decoder.decode(document_table[i]) for i in (1, 2)]
+
+        # Assert
+        blobs = [row[decoder.blob_indexes[0]] for row in values]
+        assert all(isinstance(blob, Blob) for blob in blobs)
+        assert [blob.value for blob in blobs] == [
+            "Букет роз №1 ПЦ022",
+            "Букет роз №2 ПЦ022",
+        ]
+
+    def test_empty_row_decodes_to_nulls(self, document_table):
+        """
+        JTBD:
+        Как декодер, я хочу разбирать пустую строку в None без чтения полей,
+        чтобы удаленные записи не ломали декодирование.
+        """
+        # Arrange
+        decoder = CompiledRowDecoder.from_table(document_table)
+
+        # Act
+        values = decoder.decode(document_table[5])
+
+        # Assert
+        assert values == [None] * len(decoder.names)
+
+    def test_column_roles(self, document_table):
+        """
+        JTBD:
+        Как классификатор полей, я хочу знать роли колонок заранее,
+        чтобы суммы, количества и BLOB выбирались по индексам без проверки типов.
+        """
+        # Act
+        decoder = CompiledRowDecoder.from_table(
+            document_table,
+            business_fields=["_NUMBER", "_DATE_TIME"],
+        )
+
+        # Assert
+        roles = {field.name: field.role for field in decoder.fields}
+        assert roles["_FLD100"] == ROLE_NUMERIC
+        assert roles["_FLD103"] == ROLE_BLOB
+        assert [decoder.names[i] for i in decoder.business_indexes] == [
+            "_DATE_TIME",
+            "_NUMBER",
+        ]
+        assert [decoder.names[i] for i in decoder.numeric_indexes] == [
+            "_MARKED",
+            "_POSTED",
+            "_FLD100",
+            "_FLD101",
+            "_FLD104",
+        ]
+        assert decoder.positional_names[:2] == ["field_0", "field_1"]
+
+
+def test_decode_dict_uses_field_names(document_table):
+    """
+    JTBD:
+    Как замена row.as_dict, я хочу получать словарь по именам полей,
+    чтобы код, работающий со словарями, переходил на декодер без изменений.
+    """
+    # Arrange
+    decoder = CompiledRowDecoder.from_table(document_table)
+    row = document_table[1]
+
+    # Act
+    row_dict = decoder.decode_dict(row, read_blobs=True)
+
+    # Assert
+    assert row_dict == row.as_dict(True)
+    assert row_dict["_NUMBER"].rstrip() == "ПЦ0000001"
+    assert row_dict["_FLD104"] == pytest.approx(-12.345)
+
+
+def test_unknown_field_types_decode_to_none():
+    """
+    JTBD:
+    Как замена row.as_list, я хочу возвращать None для типов полей,
+    которые onec_dtools не разбирает (VB и другие из simple_patch),
+    чтобы байты таких полей не попадали в эвристики BLOB.
+    """
+    # Arrange
+    from types import SimpleNamespace
+
+    from src.utils.row_decoder import ROLE_RAW
+
+    fields = {
+        "_FLD200": SimpleNamespace(
+            type="VB",
+            length=150,
+            precision=0,
+            data_offset=1,
+            data_length=150,
+            null_exists=False,
+        ),
+    }
+    decoder = CompiledRowDecoder(fields)
+
+    # Act
+    values = decoder.decode_bytes(b"\x00" + bytes(range(150)))
+
+    # Assert
+    assert decoder.fields[0].role == ROLE_RAW
+    assert values == [None]
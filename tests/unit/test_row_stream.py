@@ -0,0 +1,180 @@
+"""
+Unit тесты для потокового конвейера строк (row_stream)
+Согласно TDD Documentation Standard
+"""
+
+import json
+from unittest.mock import Mock
+
+from src.utils.row_stream import (
+    JsonlSpool,
+    batched,
+    decode_rows,
+    iter_non_empty_rows,
+    write_json_sections,
+)
+
+
+class FakeTable:
+    """Таблица, которая считает обращения к строкам"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return self.rows[index]
+
+
+def make_row(values, is_empty=False):
+    return Mock(is_empty=is_empty, as_list=Mock(return_value=values))
+
+
+class TestRowSource:
+    """Тесты для источника строк"""
+
+    def test_skips_empty_rows(self):
+        """
+        JTBD:
+        Как источник строк, я хочу пропускать удаленные строки,
+        чтобы дальше по конвейеру шли только реальные документы.
+        """
+        # Arrange
+        table = FakeTable([make_row([1]), make_row([], is_empty=True), make_row([3])])
+
+        # Act
+        rows = list(iter_non_empty_rows(table))
+
+        # Assert
+        assert [index for index, _row in rows] == [0, 2]
+
+    def test_reads_rows_lazily(self):
+        """
+        JTBD:
+        Как источник строк, я хочу читать строку только когда она нужна,
+        чтобы память не зависела от размера таблицы.
+        """
+        # Arrange
+        table = FakeTable([make_row([i]) for i in range(1000)])
+
+        # Act
+        stream = iter_non_empty_rows(table)
+        first = [next(stream) for _ in range(3)]
+
+        # Assert
+        assert len(first) == 3
+        assert table.reads == 3
+
+    def test_stops_on_interrupt_flag(self):
+        """
+        JTBD:
+        Как источник строк, я хочу останавливаться по флагу прерывания,
+        чтобы Ctrl+C сохранял уже извлеченные документы.
+        """
+        # Arrange
+        table = FakeTable([make_row([i]) for i in range(10)])
+        state = {"reads": 0}
+
+        def should_stop():
+            state["reads"] += 1
+            return state["reads"] > 4
+
+        # Act
+        rows = list(iter_non_empty_rows(table, should_stop=should_stop))
+
+        # Assert
+        assert len(rows) == 4
+
+
+def test_decode_rows_skips_broken_rows():
+    """
+    JTBD:
+    Как стадия декодирования, я хочу пропускать строки с ошибкой декодирования,
+    чтобы одна битая строка не останавливала всю таблицу.
+    """
+    # Arrange
+    broken = Mock(as_list=Mock(side_effect=RuntimeError("bad blob")))
+    rows = [(0, make_row(["a"])), (1, broken), (2, make_row(["c"]))]
+
+    # Act
+    decoded = list(decode_rows(rows))
+
+    # Assert
+    assert [(index, values) for index, _row, values in decoded] == [
+        (0, ["a"]),
+        (2, ["c"]),
+    ]
+
+
+def test_batched_groups_stream():
+    """
+    JTBD:
+    Как конвейер, я хочу группировать записи в пакеты,
+    чтобы sink получал данные порциями фиксированного размера.
+    """
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+class TestJsonlSpool:
+    """Тесты для sink на диске"""
+
+    def test_spool_roundtrip_and_counters(self, tmp_path):
+        """
+        JTBD:
+        Как sink, я хочу хранить записи на диске и считать BLOB поля по таблицам,
+        чтобы сводка по таблице не требовала повторного прохода по документам.
+        """
+        # Arrange
+        spool = JsonlSpool(str(tmp_path / "documents.jsonl"))
+
+        # Act
+        spool.write(
+            {
+                "table_name": "_DOCUMENT156",
+                "blobs": {
+                    "_FLD1": {"value": {"content": "Розы"}},
+                    "_FLD2": {"value": {"content": ""}},
+                },
+            },
+        )
+        spool.write({"table_name": "_DOCUMENT138", "blobs": {}})
+        spool.close()
+
+        # Assert
+        assert len(spool) == 2
+        assert spool.stats_for("_DOCUMENT156") == {
+            "records": 1,
+            "blob_fields": 1,
+            "failed_blob_fields": 1,
+        }
+        assert [doc["table_name"] for doc in spool] == ["_DOCUMENT156", "_DOCUMENT138"]
+
+
+def test_write_json_sections_matches_json_dump(tmp_path):
+    """
+    JTBD:
+    Как writer результатов, я хочу получать тот же JSON, что и json.dump,
+    чтобы потребители all_available_data.json не заметили потоковой записи.
+    """
+    # Arrange
+    documents = [{"id": "_DOCUMENT156_1", "fields": {"_NUMBER": "ПЦ022"}}]
+    metadata = {"total_documents": 1}
+    output_file = tmp_path / "all_available_data.json"
+
+    # Act
+    write_json_sections(
+        str(output_file),
+        {"documents": iter(documents), "references": iter([])},
+        metadata,
+    )
+
+    # Assert
+    assert json.loads(output_file.read_text(encoding="utf-8")) == {
+        "documents": documents,
+        "references": [],
+        "metadata": metadata,
+    }
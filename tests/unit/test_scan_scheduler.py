@@ -0,0 +1,172 @@
+"""
+Unit тесты для общего прохода extractors по таблицам (ScanScheduler)
+Согласно TDD Documentation Standard
+"""
+
+import json
+import os
+
+import pytest
+
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """База с таблицей документов и справочником"""
+    restore_onec_dtools(monkeypatch)
+    references = [
+        {"_IDRREF": bytes(15) + bytes([i]), "_DESCRIPTION": name}
+        for i, name in enumerate(["Склад Братиславский", "Розовый букет"])
+    ]
+    writer = Synthetic1CDWriter()
+    writer.add_table("_DOCUMENT156", document_table_fields(), make_document_rows(12))
+    writer.add_table(
+        "_Reference90",
+        [FieldSpec("_IDRREF", "B", 16), FieldSpec("_DESCRIPTION", "NVC", 50)],
+        references,
+    )
+    return writer.write(str(tmp_path / "1Cv8.1CD"))
+
+
+def make_visitors(db_path):
+    from src.extractors.scan_scheduler import default_visitors
+
+    return default_visitors(db_path)
+
+
+def without_dates(results):
+    """Результат без времени извлечения"""
+    results = json.loads(json.dumps(results, default=str))
+    results.get("metadata", {}).pop("extraction_date", None)
+    return results
+
+
+class TestScanScheduler:
+    """Тесты для общего прохода по строкам"""
+
+    def test_shared_scan_matches_separate_extract(self, db_path):
+        """
+        JTBD:
+        Как набор extractors, я хочу получать в общем проходе те же результаты,
+        что и при отдельном запуске каждого extractor.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        from src.extractors.scan_scheduler import ScanScheduler
+
+        with open(db_path, "rb") as f:
+            db = DatabaseReader(f)
+            separate = []
+            for extractor in make_visitors(db_path):
+                extractor.db = db
+                separate.append(without_dates(extractor.extract()))
+
+            # Act
+            visitors = make_visitors(db_path)
+            for visitor in visitors:
+                visitor.db = db
+            shared = [without_dates(r) for r in ScanScheduler(visitors).scan(db)]
+
+        # Assert
+        assert shared == separate
+        assert shared[0]["document_types"]["_DOCUMENT156"]["sample_records"]
+        assert shared[1]["found_references"]["_Reference90"]["categories"]
+
+    def test_each_row_is_read_once(self, db_path, monkeypatch):
+        """
+        JTBD:
+        Как общий проход, я хочу читать и декодировать каждую строку один раз
+        независимо от числа посетителей, запросивших таблицу.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader, Table
+
+        from src.extractors.scan_scheduler import ScanScheduler
+
+        with open(db_path, "rb") as f:
+            db = DatabaseReader(f)
+            visitors = make_visitors(db_path)
+            for visitor in visitors:
+                visitor.db = db
+            scheduler = ScanScheduler(visitors)
+            reads = []
+            getitem = Table.__getitem__
+            monkeypatch.setattr(
+                Table,
+                "__getitem__",
+                lambda table, i: reads.append(i) or getitem(table, i),
+            )
+
+            # Act
+            scheduler.scan(db)
+
+        # Assert
+        # 12 документов нужны 4 посетителям, 2 строки справочника - двум
+        assert len(reads) == 14
+        assert scheduler.stats["tables_scanned"] == 2
+        assert scheduler.stats["rows_decoded"] == 14
+
+
+def test_run_saves_results_per_visitor(db_path, tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как запуск всех extractors, я хочу открыть базу один раз и получить
+    отдельный файл результатов каждого extractor.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    import src.extractors.base_extractor as base_extractor
+    from src.extractors.scan_scheduler import run_all_extractors
+
+    monkeypatch.setattr(base_extractor, "DatabaseReader", DatabaseReader)
+    output_dir = str(tmp_path / "results")
+
+    # Act
+    results = run_all_extractors(db_path, output_dir)
+
+    # Assert
+    assert sorted(os.listdir(output_dir)) == sorted(
+        visitor.results_file for visitor in make_visitors(db_path)
+    )
+    assert len(results) == 5
+    with open(os.path.join(output_dir, "all_document_types_search_results.json")) as f:
+        saved = json.load(f)
+    assert saved["metadata"]["extractor_class"] == "AllDocumentTypesExtractor"
+    assert list(saved["document_types"]) == ["_DOCUMENT156"]
+
+
+def test_visitors_reset_scan_state_between_scans(db_path):
+    """
+    JTBD:
+    Как посетитель общего прохода, я хочу объявлять состояние прохода при
+    создании и сбрасывать его в begin_scan, чтобы повторный проход тем же
+    extractor не накапливал результаты прошлого.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.extractors.scan_scheduler import ScanScheduler
+
+    visitors = make_visitors(db_path)
+    assert all(visitor.scan_results == {} for visitor in visitors)
+
+    with open(db_path, "rb") as f:
+        db = DatabaseReader(f)
+        for visitor in visitors:
+            visitor.db = db
+
+        # Act
+        first = [without_dates(r) for r in ScanScheduler(visitors).scan(db)]
+        second = [without_dates(r) for r in ScanScheduler(visitors).scan(db)]
+
+    # Assert
+    assert second == first
@@ -0,0 +1,164 @@
+"""
+Unit тесты для учета времени этапов извлечения (StageProfiler)
+Согласно TDD Documentation Standard
+"""
+
+import json
+import time
+
+import pytest
+
+from src.utils import stage_profiler
+from src.utils.stage_profiler import (
+    STAGE_BLOB_DECODE,
+    STAGE_DECODE,
+    STAGE_FETCH,
+    StageProfiler,
+    profiled,
+    profiler_mode,
+)
+from src.utils.table_reader import TableReader
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+def use_profiler(monkeypatch, mode):
+    """Общий профайлер процесса на время теста"""
+    profiler = StageProfiler(mode)
+    monkeypatch.setattr(stage_profiler, "_profiler", profiler)
+    return profiler
+
+
+@profiled(STAGE_BLOB_DECODE)
+def nested_decode(depth):
+    """Рекурсивный декодер: вложенные входы в этап не суммируются"""
+    time.sleep(0.001)
+    if depth:
+        nested_decode(depth - 1)
+
+
+class TestStageProfiler:
+    """Тесты для времени и числа вызовов этапов по таблицам"""
+
+    def test_stages_are_counted_per_table(self, monkeypatch):
+        """
+        JTBD:
+        Как разработчик, я хочу видеть время и вызовы каждого этапа
+        по каждой таблице, чтобы понимать, какая таблица и какой этап
+        занимают часы прохода.
+        """
+        # Arrange
+        profiler = use_profiler(monkeypatch, "stages")
+
+        # Act
+        with profiler.profiling():
+            profiler.set_table("_DOCUMENT156")
+            for _ in range(3):
+                with profiler.stage(STAGE_FETCH):
+                    pass
+            nested_decode(2)
+            profiler.add(STAGE_DECODE, 0.5, count=10, table_name="_REFERENCE90")
+        report = profiler.report()
+
+        # Assert
+        document = report["tables"]["_DOCUMENT156"]
+        assert document[STAGE_FETCH]["count"] == 3
+        assert document[STAGE_BLOB_DECODE]["count"] == 1
+        assert document[STAGE_BLOB_DECODE]["seconds"] >= 0.003
+        assert report["tables"]["_REFERENCE90"][STAGE_DECODE]["avg_ms"] == 50.0
+        assert report["stages"][STAGE_DECODE]["count"] == 10
+        assert report["wall_seconds"] >= 0
+        assert "fetch" in profiler.progress_line("_DOCUMENT156")
+
+    def test_disabled_profiler_records_nothing(self, tmp_path, monkeypatch):
+        """
+        JTBD:
+        Как обычный запуск извлечения, я хочу, чтобы выключенный профайлер
+        ничего не копил и не писал отчет, чтобы учет не стоил времени.
+        """
+        # Arrange
+        profiler = use_profiler(monkeypatch, None)
+
+        # Act
+        with profiler.stage(STAGE_FETCH):
+            pass
+        nested_decode(0)
+        written = profiler.write_report(str(tmp_path / "stage_profile.json"))
+
+        # Assert
+        assert not profiler.enabled
+        assert profiler.stats == {}
+        assert written is None
+        assert not (tmp_path / "stage_profile.json").exists()
+
+
+def test_profiler_mode_from_environment_value():
+    """
+    JTBD:
+    Как пользователь EXTRACTOR_PROFILE, я хочу включать учет значением 1
+    или именем режима и получать ошибку на опечатку, чтобы не запускать
+    многочасовой проход без отчета.
+    """
+    assert profiler_mode(None) is None
+    assert profiler_mode("0") is None
+    assert profiler_mode("1") == "stages"
+    assert profiler_mode(" CProfile ") == "cprofile"
+    with pytest.raises(ValueError):
+        profiler_mode("perf")
+
+
+@pytest.mark.parametrize(
+    ("mode", "suffix"), [("cprofile", "prof"), ("sample", "folded")]
+)
+def test_report_is_written_with_profiler_output(tmp_path, monkeypatch, mode, suffix):
+    """
+    JTBD:
+    Как разработчик, я хочу получать рядом с JSON сводкой файл cProfile
+    или свернутые стеки сэмплера, чтобы смотреть горячие функции
+    в pstats/snakeviz или flamegraph.
+    """
+    # Arrange
+    profiler = use_profiler(monkeypatch, mode)
+    profiler.sample_interval = 0.001
+    path = tmp_path / "results" / "stage_profile.json"
+
+    # Act
+    with profiler.profiling():
+        profiler.set_table("_DOCUMENT156")
+        nested_decode(20)
+    written = profiler.write_report(str(path))
+    report = json.loads(path.read_text(encoding="utf-8"))
+
+    # Assert
+    assert written == str(path)
+    assert report["mode"] == mode
+    assert report["tables"]["_DOCUMENT156"][STAGE_BLOB_DECODE]["count"] == 1
+    assert (tmp_path / "results" / f"stage_profile.{suffix}").exists()
+    if mode == "cprofile":
+        assert any("nested_decode" in line for line in report["cprofile"])
+    else:
+        assert report["samples"]["count"] > 0
+
+
+def test_table_reader_reports_fetch_and_decode(tmp_path, monkeypatch):
+    """
+    JTBD:
+    Как extractor на TableReader, я хочу, чтобы чтение и декодирование
+    строк учитывались под именем таблицы, чтобы отчет профайлера
+    совпадал с таблицами прохода.
+    """
+    # Arrange
+    restore_onec_dtools(monkeypatch)
+    db_path = write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=20, empty_every=5)
+    profiler = use_profiler(monkeypatch, "stages")
+    from onec_dtools.database_reader import DatabaseReader
+
+    # Act
+    with open(db_path, "rb") as f:
+        table = DatabaseReader(f).tables["_DOCUMENT156"]
+        rows = list(TableReader(table, "_DOCUMENT156").iter_rows(["_NUMBER"]))
+    stats = profiler.table_stats("_DOCUMENT156")
+
+    # Assert
+    assert len(rows) == 16
+    assert stats[STAGE_FETCH]["count"] == 20
+    assert stats[STAGE_DECODE]["count"] == 16
@@ -0,0 +1,147 @@
+"""
+Unit тесты для индекса табличных частей (TablePartIndex)
+Согласно TDD Documentation Standard
+"""
+
+import os
+
+import pytest
+
+from src.utils.table_part_index import TablePartIndex
+from tests.fixtures.synthetic_1cd import (
+    FieldSpec,
+    Synthetic1CDWriter,
+    document_table_fields,
+    make_document_rows,
+    restore_onec_dtools,
+)
+
+
+def table_part_fields():
+    """Поля табличной части _DOCUMENT156_VT200 (товары)"""
+    return [
+        FieldSpec("_DOCUMENT156_IDRREF", "B", 16),
+        FieldSpec("_KEYFIELD", "B", 4),
+        FieldSpec("_LINENO201", "N", 5),
+        FieldSpec("_FLD202", "N", 15, 2),
+    ]
+
+
+@pytest.fixture
+def db_with_table_parts(tmp_path, monkeypatch):
+    """Документы и табличная часть: у документа i ровно i % 3 строк"""
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    documents = make_document_rows(12)
+    lines = []
+    for i, document in enumerate(documents):
+        for line in range(i % 3):
+            lines.append(
+                {
+                    "_DOCUMENT156_IDRREF": document["_IDRREF"],
+                    "_KEYFIELD": line.to_bytes(4, "big"),
+                    "_LINENO201": line + 1,
+                    "_FLD202": 10.5 * (i + 1),
+                },
+            )
+    lines.insert(3, None)
+
+    writer = Synthetic1CDWriter()
+    writer.add_table("_DOCUMENT156", document_table_fields(), documents)
+    writer.add_table("_DOCUMENT156_VT200", table_part_fields(), lines)
+    return writer.write(str(tmp_path / "1Cv8.1CD")), documents
+
+
+class TestTablePartIndex:
+    """Тесты для индекса ссылка документа → строки табличной части"""
+
+    def test_rows_for_document(self, db_with_table_parts):
+        """
+        JTBD:
+        Как извлечение документа, я хочу получать только строки его табличной
+        части, чтобы не перебирать строки всех документов.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        path, documents = db_with_table_parts
+
+        # Act
+        with open(path, "rb") as f:
+            index = TablePartIndex(DatabaseReader(f))
+            rows = [index.rows_for("_DOCUMENT156", d["_IDRREF"]) for d in documents]
+
+        # Assert
+        assert rows[0] == {}
+        assert rows[1] == {"_DOCUMENT156_VT200": [0]}
+        assert rows[2] == {"_DOCUMENT156_VT200": [1, 2]}
+        assert rows[4] == {"_DOCUMENT156_VT200": [4]}
+        assert sum(len(r.get("_DOCUMENT156_VT200", [])) for r in rows) == 12
+
+    def test_index_is_persisted_and_reused(self, db_with_table_parts, monkeypatch):
+        """
+        JTBD:
+        Как повторный запуск, я хочу загружать индекс с диска,
+        чтобы не перечитывать колонку ссылок табличной части.
+        """
+        # Arrange
+        from onec_dtools.database_reader import DatabaseReader
+
+        path, documents = db_with_table_parts
+        with open(path, "rb") as f:
+            index = TablePartIndex(DatabaseReader(f))
+            index.offsets("_DOCUMENT156", "_DOCUMENT156_VT200")
+
+        # Act
+        monkeypatch.setattr(
+            TablePartIndex,
+            "_build",
+            lambda *args: pytest.fail("индекс должен загружаться с диска"),
+        )
+        with open(path, "rb") as f:
+            index = TablePartIndex(DatabaseReader(f))
+            rows = index.rows_for("_DOCUMENT156", documents[2]["_IDRREF"])
+
+        # Assert
+        assert os.path.exists("data/results/table_part_index/_DOCUMENT156_VT200.json")
+        assert rows == {"_DOCUMENT156_VT200": [1, 2]}
+
+
+def test_extract_table_parts_filters_by_document(db_with_table_parts):
+    """
+    JTBD:
+    Как extract_table_parts, я хочу возвращать строки табличной части
+    только текущего документа, а не всю таблицу _VT.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.extract_all_available_data import extract_table_parts
+
+    path, documents = db_with_table_parts
+
+    # Act
+    with open(path, "rb") as f:
+        db = DatabaseReader(f)
+        index = TablePartIndex(db)
+        parts = extract_table_parts(
+            db,
+            "_DOCUMENT156",
+            5,
+            parent_ref=documents[5]["_IDRREF"],
+            index=index,
+        )
+        empty = extract_table_parts(
+            db,
+            "_DOCUMENT156",
+            0,
+            parent_ref=documents[0]["_IDRREF"],
+            index=index,
+        )
+
+    # Assert
+    records = parts["_DOCUMENT156_VT200"]
+    assert [record["row_index"] for record in records] == [5, 6]
+    assert [record["fields"]["field_2"] for record in records] == [1, 2]
+    assert records[0]["fields"]["field_3"] == 63.0
+    assert empty == {}
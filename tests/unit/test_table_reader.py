@@ -0,0 +1,155 @@
+"""
+Unit тесты для чтения таблиц с проекцией колонок (TableReader)
+Согласно TDD Documentation Standard
+"""
+
+import pytest
+
+from src.utils.table_reader import TableReader
+from tests.fixtures.synthetic_1cd import restore_onec_dtools, write_sample_database
+
+
+@pytest.fixture
+def sample_db(tmp_path, monkeypatch):
+    """Синтетическая 1CD база с пустыми строками и BLOB полями"""
+    restore_onec_dtools(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    return write_sample_database(str(tmp_path / "1Cv8.1CD"), rows=20, empty_every=5)
+
+
+@pytest.fixture
+def document_table(sample_db):
+    from onec_dtools.database_reader import DatabaseReader
+
+    with open(sample_db, "rb") as f:
+        yield DatabaseReader(f).tables["_DOCUMENT156"]
+
+
+class TestTableReader:
+    """Тесты для проекции колонок"""
+
+    def test_projection_decodes_only_requested_columns(self, document_table):
+        """
+        JTBD:
+        Как extractor широкой таблицы, я хочу получать только запрошенные
+        колонки, чтобы остальные поля строки не декодировались.
+        """
+        # Arrange
+        reader = TableReader(document_table, "_DOCUMENT156")
+
+        # Act
+        rows = list(reader.iter_rows(["_NUMBER", "_FLD100"]))
+
+        # Assert
+        assert len(rows) == 16
+        index, row = rows[0]
+        assert index == 0
+        assert list(row) == ["_NUMBER", "_FLD100"]
+        assert row["_FLD100"] == document_table[0]["_FLD100"]
+        decoder = reader.decoder(["_FLD100", "_NUMBER"])
+        assert decoder.names == ["_NUMBER", "_FLD100"]
+
+    def test_unrequested_blobs_are_not_created(self, document_table):
+        """
+        JTBD:
+        Как extractor, я хочу не создавать объекты BLOB для непрошенных
+        колонок, чтобы проекция экономила и чтение BLOB.
+        """
+        # Arrange
+        reader = TableReader(document_table, "_DOCUMENT156")
+
+        # Act
+        projected = reader.decoder(["_NUMBER"])
+        full = reader.decoder()
+
+        # Assert
+        assert projected.blob_indexes == []
+        assert reader.blob_columns() == ["_FLD103"]
+        assert len(full.blob_indexes) == 1
+
+    def test_read_blobs_and_empty_rows(self, document_table):
+        """
+        JTBD:
+        Как extractor, обрабатывающий все записи, я хочу получать пустые строки
+        как None и читать BLOB проекции, чтобы проекция не меняла результат.
+        """
+        # Arrange
+        reader = TableReader(document_table, "_DOCUMENT156")
+
+        # Act
+        rows = dict(reader.iter_rows(["_FLD103"], read_blobs=True, skip_empty=False))
+
+        # Assert
+        assert len(rows) == 20
+        assert rows[4] == {"_FLD103": None}
+        assert rows[3] == {"_FLD103": "Букет роз №3 ПЦ022"}
+
+    def test_positional_names_keep_table_order(self, document_table):
+        """
+        JTBD:
+        Как выгрузка с именами field_N, я хочу сохранять номер поля в таблице
+        при проекции, чтобы имена колонок не зависели от набора полей.
+        """
+        # Act
+        decoder = TableReader(document_table).decoder(["_FLD102", "_VERSION"])
+
+        # Assert
+        assert decoder.positional_names == ["field_1", "field_8"]
+        assert decoder.missing_columns == []
+
+
+def test_business_extraction_projects_business_and_blob_columns(sample_db):
+    """
+    JTBD:
+    Как извлечение бизнес-данных, я хочу декодировать только бизнес-поля
+    и BLOB, чтобы filter_business_fields не разбирал технические колонки.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.extract_business_data import business_columns, extract_critical_tables
+
+    # Act
+    with open(sample_db, "rb") as f:
+        db = DatabaseReader(f)
+        columns = business_columns(TableReader(db.tables["_DOCUMENT156"]))
+        results = extract_critical_tables(db)
+
+    # Assert
+    assert columns == ["_MARKED", "_DATE_TIME", "_NUMBER", "_POSTED", "_FLD103"]
+    records = results["_DOCUMENT156"]
+    assert len(records) == 20
+    assert records[0]["fields"]["_NUMBER"].rstrip() == "ПЦ0000000"
+    assert "Blob" in records[0]["blobs"]["_FLD103"]["field_type"]
+
+
+def test_adaptive_extractor_projects_mapped_columns(sample_db):
+    """
+    JTBD:
+    Как AdaptiveExtractor с --project, я хочу декодировать только поля
+    из field_mapping и бизнес-поля, чтобы не разбирать остальные колонки.
+    """
+    # Arrange
+    from onec_dtools.database_reader import DatabaseReader
+
+    from src.adaptive_extractor import AdaptiveExtractor
+
+    extractor = AdaptiveExtractor(project_columns=True)
+    extractor.field_mapping["_DOCUMENT156"] = {
+        "amount_fields": ["_FLD100"],
+        "quantity_fields": [],
+        "blob_fields": [],
+    }
+
+    # Act
+    with open(sample_db, "rb") as f:
+        table = DatabaseReader(f).tables["_DOCUMENT156"]
+        records = extractor.extract_table_data("_DOCUMENT156", table, checkpoints=False)
+
+    # Assert
+    assert len(records) == 16
+    fields = records[1]["fields"]
+    assert fields["amount__FLD100"] == 101.5
+    assert "quantity__FLD101" not in fields
+    assert records[1]["blobs"] == {}
+    assert "blob__FLD103_content" not in extractor.table_schemas["_DOCUMENT156"].names